@@ -118,8 +118,8 @@ class CylindricalCutter(BaseCutter):
             d = d_e3
             cl = cl_e3
             cp = cp_e3
-        if cl and (direction[0] == 0) and (direction[1] == 0):
-            return (cl, d, cp)
+        # A vertex within the circle may be higher than every edge contact (e.g. the peak of a
+        # convex shape), thus an edge contact is not a final result for a drop.
         (cl_p1, d_p1, cp_p1) = self.intersect_circle_vertex(direction, triangle.p1, start=start)
         (cl_p2, d_p2, cp_p2) = self.intersect_circle_vertex(direction, triangle.p2, start=start)
         (cl_p3, d_p3, cp_p3) = self.intersect_circle_vertex(direction, triangle.p3, start=start)
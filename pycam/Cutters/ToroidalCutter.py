@@ -190,8 +190,10 @@ class ToroidalCutter(BaseCutter):
         return (None, None, None, INFINITE)
 
     def intersect_cylinder_edge(self, direction, edge, start=None):
+        if start is None:
+            start = self.location
         (cl, ccp, cp, l) = self.intersect_cylinder_line(direction, edge, start=start)
-        if ccp and ccp[2] < self.center[2]:
+        if ccp and ccp[2] < padd(psub(start, self.location), self.center)[2]:
             return (None, INFINITE, None)
         if ccp:
             m = pdot(psub(cp, edge.p1), edge.dir)
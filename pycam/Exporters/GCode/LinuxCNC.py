@@ -23,6 +23,12 @@ import pycam.Exporters.GCode
 from pycam.Toolpath import CORNER_STYLE_EXACT_PATH, CORNER_STYLE_EXACT_STOP, \
         CORNER_STYLE_OPTIMIZE_SPEED, CORNER_STYLE_OPTIMIZE_TOLERANCE
 
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
 
 DEFAULT_HEADER = (("G40", "disable tool radius compensation"),
                   ("G49", "disable tool length compensation"),
@@ -31,6 +37,7 @@ DEFAULT_HEADER = (("G40", "disable tool radius compensation"),
                   ("G90", "disable incremental moves"))
 
 DEFAULT_DIGITS = 6
+AXES = "XYZABCUVW"
 
 
 def _render_number(number):
@@ -65,6 +72,18 @@ class LinuxCNC(pycam.Exporters.GCode.BaseGenerator):
         else:
             self.destination.write(os.linesep)
 
+    def _get_axis_formats(self, count):
+        """ return the format strings and the scale factors (precision) of the axes """
+        key = (tuple(self.axis_digits), count)
+        if self._get_cache("axis_formats_key", None) != key:
+            digits = [self.axis_digits[min(index, len(self.axis_digits) - 1)]
+                      for index in range(count)]
+            self._cache["axis_formats"] = [("%s%%.%df" % (axis, axis_digits),
+                                            10.0 ** axis_digits)
+                                           for axis, axis_digits in zip(AXES, digits)]
+            self._cache["axis_formats_key"] = key
+        return self._cache["axis_formats"]
+
     def add_move(self, coordinates, is_rapid=False):
         components = []
         # the cached value may be:
@@ -76,15 +95,91 @@ class LinuxCNC(pycam.Exporters.GCode.BaseGenerator):
         else:
             # improve gcode style
             components.append(" ")
-        axes = [axis for axis in "XYZABCUVW"]
         previous = self._get_cache("position", [None] * len(coordinates))
-        for (axis, value, last) in zip(axes, coordinates, previous):
-            if (last is None) or (last != value):
-                components.append("%s%.6f" % (axis, value))
+        for (axis_format, scale), value, last in zip(self._get_axis_formats(len(coordinates)),
+                                                     coordinates, previous):
+            # skip axes without a change (within the precision of the output)
+            steps = round(value * scale)
+            if (last is None) or (round(last * scale) != steps):
+                # "+ 0.0" avoids negative zeros
+                components.append(axis_format % (steps / scale + 0.0))
         command = " ".join(components)
         if command.strip():
             self.add_command(command)
 
+    def add_arc(self, position, center, clockwise):
+        previous = self._get_cache("position", None)
+        if previous is None:
+            # the start of the arc is unknown
+            self.add_move(position)
+        else:
+            if not self._get_cache("arc_plane", False):
+                self.add_command("G17", "select the XY plane for arcs")
+                self._cache["arc_plane"] = True
+            components = ["G2" if clockwise else "G3"]
+            axis_formats = self._get_axis_formats(len(position))
+            for (axis_format, scale), value, last in zip(axis_formats, position, previous):
+                # the end of the arc is specified (except for an unchanged height)
+                if (axis_format[0] in "XY") or (round(last * scale) != round(value * scale)):
+                    components.append(axis_format % (round(value * scale) / scale + 0.0))
+            # the center is given relative to the (rounded) start
+            for offset_axis, (axis_format, scale), value, last in zip(
+                    "IJ", axis_formats, center, previous):
+                offset = (round(value * scale) - round(last * scale)) / scale
+                components.append(offset_axis + axis_format[1:] % (offset + 0.0))
+            self.add_command(" ".join(components))
+        self._cache["position"] = tuple(position)
+
+    def add_move_sequence(self, positions, rapid_flags):
+        """ format a sequence of moves at once
+
+        The result is the same as the one of "add_move" - but the coordinates are rounded and
+        compared for all moves at once. Moves are written in a single chunk.
+        """
+        if not numpy_enabled:
+            return super(LinuxCNC, self).add_move_sequence(positions, rapid_flags)
+        positions = numpy.array(positions, dtype=numpy.float64)
+        count, dimensions = positions.shape
+        axis_formats = self._get_axis_formats(dimensions)
+        scales = numpy.array([scale for axis_format, scale in axis_formats])
+        steps = numpy.round(positions * scales)
+        # compare every move with its predecessor (the first one with the previous position)
+        previous_position = self._get_cache("position", None)
+        changed = numpy.empty((count, dimensions), dtype=bool)
+        changed[0] = True
+        if previous_position is not None:
+            for index, value in enumerate(previous_position[:dimensions]):
+                if value is not None:
+                    changed[0, index] = (round(value * scales[index]) != steps[0, index])
+        numpy.not_equal(steps[1:], steps[:-1], out=changed[1:])
+        # the motion mode is emitted only if it changes
+        rapid_flags = numpy.array(rapid_flags, dtype=numpy.int8)
+        last_rapid = self._get_cache("rapid_move", None)
+        previous_rapid = numpy.empty(count, dtype=numpy.int8)
+        previous_rapid[0] = -1 if last_rapid is None else int(last_rapid)
+        previous_rapid[1:] = rapid_flags[:-1]
+        # prefix: 0 -> none, 1 -> G1, 2 -> G0
+        prefix = numpy.where(previous_rapid != rapid_flags, 1 + rapid_flags, 0)
+        self._cache["position"] = tuple(positions[-1].tolist())
+        self._cache["rapid_move"] = bool(rapid_flags[-1])
+        visible = changed.any(axis=1) | (prefix > 0)
+        if not visible.any():
+            return
+        # the combination of prefix and changed axes determines the format of a line
+        patterns = (prefix[visible] * (2 ** dimensions)
+                    + changed[visible].dot(2 ** numpy.arange(dimensions)))
+        # "+ 0.0" avoids negative zeros
+        values = steps[visible] / scales + 0.0
+        lines = numpy.empty(len(patterns), dtype=object)
+        for pattern in numpy.unique(patterns).tolist():
+            pattern_prefix, mask = divmod(pattern, 2 ** dimensions)
+            axes = [index for index in range(dimensions) if mask & (2 ** index)]
+            line_format = " ".join([(" ", "G1", "G0")[pattern_prefix]]
+                                   + [axis_formats[index][0] for index in axes]) + os.linesep
+            rows = numpy.flatnonzero(patterns == pattern)
+            lines[rows] = [line_format % tuple(row) for row in values[rows][:, axes].tolist()]
+        self.destination.write("".join(lines))
+
     def command_feedrate(self, feedrate):
         self.add_command("F%s" % _render_number(feedrate), "set feedrate")
 
@@ -18,16 +18,45 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import gzip
+import io
+import sys
+
 import pycam.Utils.log
 import pycam.Toolpath.Filters
-from pycam.Toolpath import MOVE_STRAIGHT_RAPID, MACHINE_SETTING, COMMENT, MOVES_LIST
+from pycam.Toolpath import MOVE_ARC, MOVE_STRAIGHT_RAPID, MACHINE_SETTING, COMMENT, MOVES_LIST
 
 _log = pycam.Utils.log.get_logger()
 
+# number of decimal places of coordinates (if no step width is given)
+DEFAULT_DIGITS = 6
+# size of the write buffer of output files
+BUFFER_SIZE = 2 ** 20
+# maximum number of consecutive moves passed to "add_move_sequence" at once
+MAX_MOVE_SEQUENCE = 2 ** 16
+
+
+def open_destination(filename):
+    """ open a file for writing GCode - files ending with ".gz" are compressed """
+    if filename.lower().endswith(".gz"):
+        if sys.version_info[0] < 3:
+            return gzip.open(filename, "wb")
+        return io.TextIOWrapper(io.BufferedWriter(gzip.open(filename, "wb"), BUFFER_SIZE))
+    else:
+        return open(filename, "w", BUFFER_SIZE)
+
+
+def get_axis_digits(minimum_steps):
+    """ return the number of decimal places for each axis (x, y, z) based on its step width """
+    if not minimum_steps:
+        return [DEFAULT_DIGITS] * 3
+    return [pycam.Toolpath.Filters._get_num_of_significant_digits(
+        minimum_steps[min(index, len(minimum_steps) - 1)]) for index in range(3)]
+
 
 class BaseGenerator(object):
 
-    def __init__(self, destination):
+    def __init__(self, destination, minimum_steps=None):
         if hasattr(destination, "write"):
             # assume that "destination" is something like a StringIO instance or an open file
             self.destination = destination
@@ -35,10 +64,12 @@ class BaseGenerator(object):
             self._close_stream_on_exit = False
         else:
             # open the file
-            self.destination = open(destination, "w")
+            self.destination = open_destination(destination)
             self._close_stream_on_exit = True
         self._filters = []
         self._cache = {}
+        self._minimum_steps = minimum_steps
+        self.axis_digits = get_axis_digits(minimum_steps)
         self.add_header()
 
     def _get_cache(self, key, default_value):
@@ -57,6 +88,24 @@ class BaseGenerator(object):
     def add_move(self, coordinates, is_rapid=False):
         raise NotImplementedError("someone forgot to implement 'add_move'")
 
+    def add_arc(self, position, center, clockwise):
+        """ add an arc within the XY plane starting at the current position
+
+        The cache value "position" needs to be updated.
+        """
+        raise NotImplementedError("someone forgot to implement 'add_arc'")
+
+    def add_move_sequence(self, positions, rapid_flags):
+        """ add a sequence of consecutive moves
+
+        Generators may override this method with a faster implementation. The cache values
+        "position" and "rapid_move" need to be updated.
+        """
+        for position, is_rapid in zip(positions, rapid_flags):
+            self.add_move(position, is_rapid)
+            self._cache["position"] = position
+            self._cache["rapid_move"] = is_rapid
+
     def add_footer(self):
         raise NotImplementedError("someone forgot to implement 'add_footer'")
 
@@ -70,13 +119,34 @@ class BaseGenerator(object):
         all_filters = list(self._filters)
         if filters:
             all_filters.extend(filters)
-        filtered_moves = pycam.Toolpath.Filters.get_filtered_moves(moves, all_filters)
+        # the precision of the coordinates is defined by the step width (if available)
+        step_widths = [one_filter for one_filter in all_filters
+                       if isinstance(one_filter, pycam.Toolpath.Filters.StepWidth)]
+        if step_widths:
+            self.axis_digits = get_axis_digits([step_widths[-1].settings["step_width_%s" % key]
+                                                for key in "xyz"])
+        else:
+            self.axis_digits = get_axis_digits(self._minimum_steps)
+        filtered_moves = pycam.Toolpath.Filters.iter_filtered_moves(moves, all_filters)
+        # consecutive moves are passed on in batches
+        positions = []
+        rapid_flags = []
         for step in filtered_moves:
-            if step.action in MOVES_LIST:
-                is_rapid = step.action == MOVE_STRAIGHT_RAPID
-                self.add_move(step.position, is_rapid)
-                self._cache["position"] = step.position
-                self._cache["rapid_move"] = is_rapid
+            if step.action in MOVES_LIST and (step.action != MOVE_ARC):
+                positions.append(step.position)
+                rapid_flags.append(step.action == MOVE_STRAIGHT_RAPID)
+                if len(positions) >= MAX_MOVE_SEQUENCE:
+                    self.add_move_sequence(positions, rapid_flags)
+                    positions = []
+                    rapid_flags = []
+                continue
+            if positions:
+                self.add_move_sequence(positions, rapid_flags)
+                positions = []
+                rapid_flags = []
+            if step.action == MOVE_ARC:
+                self.add_arc(step.position, step.center, step.clockwise)
+                self._cache["rapid_move"] = None
             elif step.action == COMMENT:
                 self.add_comment(step.text)
             elif step.action == MACHINE_SETTING:
@@ -91,3 +161,5 @@ class BaseGenerator(object):
                               "'%s=%s' -> ignore", step.key, step.value)
             else:
                 _log.warn("A non-basic toolpath item (%s) remained in the queue -> ignore", step)
+        if positions:
+            self.add_move_sequence(positions, rapid_flags)
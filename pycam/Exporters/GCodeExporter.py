@@ -22,6 +22,8 @@ along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 import decimal
 import os
 
+import pycam.Exporters.GCode
+
 
 DEFAULT_HEADER = ("G40 (disable tool radius compensation)",
                   "G49 (disable tool length compensation)",
@@ -78,7 +80,7 @@ class GCodeGenerator(object):
             self._close_stream_on_exit = False
         else:
             # open the file by its name
-            self.destination = open(destination, "w")
+            self.destination = pycam.Exporters.GCode.open_destination(destination)
             self._close_stream_on_exit = True
         self.safety_height = safety_height
         self.toggle_spindle_status = toggle_spindle_status
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import bisect
+
+
+class IntervalSweep(object):
+    """ sweep a level across intervals (e.g. the z ranges of triangles)
+
+    The intervals are sorted by their lower and by their upper end (two event lists). The set of
+    intervals containing the current level is kept between queries. Moving the level only
+    processes the intervals starting or ending between the previous and the new level. Thus
+    subsequent queries for neighbouring levels (e.g. the layers of a waterline toolpath) do not
+    need to scan all intervals again.
+    The level may move in both directions.
+    """
+
+    def __init__(self, lows, highs):
+        """ "lows" may be None for intervals without a lower end """
+        self._highs = list(highs)
+        if lows is None:
+            self._lows = None
+        else:
+            self._lows = list(lows)
+            if len(self._lows) != len(self._highs):
+                raise ValueError("The number of lower (%d) and upper (%d) ends differs"
+                                 % (len(self._lows), len(self._highs)))
+            self._by_low = sorted(range(len(self._lows)), key=self._lows.__getitem__)
+            self._sorted_lows = [self._lows[index] for index in self._by_low]
+        self._by_high = sorted(range(len(self._highs)), key=self._highs.__getitem__)
+        self._sorted_highs = [self._highs[index] for index in self._by_high]
+        self._level = None
+        self._active = set()
+
+    def __len__(self):
+        return len(self._highs)
+
+    def _contains(self, index, level):
+        return (self._highs[index] >= level) and ((self._lows is None)
+                                                  or (self._lows[index] <= level))
+
+    def _update_active(self, level):
+        previous = self._level
+        if previous is None:
+            # the first query
+            if self._lows is None:
+                begin = bisect.bisect_left(self._sorted_highs, level)
+                self._active = set(self._by_high[begin:])
+            else:
+                end = bisect.bisect_right(self._sorted_lows, level)
+                self._active = set(index for index in self._by_low[:end]
+                                   if self._highs[index] >= level)
+        elif level > previous:
+            if self._lows is not None:
+                begin = bisect.bisect_right(self._sorted_lows, previous)
+                end = bisect.bisect_right(self._sorted_lows, level)
+                for index in self._by_low[begin:end]:
+                    if self._highs[index] >= level:
+                        self._active.add(index)
+            begin = bisect.bisect_left(self._sorted_highs, previous)
+            end = bisect.bisect_left(self._sorted_highs, level)
+            for index in self._by_high[begin:end]:
+                self._active.discard(index)
+        elif level < previous:
+            begin = bisect.bisect_left(self._sorted_highs, level)
+            end = bisect.bisect_left(self._sorted_highs, previous)
+            for index in self._by_high[begin:end]:
+                if self._contains(index, level):
+                    self._active.add(index)
+            if self._lows is not None:
+                begin = bisect.bisect_right(self._sorted_lows, level)
+                end = bisect.bisect_right(self._sorted_lows, previous)
+                for index in self._by_low[begin:end]:
+                    self._active.discard(index)
+        self._level = level
+
+    def get_indices(self, level):
+        """ return the indices of the intervals containing the level (in ascending order) """
+        self._update_active(level)
+        return sorted(self._active)
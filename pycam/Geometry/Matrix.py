@@ -40,6 +40,30 @@ TRANSFORMATIONS = {
 }
 
 
+def get_xy_box_mapping(matrix):
+    """ describe the effect of a transformation on axis-aligned boxes in the xy plane
+
+    Shifting, scaling, mirroring and swapping x and y turn every axis-aligned box into another
+    axis-aligned box. Thus spatial indexes based on such boxes (e.g. TriangleBVH) may be
+    transformed instead of being rebuilt.
+    @type matrix: tuple(tuple(float))
+    @value matrix: a 3x3 or 3x4 transformation matrix
+    @rtype: tuple(tuple) | None
+    @return: the source axis (0 or 1), the factor and the offset for the new x and y
+        coordinates - or None if the new x or y coordinates depend on multiple axes or on z
+    """
+    result = []
+    for row in matrix[:2]:
+        sources = [axis for axis in range(3) if row[axis] != 0]
+        if (len(sources) != 1) or (sources[0] == 2):
+            return None
+        offset = row[3] if len(row) > 3 else 0
+        result.append((sources[0], row[sources[0]], offset))
+    if result[0][0] == result[1][0]:
+        return None
+    return tuple(result)
+
+
 def get_dot_product(a, b):
     """ calculate the dot product of two 3d vectors
 
@@ -23,18 +23,29 @@ import math
 import uuid
 
 from pycam.Geometry import epsilon, INFINITE, TransformableContainer, IDGenerator, Box3D, Point3D
-from pycam.Geometry.Matrix import TRANSFORMATIONS
+from pycam.Geometry.IntervalSweep import IntervalSweep
+from pycam.Geometry.Matrix import get_xy_box_mapping, TRANSFORMATIONS
 from pycam.Geometry.Line import Line
 from pycam.Geometry.Plane import Plane
 from pycam.Geometry.Polygon import Polygon
 from pycam.Geometry.PointUtils import pcross, pdist, pnorm, pnormalized, psub
 from pycam.Geometry.Triangle import Triangle
+from pycam.Geometry.TriangleBVH import TriangleBVH
+import pycam.Geometry.TriangleBVH
 from pycam.Geometry.TriangleKdtree import TriangleKdtree
+from pycam.Geometry.TriangleMesh import TriangleMesh
+import pycam.Geometry.intersection_batch as intersection_batch
 from pycam.Toolpath import Bounds
 from pycam.Utils import ProgressCounter
 import pycam.Utils.log
 log = pycam.Utils.log.get_logger()
 
+# Triangles appended to a model with a TriangleBVH are inserted into a separate kdtree (the flat
+# tree cannot be extended). The TriangleBVH is rebuilt as soon as this kdtree contains more than
+# the given share of all triangles (or more than the given number of triangles for small models).
+APPENDED_TRIANGLES_SHARE = 0.1
+APPENDED_TRIANGLES_MINIMUM = 100
+
 
 def get_combined_bounds(models):
     low = [None, None, None]
@@ -87,7 +98,7 @@ class BaseModel(IDGenerator, TransformableContainer):
     def __add__(self, other_model):
         """ combine two models """
         result = self.copy()
-        for item in next(other_model):
+        for item in other_model.next():
             result.append(item.copy())
         return result
 
@@ -157,7 +168,7 @@ class BaseModel(IDGenerator, TransformableContainer):
 
     def subdivide(self, depth):
         model = self.__class__()
-        for item in next(self):
+        for item in self.next():
             for s in item.subdivide(depth):
                 model.append(s)
         return model
@@ -169,7 +180,7 @@ class BaseModel(IDGenerator, TransformableContainer):
         self.maxx = None
         self.maxy = None
         self.maxz = None
-        for item in next(self):
+        for item in self.next():
             self._update_limits(item)
 
     def _get_progress_callback(self, update_callback):
@@ -214,6 +225,10 @@ class Model(BaseModel):
         # enable/disable kdtree
         self._use_kdtree = use_kdtree
         self._t_kdtree = None
+        # triangles appended after building a TriangleBVH (see "append")
+        self._appended_kdtree = None
+        # the triangles spanning the height of horizontal planes (see "get_waterline_contour")
+        self._z_sweep = None
         self.__uuid = None
 
     def __len__(self):
@@ -230,29 +245,82 @@ class Model(BaseModel):
 
     @property
     def uuid(self):
-        if (self.__uuid is None) or self._dirty:
+        if self._dirty:
             self._update_caches()
+        elif self.__uuid is None:
+            # triangles were added to the existing kdtree
+            self.__uuid = str(uuid.uuid4())
         return self.__uuid
 
     def append(self, item):
         super(Model, self).append(item)
         if isinstance(item, Triangle):
             self._triangles.append(item)
-            # we assume, that the kdtree needs to be rebuilt again
-            self._dirty = True
+            if self._use_kdtree and not self._dirty and self._insert_into_kdtree(item):
+                self._z_sweep = None
+                self.__uuid = None
+            else:
+                # we assume, that the kdtree needs to be rebuilt again
+                self._dirty = True
+
+    def _insert_into_kdtree(self, triangle):
+        """ add a triangle to the existing kdtree - return False if it should be rebuilt """
+        if isinstance(self._t_kdtree, TriangleKdtree):
+            self._t_kdtree.insert_triangle(triangle)
+            return True
+        if self._appended_kdtree is None:
+            self._appended_kdtree = TriangleKdtree([])
+        elif self._appended_kdtree.size >= max(APPENDED_TRIANGLES_MINIMUM,
+                                               APPENDED_TRIANGLES_SHARE * len(self._triangles)):
+            return False
+        self._appended_kdtree.insert_triangle(triangle)
+        return True
+
+    def transform_by_matrix(self, matrix, transformed_list=None, callback=None):
+        mapping = get_xy_box_mapping(matrix)
+        if mapping is None:
+            super(Model, self).transform_by_matrix(matrix, transformed_list=transformed_list,
+                                                   callback=callback)
+            return
+        # same as "TransformableContainer.transform_by_matrix" - but the kdtree is moved
+        # instead of being rebuilt
+        for triangle in self._triangles:
+            triangle.transform_by_matrix(matrix, transformed_list, callback=callback)
+            if callback and callback():
+                # user requested abort: the model is only partially transformed
+                self.reset_cache()
+                return
+        self.reset_cache(index_mapping=mapping)
 
-    def reset_cache(self):
+    def reset_cache(self, index_mapping=None):
+        """ "index_mapping" describes the transformation of the model (see "get_xy_box_mapping")
+        if the kdtree may be transformed instead of being rebuilt
+        """
         super(Model, self).reset_cache()
         # the triangle kdtree needs to be reset after transforming the model
-        self._update_caches()
+        self._update_caches(index_mapping=index_mapping)
 
-    def _update_caches(self):
+    def _update_caches(self, index_mapping=None):
         if self._use_kdtree:
-            self._t_kdtree = TriangleKdtree(self.triangles())
+            if (index_mapping is None) or self._dirty or (self._t_kdtree is None):
+                self._t_kdtree = self._create_kdtree()
+                self._appended_kdtree = None
+            else:
+                self._t_kdtree.transform_xy(index_mapping)
+                if self._appended_kdtree is not None:
+                    self._appended_kdtree.transform_xy(index_mapping)
+        self._z_sweep = None
         self.__uuid = str(uuid.uuid4())
         # the kdtree is up-to-date again
         self._dirty = False
 
+    def _create_kdtree(self):
+        # the flat tree is faster to build and to query, but it requires numpy
+        if pycam.Geometry.TriangleBVH.numpy_enabled:
+            return TriangleBVH.from_triangles(self._triangles)
+        else:
+            return TriangleKdtree(self._triangles)
+
     def triangles(self, minx=-INFINITE, miny=-INFINITE, minz=-INFINITE, maxx=+INFINITE,
                   maxy=+INFINITE, maxz=+INFINITE):
         if (minx == miny == minz == -INFINITE) and (maxx == maxy == maxz == +INFINITE):
@@ -261,14 +329,53 @@ class Model(BaseModel):
             # update the kdtree, if new triangles were added meanwhile
             if self._dirty:
                 self._update_caches()
-            return self._t_kdtree.Search(minx, maxx, miny, maxy)
+            result = self._t_kdtree.Search(minx, maxx, miny, maxy)
+            if self._appended_kdtree is not None:
+                result += self._appended_kdtree.Search(minx, maxx, miny, maxy)
+            return result
         return self._triangles
 
+    def get_triangle_arrays(self, minx=-INFINITE, miny=-INFINITE, minz=-INFINITE,
+                            maxx=+INFINITE, maxy=+INFINITE, maxz=+INFINITE):
+        """ return the corners of the triangles within the given box as three Nx3 arrays
+
+        The arrays are used for the vectorized calculations of
+        "pycam.Geometry.intersection_batch". The selection of triangles is the same as for
+        "triangles".
+        """
+        return intersection_batch.get_triangle_arrays(
+            self.triangles(minx, miny, minz, maxx, maxy, maxz))
+
+    def _get_z_ranges(self):
+        """ return the lowest and the highest point of every triangle (two lists) """
+        return ([triangle.minz for triangle in self._triangles],
+                [triangle.maxz for triangle in self._triangles])
+
+    def _get_triangles_at_height(self, z):
+        """ return the triangles spanning the given height
+
+        Consecutive calls for neighbouring heights (e.g. the layers of a toolpath) reuse the
+        result of the previous call (see "IntervalSweep").
+        """
+        if self._dirty:
+            self._update_caches()
+        if self._z_sweep is None:
+            lows, highs = self._get_z_ranges()
+            # "Plane.intersect_triangle" tolerates vertices slightly outside of the plane
+            self._z_sweep = IntervalSweep([low - epsilon for low in lows],
+                                          [high + epsilon for high in highs])
+        return [self._triangles[index] for index in self._z_sweep.get_indices(z)]
+
     def get_waterline_contour(self, plane, callback=None):
         collision_lines = []
-        progress_max = 2 * len(self._triangles)
+        if plane.n[0] == plane.n[1] == 0:
+            # only the triangles spanning the height of a horizontal plane can intersect
+            triangles = self._get_triangles_at_height(plane.p[2])
+        else:
+            triangles = self._triangles
+        progress_max = 2 * len(triangles)
         counter = 0
-        for t in self._triangles:
+        for t in triangles:
             if callback and callback(percent=100.0 * counter / progress_max):
                 return
             collision_line = plane.intersect_triangle(t, counter_clockwise=True)
@@ -289,6 +396,85 @@ class Model(BaseModel):
         return contour
 
 
+class MeshModel(Model):
+    """ triangle model based on a compact array representation (see TriangleMesh)
+
+    The model behaves like a "Model", but its triangles are stored in numpy arrays. Triangle
+    objects are only created on demand for code that still requires them. Vectorized consumers
+    should use "get_triangle_arrays" or the "mesh" attribute instead.
+    This class is only available if numpy is installed.
+    """
+
+    def __init__(self, mesh=None, tree=None):
+        """ "tree" may be a TriangleBVH of the given mesh (e.g. loaded from a cache) """
+        super(MeshModel, self).__init__()
+        if mesh is None:
+            mesh = TriangleMesh()
+        self.mesh = mesh
+        self._prepared_tree = tree
+        self._triangles = mesh
+        self._item_groups = [mesh]
+        self.reset_cache()
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(TriangleMesh.from_triangles(model.triangles()))
+
+    def copy(self):
+        return self.__class__(self.mesh.copy())
+
+    def append(self, item):
+        if isinstance(item, Triangle):
+            BaseModel.append(self, item)
+            self.mesh.append(item)
+            self._dirty = True
+
+    def get_children_count(self):
+        return 7 * len(self.mesh)
+
+    def _get_z_ranges(self):
+        low, high = self.mesh.get_face_bounds()
+        return low[:, 2].tolist(), high[:, 2].tolist()
+
+    def reset_cache(self, index_mapping=None):
+        bounds = self.mesh.get_bounds()
+        if bounds is None:
+            self.minx = self.miny = self.minz = None
+            self.maxx = self.maxy = self.maxz = None
+        else:
+            low, high = bounds
+            self.minx, self.miny, self.minz = [float(value) for value in low]
+            self.maxx, self.maxy, self.maxz = [float(value) for value in high]
+        self._update_caches(index_mapping=index_mapping)
+
+    def transform_by_matrix(self, matrix, transformed_list=None, callback=None):
+        self.mesh.transform_by_matrix(matrix)
+        # the tree may be moved along with the mesh (see "Model.reset_cache")
+        self.reset_cache(index_mapping=get_xy_box_mapping(matrix))
+        if callback:
+            callback()
+
+    def _create_kdtree(self):
+        if self._prepared_tree is not None:
+            tree, self._prepared_tree = self._prepared_tree, None
+            return tree
+        # the tree is based on the face bounds of the mesh (no Triangle objects are required)
+        low, high = self.mesh.get_face_bounds()
+        return TriangleBVH(low[:, :2], high[:, :2], items=self.mesh)
+
+    def get_triangle_arrays(self, minx=-INFINITE, miny=-INFINITE, minz=-INFINITE,
+                            maxx=+INFINITE, maxy=+INFINITE, maxz=+INFINITE):
+        if (minx == miny == minz == -INFINITE) and (maxx == maxy == maxz == +INFINITE):
+            return self.mesh.get_triangle_arrays()
+        return self.mesh.get_triangle_arrays(self.get_tree().get_indices(minx, maxx, miny, maxy))
+
+    def get_tree(self):
+        """ return the TriangleBVH of the mesh """
+        if self._dirty:
+            self._update_caches()
+        return self._t_kdtree
+
+
 class ContourModel(BaseModel):
 
     def __init__(self, plane=None):
@@ -414,7 +600,7 @@ class ContourModel(BaseModel):
         elif isinstance(item, Polygon):
             if not unify_overlaps or (len(self._line_groups) == 0):
                 self._line_groups.append(item)
-                for subitem in next(item):
+                for subitem in item.next():
                     self._update_limits(subitem)
             else:
                 # go through all polygons and check if they can be combined
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+# number of items stored in every leaf of the tree
+LEAF_SIZE = 8
+# number of tree levels to be descended at once during a query
+TRAVERSAL_STEP = 3
+# resolution of the morton codes (bits per axis)
+_MORTON_BITS = 16
+
+
+def _spread_bits(values):
+    """ insert a zero bit between all bits of the given 16 bit integers """
+    values = values.astype(numpy.uint64)
+    values = (values | (values << numpy.uint64(8))) & numpy.uint64(0x00FF00FF)
+    values = (values | (values << numpy.uint64(4))) & numpy.uint64(0x0F0F0F0F)
+    values = (values | (values << numpy.uint64(2))) & numpy.uint64(0x33333333)
+    values = (values | (values << numpy.uint64(1))) & numpy.uint64(0x55555555)
+    return values
+
+
+def _get_morton_order(lower, upper):
+    """ sort boxes along a z-order curve of their centers (2D) """
+    centers = (lower + upper) / 2
+    low = centers.min(axis=0)
+    size = centers.max(axis=0) - low
+    size[size == 0] = 1
+    scale = (2 ** _MORTON_BITS - 1) / size
+    quantized = ((centers - low) * scale).astype(numpy.uint64)
+    codes = _spread_bits(quantized[:, 0]) | (_spread_bits(quantized[:, 1]) << numpy.uint64(1))
+    return numpy.argsort(codes, kind="mergesort")
+
+
+class TriangleBVH(object):
+    """ flat bounding volume hierarchy for x/y box queries
+
+    The items (e.g. triangles) are sorted along a z-order curve and grouped into leaves of
+    LEAF_SIZE items. The leaves form the bottom level of a complete binary tree. The tree is
+    stored in flat arrays (heap layout: the children of node "n" are "2n+1" and "2n+2").
+    Thus the build requires just one sort and a few array operations per level.
+    Queries return the indices of the matching items in ascending order. Many boxes can be
+    queried at once with "get_indices_batch".
+    """
+
+    def __init__(self, lower, upper, items=None, leaf_size=LEAF_SIZE):
+        """ lower and upper are Nx2 arrays (x/y) of the bounding boxes of the items """
+        lower = numpy.asarray(lower, dtype=numpy.float64).reshape(-1, 2)
+        upper = numpy.asarray(upper, dtype=numpy.float64).reshape(-1, 2)
+        self._items = items
+        self._leaf_size = leaf_size
+        count = len(lower)
+        leaf_count = max(1, -(-count // leaf_size))
+        self._depth = 0
+        while 2 ** self._depth < leaf_count:
+            self._depth += 1
+        leaf_count = 2 ** self._depth
+        self._level_steps = self._get_level_steps(self._depth)
+        if count > 0:
+            self._order = _get_morton_order(lower, upper)
+        else:
+            self._order = numpy.zeros(0, dtype=numpy.intp)
+        # item bounds in tree order (padded with empty boxes)
+        padded_count = leaf_count * leaf_size
+        item_lower = numpy.full((padded_count, 2), numpy.inf)
+        item_upper = numpy.full((padded_count, 2), -numpy.inf)
+        item_lower[:count] = lower[self._order]
+        item_upper[:count] = upper[self._order]
+        # calculate the bounds of all nodes - starting with the leaves
+        node_count = 2 * leaf_count - 1
+        node_lower = numpy.empty((node_count, 2))
+        node_upper = numpy.empty((node_count, 2))
+        level_lower = item_lower.reshape(leaf_count, leaf_size, 2).min(axis=1)
+        level_upper = item_upper.reshape(leaf_count, leaf_size, 2).max(axis=1)
+        for level in range(self._depth, -1, -1):
+            first = 2 ** level - 1
+            node_lower[first:first + len(level_lower)] = level_lower
+            node_upper[first:first + len(level_upper)] = level_upper
+            if level > 0:
+                level_lower = level_lower.reshape(-1, 2, 2).min(axis=1)
+                level_upper = level_upper.reshape(-1, 2, 2).max(axis=1)
+        # Bounds are stored as (minx, miny, -maxx, -maxy). Thus a box overlaps with a query box
+        # if all four values are below (maxx, maxy, -minx, -miny) of the query.
+        self._node_bounds = numpy.hstack((node_lower, -node_upper))
+        self._item_bounds = numpy.hstack((item_lower, -item_upper))
+
+    def get_arrays(self):
+        """ return the internal state as a dictionary of arrays (e.g. for storing it on disk) """
+        return {"order": self._order, "node_bounds": self._node_bounds,
+                "item_bounds": self._item_bounds,
+                "settings": numpy.array((self._leaf_size, self._depth))}
+
+    @classmethod
+    def from_arrays(cls, arrays, items=None):
+        """ restore a tree based on the result of "get_arrays" """
+        tree = cls.__new__(cls)
+        tree._items = items
+        tree._order = numpy.asarray(arrays["order"])
+        tree._node_bounds = numpy.asarray(arrays["node_bounds"])
+        tree._item_bounds = numpy.asarray(arrays["item_bounds"])
+        tree._leaf_size, tree._depth = [int(value) for value in arrays["settings"]]
+        tree._level_steps = tree._get_level_steps(tree._depth)
+        return tree
+
+    def transform_xy(self, mapping):
+        """ move the bounds of all items according to the result of "get_xy_box_mapping"
+
+        The bounds of every node still enclose the bounds of its children afterwards. Thus the
+        tree does not need to be rebuilt after shifting, scaling or mirroring its items.
+        """
+        self._node_bounds = self._get_transformed_bounds(self._node_bounds, mapping)
+        self._item_bounds = self._get_transformed_bounds(self._item_bounds, mapping)
+
+    @staticmethod
+    def _get_transformed_bounds(bounds, mapping):
+        lower = bounds[:, :2]
+        upper = -bounds[:, 2:]
+        result = numpy.empty_like(bounds)
+        for axis, (source, factor, offset) in enumerate(mapping):
+            low = lower[:, source] * factor + offset
+            high = upper[:, source] * factor + offset
+            if factor < 0:
+                low, high = high, low
+            # the empty boxes used for padding remain empty (inf / -inf)
+            result[:, axis] = low
+            result[:, axis + 2] = -high
+        return result
+
+    @staticmethod
+    def _get_level_steps(depth):
+        # a query descends multiple levels at once
+        steps = [TRAVERSAL_STEP] * (depth // TRAVERSAL_STEP)
+        if depth % TRAVERSAL_STEP:
+            steps.append(depth % TRAVERSAL_STEP)
+        return steps
+
+    @classmethod
+    def from_triangles(cls, triangles, **kwargs):
+        """ build the tree for a sequence of triangles - "Search" returns triangles """
+        lower = numpy.array([(t.minx, t.miny) for t in triangles],
+                            dtype=numpy.float64).reshape(-1, 2)
+        upper = numpy.array([(t.maxx, t.maxy) for t in triangles],
+                            dtype=numpy.float64).reshape(-1, 2)
+        return cls(lower, upper, items=triangles, **kwargs)
+
+    def __len__(self):
+        return len(self._order)
+
+    def _get_matches(self, box_ids, queries):
+        """ return pairs of query ids and item indices for all overlapping items
+
+        "queries" is an array of (maxx, maxy, -minx, -miny) rows. "box_ids" refer to these rows.
+        The tree is traversed for all boxes at once. Every step descends multiple levels.
+        """
+        nodes = numpy.zeros(len(box_ids), dtype=numpy.intp)
+        overlap = (self._node_bounds[nodes] <= queries[box_ids]).all(axis=1)
+        box_ids, nodes = box_ids[overlap], nodes[overlap]
+        for step in self._level_steps:
+            width = 2 ** step
+            # the descendants of node "n" (after "step" levels) start at "(n + 1) * width - 1"
+            nodes = ((nodes[:, numpy.newaxis] + 1) * width - 1 + numpy.arange(width)).ravel()
+            box_ids = numpy.repeat(box_ids, width)
+            overlap = (self._node_bounds[nodes] <= queries[box_ids]).all(axis=1)
+            box_ids, nodes = box_ids[overlap], nodes[overlap]
+        # expand the leaves to their items
+        leaves = nodes - (2 ** self._depth - 1)
+        positions = (leaves[:, numpy.newaxis] * self._leaf_size
+                     + numpy.arange(self._leaf_size)).ravel()
+        box_ids = numpy.repeat(box_ids, self._leaf_size)
+        overlap = (self._item_bounds[positions] <= queries[box_ids]).all(axis=1)
+        return box_ids[overlap], self._order[positions[overlap]]
+
+    @staticmethod
+    def _get_queries(boxes):
+        boxes = numpy.asarray(boxes, dtype=numpy.float64).reshape(-1, 4)
+        return numpy.column_stack((boxes[:, 1], boxes[:, 3], -boxes[:, 0], -boxes[:, 2]))
+
+    def get_indices(self, minx, maxx, miny, maxy):
+        """ return the sorted indices of all items overlapping the given box """
+        # same traversal as in "_get_matches" - simplified for a single box
+        query = numpy.array((maxx, maxy, -minx, -miny), dtype=numpy.float64)
+        nodes = numpy.zeros(1, dtype=numpy.intp)
+        nodes = nodes[(self._node_bounds[nodes] <= query).all(axis=1)]
+        for step in self._level_steps:
+            width = 2 ** step
+            nodes = ((nodes[:, numpy.newaxis] + 1) * width - 1 + numpy.arange(width)).ravel()
+            nodes = nodes[(self._node_bounds[nodes] <= query).all(axis=1)]
+        leaves = nodes - (2 ** self._depth - 1)
+        positions = (leaves[:, numpy.newaxis] * self._leaf_size
+                     + numpy.arange(self._leaf_size)).ravel()
+        positions = positions[(self._item_bounds[positions] <= query).all(axis=1)]
+        indices = self._order[positions]
+        indices.sort()
+        return indices
+
+    def get_indices_batch(self, boxes):
+        """ query many boxes (rows of minx, maxx, miny, maxy) at once
+
+        The result is a list of sorted index arrays - one for every box.
+        """
+        queries = self._get_queries(boxes)
+        box_ids, indices = self._get_matches(numpy.arange(len(queries)), queries)
+        # sort by box and item index
+        order = numpy.lexsort((indices, box_ids))
+        box_ids = box_ids[order]
+        indices = indices[order]
+        splits = numpy.searchsorted(box_ids, numpy.arange(1, len(queries)))
+        return numpy.split(indices, splits)
+
+    def Search(self, minx, maxx, miny, maxy):
+        """ return the items overlapping the given box (compatible with TriangleKdtree) """
+        items = self._items
+        return [items[index] for index in self.get_indices(minx, maxx, miny, maxy).tolist()]
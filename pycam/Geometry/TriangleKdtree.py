@@ -71,19 +71,61 @@ def SearchKdtree2d(tree, minx, maxx, miny, maxy):
                         + SearchKdtree2d(tree.hi, minx, maxx, miny, maxy)
 
 
+def _get_node(triangle):
+    return Node(triangle, (min(triangle.p1[0], triangle.p2[0], triangle.p3[0]),
+                           max(triangle.p1[0], triangle.p2[0], triangle.p3[0]),
+                           min(triangle.p1[1], triangle.p2[1], triangle.p3[1]),
+                           max(triangle.p1[1], triangle.p2[1], triangle.p3[1])))
+
+
+def _transform_kdtree2d(tree, bound_mapping):
+    if tree.bucket:
+        for node in tree.nodes:
+            node.bound = tuple(node.bound[index] * factor + offset
+                               for index, factor, offset in bound_mapping)
+    else:
+        for new_cutdim, (index, factor, offset) in enumerate(bound_mapping):
+            if index == tree.cutdim:
+                break
+        tree.cutdim = new_cutdim
+        tree.cutval = tree.cutval * factor + offset
+        tree.minval = tree.minval * factor + offset
+        tree.maxval = tree.maxval * factor + offset
+        if factor < 0:
+            # the order of the values along the split dimension is reversed
+            tree.minval, tree.maxval = tree.maxval, tree.minval
+            tree.lo, tree.hi = tree.hi, tree.lo
+        _transform_kdtree2d(tree.lo, bound_mapping)
+        _transform_kdtree2d(tree.hi, bound_mapping)
+
+
 class TriangleKdtree(kdtree):
 
     __slots__ = []
 
     def __init__(self, triangles, cutoff=3, cutoff_distance=1.0):
-        nodes = []
-        for t in triangles:
-            n = Node(t, (min(t.p1[0], t.p2[0], t.p3[0]),
-                         max(t.p1[0], t.p2[0], t.p3[0]),
-                         min(t.p1[1], t.p2[1], t.p3[1]),
-                         max(t.p1[1], t.p2[1], t.p3[1])))
-            nodes.append(n)
+        nodes = [_get_node(t) for t in triangles]
         super(TriangleKdtree, self).__init__(nodes, cutoff, cutoff_distance)
 
+    def insert_triangle(self, triangle):
+        self.insert(_get_node(triangle))
+
+    def transform_xy(self, mapping):
+        """ move the bounds of all triangles according to the result of "get_xy_box_mapping"
+
+        The structure of the tree remains valid. Only the bounds, the split values and (for
+        mirrored axes) the order of the subtrees need to be updated.
+        """
+        bound_mapping = []
+        for source, factor, offset in mapping:
+            # the bounds of a node are (minx, maxx, miny, maxy)
+            if factor > 0:
+                bound_mapping.append((2 * source, factor, offset))
+                bound_mapping.append((2 * source + 1, factor, offset))
+            else:
+                bound_mapping.append((2 * source + 1, factor, offset))
+                bound_mapping.append((2 * source, factor, offset))
+        _transform_kdtree2d(self, bound_mapping)
+
     def Search(self, minx, maxx, miny, maxy):
         return SearchKdtree2d(self, minx, maxx, miny, maxy)
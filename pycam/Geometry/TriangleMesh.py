@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import weakref
+
+from pycam.Geometry.Triangle import Triangle
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+def get_face_normals(vertices, faces):
+    """ calculate the normalized normals of faces (based on vertex indices)
+
+    The points of every face are expected in clockwise order (see Triangle.reset_cache).
+    """
+    p1, p2, p3 = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+    normals = numpy.cross(p3 - p1, p2 - p1)
+    lengths = numpy.sqrt((normals * normals).sum(axis=1))
+    lengths[lengths == 0] = 1
+    return normals / lengths[:, numpy.newaxis]
+
+
+class TriangleMesh(object):
+    """ compact storage of triangles based on contiguous numpy arrays
+
+    The mesh consists of a list of unique vertices and a list of faces (three vertex indices
+    each). The normal and the axis aligned bounding box of every face are stored in separate
+    arrays ("struct of arrays").
+    The mesh behaves like a sequence of Triangle objects. These objects are just views of the
+    underlying arrays and they are created on demand. A view is kept alive (and thus identical
+    for repeated requests) as long as it is referenced somewhere else.
+    Triangles may be appended one by one. They are buffered and merged into the arrays as soon as
+    the arrays are accessed.
+    """
+
+    def __init__(self, vertices=None, faces=None, normals=None, face_bounds=None):
+        """ "face_bounds" may contain the result of "get_face_bounds" (e.g. from a cache) """
+        if vertices is None:
+            vertices = numpy.zeros((0, 3), dtype=numpy.float64)
+        if faces is None:
+            faces = numpy.zeros((0, 3), dtype=numpy.intp)
+        self._vertices = numpy.ascontiguousarray(vertices, dtype=numpy.float64).reshape(-1, 3)
+        self._faces = numpy.ascontiguousarray(faces, dtype=numpy.intp).reshape(-1, 3)
+        if normals is None:
+            self._normals = get_face_normals(self._vertices, self._faces)
+        else:
+            self._normals = numpy.ascontiguousarray(normals, dtype=numpy.float64).reshape(-1, 3)
+        self._pending = []
+        self._views = weakref.WeakValueDictionary()
+        if face_bounds is None:
+            self._update_bounds()
+        else:
+            self._face_low, self._face_high = [numpy.asarray(bounds, dtype=numpy.float64)
+                                               for bounds in face_bounds]
+
+    @classmethod
+    def from_triangles(cls, triangles):
+        """ create a mesh based on Triangle objects - shared vertices are merged """
+        vertex_indices = {}
+        vertices = []
+        faces = []
+        normals = []
+        for triangle in triangles:
+            face = []
+            for point in (triangle.p1, triangle.p2, triangle.p3):
+                point = tuple(point[:3])
+                if point not in vertex_indices:
+                    vertex_indices[point] = len(vertices)
+                    vertices.append(point)
+                face.append(vertex_indices[point])
+            faces.append(face)
+            normals.append(tuple(triangle.normal[:3]))
+        if not faces:
+            return cls()
+        return cls(vertices, faces, normals)
+
+    def copy(self):
+        self._flush()
+        return self.__class__(self._vertices.copy(), self._faces.copy(), self._normals.copy())
+
+    def __getstate__(self):
+        # the views are not transferred (e.g. to other processes)
+        self._flush()
+        return (self._vertices, self._faces, self._normals)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self):
+        return len(self._faces) + len(self._pending)
+
+    def __getitem__(self, index):
+        self._flush()
+        if index < 0:
+            index += len(self._faces)
+        if not 0 <= index < len(self._faces):
+            raise IndexError("triangle index out of range: %d" % index)
+        try:
+            return self._views[index]
+        except KeyError:
+            p1, p2, p3 = [tuple(point) for point in self._vertices[self._faces[index]].tolist()]
+            triangle = Triangle(p1, p2, p3, tuple(self._normals[index].tolist()))
+            self._views[index] = triangle
+            return triangle
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def vertices(self):
+        self._flush()
+        return self._vertices
+
+    @property
+    def faces(self):
+        self._flush()
+        return self._faces
+
+    @property
+    def normals(self):
+        self._flush()
+        return self._normals
+
+    def get_face_bounds(self):
+        """ return the lower and upper corners of the bounding boxes of all faces """
+        self._flush()
+        return self._face_low, self._face_high
+
+    def get_bounds(self):
+        """ return the lower and upper corner of the mesh (or None for an empty mesh) """
+        self._flush()
+        if len(self._faces) == 0:
+            return None
+        return self._face_low.min(axis=0), self._face_high.max(axis=0)
+
+    def append(self, triangle):
+        self._pending.append((triangle.p1, triangle.p2, triangle.p3, triangle.normal[:3]))
+
+    def extend(self, triangles):
+        for triangle in triangles:
+            self.append(triangle)
+
+    def get_triangle_arrays(self, indices=None):
+        """ return the three corner arrays (Nx3) of all faces or of the selected faces
+
+        The result is suitable for the vectorized functions in
+        "pycam.Geometry.intersection_batch".
+        """
+        self._flush()
+        faces = self._faces if indices is None else self._faces[indices]
+        return (self._vertices[faces[:, 0]], self._vertices[faces[:, 1]],
+                self._vertices[faces[:, 2]])
+
+    def transform_by_matrix(self, matrix):
+        """ apply a 3x3 or 3x4 transformation matrix to all vertices and normals
+
+        Normals are transformed (without the translation part) just like the "normal" vector of
+        Triangle objects.
+        """
+        self._flush()
+        rows = [tuple(row) + (0,) * (4 - len(row)) for row in matrix]
+        matrix = numpy.array(rows, dtype=numpy.float64)
+        rotation = matrix[:, :3]
+        self._vertices = self._vertices.dot(rotation.T) + matrix[:, 3]
+        self._normals = self._normals.dot(rotation.T)
+        # existing views refer to outdated coordinates
+        self._views = weakref.WeakValueDictionary()
+        self._update_bounds()
+
+    def _update_bounds(self):
+        p1, p2, p3 = self.get_triangle_arrays()
+        self._face_low = numpy.minimum(numpy.minimum(p1, p2), p3)
+        self._face_high = numpy.maximum(numpy.maximum(p1, p2), p3)
+
+    def _flush(self):
+        """ merge buffered triangles into the arrays """
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = []
+        offset = len(self._vertices)
+        new_vertices = numpy.array([point[:3] for item in pending for point in item[:3]],
+                                   dtype=numpy.float64).reshape(-1, 3)
+        new_faces = numpy.arange(offset, offset + len(new_vertices),
+                                 dtype=numpy.intp).reshape(-1, 3)
+        new_normals = numpy.array([item[3] for item in pending],
+                                  dtype=numpy.float64).reshape(-1, 3)
+        self._vertices = numpy.concatenate((self._vertices, new_vertices))
+        self._faces = numpy.concatenate((self._faces, new_faces))
+        self._normals = numpy.concatenate((self._normals, new_normals))
+        self._update_bounds()
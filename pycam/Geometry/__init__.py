@@ -118,7 +118,7 @@ class TransformableContainer(object):
         # Prevent any kind of loops or double transformations (e.g. Points in
         # multiple containers (Line, Triangle, ...).
         # Use the 'id' builtin to prevent expensive object comparions.
-        for item in next(self):
+        for item in self.next():
             if isinstance(item, TransformableContainer):
                 item.transform_by_matrix(matrix, transformed_list, callback=callback)
             elif not id(item) in transformed_list:
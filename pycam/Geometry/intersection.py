@@ -87,6 +87,9 @@ def intersect_circle_plane(center, radius, direction, triangle):
     n = triangle.normal
     if pdot(n, direction) == 0:
         return (None, None, INFINITE)
+    if pdot(n, direction) > 0:
+        # the side of the plane facing the circle is relevant (e.g. for downward normals)
+        n = pmul(n, -1)
     # project onto z=0
     n2 = (n[0], n[1], 0)
     if pnorm(n2) == 0:
@@ -170,12 +173,17 @@ def intersect_circle_line(center, axis, radius, radiussq, direction, edge):
         return (None, None, INFINITE)
     # must be on circle
     dist2 = sqrt(radiussq - distsq)
-    if pdot(d, axis) < 0:
-        dist2 = -dist2
-    ccp = psub(center, psub(pmul(n2, dist), pmul(v, dist2)))
     plane = Plane(edge.p1, pcross(pcross(d, direction), d))
-    (cp, l) = plane.intersect_point(direction, ccp)
-    return (ccp, cp, l)
+    # There are two candidates on the circle (in front of and behind the center along "v"). The
+    # first one to touch the line along the direction is the contact point (e.g. the higher one
+    # for a drop along a sloped line or the leading one for a horizontal push).
+    result = (None, None, INFINITE)
+    for offset in (dist2, -dist2):
+        ccp = psub(center, psub(pmul(n2, dist), pmul(v, offset)))
+        (cp, l) = plane.intersect_point(direction, ccp)
+        if cp and (l < result[2]):
+            result = (ccp, cp, l)
+    return result
 
 
 def intersect_sphere_plane(center, radius, direction, triangle):
@@ -0,0 +1,581 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Vectorized collision calculations for dropping a cutter onto many triangles
+at many positions at once and for pushing a cutter along many horizontal
+scanlines at once.
+
+All supported cutter shapes are described by the same rotational profile: a
+torus with a major and a minor radius. A cylinder is a torus without a minor
+radius, a sphere is a torus without a major radius. The profile is located at
+"center_offset" above the cutter location.
+"""
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+from pycam.Geometry import epsilon
+
+
+# maximum number of elements of temporary position/triangle matrices
+MAX_BATCH_SIZE = 2 ** 19
+# maximum number of positions to be processed at once
+CHUNK_SIZE = 32
+# maximum number of scanline/triangle combinations to be processed at once
+MAX_SCANLINE_BATCH_SIZE = 2 ** 16
+# number of golden section (or bisection) steps for edge collisions of toroidal cutters
+TORUS_EDGE_ITERATIONS = 40
+_GOLDEN_RATIO = (5 ** 0.5 - 1) / 2
+
+
+class CutterProfile(object):
+
+    def __init__(self, major_radius, minor_radius, center_offset):
+        self.major_radius = float(major_radius)
+        self.minor_radius = float(minor_radius)
+        self.center_offset = float(center_offset)
+        self.radius = self.major_radius + self.minor_radius
+
+    def __repr__(self):
+        return "CutterProfile<%s,%s,%s>" % (self.major_radius, self.minor_radius,
+                                            self.center_offset)
+
+    def get_lowest_offset(self, distance):
+        """ return the height of the lowest point of the cutter surface above the cutter location
+
+        @value distance: horizontal distance(s) from the axis of the cutter (within the radius)
+        @type distance: numpy.ndarray
+        """
+        ring_distance = numpy.maximum(distance - self.major_radius, 0)
+        return self.center_offset - numpy.sqrt(
+            numpy.maximum(self.minor_radius ** 2 - ring_distance ** 2, 0))
+
+
+def get_cutter_profile(cutter):
+    """ return the rotational profile of a cutter or None for unsupported cutters """
+    from pycam.Cutters.CylindricalCutter import CylindricalCutter
+    from pycam.Cutters.SphericalCutter import SphericalCutter
+    from pycam.Cutters.ToroidalCutter import ToroidalCutter
+    if isinstance(cutter, ToroidalCutter):
+        return CutterProfile(cutter.distance_majorradius, cutter.distance_minorradius,
+                             cutter.minorradius)
+    elif isinstance(cutter, SphericalCutter):
+        return CutterProfile(0, cutter.distance_radius, cutter.radius)
+    elif isinstance(cutter, CylindricalCutter):
+        return CutterProfile(cutter.distance_radius, 0, -cutter.get_required_distance())
+    else:
+        return None
+
+
+def get_triangle_arrays(triangles):
+    """ turn a list of triangles into three arrays of vertices (each with the shape Nx3) """
+    count = len(triangles)
+    result = []
+    for attr in ("p1", "p2", "p3"):
+        points = numpy.empty((count, 3), dtype=numpy.float64)
+        for index, triangle in enumerate(triangles):
+            points[index] = getattr(triangle, attr)[:3]
+        result.append(points)
+    return tuple(result)
+
+
+def _drop_vertices(profile, xs, ys, vertices, result):
+    for point in vertices:
+        dist_sq = ((xs[:, None] - point[None, :, 0]) ** 2
+                   + (ys[:, None] - point[None, :, 1]) ** 2)
+        valid = dist_sq <= profile.radius ** 2 + epsilon
+        offset = profile.get_lowest_offset(numpy.sqrt(dist_sq))
+        heights = numpy.where(valid, point[None, :, 2] - offset, -numpy.inf)
+        numpy.maximum(result, heights.max(axis=1), out=result)
+
+
+def _drop_facets(profile, xs, ys, p1, p2, p3, result):
+    normals = numpy.cross(p3 - p1, p2 - p1)
+    lengths = numpy.sqrt((normals ** 2).sum(axis=1))
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        normals /= lengths[:, None]
+    # the cutter can only touch the upper side of a facet
+    normals[normals[:, 2] < 0] *= -1
+    usable = numpy.isfinite(normals[:, 2]) & (normals[:, 2] > epsilon)
+    if not usable.any():
+        return
+    p1, p2, p3, normals = p1[usable], p2[usable], p3[usable], normals[usable]
+    # the contact point of the cutter (relative to its location) only depends on the normal
+    normal_xy = numpy.sqrt(normals[:, 0] ** 2 + normals[:, 1] ** 2)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        ring_factor = numpy.where(normal_xy > 0, profile.major_radius / normal_xy, 0)
+    factor = ring_factor + profile.minor_radius
+    contact_dx = -normals[:, 0] * factor
+    contact_dy = -normals[:, 1] * factor
+    contact_dz = profile.center_offset - profile.minor_radius * normals[:, 2]
+    cx = xs[:, None] + contact_dx[None, :]
+    cy = ys[:, None] + contact_dy[None, :]
+    # check if the contact point is inside of the triangle (barycentric coordinates)
+    v0x, v0y = p3[:, 0] - p1[:, 0], p3[:, 1] - p1[:, 1]
+    v1x, v1y = p2[:, 0] - p1[:, 0], p2[:, 1] - p1[:, 1]
+    v2x, v2y = cx - p1[None, :, 0], cy - p1[None, :, 1]
+    dot00 = v0x * v0x + v0y * v0y
+    dot01 = v0x * v1x + v0y * v1y
+    dot11 = v1x * v1x + v1y * v1y
+    dot02 = v0x[None, :] * v2x + v0y[None, :] * v2y
+    dot12 = v1x[None, :] * v2x + v1y[None, :] * v2y
+    inv_denom = 1.0 / (dot00 * dot11 - dot01 * dot01)
+    u = (dot11[None, :] * dot02 - dot01[None, :] * dot12) * inv_denom[None, :]
+    v = (dot00[None, :] * dot12 - dot01[None, :] * dot02) * inv_denom[None, :]
+    inside = (u >= -epsilon) & (v >= -epsilon) & (u + v <= 1 + epsilon)
+    plane_z = p1[None, :, 2] - ((normals[None, :, 0] * v2x + normals[None, :, 1] * v2y)
+                                / normals[None, :, 2])
+    heights = numpy.where(inside, plane_z - contact_dz[None, :], -numpy.inf)
+    numpy.maximum(result, heights.max(axis=1), out=result)
+
+
+def _drop_edges(profile, xs, ys, p1, p2, p3, result):
+    for start, end in ((p1, p2), (p2, p3), (p3, p1)):
+        direction = end - start
+        length_xy = numpy.sqrt(direction[:, 0] ** 2 + direction[:, 1] ** 2)
+        # vertical edges are handled by the vertex collisions
+        usable = length_xy > epsilon
+        if not usable.any():
+            continue
+        start, direction, length_xy = start[usable], direction[usable], length_xy[usable]
+        unit_x = direction[:, 0] / length_xy
+        unit_y = direction[:, 1] / length_xy
+        slope = direction[:, 2] / length_xy
+        wx = xs[:, None] - start[None, :, 0]
+        wy = ys[:, None] - start[None, :, 1]
+        # position of the projected axis along the edge and its distance from the edge
+        foot = wx * unit_x[None, :] + wy * unit_y[None, :]
+        dist_sq = (wx * unit_y[None, :] - wy * unit_x[None, :]) ** 2
+        # "shift" is measured along the edge relative to the projected axis
+        shift_min = -foot
+        shift_max = length_xy[None, :] - foot
+        if profile.minor_radius == 0:
+            # cylinder: the highest contact is at the border of the chord
+            chord = numpy.sqrt(numpy.maximum(profile.major_radius ** 2 - dist_sq, 0))
+            shift = numpy.where(slope[None, :] >= 0, chord, -chord)
+            heights = (start[None, :, 2] + slope[None, :] * (foot + shift)
+                       - profile.center_offset)
+            valid = dist_sq <= profile.major_radius ** 2
+        elif profile.major_radius == 0:
+            # sphere: closed solution for the contact point on the edge
+            chord = numpy.sqrt(numpy.maximum(profile.minor_radius ** 2 - dist_sq, 0))
+            slope_factor = numpy.sqrt(1 + slope ** 2)
+            shift = chord * (slope / slope_factor)[None, :]
+            heights = (start[None, :, 2] + slope[None, :] * (foot + shift)
+                       + chord / slope_factor[None, :] - profile.center_offset)
+            valid = dist_sq <= profile.minor_radius ** 2
+        else:
+            # torus: the height along the edge is a concave function -> golden section search
+            chord = numpy.sqrt(numpy.maximum(profile.radius ** 2 - dist_sq, 0))
+            low = numpy.maximum(shift_min, -chord)
+            high = numpy.minimum(shift_max, chord)
+            valid = (dist_sq <= profile.radius ** 2) & (low <= high)
+
+            def get_height(shift):
+                offset = profile.get_lowest_offset(numpy.sqrt(shift ** 2 + dist_sq))
+                return start[None, :, 2] + slope[None, :] * (foot + shift) - offset
+
+            for _ in range(TORUS_EDGE_ITERATIONS):
+                delta = (high - low) * _GOLDEN_RATIO
+                left = high - delta
+                right = low + delta
+                move_up = get_height(left) < get_height(right)
+                low = numpy.where(move_up, left, low)
+                high = numpy.where(move_up, high, right)
+            shift = (low + high) / 2
+            heights = get_height(shift)
+        # contacts beyond the ends of the edge are covered by the vertex collisions
+        valid &= (shift >= shift_min - epsilon) & (shift <= shift_max + epsilon)
+        heights = numpy.where(valid, heights, -numpy.inf)
+        numpy.maximum(result, heights.max(axis=1), out=result)
+
+
+def drop_cutter_on_triangles(profile, positions, p1, p2, p3):
+    """ calculate the drop height of a cutter for many positions against many triangles
+
+    @value profile: the shape of the cutter (see "get_cutter_profile")
+    @type profile: CutterProfile
+    @value positions: x/y coordinates of the cutter locations
+    @type positions: list of tuples or numpy.ndarray (Nx2)
+    @value p1, p2, p3: vertices of the triangles (see "get_triangle_arrays")
+    @type p1, p2, p3: numpy.ndarray (Mx3)
+    @returns: the highest cutter location for every position ("-inf" for no collision)
+    @rtype: numpy.ndarray
+    """
+    positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 2)
+    result = numpy.full(len(positions), -numpy.inf)
+    if (len(positions) == 0) or (len(p1) == 0):
+        return result
+    tri_minx = numpy.minimum(numpy.minimum(p1[:, 0], p2[:, 0]), p3[:, 0])
+    tri_maxx = numpy.maximum(numpy.maximum(p1[:, 0], p2[:, 0]), p3[:, 0])
+    tri_miny = numpy.minimum(numpy.minimum(p1[:, 1], p2[:, 1]), p3[:, 1])
+    tri_maxy = numpy.maximum(numpy.maximum(p1[:, 1], p2[:, 1]), p3[:, 1])
+    # Small chunks of neighbouring positions allow to skip most of the triangles.
+    chunk_size = max(1, min(CHUNK_SIZE, MAX_BATCH_SIZE // len(p1)))
+    for chunk_start in range(0, len(positions), chunk_size):
+        chunk = positions[chunk_start:chunk_start + chunk_size]
+        xs, ys = chunk[:, 0], chunk[:, 1]
+        # use only the triangles near this chunk of positions
+        margin = profile.radius + epsilon
+        nearby = ((tri_maxx >= xs.min() - margin) & (tri_minx <= xs.max() + margin)
+                  & (tri_maxy >= ys.min() - margin) & (tri_miny <= ys.max() + margin))
+        if not nearby.any():
+            continue
+        c1, c2, c3 = p1[nearby], p2[nearby], p3[nearby]
+        chunk_result = result[chunk_start:chunk_start + chunk_size]
+        _drop_vertices(profile, xs, ys, (c1, c2, c3), chunk_result)
+        _drop_facets(profile, xs, ys, c1, c2, c3, chunk_result)
+        _drop_edges(profile, xs, ys, c1, c2, c3, chunk_result)
+    return result
+
+
+def _get_reach(profile, heights):
+    """ return the maximum horizontal distance between the axis of the cutter and colliding points
+
+    The cutter is regarded as infinitely long (upwards).
+    @value heights: the height(s) of the points above the cutter location
+    @returns: the maximum distance for every height ("nan" if the cutter cannot reach this height)
+    """
+    depth = profile.center_offset - heights
+    with numpy.errstate(invalid="ignore"):
+        ring = numpy.sqrt(profile.minor_radius ** 2 - numpy.maximum(depth, 0) ** 2)
+    return numpy.where(depth <= 0, profile.radius, profile.major_radius + ring)
+
+
+def _get_parameter_range(values, deltas, minimum, maximum):
+    """ return the range (within 0..1) of parameters "s" with "minimum <= values + s * deltas <=
+    maximum" (empty ranges: the lower limit exceeds the upper limit)
+    """
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        to_minimum = (minimum - values) / deltas
+        to_maximum = (maximum - values) / deltas
+    inside = (values >= minimum) & (values <= maximum)
+    low = numpy.where(deltas > 0, to_minimum, numpy.where(deltas < 0, to_maximum,
+                                                          numpy.where(inside, 0, numpy.inf)))
+    high = numpy.where(deltas > 0, to_maximum, numpy.where(deltas < 0, to_minimum,
+                                                           numpy.where(inside, 1, -numpy.inf)))
+    return numpy.maximum(low, 0), numpy.minimum(high, 1)
+
+
+def _golden_section(func, low, high, maximize=False):
+    """ locate the minimum (or maximum) of unimodal functions (elementwise) """
+    sign = -1 if maximize else 1
+    for _ in range(TORUS_EDGE_ITERATIONS):
+        delta = (high - low) * _GOLDEN_RATIO
+        left = high - delta
+        right = low + delta
+        move_up = sign * func(left) > sign * func(right)
+        low = numpy.where(move_up, left, low)
+        high = numpy.where(move_up, high, right)
+    return (low + high) / 2
+
+
+def _bisect(func, inside, outside):
+    """ locate the border between non-negative ("inside") and negative ("outside") values """
+    for _ in range(TORUS_EDGE_ITERATIONS):
+        middle = (inside + outside) / 2
+        is_inside = func(middle) >= 0
+        inside = numpy.where(is_inside, middle, inside)
+        outside = numpy.where(is_inside, outside, middle)
+    return inside
+
+
+def _get_vertex_extent(profile, vertices):
+    """ return the range of cutter locations along the scanline colliding with the vertices
+
+    All push calculations use a coordinate system based on the scanline: the first axis follows
+    the scanline, the scanline is located at zero along the second and the third axis.
+    """
+    reach = _get_reach(profile, vertices[:, 2])
+    with numpy.errstate(invalid="ignore"):
+        chord = numpy.sqrt(reach ** 2 - vertices[:, 1] ** 2)
+    return vertices[:, 0] - chord, vertices[:, 0] + chord
+
+
+def _get_facet_extent(profile, p1, p2, p3):
+    """ return the range of cutter locations along the scanline colliding with the inner part of
+    the triangles (see "_get_vertex_extent")
+    """
+    normals = numpy.cross(p3 - p1, p2 - p1)
+    lengths = numpy.sqrt((normals ** 2).sum(axis=1))
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        normals /= lengths[:, None]
+    # the cutter can only touch the upper side of a facet
+    normals[normals[:, 2] < 0] *= -1
+    usable = numpy.isfinite(normals[:, 2]) & (normals[:, 2] > epsilon)
+    normals[~usable] = (0, 0, 1)
+    # the contact point of the cutter (relative to its location) only depends on the normal
+    normal_xy = numpy.sqrt(normals[:, 0] ** 2 + normals[:, 1] ** 2)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        ring_factor = numpy.where(normal_xy > 0, profile.major_radius / normal_xy, 0)
+    factor = ring_factor + profile.minor_radius
+    contact_t = -normals[:, 0] * factor
+    contact_n = -normals[:, 1] * factor
+    contact_z = profile.center_offset - profile.minor_radius * normals[:, 2]
+    # the contact points are located on a parallel line (shifted by "contact_n")
+    low = numpy.full(len(p1), numpy.nan)
+    high = numpy.full(len(p1), numpy.nan)
+    for start, end in ((p1, p2), (p2, p3), (p3, p1)):
+        start_n = start[:, 1] - contact_n
+        end_n = end[:, 1] - contact_n
+        crossing = (start_n * end_n <= 0) & (start_n != end_n)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            fraction = start_n / (start_n - end_n)
+            position = numpy.where(crossing, start[:, 0] + fraction * (end[:, 0] - start[:, 0]),
+                                   numpy.nan)
+        low = numpy.fmin(low, position)
+        high = numpy.fmax(high, position)
+    # the height of the cutter touching the plane at location "t" is "base - slope * t"
+    slope = normals[:, 0] / normals[:, 2]
+    base = p1[:, 2] - contact_z + (normals[:, 0] * (p1[:, 0] - contact_t)
+                                   + normals[:, 1] * (p1[:, 1] - contact_n)) / normals[:, 2]
+    starts = low - contact_t
+    ends = high - contact_t
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        limit = base / slope
+        starts = numpy.where(slope < 0, numpy.maximum(starts, limit), starts)
+        ends = numpy.where(slope > 0, numpy.minimum(ends, limit), ends)
+        valid = usable & (starts <= ends) & ((slope != 0) | (base > 0))
+    return numpy.where(valid, starts, numpy.nan), numpy.where(valid, ends, numpy.nan)
+
+
+def _get_arc_extent(radius, positions, position_deltas, offsets, offset_deltas, low, high):
+    """ return the range of scanline locations within a circle around any point of the edges
+
+    The points of an edge are given by a parameter "s" (between "low" and "high"): the location
+    along the scanline is "positions + s * position_deltas". The components of the (two- or
+    three-dimensional) distance vector are "offsets[i] + s * offset_deltas[i]".
+    """
+    deltas_sq = sum(delta ** 2 for delta in offset_deltas)
+    # the distance does not depend on "s"
+    constant = deltas_sq < epsilon ** 2
+    deltas_sq = numpy.where(constant, 1, deltas_sq)
+    deltas_norm = numpy.sqrt(deltas_sq)
+    # "center" is the parameter of the point closest to the circle
+    products = sum(offset * delta for offset, delta in zip(offsets, offset_deltas))
+    center = numpy.where(constant, 0, -products / deltas_sq)
+    rest_sq = radius ** 2 - sum((offset + center * delta) ** 2
+                                for offset, delta in zip(offsets, offset_deltas))
+
+    def get_chord(parameters):
+        return numpy.sqrt(numpy.maximum(radius ** 2 - sum(
+            (offset + parameters * delta) ** 2 for offset, delta in zip(offsets, offset_deltas)),
+            0))
+
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        rest = numpy.sqrt(rest_sq)
+        half_width = numpy.where(constant, numpy.inf, rest / deltas_norm)
+        low = numpy.maximum(low, center - half_width)
+        high = numpy.minimum(high, center + half_width)
+        valid = (rest_sq >= 0) & (low <= high)
+        # the extremes of "positions -/+ chord" (unless they are beyond the limits)
+        shift = numpy.where(constant, numpy.where(position_deltas >= 0, numpy.inf, -numpy.inf),
+                            rest * position_deltas
+                            / (deltas_norm * numpy.sqrt(position_deltas ** 2 + deltas_sq)))
+        first = numpy.minimum(numpy.maximum(center - shift, low), high)
+        last = numpy.minimum(numpy.maximum(center + shift, low), high)
+        starts = positions + first * position_deltas - get_chord(first)
+        ends = positions + last * position_deltas + get_chord(last)
+    return numpy.where(valid, starts, numpy.nan), numpy.where(valid, ends, numpy.nan)
+
+
+def _get_torus_edge_extent(profile, start, direction, low, high):
+    """ return the range of scanline locations colliding with the edges via the ring of a
+    toroidal cutter
+
+    There is no closed solution: the borders are located via golden section and bisection.
+    """
+    lowest = profile.center_offset - profile.minor_radius
+
+    def get_distance(parameters):
+        return numpy.abs(start[:, 1] + parameters * direction[:, 1])
+
+    def get_reach(parameters):
+        heights = start[:, 2] + parameters * direction[:, 2]
+        return _get_reach(profile, numpy.clip(heights, lowest, profile.center_offset))
+
+    def get_margin(parameters):
+        return get_reach(parameters) - get_distance(parameters)
+
+    def get_chord(parameters):
+        return numpy.sqrt(numpy.maximum(get_reach(parameters) ** 2
+                                        - get_distance(parameters) ** 2, 0))
+
+    def get_start(parameters):
+        return start[:, 0] + parameters * direction[:, 0] - get_chord(parameters)
+
+    def get_end(parameters):
+        return start[:, 0] + parameters * direction[:, 0] + get_chord(parameters)
+
+    # empty ranges (edges out of reach) are discarded at the end
+    with numpy.errstate(invalid="ignore"):
+        # the margin is a concave function: reduce the range to its non-negative part
+        best = _golden_section(get_margin, low, high, maximize=True)
+        valid = (low <= high) & (get_margin(best) >= 0)
+        low = numpy.where(get_margin(low) >= 0, low, _bisect(get_margin, best, low))
+        high = numpy.where(get_margin(high) >= 0, high, _bisect(get_margin, best, high))
+        starts = get_start(_golden_section(get_start, low, high))
+        ends = get_end(_golden_section(get_end, low, high, maximize=True))
+    return numpy.where(valid, starts, numpy.nan), numpy.where(valid, ends, numpy.nan)
+
+
+def _get_edge_extent(profile, start, end):
+    """ return the range of cutter locations along the scanline colliding with the edges (see
+    "_get_vertex_extent")
+    """
+    direction = end - start
+    # the shaft of the cutter (above the center of its profile) has the full radius
+    low, high = _get_parameter_range(start[:, 2], direction[:, 2], profile.center_offset,
+                                     numpy.inf)
+    starts, ends = _get_arc_extent(profile.radius, start[:, 0], direction[:, 0],
+                                   (start[:, 1], ), (direction[:, 1], ), low, high)
+    if profile.minor_radius > 0:
+        low, high = _get_parameter_range(start[:, 2], direction[:, 2],
+                                         profile.center_offset - profile.minor_radius,
+                                         profile.center_offset)
+        if profile.major_radius == 0:
+            # sphere: the distance between the edge and the center of the sphere matters
+            lower = _get_arc_extent(
+                profile.minor_radius, start[:, 0], direction[:, 0],
+                (start[:, 1], start[:, 2] - profile.center_offset),
+                (direction[:, 1], direction[:, 2]), low, high)
+        else:
+            lower = _get_torus_edge_extent(profile, start, direction, low, high)
+        starts = numpy.fmin(starts, lower[0])
+        ends = numpy.fmax(ends, lower[1])
+    return starts, ends
+
+
+def get_scanline_collisions(profile, starts, direction, lengths, p1, p2, p3):
+    """ calculate the collisions of a cutter moving along parallel horizontal scanlines
+
+    The cutter is regarded as infinitely long (upwards). Mere contacts (less than "epsilon") are
+    not regarded as collisions.
+    @value profile: the shape of the cutter (see "get_cutter_profile")
+    @type profile: CutterProfile
+    @value starts: the start points of the scanlines
+    @type starts: list of tuples or numpy.ndarray (Nx3)
+    @value direction: the direction of all scanlines (a horizontal unit vector)
+    @value lengths: the lengths of the scanlines
+    @value p1, p2, p3: vertices of the triangles (see "get_triangle_arrays")
+    @returns: the indices of the scanlines and the ranges of colliding cutter locations along
+        them (distance from the start of the scanline). Every combination of scanline and
+        triangle results in one range at most.
+    @rtype: tuple of three numpy.ndarray
+    """
+    starts = numpy.asarray(starts, dtype=numpy.float64).reshape(-1, 3)
+    lengths = numpy.asarray(lengths, dtype=numpy.float64)
+    ux, uy = float(direction[0]), float(direction[1])
+
+    def to_scanline_system(points):
+        return numpy.column_stack((points[:, 0] * ux + points[:, 1] * uy,
+                                   points[:, 1] * ux - points[:, 0] * uy, points[:, 2]))
+
+    empty = (numpy.zeros(0, dtype=int), numpy.zeros(0), numpy.zeros(0))
+    if (len(starts) == 0) or (len(p1) == 0):
+        return empty
+    lines = to_scanline_system(starts)
+    corners = [to_scanline_system(points) for points in (p1, p2, p3)]
+    tri_min = numpy.minimum(numpy.minimum(corners[0], corners[1]), corners[2])
+    tri_max = numpy.maximum(numpy.maximum(corners[0], corners[1]), corners[2])
+    margin = profile.radius + epsilon
+    lowest = profile.center_offset - profile.minor_radius
+    # the scanlines (sorted by their offset) within reach of every triangle
+    order = numpy.argsort(lines[:, 1], kind="mergesort")
+    sorted_offsets = lines[order, 1]
+    first_line = numpy.searchsorted(sorted_offsets, tri_min[:, 1] - margin, side="left")
+    counts = numpy.searchsorted(sorted_offsets, tri_max[:, 1] + margin, side="right") - first_line
+    # process a limited number of combinations at once
+    totals = numpy.cumsum(counts)
+    boundaries = numpy.flatnonzero(numpy.diff(totals // MAX_SCANLINE_BATCH_SIZE)) + 1
+    results = []
+    for tri_start, tri_end in zip(numpy.concatenate(([0], boundaries)).tolist(),
+                                  numpy.append(boundaries, len(counts)).tolist()):
+        chunk_counts = counts[tri_start:tri_end]
+        total = int(chunk_counts.sum())
+        if total == 0:
+            continue
+        triangles = numpy.repeat(numpy.arange(tri_start, tri_end), chunk_counts)
+        offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(chunk_counts) - chunk_counts,
+                                                     chunk_counts)
+        line_indices = order[numpy.repeat(first_line[tri_start:tri_end], chunk_counts) + offsets]
+        near = ((tri_max[triangles, 0] >= lines[line_indices, 0] - margin)
+                & (tri_min[triangles, 0] <= lines[line_indices, 0] + lengths[line_indices]
+                   + margin)
+                & (tri_max[triangles, 2] - lines[line_indices, 2] - epsilon >= lowest))
+        triangles = triangles[near]
+        line_indices = line_indices[near]
+        # move the scanline to zero (second and third axis) - slightly raised to ignore contacts
+        shift = lines[line_indices] * (0, 1, 1) + (0, 0, epsilon)
+        c1, c2, c3 = [corner[triangles] - shift for corner in corners]
+        range_starts, range_ends = _get_facet_extent(profile, c1, c2, c3)
+        for vertices in (c1, c2, c3):
+            vertex_starts, vertex_ends = _get_vertex_extent(profile, vertices)
+            range_starts = numpy.fmin(range_starts, vertex_starts)
+            range_ends = numpy.fmax(range_ends, vertex_ends)
+        for start, end in ((c1, c2), (c2, c3), (c3, c1)):
+            edge_starts, edge_ends = _get_edge_extent(profile, start, end)
+            range_starts = numpy.fmin(range_starts, edge_starts)
+            range_ends = numpy.fmax(range_ends, edge_ends)
+        valid = ~numpy.isnan(range_starts)
+        line_starts = lines[line_indices[valid], 0]
+        results.append((line_indices[valid], range_starts[valid] - line_starts,
+                        range_ends[valid] - line_starts))
+    if not results:
+        return empty
+    return tuple(numpy.concatenate(items) for items in zip(*results))
+
+
+def get_free_ranges(lengths, line_indices, starts, ends):
+    """ return the parts of the scanlines without collisions
+
+    Gaps shorter than "epsilon" between collisions are ignored.
+    @value lengths: the lengths of all scanlines
+    @value line_indices, starts, ends: the collisions (see "get_scanline_collisions")
+    @returns: the indices of the scanlines and the free ranges along them (ordered by scanline
+        and position)
+    @rtype: tuple of three numpy.ndarray
+    """
+    lengths = numpy.asarray(lengths, dtype=numpy.float64)
+    line_indices = numpy.asarray(line_indices, dtype=int)
+    starts = numpy.asarray(starts, dtype=numpy.float64)
+    ends = numpy.asarray(ends, dtype=numpy.float64)
+    count = len(lengths)
+    if count == 0:
+        return (numpy.zeros(0, dtype=int), numpy.zeros(0), numpy.zeros(0))
+    lower = min(starts.min() if len(starts) else 0, 0) - 1
+    upper = max(ends.max() if len(ends) else 0, lengths.max()) + 1
+    # the areas before and after every scanline are blocked
+    indices = numpy.arange(count)
+    line_indices = numpy.concatenate((line_indices, indices, indices))
+    starts = numpy.concatenate((starts, numpy.full(count, lower), lengths))
+    ends = numpy.concatenate((ends, numpy.zeros(count), numpy.full(count, upper)))
+    order = numpy.lexsort((starts, line_indices))
+    line_indices, starts, ends = line_indices[order], starts[order], ends[order]
+    # The furthest end of all ranges up to every position within the same scanline: the values
+    # of every scanline are shifted above the values of the previous scanline.
+    span = upper - lower
+    shifted = ends - lower + line_indices * span
+    reached = numpy.maximum.accumulate(shifted) - line_indices * span + lower
+    gaps = (line_indices[1:] == line_indices[:-1]) & (starts[1:] > reached[:-1] + epsilon)
+    return line_indices[1:][gaps], reached[:-1][gaps], starts[1:][gaps]
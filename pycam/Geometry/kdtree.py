@@ -27,6 +27,10 @@ except ImportError:
 from pycam.Geometry import IDGenerator
 
 
+# maximum share of the nodes of a subtree located in one of its halves (see "kdtree.insert")
+BALANCE_LIMIT = 0.8
+
+
 class Node(object):
 
     __slots__ = ["obj", "bound"]
@@ -67,18 +71,20 @@ def find_max_spread(nodes):
 class kdtree(IDGenerator):
 
     __slots__ = ["bucket", "dim", "cutoff", "cutoff_distance", "nodes", "cutdim", "minval",
-                 "maxval", "cutval", "hi", "lo"]
+                 "maxval", "cutval", "hi", "lo", "size"]
 
     def __init__(self, nodes, cutoff, cutoff_distance):
         super(kdtree, self).__init__()
-        self.bucket = False
         if nodes and len(nodes) > 0:
             self.dim = len(nodes[0].bound)
         else:
             self.dim = 0
         self.cutoff = cutoff
         self.cutoff_distance = cutoff_distance
+        self._build(nodes)
 
+    def _build(self, nodes):
+        self.size = len(nodes)
         if len(nodes) <= self.cutoff:
             self.bucket = True
             self.nodes = nodes
@@ -88,15 +94,26 @@ class kdtree(IDGenerator):
                 self.bucket = True
                 self.nodes = nodes
             else:
-                self.bucket = False
-                self.cutdim = cutdim
-                nodes.sort(key=lambda item: item.bound[cutdim])
-                median = len(nodes) // 2
-                self.minval = nodes[0].bound[cutdim]
-                self.maxval = nodes[-1].bound[cutdim]
-                self.cutval = nodes[median].bound[cutdim]
-                self.lo = kdtree(nodes[0:median], cutoff, cutoff_distance)
-                self.hi = kdtree(nodes[median:], cutoff, cutoff_distance)
+                self._split(nodes, cutdim)
+
+    def _split(self, nodes, cutdim):
+        self.bucket = False
+        self.cutdim = cutdim
+        nodes.sort(key=lambda item: item.bound[cutdim])
+        median = len(nodes) // 2
+        self.minval = nodes[0].bound[cutdim]
+        self.maxval = nodes[-1].bound[cutdim]
+        self.cutval = nodes[median].bound[cutdim]
+        self.lo = kdtree(nodes[0:median], self.cutoff, self.cutoff_distance)
+        self.hi = kdtree(nodes[median:], self.cutoff, self.cutoff_distance)
+        self.nodes = None
+
+    def get_nodes(self):
+        """ return the nodes of all buckets """
+        if self.bucket:
+            return list(self.nodes)
+        else:
+            return self.lo.get_nodes() + self.hi.get_nodes()
 
     def __repr__(self):
         if self.bucket:
@@ -214,19 +231,24 @@ class kdtree(IDGenerator):
 
         if self.bucket:
             self.nodes.append(node)
+            self.size += 1
             if len(self.nodes) > self.cutoff:
-                self.bucket = False
                 (cutdim, spread) = find_max_spread(self.nodes)
-                self.cutdim = cutdim
-                self.nodes.sort(key=lambda node: node.bound[cutdim])
-                median = len(self.nodes) // 2
-                self.minval = self.nodes[0].bound[cutdim]
-                self.maxval = self.nodes[-1].bound[cutdim]
-                self.cutval = self.nodes[median].bound[cutdim]
-                self.lo = kdtree(self.nodes[0:median], self.cutoff, self.cutoff_distance)
-                self.hi = kdtree(self.nodes[median:], self.cutoff, self.cutoff_distance)
+                self._split(self.nodes, cutdim)
         else:
-            if node.bound[self.cutdim] <= self.cutval:
-                self.lo.insert(node)
+            value = node.bound[self.cutdim]
+            if value <= self.cutval:
+                child = self.lo
             else:
-                self.hi.insert(node)
+                child = self.hi
+            if child.size + 1 > BALANCE_LIMIT * (self.size + 1):
+                # Rebuild the subtree instead of adding more nodes to its larger half (similar to
+                # a scapegoat tree). Thus a sequence of sorted nodes (e.g. the triangles of an
+                # imported model) does not degrade the tree into a list.
+                self._build(self.get_nodes() + [node])
+                return
+            # the range of the split dimension is used for skipping subtrees during a search
+            self.minval = min(self.minval, value)
+            self.maxval = max(self.maxval, value)
+            self.size += 1
+            child.insert(node)
@@ -0,0 +1,806 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Vectorized calculation of outlines around horizontally widened segments.
+
+The area covered by a segment widened by a radius is a "stadium": it is bounded by two parallel
+offset lines and by two circles around the ends of the segment. The outline of the area covered
+by many stadiums consists of those parts of their offset lines and circles, that are not covered
+by any other stadium.
+The segments are usually the outline of a horizontal slab of a triangle mesh (projected onto the
+x/y plane): the intersections with the planes at the top and the bottom of the slab and the
+folds of the mesh in between (see "get_slice_segments" and "get_outline_edges").
+"""
+
+import math
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+from pycam.Geometry import epsilon
+
+
+# distance between a piece of an outline and the positions used for checking its surroundings
+PROBE_DISTANCE = 10 * epsilon
+# number of segments checked at once for covering positions
+COVERAGE_CHUNK_SIZE = 8
+# number of segments checked at once for being located within other stadiums
+CONTAINED_CHUNK_SIZE = 1024
+
+
+def _get_grid_keys(values):
+    """ return the index of the grid cell (size: epsilon) containing the values
+
+    The grid is shifted by a quarter of a cell. Otherwise coordinates with few decimal places
+    (e.g. 4.703305) would be located exactly at the border between two cells.
+    """
+    return numpy.floor(values / epsilon + 0.25).astype(numpy.int64)
+
+
+def get_slice_segments(p1, p2, p3, z):
+    """ return the intersection segments of triangles with a horizontal plane
+
+    Vertices exactly on the plane are regarded as being above it. Thus triangles touching the
+    plane from below with a vertex or an edge are ignored as well as horizontal triangles.
+    @value p1, p2, p3: vertices of the triangles (see "intersection_batch.get_triangle_arrays")
+    @returns: the start and end points (x/y) of the segments
+    @rtype: tuple of two numpy.ndarray (Nx2)
+    """
+    above = numpy.stack([vertices[:, 2] >= z for vertices in (p1, p2, p3)], axis=1)
+    count = above.sum(axis=1)
+    crossing = (count == 1) | (count == 2)
+    flags = above[crossing]
+    vertices = (p1[crossing], p2[crossing], p3[crossing])
+    crosses = []
+    points = []
+    for index in range(3):
+        start, end = vertices[index], vertices[(index + 1) % 3]
+        crosses.append(flags[:, index] != flags[:, (index + 1) % 3])
+        # the points of edges not crossing the plane are ignored
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            fraction = (z - start[:, 2]) / (end[:, 2] - start[:, 2])
+            points.append(start[:, :2]
+                          + fraction[:, numpy.newaxis] * (end[:, :2] - start[:, :2]))
+    crosses = numpy.stack(crosses, axis=1)
+    points = numpy.stack(points, axis=1)
+    # exactly two edges of every remaining triangle cross the plane
+    edges = numpy.argsort(~crosses, axis=1, kind="stable")[:, :2]
+    rows = numpy.arange(len(edges))
+    return points[rows, edges[:, 0]], points[rows, edges[:, 1]]
+
+
+def get_outline_edges(p1, p2, p3):
+    """ return the edges of a triangle mesh, that may be part of the outline of its projection
+    onto the x/y plane
+
+    These are the edges at the border of the mesh and the folds: edges with both adjacent
+    triangles located on the same side of the vertical plane through the edge. Vertical edges
+    are ignored.
+    @returns: the start and end points of the edges
+    @rtype: tuple of two numpy.ndarray (Nx3)
+    """
+    count = len(p1)
+    if count == 0:
+        return numpy.zeros((0, 3)), numpy.zeros((0, 3))
+    vertices = numpy.concatenate((p1, p2, p3))
+    # identical vertices of adjacent triangles need to be recognized
+    keys = _get_grid_keys(vertices)
+    first_indices, vertex_ids = numpy.unique(keys, axis=0, return_index=True,
+                                             return_inverse=True)[1:]
+    vertex_ids = vertex_ids.reshape(-1)
+    vertices = vertices[first_indices]
+    corners = vertex_ids.reshape(3, count)
+    starts, ends, others = [], [], []
+    for index in range(3):
+        starts.append(corners[index])
+        ends.append(corners[(index + 1) % 3])
+        others.append(corners[(index + 2) % 3])
+    starts, ends, others = (numpy.concatenate(values) for values in (starts, ends, others))
+    # every edge is oriented from the lower to the higher vertex id
+    low = numpy.minimum(starts, ends)
+    high = numpy.maximum(starts, ends)
+    a, b, c = vertices[low], vertices[high], vertices[others]
+    ab = b[:, :2] - a[:, :2]
+    ac = c[:, :2] - a[:, :2]
+    length = numpy.sqrt((ab ** 2).sum(axis=1))
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        side = (ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]) / (
+            length * numpy.sqrt(((c - a) ** 2).sum(axis=1)))
+    # triangles within the vertical plane through the edge count for both sides
+    side = numpy.where(numpy.isfinite(side) & (numpy.abs(side) >= epsilon), numpy.sign(side), 0)
+    order = numpy.lexsort((high, low))
+    low, high, side, length = low[order], high[order], side[order], length[order]
+    first = numpy.ones(len(low), dtype=bool)
+    first[1:] = (low[1:] != low[:-1]) | (high[1:] != high[:-1])
+    group = numpy.cumsum(first) - 1
+    members = numpy.bincount(group)
+    smallest = numpy.full(len(members), numpy.inf)
+    numpy.minimum.at(smallest, group, side)
+    largest = numpy.full(len(members), -numpy.inf)
+    numpy.maximum.at(largest, group, side)
+    is_outline = (members != 2) | (smallest * largest >= 0)
+    selected = first & is_outline[group] & (length > epsilon)
+    return vertices[low[selected]], vertices[high[selected]]
+
+
+def get_clipped_edges(starts, ends, minz, maxz=None):
+    """ return the x/y projection of the parts of edges between two heights
+
+    @value maxz: the upper limit or None (unlimited)
+    @rtype: tuple of two numpy.ndarray (Nx2)
+    """
+    if maxz is None:
+        maxz = numpy.inf
+    delta = ends - starts
+    flat = numpy.abs(delta[:, 2]) < epsilon
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        to_min = (minz - starts[:, 2]) / delta[:, 2]
+        to_max = (maxz - starts[:, 2]) / delta[:, 2]
+    low = numpy.maximum(numpy.where(delta[:, 2] > 0, to_min, to_max), 0)
+    high = numpy.minimum(numpy.where(delta[:, 2] > 0, to_max, to_min), 1)
+    inside_flat = (starts[:, 2] > minz) & (starts[:, 2] < maxz)
+    low = numpy.where(flat, numpy.where(inside_flat, 0, 1), low)
+    high = numpy.where(flat, numpy.where(inside_flat, 1, 0), high)
+    valid = low < high
+    low, high = low[valid, numpy.newaxis], high[valid, numpy.newaxis]
+    return (starts[valid, :2] + low * delta[valid, :2],
+            starts[valid, :2] + high * delta[valid, :2])
+
+
+def _merge_collinear(starts, ends):
+    """ combine overlapping segments located on the same straight line
+
+    The offset lines of overlapping segments would coincide.
+    """
+    delta = ends - starts
+    angle = numpy.arctan2(delta[:, 1], delta[:, 0]) % math.pi
+    # "pi" and "0" describe the same direction
+    angle = numpy.where(angle > math.pi - epsilon, 0, angle)
+    direction = numpy.stack((numpy.cos(angle), numpy.sin(angle)), axis=1)
+    offset = starts[:, 1] * direction[:, 0] - starts[:, 0] * direction[:, 1]
+    line_keys = _get_grid_keys(numpy.stack((angle, offset), axis=1))
+    line_ids = numpy.unique(line_keys, axis=0, return_inverse=True)[1].reshape(-1)
+    begin = (starts * direction).sum(axis=1)
+    finish = (ends * direction).sum(axis=1)
+    begin, finish = numpy.minimum(begin, finish), numpy.maximum(begin, finish)
+    order = numpy.lexsort((begin, line_ids))
+    line_ids, begin, finish = line_ids[order], begin[order], finish[order]
+    direction, offset = direction[order], offset[order]
+    # running maximum of the end position per line (see "get_free_ranges")
+    span = finish.max() - begin.min() + 1
+    shifted = finish - begin.min() + line_ids * span
+    reached = numpy.maximum.accumulate(shifted) - line_ids * span + begin.min()
+    new_group = numpy.ones(len(begin), dtype=bool)
+    new_group[1:] = (line_ids[1:] != line_ids[:-1]) | (begin[1:] > reached[:-1] + epsilon)
+    last = numpy.ones(len(begin), dtype=bool)
+    last[:-1] = new_group[1:]
+    first_index = numpy.flatnonzero(new_group)
+    last_index = numpy.flatnonzero(last)
+    normal = numpy.stack((-direction[:, 1], direction[:, 0]), axis=1)
+    base = normal * offset[:, numpy.newaxis]
+    return (base[first_index] + direction[first_index] * begin[first_index, numpy.newaxis],
+            base[first_index] + direction[first_index] * reached[last_index, numpy.newaxis])
+
+
+def _get_point_ids(points):
+    """ return the same id for points closer than "epsilon" (and for chains of such points)
+
+    Grid cells are not sufficient: close points may be located on both sides of a border.
+    """
+    count = len(points)
+    half = epsilon / 2
+    first, second = _get_candidate_pairs(points - half, points + half, points - half,
+                                         points + half, epsilon, unique=False)
+    close = (first != second) & (numpy.hypot(*(points[first] - points[second]).T) <= epsilon)
+    first, second = first[close], second[close]
+    # every point receives the lowest index of its group
+    labels = numpy.arange(count)
+    while True:
+        previous = labels
+        labels = labels.copy()
+        numpy.minimum.at(labels, first, labels[second])
+        labels = labels[labels]
+        if numpy.array_equal(labels, previous):
+            break
+    return numpy.unique(labels, return_inverse=True)[1].reshape(-1)
+
+
+def _get_cell_entries(low, high, cell_size):
+    """ return the grid cells covered by boxes
+
+    @returns: the keys of the cells and the indices of the boxes
+    """
+    first = numpy.floor(low / cell_size).astype(numpy.int64)
+    last = numpy.floor(high / cell_size).astype(numpy.int64)
+    counts = last - first + 1
+    totals = counts[:, 0] * counts[:, 1]
+    indices = numpy.repeat(numpy.arange(len(low)), totals)
+    offsets = numpy.arange(totals.sum()) - numpy.repeat(numpy.cumsum(totals) - totals, totals)
+    xs = first[indices, 0] + offsets % counts[indices, 0]
+    ys = first[indices, 1] + offsets // counts[indices, 0]
+    # the cell coordinates are small enough for a combined key
+    return xs * (2 ** 31) + ys, indices
+
+
+def _get_cell_index(low, high, cell_size):
+    """ return the grid cells covered by boxes sorted by their keys (see "_find_in_cell_index")
+    """
+    keys, indices = _get_cell_entries(low, high, cell_size)
+    order = numpy.argsort(keys, kind="stable")
+    return keys[order], indices[order]
+
+
+def _find_in_cell_index(cell_index, low, high, cell_size):
+    """ return the pairs of indices of boxes and indexed boxes sharing at least one grid cell
+
+    Boxes sharing more than one cell are reported repeatedly.
+    """
+    keys1, indices1 = _get_cell_entries(low, high, cell_size)
+    keys2, indices2 = cell_index
+    begin = numpy.searchsorted(keys2, keys1, side="left")
+    end = numpy.searchsorted(keys2, keys1, side="right")
+    counts = end - begin
+    first = numpy.repeat(indices1, counts)
+    positions = numpy.repeat(begin - (numpy.cumsum(counts) - counts), counts) \
+        + numpy.arange(counts.sum())
+    return first, indices2[positions]
+
+
+def _get_candidate_pairs(low1, high1, low2, high2, cell_size, unique=True):
+    """ return the pairs of indices of boxes (from two lists) sharing at least one grid cell
+
+    Boxes sharing more than one cell are reported repeatedly, if "unique" is disabled.
+    """
+    first, second = _find_in_cell_index(_get_cell_index(low2, high2, cell_size), low1, high1,
+                                        cell_size)
+    if (len(first) == 0) or not unique:
+        return first, second
+    combined = numpy.sort(first * len(low2) + second)
+    # faster than "numpy.unique" for large arrays
+    combined = combined[numpy.concatenate(([True], combined[1:] != combined[:-1]))]
+    return combined // len(low2), combined % len(low2)
+
+
+def _get_distances(points, starts, ends):
+    """ return the distances between points and segments (pairwise) """
+    delta_x, delta_y = ends[:, 0] - starts[:, 0], ends[:, 1] - starts[:, 1]
+    relative_x, relative_y = points[:, 0] - starts[:, 0], points[:, 1] - starts[:, 1]
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        fraction = (relative_x * delta_x + relative_y * delta_y) / (delta_x ** 2 + delta_y ** 2)
+    fraction = numpy.clip(numpy.nan_to_num(fraction), 0, 1)
+    return numpy.hypot(relative_x - fraction * delta_x, relative_y - fraction * delta_y)
+
+
+def _remove_contained(segment_groups):
+    """ remove the segments with a stadium located within the stadium of another segment
+
+    The stadiums around segments of different groups are often nested (e.g. the slabs of rounded
+    cutters). The number of intersections between their outlines would grow quickly.
+    The segments are processed from the largest to the smallest stadium. Removed segments do not
+    need to be checked as containers: their container contains everything within them, as well.
+    """
+    sizes = [len(starts) for starts, ends, radius in segment_groups]
+    if sum(sizes) == 0:
+        return segment_groups
+    starts = numpy.concatenate([numpy.asarray(starts, dtype=numpy.float64).reshape(-1, 2)
+                                for starts, ends, radius in segment_groups])
+    ends = numpy.concatenate([numpy.asarray(ends, dtype=numpy.float64).reshape(-1, 2)
+                              for starts, ends, radius in segment_groups])
+    radii = numpy.repeat([float(radius) for starts, ends, radius in segment_groups], sizes)
+    low, high = numpy.minimum(starts, ends), numpy.maximum(starts, ends)
+    cell_size = max(float(numpy.median((high - low).max(axis=1))),
+                    float(radii.max() - radii.min()) / 4, epsilon)
+    # Equal stadiums are common: the slices of vertical walls are repeated in subsequent slabs.
+    # Only the first one of them (in this order) is kept.
+    order = numpy.lexsort((-numpy.hypot(*(ends - starts).T), -radii))
+    rank = numpy.empty(len(order), dtype=numpy.int64)
+    rank[order] = numpy.arange(len(order))
+    keep = numpy.ones(len(starts), dtype=bool)
+    # the number of candidate pairs per segment grows with the difference of the radii
+    for chunk_start in range(0, len(order), CONTAINED_CHUNK_SIZE):
+        chunk = order[chunk_start:chunk_start + CONTAINED_CHUNK_SIZE]
+        containers = order[:chunk_start + CONTAINED_CHUNK_SIZE]
+        containers = containers[keep[containers]]
+        # a segment needs to be closer than the difference of the radii
+        margin = (radii[containers] - radii[chunk].min())[:, numpy.newaxis]
+        # repeated pairs do not matter
+        inner, outer = _get_candidate_pairs(low[chunk], high[chunk], low[containers] - margin,
+                                            high[containers] + margin, cell_size, unique=False)
+        inner, outer = chunk[inner], containers[outer]
+        valid = rank[outer] < rank[inner]
+        inner, outer = inner[valid], outer[valid]
+        # tolerate rounding errors of equal stadiums
+        allowed = radii[outer] - radii[inner] + epsilon ** 2
+        # the distance to a segment is a convex function: checking the end points is sufficient
+        contained = ((_get_distances(starts[inner], starts[outer], ends[outer]) <= allowed)
+                     & (_get_distances(ends[inner], starts[outer], ends[outer]) <= allowed))
+        keep[inner[contained]] = False
+    result = []
+    offset = 0
+    for size, (_, _, radius) in zip(sizes, segment_groups):
+        selected = keep[offset:offset + size]
+        result.append((starts[offset:offset + size][selected],
+                       ends[offset:offset + size][selected], radius))
+        offset += size
+    return result
+
+
+class _Primitives(object):
+    """ the offset lines and circles bounding the stadiums around segments """
+
+    def __init__(self, segment_groups):
+        line_starts, line_ends, line_normals = [], [], []
+        line_circles = []
+        circle_centers, circle_radii = [], []
+        segment_starts, segment_ends, segment_radii = [], [], []
+        # Overlapping segments with equal radii would cause coincident offset lines. Thus groups
+        # with equal radii are combined before merging collinear segments.
+        radii = []
+        combined = {}
+        for starts, ends, radius in segment_groups:
+            if len(starts) > 0:
+                if float(radius) not in combined:
+                    radii.append(float(radius))
+                combined.setdefault(float(radius), []).append(
+                    (numpy.asarray(starts, dtype=numpy.float64).reshape(-1, 2),
+                     numpy.asarray(ends, dtype=numpy.float64).reshape(-1, 2)))
+        for radius in radii:
+            starts, ends = _merge_collinear(
+                numpy.concatenate([starts for starts, ends in combined[radius]]),
+                numpy.concatenate([ends for starts, ends in combined[radius]]))
+            segment_starts.append(starts)
+            segment_ends.append(ends)
+            segment_radii.append(numpy.full(len(starts), float(radius)))
+            # one circle for every distinct end point
+            point_ids = _get_point_ids(numpy.concatenate((starts, ends)))
+            unique_ids, first = numpy.unique(point_ids, return_index=True)
+            circle_offset = sum(len(centers) for centers in circle_centers)
+            circle_centers.append(numpy.concatenate((starts, ends))[first])
+            circle_radii.append(numpy.full(len(first), float(radius)))
+            ids = numpy.searchsorted(unique_ids, point_ids) + circle_offset
+            start_circles, end_circles = ids[:len(starts)], ids[len(starts):]
+            delta = ends - starts
+            length = numpy.sqrt((delta ** 2).sum(axis=1))
+            valid = length > epsilon
+            normal = numpy.stack((-delta[valid, 1], delta[valid, 0]), axis=1) \
+                / length[valid, numpy.newaxis]
+            for side in (1, -1):
+                shift = side * radius * normal
+                line_starts.append(starts[valid] + shift)
+                line_ends.append(ends[valid] + shift)
+                line_normals.append(side * normal)
+                line_circles.append(numpy.stack((start_circles[valid], end_circles[valid]),
+                                                axis=1))
+        self.line_starts = self._concatenate(line_starts, 2)
+        self.line_ends = self._concatenate(line_ends, 2)
+        self.line_normals = self._concatenate(line_normals, 2)
+        self.line_circles = self._concatenate(line_circles, 2, dtype=numpy.int64)
+        self.circle_centers = self._concatenate(circle_centers, 2)
+        self.circle_radii = self._concatenate(circle_radii)
+        self.segment_starts = self._concatenate(segment_starts, 2)
+        self.segment_ends = self._concatenate(segment_ends, 2)
+        self.segment_radii = self._concatenate(segment_radii)
+
+    @staticmethod
+    def _concatenate(arrays, width=None, dtype=numpy.float64 if numpy_enabled else None):
+        if arrays:
+            return numpy.concatenate(arrays).astype(dtype)
+        shape = (0, ) if width is None else (0, width)
+        return numpy.zeros(shape, dtype=dtype)
+
+    def get_boxes(self):
+        """ return the bounding boxes of the lines followed by the circles """
+        radii = self.circle_radii[:, numpy.newaxis]
+        low = numpy.concatenate((numpy.minimum(self.line_starts, self.line_ends),
+                                 self.circle_centers - radii))
+        high = numpy.concatenate((numpy.maximum(self.line_starts, self.line_ends),
+                                  self.circle_centers + radii))
+        return low, high
+
+    def is_covered(self, positions, cell_size):
+        """ check if positions are located strictly within any stadium """
+        result = numpy.zeros(len(positions), dtype=bool)
+        # The largest stadiums cover most positions. Positions covered by previous chunks are
+        # skipped. The index of the positions is rebuilt after most of them are covered.
+        lengths = numpy.hypot(*(self.segment_ends - self.segment_starts).T)
+        order = numpy.lexsort((-lengths, -self.segment_radii))
+        indexed_count = 0
+        for chunk_start in range(0, len(order), COVERAGE_CHUNK_SIZE):
+            remaining_count = len(result) - numpy.count_nonzero(result)
+            if remaining_count == 0:
+                break
+            if 2 * remaining_count <= indexed_count or indexed_count == 0:
+                remaining = numpy.flatnonzero(~result)
+                # every position is located in a single cell
+                keys, indices = _get_cell_index(positions[remaining], positions[remaining],
+                                                cell_size)
+                cell_index = (keys, remaining[indices])
+                indexed_count = len(remaining)
+            chunk = order[chunk_start:chunk_start + COVERAGE_CHUNK_SIZE]
+            starts, ends = self.segment_starts[chunk], self.segment_ends[chunk]
+            radii = self.segment_radii[chunk]
+            low = numpy.minimum(starts, ends) - radii[:, numpy.newaxis]
+            high = numpy.maximum(starts, ends) + radii[:, numpy.newaxis]
+            segment_indices, position_indices = _find_in_cell_index(
+                cell_index, low, high, cell_size)
+            remaining = ~result[position_indices]
+            segment_indices = segment_indices[remaining]
+            position_indices = position_indices[remaining]
+            distance = _get_distances(positions[position_indices], starts[segment_indices],
+                                      ends[segment_indices])
+            covered = distance < radii[segment_indices] - epsilon
+            result[position_indices[covered]] = True
+        return result
+
+
+def _intersect_lines(primitives, first, second):
+    """ return the intersections of pairs of offset lines
+
+    @returns: the indices of the pairs, the positions along both lines and the points
+    """
+    start1, start2 = primitives.line_starts[first], primitives.line_starts[second]
+    delta1 = primitives.line_ends[first] - start1
+    delta2 = primitives.line_ends[second] - start2
+    denominator = delta1[:, 0] * delta2[:, 1] - delta1[:, 1] * delta2[:, 0]
+    relative = start2 - start1
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        t1 = (relative[:, 0] * delta2[:, 1] - relative[:, 1] * delta2[:, 0]) / denominator
+        t2 = (relative[:, 0] * delta1[:, 1] - relative[:, 1] * delta1[:, 0]) / denominator
+    valid = ((numpy.abs(denominator) > epsilon ** 2) & (t1 >= 0) & (t1 <= 1)
+             & (t2 >= 0) & (t2 <= 1))
+    points = start1[valid] + t1[valid, numpy.newaxis] * delta1[valid]
+    return valid, t1[valid], t2[valid], points
+
+
+def _intersect_line_circles(primitives, lines, circles):
+    """ return the intersections of offset lines with circles
+
+    @returns: the indices of the line and the circle, the positions along the line, the angles
+        on the circle and the points for every intersection
+    """
+    # the circles at the ends of the segment touch its offset lines (see "get_offset_outlines")
+    own = ((primitives.line_circles[lines, 0] == circles)
+           | (primitives.line_circles[lines, 1] == circles))
+    lines, circles = lines[~own], circles[~own]
+    start = primitives.line_starts[lines]
+    delta = primitives.line_ends[lines] - start
+    relative = start - primitives.circle_centers[circles]
+    a = (delta ** 2).sum(axis=1)
+    b = 2 * (relative * delta).sum(axis=1)
+    c = (relative ** 2).sum(axis=1) - primitives.circle_radii[circles] ** 2
+    discriminant = b ** 2 - 4 * a * c
+    result = []
+    with numpy.errstate(invalid="ignore"):
+        root = numpy.sqrt(discriminant)
+    for sign in (-1, 1):
+        t = (-b + sign * root) / (2 * a)
+        # tangents are ignored
+        valid = (discriminant > 0) & (t >= 0) & (t <= 1)
+        points = start[valid] + t[valid, numpy.newaxis] * delta[valid]
+        offset = points - primitives.circle_centers[circles[valid]]
+        angles = numpy.arctan2(offset[:, 1], offset[:, 0]) % (2 * math.pi)
+        result.append((lines[valid], circles[valid], t[valid], angles, points))
+    return [numpy.concatenate(values) for values in zip(*result)]
+
+
+def _intersect_circles(primitives, first, second):
+    """ return the intersections of pairs of circles
+
+    @returns: the indices of both circles, the angles on both circles and the points
+    """
+    center1, center2 = primitives.circle_centers[first], primitives.circle_centers[second]
+    radius1, radius2 = primitives.circle_radii[first], primitives.circle_radii[second]
+    delta = center2 - center1
+    distance = numpy.sqrt((delta ** 2).sum(axis=1))
+    valid = ((distance > epsilon) & (distance < radius1 + radius2)
+             & (distance > numpy.abs(radius1 - radius2)))
+    first, second = first[valid], second[valid]
+    center1, center2 = center1[valid], center2[valid]
+    radius1, delta, distance = radius1[valid], delta[valid], distance[valid]
+    radius2 = radius2[valid]
+    along = (distance ** 2 + radius1 ** 2 - radius2 ** 2) / (2 * distance)
+    across = numpy.sqrt(numpy.maximum(radius1 ** 2 - along ** 2, 0))
+    unit = delta / distance[:, numpy.newaxis]
+    normal = numpy.stack((-unit[:, 1], unit[:, 0]), axis=1)
+    result = []
+    for sign in (-1, 1):
+        points = (center1 + along[:, numpy.newaxis] * unit
+                  + sign * across[:, numpy.newaxis] * normal)
+        angles = []
+        for centers in (center1, center2):
+            offset = points - centers
+            angles.append(numpy.arctan2(offset[:, 1], offset[:, 0]) % (2 * math.pi))
+        result.append((first, second, angles[0], angles[1], points))
+    return [numpy.concatenate(values) for values in zip(*result)]
+
+
+def _get_splits(primitives, cell_size):
+    """ return the positions splitting the offset lines and circles into pieces
+
+    Every split is described by the index of the primitive (lines followed by circles), the
+    position (along a line or the angle on a circle) and the point.
+    """
+    line_count = len(primitives.line_starts)
+    indices, positions, points = [], [], []
+
+    def add(index, position, point):
+        indices.append(index)
+        positions.append(position)
+        points.append(point)
+
+    # the ends of the lines
+    line_indices = numpy.arange(line_count)
+    add(line_indices, numpy.zeros(line_count), primitives.line_starts)
+    add(line_indices, numpy.ones(line_count), primitives.line_ends)
+    # the circles at the ends of a segment touch its offset lines
+    for column, points_column in ((0, primitives.line_starts), (1, primitives.line_ends)):
+        circles = primitives.line_circles[:, column]
+        normals = primitives.line_normals
+        angles = numpy.arctan2(normals[:, 1], normals[:, 0]) % (2 * math.pi)
+        add(circles + line_count, angles, points_column)
+    low, high = primitives.get_boxes()
+    first, second = _get_candidate_pairs(low, high, low, high, cell_size)
+    ordered = first < second
+    first, second = first[ordered], second[ordered]
+    # line/line
+    pairs = (first < line_count) & (second < line_count)
+    valid, t1, t2, cross_points = _intersect_lines(primitives, first[pairs], second[pairs])
+    add(first[pairs][valid], t1, cross_points)
+    add(second[pairs][valid], t2, cross_points)
+    # line/circle
+    pairs = (first < line_count) & (second >= line_count)
+    lines, circles, t, angles, cross_points = _intersect_line_circles(
+        primitives, first[pairs], second[pairs] - line_count)
+    add(lines, t, cross_points)
+    add(circles + line_count, angles, cross_points)
+    # circle/circle
+    pairs = first >= line_count
+    circles1, circles2, angles1, angles2, cross_points = _intersect_circles(
+        primitives, first[pairs] - line_count, second[pairs] - line_count)
+    add(circles1 + line_count, angles1, cross_points)
+    add(circles2 + line_count, angles2, cross_points)
+    return numpy.concatenate(indices), numpy.concatenate(positions), numpy.concatenate(points)
+
+
+def _get_pieces(primitives, cell_size):
+    """ split all offset lines and circles at their intersections
+
+    @returns: the index of the primitive, the start and end position and the start and end
+        point for every piece
+    """
+    line_count = len(primitives.line_starts)
+    indices, positions, points = _get_splits(primitives, cell_size)
+    order = numpy.lexsort((positions, indices))
+    indices, positions, points = indices[order], positions[order], points[order]
+    same = numpy.zeros(len(indices), dtype=bool)
+    same[:-1] = indices[1:] == indices[:-1]
+    # pieces between two subsequent splits of the same primitive
+    pieces = numpy.flatnonzero(same)
+    result = [indices[pieces], positions[pieces], positions[pieces + 1], points[pieces],
+              points[pieces + 1]]
+    # the last piece of every circle ends at its first split
+    is_last = numpy.flatnonzero(~same & (indices >= line_count))
+    first_of_primitive = numpy.searchsorted(indices, indices[is_last], side="left")
+    wrapped = [indices[is_last], positions[is_last],
+               positions[first_of_primitive] + 2 * math.pi, points[is_last],
+               points[first_of_primitive]]
+    result = [numpy.concatenate(values) for values in zip(result, wrapped)]
+    # circles without any intersection
+    circles = numpy.setdiff1d(numpy.arange(len(primitives.circle_centers)),
+                              indices[indices >= line_count] - line_count)
+    if len(circles):
+        start = (primitives.circle_centers[circles]
+                 + primitives.circle_radii[circles, numpy.newaxis] * numpy.array((1.0, 0.0)))
+        complete = [circles + line_count, numpy.zeros(len(circles)),
+                    numpy.full(len(circles), 2 * math.pi), start, start]
+        result = [numpy.concatenate(values) for values in zip(result, complete)]
+    return result
+
+
+def _get_piece_probes(primitives, indices, begin, end, distance=0):
+    """ return the middle of every piece (moved outwards by "distance") """
+    line_count = len(primitives.line_starts)
+    result = numpy.zeros((len(indices), 2))
+    is_line = indices < line_count
+    lines = indices[is_line]
+    middle = (begin[is_line] + end[is_line]) / 2
+    starts = primitives.line_starts[lines]
+    result[is_line] = (starts + middle[:, numpy.newaxis] * (primitives.line_ends[lines] - starts)
+                       + distance * primitives.line_normals[lines])
+    circles = indices[~is_line] - line_count
+    angles = (begin[~is_line] + end[~is_line]) / 2
+    directions = numpy.stack((numpy.cos(angles), numpy.sin(angles)), axis=1)
+    radii = primitives.circle_radii[circles, numpy.newaxis] + distance
+    result[~is_line] = primitives.circle_centers[circles] + radii * directions
+    return result
+
+
+def _get_piece_points(primitives, index, begin, end, start_point, end_point, accuracy):
+    """ return the points of a piece
+
+    Arcs are approximated by straight lines touching the arc from outside. Thus the deviation
+    (at most "accuracy") never reduces the distance to the segments.
+    """
+    line_count = len(primitives.line_starts)
+    if index < line_count:
+        return [start_point, end_point]
+    center = primitives.circle_centers[index - line_count].tolist()
+    radius = float(primitives.circle_radii[index - line_count])
+    step = min(2 * math.acos(radius / (radius + accuracy)), math.pi / 2)
+    count = max(1, int(math.ceil((end - begin) / step)))
+    angle_step = (end - begin) / count
+    corner_radius = radius / math.cos(angle_step / 2)
+    result = [start_point]
+    for part in range(count):
+        angle = begin + angle_step * (part + 0.5)
+        result.append((center[0] + corner_radius * math.cos(angle),
+                       center[1] + corner_radius * math.sin(angle)))
+    result.append(end_point)
+    return result
+
+
+def _combine_pieces(pieces):
+    """ connect pieces (start and end point) to polylines
+
+    The outline of an area consists of closed polylines. Pieces without a predecessor or without
+    a successor (e.g. remains of almost coincident outlines) are separated beforehand. They are
+    returned as open polylines.
+    @value pieces: list of (start_id, end_id, points)
+    @returns: list of (points, is_closed)
+    """
+    outgoing = {}
+    incoming = {}
+    for index, (start_id, end_id, _) in enumerate(pieces):
+        outgoing.setdefault(start_id, []).append(index)
+        incoming.setdefault(end_id, []).append(index)
+    outgoing_count = dict((key, len(value)) for key, value in outgoing.items())
+    incoming_count = dict((key, len(value)) for key, value in incoming.items())
+    dangling = [False] * len(pieces)
+    queue = [index for index, (start_id, end_id, _) in enumerate(pieces)
+             if not incoming_count.get(start_id) or not outgoing_count.get(end_id)]
+    while queue:
+        index = queue.pop()
+        if dangling[index]:
+            continue
+        dangling[index] = True
+        start_id, end_id, _ = pieces[index]
+        outgoing_count[start_id] -= 1
+        incoming_count[end_id] -= 1
+        # the neighbours may be dangling now
+        if outgoing_count[start_id] == 0:
+            queue.extend(incoming.get(start_id, []))
+        if incoming_count[end_id] == 0:
+            queue.extend(outgoing.get(end_id, []))
+    used = [False] * len(pieces)
+
+    def follow(index):
+        chain = []
+        start_id = pieces[index][0]
+        is_dangling = dangling[index]
+        while index is not None:
+            used[index] = True
+            current_id, end_id, points = pieces[index]
+            chain.extend(points if not chain else points[1:])
+            if end_id == start_id:
+                return chain, True
+            index = None
+            for candidate in outgoing.get(end_id, []):
+                if not used[candidate] and (dangling[candidate] == is_dangling):
+                    index = candidate
+                    break
+        return chain, False
+
+    result = []
+    for index in range(len(pieces)):
+        if not used[index] and not dangling[index]:
+            result.append(follow(index))
+    # open polylines begin at points without any incoming piece
+    for index, (start_id, _, _) in enumerate(pieces):
+        if not used[index] and not any(dangling[other] and not used[other]
+                                       for other in incoming.get(start_id, [])):
+            result.append(follow(index))
+    for index in range(len(pieces)):
+        if not used[index]:
+            result.append(follow(index))
+    return result
+
+
+def get_offset_outlines(segment_groups, is_blocked, accuracy):
+    """ return the outline of the area covered by widened segments
+
+    @value segment_groups: the segments and the distance to be covered around them
+    @type segment_groups: list of (starts, ends, radius) with starts/ends as Nx2 arrays
+    @value is_blocked: function returning a boolean array for an Nx2 array of positions. It needs
+        to recognize the positions inside the area, that are not covered by any widened segment
+        (e.g. in the middle of a large polygon).
+    @value accuracy: maximum deviation of the straight lines approximating arcs
+    @returns: the outline with the covered area on the left side
+    @rtype: list of (points, is_closed) with points as a list of x/y tuples
+    """
+    primitives = _Primitives(_remove_contained(segment_groups))
+    if len(primitives.circle_centers) == 0:
+        return []
+    low, high = primitives.get_boxes()
+    # the circles should not cover too many cells
+    cell_size = max(float(numpy.median((high - low).max(axis=1))),
+                    float(primitives.circle_radii.max()) / 4, epsilon)
+    indices, begin, end, start_points, end_points = _get_pieces(primitives, cell_size)
+    # ignore tiny pieces (e.g. between neighbouring intersections)
+    line_count = len(primitives.line_starts)
+    length = numpy.where(indices < line_count, 1, 0) * numpy.sqrt(
+        ((end_points - start_points) ** 2).sum(axis=1))
+    is_circle = indices >= line_count
+    radii = primitives.circle_radii[numpy.maximum(indices - line_count, 0)]
+    length = numpy.where(is_circle, (end - begin) * radii, length)
+    valid = length > epsilon
+    indices, begin, end = indices[valid], begin[valid], end[valid]
+    start_points, end_points = start_points[valid], end_points[valid]
+    free = ~primitives.is_covered(_get_piece_probes(primitives, indices, begin, end),
+                                  cell_size)
+    # A piece may touch the border of a stadium in its middle (e.g. a circle touching an offset
+    # line from inside). Thus free pieces are checked at two more positions.
+    for fraction in (0.25, 0.75):
+        candidates = numpy.flatnonzero(free)
+        between = begin[candidates] + fraction * (end[candidates] - begin[candidates])
+        free[candidates] = ~primitives.is_covered(
+            _get_piece_probes(primitives, indices[candidates], between, between), cell_size)
+    # the area outside of the piece needs to be accessible
+    probes = _get_piece_probes(primitives, indices[free], begin[free], end[free],
+                               distance=PROBE_DISTANCE)
+    free[free] = ~numpy.asarray(is_blocked(probes), dtype=bool)
+    indices, begin, end = indices[free], begin[free], end[free]
+    start_points, end_points = start_points[free], end_points[free]
+    # the covered area is on the left side: reverse the offset lines if necessary
+    lines = indices < line_count
+    normals = primitives.line_normals[indices[lines]]
+    delta = (primitives.line_ends - primitives.line_starts)[indices[lines]]
+    reverse = numpy.zeros(len(indices), dtype=bool)
+    reverse[lines] = (normals[:, 0] * delta[:, 1] - normals[:, 1] * delta[:, 0]) < 0
+    point_ids = _get_point_ids(numpy.concatenate((start_points, end_points)))
+    start_ids, end_ids = point_ids[:len(indices)], point_ids[len(indices):]
+    pieces = []
+    known = set()
+    for index, piece_begin, piece_end, start_point, end_point, start_id, end_id, backwards in zip(
+            indices.tolist(), begin.tolist(), end.tolist(), start_points.tolist(),
+            end_points.tolist(), start_ids.tolist(), end_ids.tolist(), reverse.tolist()):
+        if start_id == end_id and index < line_count:
+            continue
+        points = _get_piece_points(primitives, index, piece_begin, piece_end,
+                                   tuple(start_point), tuple(end_point), accuracy)
+        if backwards:
+            points.reverse()
+            start_id, end_id = end_id, start_id
+        # duplicate pieces (e.g. identical segments within different groups)
+        key = (start_id, end_id, len(points))
+        if key in known:
+            continue
+        known.add(key)
+        pieces.append((start_id, end_id, points))
+    result = []
+    for points, is_closed in _combine_pieces(pieces):
+        length = sum(math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+                     for p1, p2 in zip(points, points[1:]))
+        # almost coincident outlines leave tiny open fragments behind
+        if is_closed or (length > accuracy):
+            result.append((points, is_closed))
+    return result
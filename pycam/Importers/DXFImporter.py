@@ -222,6 +222,9 @@ class DXFParser(object):
                 text = line2.decode("utf", errors="ignore")
             line2 = _unescape_control_characters(text)
         else:
+            if isinstance(line2, bytes) and not isinstance(line2, str):
+                # files are read in binary mode (Python 3)
+                line2 = line2.decode("utf", errors="ignore")
             line2 = line2.upper()
         self.line_number += 2
         return line1, line2
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import zipfile
+
+from pycam.Geometry.Model import MeshModel, Model
+from pycam.Geometry.TriangleBVH import TriangleBVH
+from pycam.Geometry.TriangleMesh import TriangleMesh
+import pycam.Utils
+import pycam.Utils.log
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+_log = pycam.Utils.log.get_logger()
+
+# increment this number whenever the format or the content of cached models changes
+CACHE_FORMAT_VERSION = 2
+# name of the cache directory within the configuration directory
+CACHE_DIRECTORY_NAME = "model-cache"
+# the least recently used items are removed, if the cache exceeds this size (in bytes)
+MAX_CACHE_SIZE = 2 * 1024 ** 3
+
+# None: use the default location; False: the cache is disabled
+_cache_directory = None
+# hashes of the modules implementing the import functions (see "get_importer_digest")
+_importer_digests = {}
+
+
+def set_cache_directory(path):
+    """ use a specific cache directory - "None" restores the default, "False" disables caching """
+    global _cache_directory
+    _cache_directory = path
+
+
+def get_cache_directory():
+    if _cache_directory is False:
+        return None
+    elif _cache_directory is None:
+        import pycam.Gui.Settings
+        path = pycam.Gui.Settings.get_config_filename(CACHE_DIRECTORY_NAME)
+    else:
+        path = _cache_directory
+    if path and not os.path.isdir(path):
+        try:
+            os.makedirs(path)
+        except OSError as exc:
+            _log.debug("Failed to create the model cache directory (%s): %s", path, exc)
+            return None
+    return path
+
+
+def _get_option_items(options):
+    """ return the import options that may influence the result in a reproducible order
+
+    Non-trivial values (e.g. callbacks or font caches) are ignored.
+    """
+    simple_types = (bool, int, float, str, type(u""), type(None))
+    result = []
+    for key, value in sorted(options.items()):
+        if isinstance(value, simple_types):
+            result.append((key, value))
+        elif isinstance(value, dict):
+            items = sorted((str(item_key), item_value) for item_key, item_value in value.items()
+                           if isinstance(item_value, simple_types))
+            result.append((key, items))
+    return result
+
+
+def get_importer_digest(importer):
+    """ return a hash of the module implementing the import function
+
+    Changes of the importer invalidate the cached results of previous versions.
+    """
+    module_name = importer.__module__
+    if module_name not in _importer_digests:
+        filename = getattr(sys.modules.get(module_name), "__file__", None)
+        hash_func = hashlib.sha1()
+        hash_func.update(module_name.encode("utf-8"))
+        if filename:
+            try:
+                with open(filename, "rb") as module_file:
+                    hash_func.update(module_file.read())
+            except (IOError, OSError) as exc:
+                _log.debug("Failed to read the importer module (%s): %s", filename, exc)
+        _importer_digests[module_name] = hash_func.hexdigest()
+    return _importer_digests[module_name]
+
+
+def get_cache_key(filename, file_type, options, importer_digest):
+    """ calculate the key of an imported file based on its content, the import options and the
+    version of the importer (see "get_importer_digest")
+    """
+    hash_func = hashlib.sha1()
+    hash_func.update(repr((CACHE_FORMAT_VERSION, file_type, importer_digest,
+                           _get_option_items(options))).encode("utf-8"))
+    with open(filename, "rb") as model_file:
+        while True:
+            data = model_file.read(2 ** 20)
+            if not data:
+                break
+            hash_func.update(data)
+    return hash_func.hexdigest()
+
+
+def _get_cache_files(cache_dir, key):
+    return (os.path.join(cache_dir, "%s.npz" % key), os.path.join(cache_dir, "%s.pickle" % key))
+
+
+def load_model(key):
+    """ return a cached model or None """
+    cache_dir = get_cache_directory()
+    if not cache_dir:
+        return None
+    array_file, pickle_file = _get_cache_files(cache_dir, key)
+    try:
+        if numpy_enabled and os.path.exists(array_file):
+            with numpy.load(array_file, allow_pickle=False) as arrays:
+                mesh = TriangleMesh(arrays["vertices"], arrays["faces"], arrays["normals"],
+                                    face_bounds=(arrays["face_low"], arrays["face_high"]))
+                tree = TriangleBVH.from_arrays(
+                    {name[len("tree_"):]: arrays[name] for name in arrays.files
+                     if name.startswith("tree_")}, items=mesh)
+                if str(arrays["model_type"]) == "mesh":
+                    model = MeshModel(mesh, tree=tree)
+                else:
+                    # the importer returned a model of Triangle objects
+                    model = Model(use_kdtree=bool(arrays["use_kdtree"]))
+                    for triangle in mesh:
+                        model.append(triangle)
+                model.name = str(arrays["name"])
+            used_file = array_file
+        elif os.path.exists(pickle_file):
+            with open(pickle_file, "rb") as cache_file:
+                model = pickle.load(cache_file)
+            used_file = pickle_file
+        else:
+            return None
+    except (IOError, OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError,
+            zipfile.BadZipfile) as exc:
+        _log.info("Ignoring invalid model cache item (%s): %s", key, exc)
+        return None
+    # mark the item as recently used
+    os.utime(used_file, None)
+    return model
+
+
+def store_model(key, model):
+    """ add a model to the cache
+
+    Triangle models are stored as a set of arrays (including the search tree). Other models are
+    pickled. The type of triangle models (Model or MeshModel) is restored when loading them.
+    """
+    cache_dir = get_cache_directory()
+    if not cache_dir:
+        return
+    array_file, pickle_file = _get_cache_files(cache_dir, key)
+    if numpy_enabled and isinstance(model, Model) and len(model) > 0:
+        if isinstance(model, MeshModel):
+            model_type = "mesh"
+            use_kdtree = True
+        else:
+            model_type = "triangles"
+            use_kdtree = model._use_kdtree
+            model = MeshModel.from_model(model)
+        filename = array_file
+    else:
+        filename = pickle_file
+    temp_filename = filename + ".tmp"
+    try:
+        with open(temp_filename, "wb") as cache_file:
+            if filename == array_file:
+                face_low, face_high = model.mesh.get_face_bounds()
+                arrays = {"vertices": model.mesh.vertices, "faces": model.mesh.faces,
+                          "normals": model.mesh.normals, "face_low": face_low,
+                          "face_high": face_high, "name": numpy.array(model.name),
+                          "model_type": numpy.array(model_type),
+                          "use_kdtree": numpy.array(use_kdtree)}
+                for name, value in model.get_tree().get_arrays().items():
+                    arrays["tree_" + name] = value
+                numpy.savez(cache_file, **arrays)
+            else:
+                pickle.dump(model, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp_filename, filename)
+    except (IOError, OSError, pickle.PicklingError, TypeError) as exc:
+        _log.info("Failed to store the model in the cache (%s): %s", cache_dir, exc)
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        return
+    _expire_cache_items(cache_dir)
+
+
+def _expire_cache_items(cache_dir):
+    """ remove the least recently used items until the size of the cache is acceptable """
+    items = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            items.append((stat.st_mtime, stat.st_size, path))
+    items.sort()
+    total_size = sum(item[1] for item in items)
+    while items and (total_size > MAX_CACHE_SIZE):
+        mtime, size, path = items.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total_size -= size
+
+
+def get_cached_importer(importer, file_type):
+    """ wrap an import function - local files are loaded from the cache if possible """
+
+    importer_digest = get_importer_digest(importer)
+
+    def import_model(filename, *args, **kwargs):
+        if hasattr(filename, "read"):
+            # streams are not cached
+            return importer(filename, *args, **kwargs)
+        uri = pycam.Utils.URIHandler(filename)
+        if not uri.is_local() or (get_cache_directory() is None) or args:
+            return importer(filename, *args, **kwargs)
+        try:
+            key = get_cache_key(uri.get_local_path(), file_type, kwargs, importer_digest)
+        except (IOError, OSError):
+            # the importer will complain about the file
+            return importer(filename, *args, **kwargs)
+        model = load_model(key)
+        if model is not None:
+            _log.info("Loaded model from cache: %s", filename)
+            return model
+        model = importer(filename, *args, **kwargs)
+        if model is not None:
+            store_model(key, model)
+        return model
+
+    return import_model
@@ -19,6 +19,7 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import os
 import re
 try:
     # Python2 (load first - due to incompatible interface)
@@ -29,14 +30,30 @@ except ImportError:
 from struct import unpack
 
 from pycam.Geometry import epsilon
-from pycam.Geometry.Model import Model
+from pycam.Geometry.Model import MeshModel, Model
 from pycam.Geometry.PointKdtree import PointKdtree
 from pycam.Geometry.PointUtils import pcross, pdot, pnormalized, psub
 from pycam.Geometry.Triangle import Triangle
+from pycam.Geometry.TriangleMesh import get_face_normals, TriangleMesh
 import pycam.Utils.log
 import pycam.Utils
 log = pycam.Utils.log.get_logger()
 
+try:
+    import numpy
+    numpy_enabled = True
+    # layout of a facet in a binary STL file (50 bytes)
+    BINARY_FACET_DTYPE = numpy.dtype([("normal", "<f4", (3, )), ("vertices", "<f4", (3, 3)),
+                                      ("attributes", "<u2")])
+except ImportError:
+    numpy_enabled = False
+
+# size of the header of binary STL files (comment and number of facets)
+BINARY_HEADER_SIZE = 84
+# Vertices closer than this distance are merged. This matches the tolerance of the PointKdtree
+# used for text files (it compares the squared distance with "epsilon").
+VERTEX_MERGE_DISTANCE = epsilon ** 0.5
+
 
 vertices = 0
 edges = 0
@@ -84,6 +101,95 @@ def get_facet_count_if_binary_format(source):
         return facet_count
 
 
+def _read_binary_facets(filename, facet_count, source=None):
+    """ decode all facets of a binary STL file at once
+
+    Local files are mapped into memory. Otherwise the remaining content of the "source" stream
+    (located after the header) is read.
+    """
+    if source is None:
+        available = (os.path.getsize(filename) - BINARY_HEADER_SIZE) // BINARY_FACET_DTYPE.itemsize
+    else:
+        data = source.read()
+        available = len(data) // BINARY_FACET_DTYPE.itemsize
+    if available < facet_count:
+        log.warning("STLImporter: the file '%s' seems to be truncated (%d of %d facets are "
+                    "available)", filename, available, facet_count)
+        facet_count = available
+    if facet_count <= 0:
+        return numpy.zeros(0, dtype=BINARY_FACET_DTYPE)
+    elif source is None:
+        return numpy.memmap(filename, dtype=BINARY_FACET_DTYPE, mode="r",
+                            offset=BINARY_HEADER_SIZE, shape=(facet_count, ))
+    else:
+        return numpy.frombuffer(data, dtype=BINARY_FACET_DTYPE, count=facet_count)
+
+
+def _merge_vertices(points):
+    """ merge points with the same rounded coordinates
+
+    The result is the array of unique vertices and the vertex index for every point. The first
+    point of every group is used as its vertex.
+    """
+    keys = numpy.floor(points / VERTEX_MERGE_DISTANCE + 0.5).astype(numpy.int64)
+    # a stable sort keeps the first point of every group in front
+    order = numpy.lexsort((keys[:, 2], keys[:, 1], keys[:, 0]))
+    sorted_keys = keys[order]
+    is_first = numpy.empty(len(points), dtype=bool)
+    is_first[0] = True
+    is_first[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    point_indices = numpy.empty(len(points), dtype=numpy.intp)
+    point_indices[order] = numpy.cumsum(is_first) - 1
+    return points[order[is_first]], point_indices
+
+
+def _import_binary_model(facets, filename, merge_vertices=True, callback=None):
+    """ turn the facets of a binary STL file into a MeshModel
+
+    The validation of the facets is equivalent to the per-facet import of binary files, but all
+    steps are vectorized. Vertices are merged by sorting their rounded coordinates.
+    """
+    if callback and callback():
+        log.warning("STLImporter: load model operation cancelled")
+        return None
+    normals = numpy.array(facets["normal"], dtype=numpy.float64)
+    points = numpy.array(facets["vertices"], dtype=numpy.float64).reshape(-1, 3)
+    if merge_vertices and len(points) > 0:
+        vertices, point_indices = _merge_vertices(points)
+        faces = point_indices.reshape(-1, 3)
+    else:
+        vertices = points
+        faces = numpy.arange(len(points)).reshape(-1, 3)
+    p1, p2, p3 = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+    cross = numpy.cross(p2 - p1, p3 - p1)
+    has_normal = (normals != 0).any(axis=1)
+    # facets without a normal are expected to point upwards
+    dotcross = numpy.where(has_normal, (normals * cross).sum(axis=1), cross[:, 2])
+    conflicts = numpy.flatnonzero(dotcross < 0)
+    if len(conflicts) > 0:
+        log.warning("Inconsistent normal/vertices found in facet definition %d of '%s'. "
+                    "Please validate the STL file!", conflicts[0] + 1, filename)
+    invalid = numpy.flatnonzero(dotcross == 0)
+    if len(invalid) > 0:
+        log.warning("Skipping %d invalid triangles (e.g. facet %d of '%s') - maybe the "
+                    "resolution of the model is too high?", len(invalid), invalid[0] + 1, filename)
+    # Triangle expects the vertices in clockwise order
+    faces = numpy.where((dotcross > 0)[:, numpy.newaxis], faces[:, [0, 2, 1]], faces)
+    valid = dotcross != 0
+    faces = faces[valid]
+    has_normal = has_normal[valid]
+    normals = numpy.where(has_normal[:, numpy.newaxis], normals[valid],
+                          get_face_normals(vertices, faces))
+    model = MeshModel(TriangleMesh(vertices, faces, normals))
+    log.info("Imported STL model: %d vertices, %d edges, %d triangles",
+             len(vertices), 0, len(model))
+    if not model:
+        # no valid items added to the model
+        return None
+    else:
+        return model
+
+
 def ImportModel(filename, use_kdtree=True, callback=None, **kwargs):
     global vertices, edges, kdtree
     vertices = 0
@@ -97,6 +203,21 @@ def ImportModel(filename, use_kdtree=True, callback=None, **kwargs):
         f = BufferedReader(filename)
         # useful for later error messages
         filename = "input stream"
+    elif numpy_enabled and pycam.Utils.URIHandler(filename).is_local():
+        # local binary files are mapped into memory - text files are read completely
+        local_path = pycam.Utils.URIHandler(filename).get_local_path()
+        try:
+            with open(local_path, "rb") as local_file:
+                reader = BufferedReader(local_file)
+                facet_count = get_facet_count_if_binary_format(reader)
+                if facet_count is None:
+                    f = BufferedReader(BytesIO(reader.read()))
+        except IOError as err_msg:
+            log.error("STLImporter: Failed to read file (%s): %s", filename, err_msg)
+            return None
+        if facet_count is not None:
+            return _import_binary_model(_read_binary_facets(local_path, facet_count), filename,
+                                        merge_vertices=use_kdtree, callback=callback)
     else:
         try:
             url_file = pycam.Utils.URIHandler(filename).open()
@@ -112,6 +233,12 @@ def ImportModel(filename, use_kdtree=True, callback=None, **kwargs):
     facet_count = get_facet_count_if_binary_format(f)
     is_binary = (facet_count is not None)
 
+    if is_binary and numpy_enabled:
+        # skip the header
+        f.read(BINARY_HEADER_SIZE)
+        return _import_binary_model(_read_binary_facets(filename, facet_count, source=f),
+                                    filename, merge_vertices=use_kdtree, callback=callback)
+
     if use_kdtree:
         kdtree = PointKdtree([], 3, 1, epsilon)
     model = Model(use_kdtree)
@@ -122,6 +249,8 @@ def ImportModel(filename, use_kdtree=True, callback=None, **kwargs):
     p3 = None
 
     if is_binary:
+        # skip the header
+        f.read(BINARY_HEADER_SIZE)
         for i in range(1, facet_count + 1):
             if callback and callback():
                 log.warn("STLImporter: load model operation cancelled")
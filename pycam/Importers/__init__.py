@@ -31,8 +31,14 @@ _log = pycam.Utils.log.get_logger()
 DetectedFileType = collections.namedtuple("DetectedFileType", ("extension", "importer", "uri"))
 
 
-def detect_file_type(filename, quiet=False):
+def detect_file_type(filename, quiet=False, use_cache=True):
+    """ find the importer for a file
+
+    The returned importer consults the on-disk model cache first (see ModelCache), unless
+    "use_cache" is disabled.
+    """
     import pycam.Importers.DXFImporter
+    import pycam.Importers.ModelCache
     import pycam.Importers.PSImporter
     import pycam.Importers.STLImporter
     import pycam.Importers.SVGImporter
@@ -42,16 +48,19 @@ def detect_file_type(filename, quiet=False):
     # check all listed importers
     # TODO: this should be done by evaluating the header of the file
     if filename.lower().endswith(".stl"):
-        return DetectedFileType("stl", pycam.Importers.STLImporter.ImportModel, uri)
+        file_type, importer = "stl", pycam.Importers.STLImporter.ImportModel
     elif filename.lower().endswith(".dxf"):
-        return DetectedFileType("dxf", pycam.Importers.DXFImporter.import_model, uri)
+        file_type, importer = "dxf", pycam.Importers.DXFImporter.import_model
     elif filename.lower().endswith(".svg"):
-        return DetectedFileType("svg", pycam.Importers.SVGImporter.import_model, uri)
+        file_type, importer = "svg", pycam.Importers.SVGImporter.import_model
     elif filename.lower().endswith(".eps") \
             or filename.lower().endswith(".ps"):
-        return DetectedFileType("ps", pycam.Importers.PSImporter.import_model, uri)
+        file_type, importer = "ps", pycam.Importers.PSImporter.import_model
     else:
         if not quiet:
             _log.error("Importers: Failed to detect the model type of '%s'. Is the file extension "
                        "(stl/dxf/svg/eps/ps) correct?", filename)
         return None
+    if use_cache:
+        importer = pycam.Importers.ModelCache.get_cached_importer(importer, file_type)
+    return DetectedFileType(file_type, importer, uri)
@@ -24,6 +24,7 @@ take a look at the related blog posting describing this algorithm:
 """
 
 from pycam.Geometry import ceil, epsilon, sqrt
+from pycam.Geometry.IntervalSweep import IntervalSweep
 from pycam.Geometry.Line import Line
 from pycam.Geometry.Plane import Plane
 from pycam.Geometry.PointUtils import padd, pcross, pdot, pmul, pnorm, pnormalized, psub
@@ -194,7 +195,8 @@ class ContourFollow(object):
     def __init__(self, path_processor):
         self.pa = path_processor
         self._up_vector = (0, 0, 1, 'v')
-        self._processed_triangles = []
+        self._processed_triangles = set()
+        self._z_sweep = None
 
     def _get_free_paths(self, cutter, models, p1, p2):
         return get_free_paths_triangles(models, cutter, p1, p2)
@@ -202,7 +204,8 @@ class ContourFollow(object):
     def GenerateToolPath(self, cutter, models, minx, maxx, miny, maxy, minz, maxz, dz,
                          draw_callback=None):
         # reset the list of processed triangles
-        self._processed_triangles = []
+        self._processed_triangles = set()
+        self._z_sweep = None
         # calculate the number of steps
         # Sometimes there is a floating point accuracy issue: make sure
         # that only one layer is drawn, if maxz and minz are almost the same.
@@ -272,19 +275,34 @@ class ContourFollow(object):
         self.pa.end_scanline()
         return self.pa.paths
 
+    def _get_triangles_above(self, model, minx, maxx, miny, maxy, z):
+        """ return the triangles within the box reaching up to the given height
+
+        Lower triangles are irrelevant for this layer (see "_process_one_triangle"). The layers
+        are processed from top to bottom: the triangles of the previous layer are kept and only
+        the triangles reaching up to the new layer are added (see "IntervalSweep").
+        """
+        key = (id(model), getattr(model, "uuid", None), minx, maxx, miny, maxy)
+        if (self._z_sweep is None) or (self._z_sweep[0] != key):
+            triangles = model.triangles(minx=minx, miny=miny, maxx=maxx, maxy=maxy)
+            sweep = IntervalSweep(None, [triangle.maxz for triangle in triangles])
+            self._z_sweep = (key, triangles, sweep)
+        triangles, sweep = self._z_sweep[1:]
+        return [triangles[index] for index in sweep.get_indices(z)]
+
     def get_potential_contour_lines(self, cutter, model, minx, maxx, miny, maxy, z,
                                     progress_counter=None):
         # use only the first model for the contour
         follow_model = model
         waterline_triangles = CollisionPaths()
-        triangles = follow_model.triangles(minx=minx, miny=miny, maxx=maxx, maxy=maxy)
+        triangles = self._get_triangles_above(follow_model, minx, maxx, miny, maxy, z)
         args = [(follow_model, cutter, self._up_vector, t, z)
                 for t in triangles if id(t) not in self._processed_triangles]
         results_iter = run_in_parallel(_process_one_triangle, args, unordered=True,
                                        callback=progress_counter.update)
         for result, ignore_triangle_id_list in results_iter:
             if ignore_triangle_id_list:
-                self._processed_triangles.extend(ignore_triangle_id_list)
+                self._processed_triangles.update(ignore_triangle_id_list)
             for edge, shifted_edge in result:
                 waterline_triangles.add(edge, shifted_edge)
             if (progress_counter is not None) and (progress_counter.increment()):
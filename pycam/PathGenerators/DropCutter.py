@@ -21,6 +21,7 @@ along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 
 import pycam.Geometry.Model
 from pycam.PathGenerators import get_max_height_dynamic
+from pycam.PathGenerators.HeightmapCache import get_heightmap_cache
 from pycam.Toolpath.Steps import MoveStraight, MoveSafety
 from pycam.Utils import ProgressCounter
 from pycam.Utils.threading import run_in_parallel
@@ -36,12 +37,17 @@ def _process_one_grid_line(extra_args):
     Otherwise the dynamic over-sampling (in get_max_height_dynamic) is
     pointless.
     """
-    positions, minz, maxz, model, cutter = extra_args
-    return get_max_height_dynamic(model, cutter, positions, minz, maxz)
+    positions, minz, maxz, model, cutter, heightmap = extra_args
+    return get_max_height_dynamic(model, cutter, positions, minz, maxz, heightmap=heightmap)
 
 
 class DropCutter(object):
 
+    def __init__(self, use_heightmap=False):
+        # Interpolated drop heights (see "HeightmapCache") are shared between toolpaths of the same
+        # model and cutter. Only positions above planar parts of the model are interpolated.
+        self.use_heightmap = use_heightmap
+
     def GenerateToolPath(self, cutter, models, motion_grid, minz=None, maxz=None,
                          draw_callback=None):
         path = []
@@ -60,11 +66,25 @@ class DropCutter(object):
         progress_counter = ProgressCounter(len(lines), draw_callback)
         current_line = 0
 
+        # simplify the data (useful for remote processing)
+        lines = [[(pos[0], pos[1]) for pos in one_grid_line] for one_grid_line in lines]
+        # Drop heights are stored in a lattice shared with other tasks for the same model and
+        # cutter. Previously calculated areas just need to be interpolated.
+        if self.use_heightmap:
+            heightmap = get_heightmap_cache(model, cutter, minz, maxz)
+        else:
+            heightmap = None
+        if heightmap is not None:
+            if draw_callback and draw_callback(text="DropCutter: preparing the heightmap"):
+                return path
+            if heightmap.fill(model, cutter, minz, maxz, lines, callback=draw_callback):
+                return path
+
         args = []
-        for one_grid_line in lines:
-            # simplify the data (useful for remote processing)
-            xy_coords = [(pos[0], pos[1]) for pos in one_grid_line]
-            args.append((xy_coords, minz, maxz, model, cutter))
+        for xy_coords in lines:
+            # every task receives only the relevant part of the heightmap
+            window = None if heightmap is None else heightmap.get_window(xy_coords)
+            args.append((xy_coords, minz, maxz, model, cutter, window))
         for points in run_in_parallel(_process_one_grid_line, args,
                                       callback=progress_counter.update):
             if draw_callback and draw_callback(
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import collections
+import hashlib
+
+import pycam.Geometry.intersection_batch as intersection_batch
+from pycam.PathGenerators import get_max_height_batch
+from pycam.Utils.threading import run_in_parallel
+import pycam.Utils.log
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+log = pycam.Utils.log.get_logger()
+
+# maximum deviation of the surrounding lattice heights from a common plane - otherwise heights
+# are calculated exactly
+DEFAULT_TOLERANCE = 0.000001
+# distance between neighbouring lattice nodes (relative to the radius of the cutter)
+RESOLUTION_FACTOR = 0.5
+# number of lattice nodes calculated by a single parallel task
+FILL_CHUNK_SIZE = 64
+# number of heightmaps kept in memory (the least recently used one is discarded)
+MAX_HEIGHTMAPS = 4
+# maximum number of lattice nodes of all shared heightmaps (16 bytes each)
+MAX_NODES = 2 ** 22
+
+# lattice nodes are identified by a single integer combining the column and the row
+_KEY_OFFSET = 2 ** 30
+_KEY_SHIFT = 31
+# the acceptance of the interpolation depends on the surrounding cell and its neighbours (4x4)
+_STENCIL = numpy.arange(-1, 3) if numpy_enabled else None
+
+# heightmaps indexed by model content, cutter shape and height range
+_heightmaps = collections.OrderedDict()
+
+
+def _get_node_keys(columns, rows):
+    return ((columns + _KEY_OFFSET) << _KEY_SHIFT) | (rows + _KEY_OFFSET)
+
+
+def _get_node_positions(keys, resolution):
+    columns = (keys >> _KEY_SHIFT) - _KEY_OFFSET
+    rows = (keys & (2 ** _KEY_SHIFT - 1)) - _KEY_OFFSET
+    return numpy.column_stack((columns, rows)) * resolution
+
+
+def _get_cells(positions, resolution):
+    """ return the lattice cells containing the positions and the offsets within these cells """
+    scaled = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 2) / resolution
+    cells = numpy.floor(scaled)
+    return cells.astype(numpy.int64), scaled - cells
+
+
+def _get_stencil_keys(cells):
+    """ return the keys of the 4x4 lattice nodes surrounding every cell """
+    columns = cells[:, 0, numpy.newaxis, numpy.newaxis] + _STENCIL[numpy.newaxis, :, numpy.newaxis]
+    rows = cells[:, 1, numpy.newaxis, numpy.newaxis] + _STENCIL[numpy.newaxis, numpy.newaxis, :]
+    return _get_node_keys(*numpy.broadcast_arrays(columns, rows))
+
+
+def _lookup(keys, values, queries):
+    """ return the values of the given keys ("nan" for unknown keys) """
+    if len(keys) == 0:
+        return numpy.full(numpy.shape(queries), numpy.nan)
+    indices = numpy.minimum(numpy.searchsorted(keys, queries), len(keys) - 1)
+    return numpy.where(keys[indices] == queries, values[indices], numpy.nan)
+
+
+def _get_model_key(model):
+    # Models are copied for every task (see "get_combined_model"). Thus their uuid changes, while
+    # their content stays the same.
+    digest = hashlib.sha1()
+    if hasattr(model, "mesh"):
+        arrays = (model.mesh.vertices, model.mesh.faces)
+    else:
+        arrays = model.get_triangle_arrays()
+    for array in arrays:
+        digest.update(numpy.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _discard_heightmaps(heightmap, additional_nodes):
+    """ discard the least recently used shared heightmaps until the nodes of "heightmap" can grow
+    by "additional_nodes" without exceeding MAX_NODES
+    """
+    total = sum(len(item) for item in _heightmaps.values()) + additional_nodes
+    if heightmap not in _heightmaps.values():
+        total += len(heightmap)
+    for key, item in list(_heightmaps.items()):
+        if total <= MAX_NODES:
+            break
+        if item is not heightmap:
+            log.debug("Discarding a heightmap (%d nodes)", len(item))
+            total -= len(item)
+            del _heightmaps[key]
+    return total <= MAX_NODES
+
+
+def clear_heightmap_cache():
+    """ discard all heightmaps (e.g. for measuring the calculation of drop heights) """
+    _heightmaps.clear()
+
+
+def get_heightmap_cache(model, cutter, minz, maxz):
+    """ return the shared heightmap for the combination of model, cutter and height range
+
+    The result is None, if the cutter shape or the model is not supported (e.g. a contour model
+    used for engraving) or if numpy is missing.
+    """
+    if not numpy_enabled or not hasattr(model, "get_triangle_arrays"):
+        return None
+    profile = intersection_batch.get_cutter_profile(cutter)
+    if profile is None:
+        return None
+    key = (_get_model_key(model), profile.major_radius, profile.minor_radius,
+           profile.center_offset, minz, maxz)
+    heightmap = _heightmaps.pop(key, None)
+    if heightmap is None:
+        heightmap = HeightmapCache(profile.radius * RESOLUTION_FACTOR)
+    # the most recently used heightmap is the last one
+    _heightmaps[key] = heightmap
+    while len(_heightmaps) > MAX_HEIGHTMAPS:
+        _heightmaps.popitem(last=False)
+    return heightmap
+
+
+def _fill_nodes(extra_args):
+    positions, minz, maxz, model, cutter = extra_args
+    # "None" (the cutter exceeds maxz) is stored as an infinite height
+    return [numpy.inf if point is None else point[2]
+            for point in get_max_height_batch(model, cutter, positions, minz, maxz)]
+
+
+class HeightmapWindow(object):
+    """ a part of a heightmap - suitable for transferring it to a worker process
+
+    Heights are interpolated (bilinear) between the nodes of a regular x/y lattice. The
+    interpolation is accepted only if the surrounding 4x4 lattice nodes lie on a common plane.
+    Otherwise the interpolation of curved surfaces, edges and steps could be lower than the exact
+    drop height (the cutter would gouge the model). Small cavities between the lattice nodes are
+    still missed (the cutter leaves material there).
+    """
+
+    def __init__(self, resolution, tolerance=DEFAULT_TOLERANCE, keys=None, heights=None):
+        self.resolution = resolution
+        self.tolerance = tolerance
+        self._keys = numpy.zeros(0, dtype=numpy.int64) if keys is None else keys
+        self._heights = numpy.zeros(0, dtype=numpy.float64) if heights is None else heights
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get_heights(self, positions):
+        """ return the interpolated heights for a list of x/y positions
+
+        Positions requiring an exact calculation are marked as "nan". This includes positions
+        next to lattice nodes exceeding the maximum height of the heightmap.
+        """
+        cells, offsets = _get_cells(positions, self.resolution)
+        heights = _lookup(self._keys, self._heights, _get_stencil_keys(cells))
+        count = len(heights)
+        with numpy.errstate(invalid="ignore"):
+            # The second differences (along both axes and mixed) of a plane are zero. "nan"
+            # (unknown or infinite heights) propagates.
+            diff_x = heights[:, 2:, :] - 2 * heights[:, 1:-1, :] + heights[:, :-2, :]
+            diff_y = heights[:, :, 2:] - 2 * heights[:, :, 1:-1] + heights[:, :, :-2]
+            diff_xy = heights[:, 1:, 1:] - heights[:, 1:, :-1] - heights[:, :-1, 1:] \
+                + heights[:, :-1, :-1]
+            deviation = numpy.maximum(numpy.abs(diff_x).reshape(count, -1).max(axis=1),
+                                      numpy.abs(diff_y).reshape(count, -1).max(axis=1))
+            deviation = numpy.maximum(deviation, numpy.abs(diff_xy).reshape(count, -1).max(axis=1))
+            valid = deviation <= self.tolerance
+            weights_x = numpy.column_stack((1 - offsets[:, 0], offsets[:, 0]))
+            weights_y = numpy.column_stack((1 - offsets[:, 1], offsets[:, 1]))
+            result = numpy.einsum("na,nb,nab->n", weights_x, weights_y, heights[:, 1:3, 1:3])
+        result[~valid] = numpy.nan
+        return result
+
+
+class HeightmapCache(HeightmapWindow):
+    """ drop heights of a cutter on a regular x/y lattice - filled on demand
+
+    The heightmap is shared between toolpath calculations for the same model, cutter shape and
+    height range (see "get_heightmap_cache"). Lattice nodes are calculated only around the
+    requested positions. Thus repeated calculations with different line distances or patterns
+    need to calculate exactly only the positions above non-planar parts of the model.
+    """
+
+    def fill(self, model, cutter, minz, maxz, lines, callback=None):
+        """ calculate the missing lattice nodes around the positions of the given lines
+
+        The calculation is distributed to parallel processes. The result is True, if the
+        operation was cancelled via the callback.
+        """
+        positions = [pos for line in lines for pos in line]
+        if not positions:
+            return False
+        cells = _get_cells(positions, self.resolution)[0]
+        keys = numpy.unique(_get_stencil_keys(cells))
+        missing = keys[numpy.isnan(_lookup(self._keys, self._heights, keys))]
+        if len(missing) == 0:
+            return False
+        if not _discard_heightmaps(self, len(missing)):
+            log.debug("Discarding the heightmap (%d nodes)", len(self._keys))
+            self._keys = self._keys[:0]
+            self._heights = self._heights[:0]
+            if not _discard_heightmaps(self, len(missing)):
+                return False
+        # The keys are sorted by column and row. Thus every chunk covers a compact area.
+        node_positions = _get_node_positions(missing, self.resolution)
+        args = []
+        for start in range(0, len(missing), FILL_CHUNK_SIZE):
+            chunk = [tuple(pos) for pos in node_positions[start:start + FILL_CHUNK_SIZE].tolist()]
+            args.append((chunk, minz, maxz, model, cutter))
+        heights = []
+        for chunk_heights in run_in_parallel(_fill_nodes, args, callback=callback):
+            heights.extend(chunk_heights)
+        if len(heights) < len(missing):
+            # cancel requested
+            return True
+        keys = numpy.concatenate((self._keys, missing))
+        order = numpy.argsort(keys, kind="mergesort")
+        self._keys = keys[order]
+        self._heights = numpy.concatenate((self._heights, heights))[order]
+        return False
+
+    def get_window(self, positions):
+        """ return the known lattice nodes required for interpolating the given positions """
+        cells = _get_cells(positions, self.resolution)[0]
+        keys = numpy.unique(_get_stencil_keys(cells))
+        heights = _lookup(self._keys, self._heights, keys)
+        known = ~numpy.isnan(heights)
+        return HeightmapWindow(self.resolution, self.tolerance, keys[known], heights[known])
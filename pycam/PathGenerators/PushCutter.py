@@ -19,7 +19,7 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from pycam.PathGenerators import get_free_paths_triangles
+from pycam.PathGenerators import get_free_paths_batch
 import pycam.PathProcessors.ContourCutter
 from pycam.Utils.threading import run_in_parallel
 from pycam.Utils import ProgressCounter
@@ -29,13 +29,33 @@ from pycam.Toolpath.Steps import MoveStraight, MoveSafety
 
 log = pycam.Utils.log.get_logger()
 
+# Neighbouring lines of a layer are processed together. This allows to share the collection of
+# triangles and to vectorize the calculation (see "get_free_paths_batch").
+LINES_PER_TASK = 32
+
 
 # We need to use a global function here - otherwise it does not work with
 # the multiprocessing Pool.
-def _process_one_line(extra_args):
-    p1, p2, models, cutter = extra_args
-    points = get_free_paths_triangles(models, cutter, p1, p2)
-    return points
+def _process_lines(extra_args):
+    lines, models, cutter = extra_args
+    return get_free_paths_batch(models, cutter, lines)
+
+
+def _process_waterline_layer(extra_args):
+    """ turn the free parts of the lines of one layer into waterlines (lists of points) """
+    lines_points, = extra_args
+    processor = pycam.PathProcessors.ContourCutter.ContourCutter()
+    processor.new_direction(0)
+    for points in lines_points:
+        if points:
+            processor.new_scanline()
+            for point in points:
+                processor.append(point)
+            processor.end_scanline()
+    processor.end_direction()
+    processor.finish()
+    # the points of the paths cannot be pickled
+    return [[tuple(point) for point in path.points] for path in processor.paths]
 
 
 class PushCutter(object):
@@ -59,94 +79,117 @@ class PushCutter(object):
 
         num_of_layers = len(grid)
 
-        progress_counter = ProgressCounter(num_of_grid_positions, draw_callback)
-
-        current_layer = 0
         if self.waterlines:
-            self.pa = pycam.PathProcessors.ContourCutter.ContourCutter()
+            # the waterlines of every layer are extracted separately
+            progress_counter = ProgressCounter(num_of_grid_positions + num_of_layers,
+                                               draw_callback)
         else:
-            path = []
-        for layer_grid in grid:
+            progress_counter = ProgressCounter(num_of_grid_positions, draw_callback)
+
+        # The lines of all layers are processed as one job. Thus the parallel processes do not
+        # need to wait for the end of every layer.
+        task_layers = []
+        args = []
+        for layer_index, layer_grid in enumerate(grid):
+            layer_args = self._get_layer_tasks(cutter, models, layer_grid)
+            task_layers.extend([layer_index] * len(layer_args))
+            args.extend(layer_args)
+        path = []
+        # the free parts of the lines of every layer (waterlines)
+        layer_results = [[] for layer_grid in grid]
+        current_layer = None
+        quit_requested = False
+        for layer_index, lines_points in zip(task_layers, run_in_parallel(
+                _process_lines, args, callback=progress_counter.update)):
             # update the progress bar and check, if we should cancel the process
-            if draw_callback and draw_callback(text=("PushCutter: processing layer %d/%d"
-                                                     % (current_layer + 1, num_of_layers))):
+            if (layer_index != current_layer) and draw_callback and draw_callback(
+                    text=("PushCutter: processing layer %d/%d"
+                          % (layer_index + 1, num_of_layers))):
                 # cancel immediately
+                quit_requested = True
+            current_layer = layer_index
+            for points in lines_points:
+                if quit_requested:
+                    break
+                quit_requested = self._process_line_result(
+                    points, layer_results[layer_index] if self.waterlines else path,
+                    draw_callback, progress_counter)
+            if quit_requested:
                 break
 
-            if self.waterlines:
-                self.pa.new_direction(0)
-            result = self.GenerateToolPathSlice(cutter, models, layer_grid, draw_callback,
-                                                progress_counter)
-            if self.waterlines:
-                self.pa.end_direction()
-                self.pa.finish()
-            else:
-                path.extend(result)
-
-            current_layer += 1
-
-        if self.waterlines:
-            # TODO: this is complicated and hacky :(
-            # we don't use parallelism (for the sake of simplicity)
-            result = []
-            # turn the waterline points into cutting segments
-            for path in self.pa.paths:
-                pairs = []
-                for index in range(len(path.points) - 1):
-                    pairs.append((path.points[index], path.points[index + 1]))
-                if len(models) > 1:
-                    # We assume that the first model is used for the waterline and all
-                    # other models are obstacles (e.g. a support grid).
-                    other_models = models[1:]
-                    for p1, p2 in pairs:
-                        free_points = get_free_paths_triangles(other_models, cutter, p1, p2)
-                        for index in range(len(free_points) / 2):
-                            result.append(MoveStraight(free_points[2 * index]))
-                            result.append(MoveStraight(free_points[2 * index + 1]))
-                            result.append(MoveSafety())
-                else:
-                    for p1, p2 in pairs:
-                        result.append(MoveStraight(p1))
-                        result.append(MoveStraight(p2))
-                        result.append(MoveSafety())
-            return result
-        else:
+        if not self.waterlines:
             return path
+        if quit_requested:
+            return []
+
+        waterlines = []
+        for layer_paths in run_in_parallel(_process_waterline_layer,
+                                           [(lines_points, ) for lines_points in layer_results],
+                                           callback=progress_counter.update):
+            waterlines.extend(layer_paths)
+            if progress_counter.increment():
+                return []
+        # the upper layers come first (see "BasePathProcessor.sort_layered")
+        waterlines.sort(key=lambda points: -points[0][2])
+        result = []
+        # turn the waterline points into cutting segments
+        for points in waterlines:
+            pairs = list(zip(points, points[1:]))
+            if len(models) > 1:
+                # We assume that the first model is used for the waterline and all
+                # other models are obstacles (e.g. a support grid).
+                other_models = models[1:]
+                for free_points in get_free_paths_batch(other_models, cutter, pairs):
+                    for index in range(len(free_points) // 2):
+                        result.append(MoveStraight(free_points[2 * index]))
+                        result.append(MoveStraight(free_points[2 * index + 1]))
+                        result.append(MoveSafety())
+            else:
+                for p1, p2 in pairs:
+                    result.append(MoveStraight(p1))
+                    result.append(MoveStraight(p2))
+                    result.append(MoveSafety())
+        return result
 
-    def GenerateToolPathSlice(self, cutter, models, layer_grid, draw_callback=None,
-                              progress_counter=None):
-        path = []
+    def _get_layer_tasks(self, cutter, models, layer_grid):
         # the ContourCutter pathprocessor does not work with combined models
         if self.waterlines:
             models = models[:1]
-        else:
-            models = models
         args = []
-        for line in layer_grid:
-            p1, p2 = line
-            args.append((p1, p2, models, cutter))
-        for points in run_in_parallel(_process_one_line, args, callback=progress_counter.update):
-            if points:
-                if self.waterlines:
-                    self.pa.new_scanline()
-                    for point in points:
-                        self.pa.append(point)
-                else:
-                    for index in range(len(points) / 2):
-                        path.append(MoveStraight(points[2 * index]))
-                        path.append(MoveStraight(points[2 * index + 1]))
-                        path.append(MoveSafety())
-                if self.waterlines:
-                    if draw_callback:
-                        draw_callback(tool_position=points[-1])
-                    self.pa.end_scanline()
-                else:
-                    if draw_callback:
-                        draw_callback(tool_position=points[-1], toolpath=path)
-            # update the progress counter
-            if progress_counter and progress_counter.increment():
-                # quit requested
-                break
+        for index in range(0, len(layer_grid), LINES_PER_TASK):
+            lines = [tuple(line) for line in layer_grid[index:index + LINES_PER_TASK]]
+            args.append((lines, models, cutter))
+        return args
 
-        if not self.waterlines:
-            return path
+    def GenerateToolPathSlice(self, cutter, models, layer_grid, draw_callback=None,
+                              progress_counter=None):
+        """ return the toolpath of a single layer or the free parts of its lines (waterlines)
+        """
+        result = []
+        callback = progress_counter.update if progress_counter else None
+        for lines_points in run_in_parallel(_process_lines,
+                                            self._get_layer_tasks(cutter, models, layer_grid),
+                                            callback=callback):
+            for points in lines_points:
+                if self._process_line_result(points, result, draw_callback, progress_counter):
+                    return result
+        return result
+
+    def _process_line_result(self, points, result, draw_callback, progress_counter):
+        """ add the free points of one line to the path (or to the lines of a waterline layer)
+
+        Return True, if the user requested to quit.
+        """
+        if self.waterlines:
+            result.append(points)
+            if points and draw_callback:
+                draw_callback(tool_position=points[-1])
+        elif points:
+            for index in range(len(points) // 2):
+                result.append(MoveStraight(points[2 * index]))
+                result.append(MoveStraight(points[2 * index + 1]))
+                result.append(MoveSafety())
+            if draw_callback:
+                draw_callback(tool_position=points[-1], toolpath=result)
+        # update the progress counter
+        return bool(progress_counter and progress_counter.increment())
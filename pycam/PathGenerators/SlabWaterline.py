@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+
+try:
+    import numpy
+except ImportError:
+    # see "offset_batch.numpy_enabled"
+    pass
+
+from pycam.Geometry import epsilon
+import pycam.Geometry.intersection_batch as intersection_batch
+import pycam.Geometry.offset_batch as offset_batch
+from pycam.PathGenerators import get_free_paths_batch
+import pycam.PathGenerators.PushCutter
+from pycam.Toolpath.MotionGrid import MillingStyle
+from pycam.Toolpath.Steps import MoveStraight, MoveSafety
+from pycam.Utils import ProgressCounter
+import pycam.Utils.log
+
+
+log = pycam.Utils.log.get_logger()
+
+# maximum deviation of the waterlines (always keeping a safe distance from the model)
+DEFAULT_ACCURACY = 0.05
+
+
+def get_slabs(profile, accuracy):
+    """ return the slabs of the cutter: its lower end (relative to the cutter location) and the
+    horizontal reach of the cutter within the slab
+
+    The reach of rounded cutters grows towards the center of their profile. This part is split
+    into slabs with a growth of the reach below "accuracy". The reach at the top of every slab is
+    used for the whole slab. The last slab (up to the infinite top of the cutter) has the full
+    radius.
+    """
+    slabs = []
+    if profile.minor_radius > 0:
+        count = int(math.ceil(profile.minor_radius / accuracy))
+        for index in range(count):
+            ring_distance = profile.minor_radius * index / count
+            bottom = profile.center_offset - math.sqrt(profile.minor_radius ** 2
+                                                       - ring_distance ** 2)
+            reach = profile.major_radius + profile.minor_radius * (index + 1) / count
+            slabs.append((bottom, reach))
+    slabs.append((profile.center_offset, profile.radius))
+    return slabs
+
+
+def _crop_segment(start, end, minx, maxx, miny, maxy):
+    """ return the part of a line within a rectangle or None (Liang-Barsky) """
+    low, high = 0.0, 1.0
+    delta = (end[0] - start[0], end[1] - start[1])
+    for axis, minimum, maximum in ((0, minx, maxx), (1, miny, maxy)):
+        if delta[axis] == 0:
+            if not minimum <= start[axis] <= maximum:
+                return None
+            continue
+        to_min = (minimum - start[axis]) / delta[axis]
+        to_max = (maximum - start[axis]) / delta[axis]
+        low = max(low, min(to_min, to_max))
+        high = min(high, max(to_min, to_max))
+    if low >= high:
+        return None
+
+    def get_point(fraction):
+        return tuple(s + fraction * (e - s) for s, e in zip(start, end))
+
+    return (start if low == 0 else get_point(low)), (end if high == 1 else get_point(high))
+
+
+def _crop_polyline(points, minx, maxx, miny, maxy):
+    """ split a polyline into the parts within a rectangle """
+    result = []
+    current = []
+    for start, end in zip(points, points[1:]):
+        cropped = _crop_segment(start, end, minx, maxx, miny, maxy)
+        if cropped is None:
+            new_start, new_end = None, None
+        else:
+            new_start, new_end = cropped
+        if current and (current[-1] != new_start):
+            result.append(current)
+            current = []
+        if cropped is not None:
+            if not current:
+                current.append(new_start)
+            current.append(new_end)
+            if new_end != end:
+                result.append(current)
+                current = []
+    if current:
+        result.append(current)
+    return result
+
+
+class SlabWaterline(object):
+    """ calculate waterlines directly from the outline of the model above every layer
+
+    The model is sliced at the bottom of every slab of the cutter (see "get_slabs"). The slices
+    and the folds of the model are widened by the reach of the cutter. The outline of the
+    resulting area is the waterline.
+    This is an alternative to "PushCutter(waterlines=True)" accepting the same motion grid. Only
+    the height and the horizontal extent of its layers are used. Thus the calculation time does
+    not depend on the density of the grid.
+    """
+
+    def __init__(self, accuracy=DEFAULT_ACCURACY, milling_style=MillingStyle.IGNORE):
+        self.accuracy = accuracy
+        self.milling_style = milling_style
+
+    def GenerateToolPath(self, cutter, models, motion_grid, minz=None, maxz=None,
+                         draw_callback=None):
+        models = [model for model in models if model is not None]
+        profile = None
+        if (offset_batch.numpy_enabled and models
+                and all(hasattr(model, "get_triangle_arrays") for model in models)):
+            profile = intersection_batch.get_cutter_profile(cutter)
+        if profile is None:
+            log.info("Slab waterlines are not available for this cutter or model - falling back "
+                     "to the PushCutter")
+            generator = pycam.PathGenerators.PushCutter.PushCutter(waterlines=True)
+            return generator.GenerateToolPath(cutter, models, motion_grid, minz=minz, maxz=maxz,
+                                              draw_callback=draw_callback)
+        layers = []
+        for layer in motion_grid:
+            points = [point for line in layer for point in line]
+            if points:
+                layers.append((points[0][2], min(point[0] for point in points),
+                               max(point[0] for point in points),
+                               min(point[1] for point in points),
+                               max(point[1] for point in points)))
+        # We assume that the first model is used for the waterline and all other models are
+        # obstacles (e.g. a support grid).
+        triangles = models[0].get_triangle_arrays()
+        outline_edges = offset_batch.get_outline_edges(*triangles)
+        # the deviations caused by the slabs and by the approximated arcs add up
+        slabs = get_slabs(profile, self.accuracy / 2)
+        progress_counter = ProgressCounter(len(layers), draw_callback)
+        path = []
+        for index, (z, minx, maxx, miny, maxy) in enumerate(layers):
+            if draw_callback and draw_callback(text=("SlabWaterline: processing layer %d/%d"
+                                                     % (index + 1, len(layers)))):
+                # cancel immediately
+                break
+            for points in self._get_waterlines(slabs, triangles, outline_edges, z):
+                for polyline in _crop_polyline([(x, y, z) for x, y in points], minx, maxx, miny,
+                                               maxy):
+                    for part in self._split_by_obstacles(cutter, models[1:], polyline):
+                        # The outlines are counter-clockwise (the model is on the left side).
+                        # A clockwise spindle (M3) needs the model on the right side for climb
+                        # milling.
+                        if self.milling_style == MillingStyle.CLIMB:
+                            part.reverse()
+                        for point in part:
+                            path.append(MoveStraight(point))
+                        path.append(MoveSafety())
+            if draw_callback:
+                draw_callback(toolpath=path)
+            if progress_counter.increment():
+                break
+        return path
+
+    def _get_waterlines(self, slabs, triangles, outline_edges, z):
+        """ return the waterlines of a layer as lists of x/y points
+
+        Collisions are checked slightly (epsilon) above the layer. Thus surfaces at the same
+        height as the layer are not regarded as obstacles.
+        """
+        z += epsilon
+        p1, p2, p3 = triangles
+        above = numpy.maximum(numpy.maximum(p1[:, 2], p2[:, 2]), p3[:, 2]) > z + slabs[0][0]
+        p1, p2, p3 = p1[above], p2[above], p3[above]
+        edge_starts, edge_ends = outline_edges
+        segment_groups = []
+        for index, (bottom, reach) in enumerate(slabs):
+            level = z + bottom
+            top = z + slabs[index + 1][0] if index + 1 < len(slabs) else None
+            slice_starts, slice_ends = offset_batch.get_slice_segments(p1, p2, p3, level)
+            fold_starts, fold_ends = offset_batch.get_clipped_edges(edge_starts, edge_ends,
+                                                                    level, top)
+            segment_groups.append((numpy.concatenate((slice_starts, fold_starts)),
+                                   numpy.concatenate((slice_ends, fold_ends)),
+                                   reach))
+
+        # The remaining positions are out of reach of all slices and folds. Thus the cutter
+        # collides only with material located straight below its axis (within an enclosed area).
+        needle = intersection_batch.CutterProfile(0, 0, 0)
+
+        def is_blocked(positions):
+            heights = intersection_batch.drop_cutter_on_triangles(needle, positions, p1, p2, p3)
+            return heights > z + slabs[0][0]
+
+        return [points for points, is_closed in offset_batch.get_offset_outlines(
+            segment_groups, is_blocked, self.accuracy / 2)]
+
+    def _split_by_obstacles(self, cutter, obstacles, polyline):
+        """ remove the parts of a polyline colliding with other models """
+        if not obstacles:
+            return [polyline]
+        lines = list(zip(polyline, polyline[1:]))
+        result = []
+        current = []
+        for (start, end), points in zip(lines, get_free_paths_batch(obstacles, cutter, lines)):
+            for index in range(0, len(points), 2):
+                begin, finish = points[index], points[index + 1]
+                if current and (current[-1] != begin):
+                    result.append(current)
+                    current = []
+                if not current:
+                    current.append(begin)
+                current.append(finish)
+            if not points or (points[-1] != end):
+                if current:
+                    result.append(current)
+                current = []
+        if current:
+            result.append(current)
+        return result
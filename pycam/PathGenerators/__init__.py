@@ -19,9 +19,18 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import math
+
 from pycam.Geometry import epsilon, INFINITE
+import pycam.Geometry.intersection_batch as intersection_batch
 from pycam.Geometry.PointUtils import pdist, pnorm, pnormalized, psub
 
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
 
 class Hit(object):
     def __init__(self, cl, cp, t, d, direction):
@@ -128,6 +137,78 @@ def get_free_paths_triangles(models, cutter, p1, p2, return_triangles=False):
         return [cut_info[0] for cut_info in points]
 
 
+def _get_free_paths_parallel(models, profile, direction, lines):
+    """ calculate the free paths of parallel horizontal lines at once (see
+    "get_free_paths_batch")
+    """
+    starts = numpy.array([p1 for p1, p2 in lines], dtype=numpy.float64)
+    ends = numpy.array([p2 for p1, p2 in lines], dtype=numpy.float64)
+    lengths = numpy.sqrt(((ends - starts)[:, :2] ** 2).sum(axis=1))
+    margin = profile.radius + epsilon
+    low = numpy.minimum(starts, ends).min(axis=0) - margin
+    high = numpy.maximum(starts, ends).max(axis=0) + margin
+    # the lowest point of the cutter
+    minz = low[2] + margin + profile.center_offset - profile.minor_radius
+    triangle_arrays = [model.get_triangle_arrays(low[0], low[1], minz, high[0], high[1],
+                                                 INFINITE) for model in models]
+    p1, p2, p3 = [numpy.concatenate([arrays[index] for arrays in triangle_arrays])
+                  for index in range(3)]
+    collisions = intersection_batch.get_scanline_collisions(profile, starts, direction, lengths,
+                                                            p1, p2, p3)
+    free_ranges = intersection_batch.get_free_ranges(lengths, *collisions)
+    lengths = lengths.tolist()
+    result = [[] for _ in lines]
+    for index, begin, end in zip(*(values.tolist() for values in free_ranges)):
+        start, end_point = lines[index]
+        length = lengths[index]
+        for distance in (begin, end):
+            if distance <= epsilon:
+                result[index].append(start)
+            elif distance >= length - epsilon:
+                result[index].append(end_point)
+            else:
+                fraction = distance / length
+                result[index].append(tuple(s + fraction * (e - s)
+                                           for s, e in zip(start, end_point)))
+    return result
+
+
+def get_free_paths_batch(models, cutter, lines):
+    """ calculate the free paths of many lines at once
+
+    Every line is a pair of a start and an end point. Parallel horizontal lines are processed
+    together (vectorized) if numpy is available and the cutter shape is supported. All other
+    lines are passed to "get_free_paths_triangles". Both calculations are exact for spherical
+    and cylindrical cutters, but the per-triangle calculation approximates the edge contacts of
+    toroidal cutters. Thus their free paths may differ slightly (e.g. a colliding point close to
+    an edge may be reported as free).
+    """
+    models = [model for model in models if model is not None]
+    lines = [(tuple(p1), tuple(p2)) for p1, p2 in lines]
+    profile = None
+    if (models and lines and intersection_batch.numpy_enabled
+            and all(hasattr(model, "get_triangle_arrays") for model in models)):
+        profile = intersection_batch.get_cutter_profile(cutter)
+    results = [None] * len(lines)
+    if profile is not None:
+        # group the lines by their direction
+        groups = {}
+        for index, (p1, p2) in enumerate(lines):
+            length = math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+            if (p1[2] == p2[2]) and (length > epsilon):
+                key = (round((p2[0] - p1[0]) / length, 9), round((p2[1] - p1[1]) / length, 9))
+                groups.setdefault(key, []).append(index)
+        for direction, indices in groups.items():
+            group_result = _get_free_paths_parallel(models, profile, direction,
+                                                    [lines[index] for index in indices])
+            for index, points in zip(indices, group_result):
+                results[index] = points
+    for index, points in enumerate(results):
+        if points is None:
+            results[index] = get_free_paths_triangles(models, cutter, *lines[index])
+    return results
+
+
 def get_max_height_triangles(model, cutter, x, y, minz, maxz):
     if model is None:
         return (x, y, minz)
@@ -154,6 +235,71 @@ def get_max_height_triangles(model, cutter, x, y, minz, maxz):
         return (x, y, height_max)
 
 
+def _get_max_height_batch_function(model, cutter, positions, minz, maxz, heightmap=None):
+    """ return a function calculating the drop heights for a list of x/y positions at once
+
+    The candidate triangles are collected only once for the area covered by "positions". Thus the
+    returned function may only be used for positions within this area (e.g. for the refinement of
+    a grid line).
+    The vectorized calculation is used if numpy is available and the cutter shape is supported.
+    Otherwise "get_max_height_triangles" is called for every position. Both are exact for
+    spherical and cylindrical cutters, but the per-triangle calculation approximates the edge
+    contacts of toroidal cutters and may underestimate their height slightly (thus the results
+    differ between installations with and without numpy).
+    An optional heightmap (see "HeightmapCache") provides interpolated heights. Only the remaining
+    positions are calculated exactly.
+    """
+    profile = None
+    if (model is not None) and positions and intersection_batch.numpy_enabled:
+        profile = intersection_batch.get_cutter_profile(cutter)
+    if profile is None:
+        return lambda positions: [get_max_height_triangles(model, cutter, x, y, minz, maxz)
+                                  for x, y in positions]
+    xs = [pos[0] for pos in positions]
+    ys = [pos[1] for pos in positions]
+    margin = profile.radius
+    # the triangles are collected on demand - they are not needed if the heightmap is sufficient
+    triangle_arrays = []
+
+    def get_exact_heights(positions):
+        if not triangle_arrays:
+            triangle_arrays.extend(model.get_triangle_arrays(
+                min(xs) - margin, min(ys) - margin, minz, max(xs) + margin, max(ys) + margin,
+                maxz))
+        return intersection_batch.drop_cutter_on_triangles(profile, positions, *triangle_arrays)
+
+    def get_max_heights(positions):
+        if heightmap is None:
+            heights = get_exact_heights(positions)
+        else:
+            heights = heightmap.get_heights(positions)
+            exact = [index for index, height in enumerate(heights.tolist())
+                     if math.isnan(height)]
+            if exact:
+                heights[exact] = get_exact_heights([positions[index] for index in exact])
+        result = []
+        for (x, y), height in zip(positions, heights):
+            # same boundary handling as in "get_max_height_triangles"
+            if height < minz + epsilon:
+                result.append((x, y, minz))
+            elif height > maxz + epsilon:
+                result.append(None)
+            else:
+                result.append((x, y, float(height)))
+        return result
+
+    return get_max_heights
+
+
+def get_max_height_batch(model, cutter, positions, minz, maxz):
+    """ calculate the drop heights for a list of x/y positions at once
+
+    See "_get_max_height_batch_function" for details.
+    """
+    positions = [(pos[0], pos[1]) for pos in positions]
+    return _get_max_height_batch_function(model, cutter, positions, minz, maxz)(positions)
+
+
 def _check_deviance_of_adjacent_points(p1, p2, p3, min_distance):
     straight = psub(p3, p1)
     added = pdist(p2, p1) + pdist(p3, p2)
@@ -166,39 +312,76 @@ def _check_deviance_of_adjacent_points(p1, p2, p3, min_distance):
         return (added / pnorm(straight)) < 1.001
 
 
-def get_max_height_dynamic(model, cutter, positions, minz, maxz):
+def _get_curved_triplets(points, indices, min_distance):
+    """ return the indices of all triplets of adjacent points that are not in line
+
+    "indices" refer to the first point of every triplet. Triplets containing "None" are skipped.
+    The result is the same as calling "_check_deviance_of_adjacent_points" for every triplet.
+    """
+    if not numpy_enabled:
+        return [index for index in indices
+                if (None not in points[index:index + 3])
+                and not _check_deviance_of_adjacent_points(*(points[index:index + 3]
+                                                             + [min_distance]))]
+    if not indices:
+        return []
+    missing = (numpy.nan, numpy.nan, numpy.nan)
+    coords = numpy.array([missing if point is None else point
+                          for index in indices for point in points[index:index + 3]],
+                         dtype=numpy.float64).reshape(-1, 3, 3)
+    straight = coords[:, 2] - coords[:, 0]
+    added = (numpy.linalg.norm(coords[:, 1] - coords[:, 0], axis=1)
+             + numpy.linalg.norm(coords[:, 2] - coords[:, 1], axis=1))
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        in_line = ((straight[:, 0] ** 2 + straight[:, 1] ** 2 < min_distance ** 2)
+                   | (added / numpy.linalg.norm(straight, axis=1) < 1.001))
+    # comparisons with "nan" (missing points) fail
+    curved = ~in_line & ~numpy.isnan(coords).any(axis=(1, 2))
+    return numpy.array(indices)[curved].tolist()
+
+
+def get_max_height_dynamic(model, cutter, positions, minz, maxz, heightmap=None):
     max_depth = 8
     # the points don't need to get closer than 1/1000 of the cutter radius
     min_distance = cutter.distance_radius / 1000
-    points = []
-    get_max_height = lambda x, y: get_max_height_triangles(model, cutter, x, y, minz, maxz)
-    # add one point between all existing points
-    for index, p in enumerate(positions):
-        points.append(get_max_height(p[0], p[1]))
+    positions = [(p[0], p[1]) for p in positions]
+    get_max_heights = _get_max_height_batch_function(model, cutter, positions, minz, maxz,
+                                                     heightmap=heightmap)
+    points = get_max_heights(positions)
     # Check if three consecutive points are "flat".
-    # Add additional points if necessary.
-    index = 0
-    depth_count = 0
-    while index < len(points) - 2:
-        p1 = points[index]
-        p2 = points[index + 1]
-        p3 = points[index + 2]
-        if ((None not in (p1, p2, p3))
-                and not _check_deviance_of_adjacent_points(p1, p2, p3, min_distance)
-                and (depth_count < max_depth)):
-            # distribute the new point two before the middle and one after
-            if depth_count % 3 != 2:
-                # insert between the 1st and 2nd point
-                middle = ((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2)
-                points.insert(index + 1, get_max_height(middle[0], middle[1]))
-            else:
-                # insert between the 2nd and 3rd point
-                middle = ((p2[0] + p3[0]) / 2, (p2[1] + p3[1]) / 2)
-                points.insert(index + 2, get_max_height(middle[0], middle[1]))
-            depth_count += 1
-        else:
-            index += 1
-            depth_count = 0
+    # Add additional points between them if necessary. All new points of one refinement level
+    # are calculated at once.
+    depths = [0] * len(points)
+    # only triplets containing new points need to be checked again
+    fresh_indices = range(len(points))
+    while True:
+        candidates = sorted({index for fresh_index in fresh_indices
+                             for index in range(fresh_index - 2, fresh_index + 1)
+                             if 0 <= index < len(points) - 2})
+        # "split_gaps" contains the indices of points to be followed by a new point
+        split_gaps = set()
+        for index in _get_curved_triplets(points, candidates, min_distance):
+            for gap in (index, index + 1):
+                if depths[gap] < max_depth:
+                    split_gaps.add(gap)
+        if not split_gaps:
+            break
+        split_gaps = sorted(split_gaps)
+        middles = [((points[gap][0] + points[gap + 1][0]) / 2,
+                    (points[gap][1] + points[gap + 1][1]) / 2) for gap in split_gaps]
+        refined_points = []
+        refined_depths = []
+        fresh_indices = []
+        previous = 0
+        for gap, new_point in zip(split_gaps, get_max_heights(middles)):
+            refined_points.extend(points[previous:gap + 1])
+            refined_depths.extend(depths[previous:gap])
+            refined_depths.extend((depths[gap] + 1, depths[gap] + 1))
+            fresh_indices.append(len(refined_points))
+            refined_points.append(new_point)
+            previous = gap + 1
+        points = refined_points + points[previous:]
+        depths = refined_depths + depths[previous:]
     # remove all points that are in line
     index = 1
     while index + 1 < len(points):
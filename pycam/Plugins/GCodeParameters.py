@@ -22,7 +22,8 @@ import pycam.Plugins
 import pycam.Gui.ControlsGTK
 import pycam.Toolpath.Filters as Filters
 from pycam.Toolpath import CORNER_STYLE_EXACT_PATH, CORNER_STYLE_EXACT_STOP, \
-        CORNER_STYLE_OPTIMIZE_SPEED, CORNER_STYLE_OPTIMIZE_TOLERANCE
+        CORNER_STYLE_OPTIMIZE_SPEED, CORNER_STYLE_OPTIMIZE_TOLERANCE, SEGMENT_ORDER_KEEP, \
+        SEGMENT_ORDER_OPTIMIZE, SEGMENT_ORDER_OPTIMIZE_REVERSE
 
 
 class GCodeSafetyHeight(pycam.Plugins.PluginBase):
@@ -97,6 +98,88 @@ class GCodeFilenameExtension(pycam.Plugins.PluginBase):
         return []
 
 
+class GCodeSimplifyPath(pycam.Plugins.PluginBase):
+
+    DEPENDS = ["ToolpathProcessors"]
+    CATEGORIES = ["GCode"]
+
+    def setup(self):
+        self.control = pycam.Gui.ControlsGTK.InputNumber(digits=4, lower=0, increment=0.001)
+        self.core.get("register_parameter")("toolpath_processor", "simplify_tolerance",
+                                            self.control)
+        self.core.register_ui("gcode_general_parameters", "Path simplification tolerance",
+                              self.control.get_widget(), weight=30)
+        self.core.register_chain("toolpath_filters", self.get_toolpath_filters)
+        return True
+
+    def teardown(self):
+        self.core.unregister_chain("toolpath_filters", self.get_toolpath_filters)
+        self.core.unregister_ui("gcode_general_parameters", self.control.get_widget())
+        self.core.get("unregister_parameter")("toolpath_processor", "simplify_tolerance")
+
+    @Filters.toolpath_filter("settings", "simplify_tolerance")
+    def get_toolpath_filters(self, simplify_tolerance):
+        if simplify_tolerance > 0:
+            return [Filters.SimplifyPath(simplify_tolerance)]
+        else:
+            return []
+
+
+class GCodeArcFit(pycam.Plugins.PluginBase):
+
+    DEPENDS = ["ToolpathProcessors"]
+    CATEGORIES = ["GCode"]
+
+    def setup(self):
+        self.control = pycam.Gui.ControlsGTK.InputNumber(digits=4, lower=0, increment=0.001)
+        self.core.get("register_parameter")("toolpath_processor", "arc_tolerance", self.control)
+        self.core.register_ui("gcode_general_parameters", "Arc fitting tolerance",
+                              self.control.get_widget(), weight=35)
+        self.core.register_chain("toolpath_filters", self.get_toolpath_filters)
+        return True
+
+    def teardown(self):
+        self.core.unregister_chain("toolpath_filters", self.get_toolpath_filters)
+        self.core.unregister_ui("gcode_general_parameters", self.control.get_widget())
+        self.core.get("unregister_parameter")("toolpath_processor", "arc_tolerance")
+
+    @Filters.toolpath_filter("settings", "arc_tolerance")
+    def get_toolpath_filters(self, arc_tolerance):
+        if arc_tolerance > 0:
+            return [Filters.ArcFit(arc_tolerance)]
+        else:
+            return []
+
+
+class GCodeSegmentOrder(pycam.Plugins.PluginBase):
+
+    DEPENDS = ["ToolpathProcessors"]
+    CATEGORIES = ["GCode"]
+
+    def setup(self):
+        self.control = pycam.Gui.ControlsGTK.InputChoice((
+            ("Keep the original order", SEGMENT_ORDER_KEEP),
+            ("Shorten rapid moves", SEGMENT_ORDER_OPTIMIZE),
+            ("Shorten rapid moves (allow reversed segments)", SEGMENT_ORDER_OPTIMIZE_REVERSE)))
+        self.core.get("register_parameter")("toolpath_processor", "segment_order", self.control)
+        self.core.register_ui("gcode_general_parameters", "Order of cutting segments",
+                              self.control.get_widget(), weight=40)
+        self.core.register_chain("toolpath_filters", self.get_toolpath_filters)
+        return True
+
+    def teardown(self):
+        self.core.unregister_chain("toolpath_filters", self.get_toolpath_filters)
+        self.core.unregister_ui("gcode_general_parameters", self.control.get_widget())
+        self.core.get("unregister_parameter")("toolpath_processor", "segment_order")
+
+    @Filters.toolpath_filter("settings", "segment_order")
+    def get_toolpath_filters(self, segment_order):
+        if segment_order == SEGMENT_ORDER_KEEP:
+            return []
+        else:
+            return [Filters.OptimizeOrder(segment_order == SEGMENT_ORDER_OPTIMIZE_REVERSE)]
+
+
 class GCodeStepWidth(pycam.Plugins.PluginBase):
 
     DEPENDS = ["ToolpathProcessors"]
@@ -131,6 +214,39 @@ class GCodeStepWidth(pycam.Plugins.PluginBase):
         return [Filters.StepWidth(**kwargs)]
 
 
+class GCodeMachineLimits(pycam.Plugins.PluginBase):
+
+    DEPENDS = ["ToolpathProcessors"]
+    CATEGORIES = ["GCode"]
+
+    def setup(self):
+        self._table = pycam.Gui.ControlsGTK.ParameterSection()
+        self.core.register_ui("gcode_preferences", "Machine limits", self._table.get_widget())
+        self.core.register_ui_section("gcode_machine_limits", self._table.add_widget,
+                                      self._table.clear_widgets)
+        # the limits are used only for estimating the machine time of toolpaths
+        self.controls = []
+        for name, label, weight in (("max_velocity", "Max. velocity %s (units/min)", 0),
+                                    ("max_acceleration", "Max. acceleration %s (units/s^2)", 10)):
+            for key in "xyz":
+                control = pycam.Gui.ControlsGTK.InputNumber(
+                    digits=1, lower=0.1, increment=10,
+                    change_handler=lambda widget=None: self.core.emit_event("toolpath-changed"))
+                self.core.register_ui("gcode_machine_limits", label % key.upper(),
+                                      control.get_widget(), weight=weight + "xyz".index(key))
+                self.core.get("register_parameter")("toolpath_processor",
+                                                    "%s_%s" % (name, key), control)
+                self.controls.append(("%s_%s" % (name, key), control))
+        return True
+
+    def teardown(self):
+        for name, control in self.controls:
+            self.core.unregister_ui("gcode_machine_limits", control.get_widget())
+            self.core.get("unregister_parameter")("toolpath_processor", name)
+        self.core.unregister_ui_section("gcode_machine_limits")
+        self.core.unregister_ui("gcode_preferences", self._table.get_widget())
+
+
 class GCodeSpindle(pycam.Plugins.PluginBase):
 
     DEPENDS = ["ToolpathProcessors"]
@@ -18,9 +18,12 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import math
+
 import pycam.Plugins
 import pycam.Gui.OpenGLTools
 from pycam.Toolpath import MOVES_LIST, MOVE_STRAIGHT_RAPID
+import pycam.Toolpath.VertexBuffers
 
 
 class OpenGLViewToolpath(pycam.Plugins.PluginBase):
@@ -81,15 +84,30 @@ class OpenGLViewToolpath(pycam.Plugins.PluginBase):
             filter_params = self.core.get("get_parameter_values")("toolpath_processor")
             settings_filters = filter_func(filter_params)
             for toolpath in self.core.get("toolpaths").get_visible():
-                # TODO: enable the VBO code for speedup!
-                # moves = toolpath.get_moves_for_opengl(self.core.get("gcode_safety_height"))
-                # self._draw_toolpath_moves2(moves)
-                moves = toolpath.get_basic_moves(filters=settings_filters)
-                self._draw_toolpath_moves(moves)
+                if pycam.Toolpath.VertexBuffers.numpy_enabled:
+                    moves = toolpath.get_moves_for_opengl(
+                        filters=settings_filters, tolerance=self._get_detail_tolerance(),
+                        show_directions=self.core.get("show_directions"))
+                    self._draw_toolpath_moves2(moves)
+                else:
+                    moves = toolpath.get_basic_moves(filters=settings_filters)
+                    self._draw_toolpath_moves(moves)
         elif toolpath_in_progress is not None:
             if self.core.get("show_simulation") or self.core.get("show_toolpath_progress"):
                 self._draw_toolpath_moves(toolpath_in_progress)
 
+    def _get_detail_tolerance(self):
+        """ vertices within the same pixel are merged (level of detail)
+
+        The tolerance is rounded down to a power of two. Thus the vertex buffers are not rebuilt
+        for every small change of the zoom level.
+        """
+        get_pixel_size = self.core.get("get_view_pixel_size")
+        pixel_size = get_pixel_size() if get_pixel_size else None
+        if not pixel_size or (pixel_size <= 0):
+            return None
+        return 2.0 ** math.floor(math.log(pixel_size, 2))
+
     def _draw_toolpath_moves2(self, paths):
         GL = self._GL
         GL.glDisable(GL.GL_LIGHTING)
@@ -110,7 +128,7 @@ class OpenGLViewToolpath(pycam.Plugins.PluginBase):
                 else:
                     GL.glColor4f(color_cut["red"], color_cut["green"], color_cut["blue"],
                                  color_cut["alpha"])
-                if show_directions:
+                if show_directions and (len(path[1]) > 0):
                     GL.glDisable(GL.GL_CULL_FACE)
                     GL.glDrawElements(GL.GL_TRIANGLES, len(path[1]), GL.GL_UNSIGNED_INT, path[1])
                     GL.glEnable(GL.GL_CULL_FACE)
@@ -196,6 +196,7 @@ class OpenGLWindow(pycam.Plugins.PluginBase):
             self.gui.get_object("OpenGLBox").pack_end(self.area, fill=True, expand=True, padding=0)
             self.camera = Camera(self.core, lambda: (self.area.allocation.width,
                                                      self.area.allocation.height))
+            self.core.set("get_view_pixel_size", self.camera.get_pixel_size)
             self._event_handlers = (("visual-item-updated", self.update_view),
                                     ("visualization-state-changed", self._update_widgets),
                                     ("model-list-changed", self._restore_latest_view))
@@ -233,6 +234,7 @@ class OpenGLWindow(pycam.Plugins.PluginBase):
                 self.core.get("unregister_display_item")(name)
             self.unregister_gtk_handlers(self._gtk_handlers)
             self.unregister_event_handlers(self._event_handlers)
+            del self.core["get_view_pixel_size"]
             # the area will be created during setup again
             self.gui.get_object("OpenGLBox").remove(self.area)
             self.area = None
@@ -921,6 +923,19 @@ class Camera(object):
                       v["up"][0], v["up"][1], v["up"][2])
         GL.glMatrixMode(prev_mode)
 
+    def get_pixel_size(self):
+        """ return the approximate size of a pixel (in model units) at the center of the view """
+        width, height = self._get_screen_dimensions()
+        v = self.view
+        distance = math.sqrt(sum([d ** 2 for d in v["distance"]]))
+        if self.core.get("view_perspective"):
+            visible_height = 2 * distance * math.tan(v["fovy"] / 360.0 * math.pi)
+        else:
+            # see "position_camera"
+            distance *= math.log(math.sqrt(width * height)) / math.log(10)
+            visible_height = 2 * math.sin(v["fovy"] / 360.0 * math.pi) * distance
+        return visible_height / max(1, height)
+
     def shift_view(self, x_dist=0, y_dist=0):
         obj_dim = []
         low, high = self._get_low_high_dims()
@@ -23,6 +23,7 @@ import pycam.Plugins
 import pycam.PathGenerators.DropCutter
 import pycam.PathGenerators.EngraveCutter
 import pycam.PathGenerators.PushCutter
+import pycam.PathGenerators.SlabWaterline
 import pycam.Toolpath.MotionGrid
 
 
@@ -89,16 +90,45 @@ class ProcessStrategyContour(pycam.Plugins.PluginBase):
         return path_generator, motion_grid
 
 
+class ProcessStrategySlabWaterline(pycam.Plugins.PluginBase):
+
+    DEPENDS = ["Processes", "PathParamStepDown", "PathParamMaterialAllowance",
+               "PathParamMillingStyle"]
+    CATEGORIES = ["Process"]
+
+    def setup(self):
+        parameters = {"step_down": 1.0,
+                      "material_allowance": 0,
+                      "milling_style": pycam.Toolpath.MotionGrid.MillingStyle.IGNORE}
+        self.core.get("register_parameter_set")("process", "slab_waterline",
+                                                "Waterline (slicing)", self.run_process,
+                                                parameters=parameters, weight=25)
+        return True
+
+    def teardown(self):
+        self.core.get("unregister_parameter_set")("process", "slab_waterline")
+
+    def run_process(self, process, tool_radius, box):
+        path_generator = pycam.PathGenerators.SlabWaterline.SlabWaterline(
+            milling_style=process["parameters"]["milling_style"])
+        # only the height and the extent of the layers are used
+        motion_grid = pycam.Toolpath.MotionGrid.get_fixed_grid(
+            box, process["parameters"]["step_down"], line_distance=2 * tool_radius,
+            grid_direction=pycam.Toolpath.MotionGrid.GridDirection.X)
+        return path_generator, motion_grid
+
+
 class ProcessStrategySurfacing(pycam.Plugins.PluginBase):
 
     DEPENDS = ["ParameterGroupManager", "PathParamOverlap", "PathParamMaterialAllowance",
-               "PathParamPattern"]
+               "PathParamPattern", "PathParamHeightmapCache"]
     CATEGORIES = ["Process"]
 
     def setup(self):
         parameters = {"overlap": 0.6,
                       "material_allowance": 0,
-                      "path_pattern": None}
+                      "path_pattern": None,
+                      "use_heightmap": False}
         self.core.get("register_parameter_set")("process", "surfacing", "Surfacing",
                                                 self.run_process, parameters=parameters, weight=50)
         return True
@@ -108,7 +138,9 @@ class ProcessStrategySurfacing(pycam.Plugins.PluginBase):
 
     def run_process(self, process, tool_radius, box):
         line_distance = _get_line_distance(tool_radius, process["parameters"]["overlap"])
-        path_generator = pycam.PathGenerators.DropCutter.DropCutter()
+        # drop heights may be interpolated from a lattice shared with other surfacing processes
+        path_generator = pycam.PathGenerators.DropCutter.DropCutter(
+            use_heightmap=process["parameters"]["use_heightmap"])
         path_pattern = process["parameters"]["path_pattern"]
         path_get_func = self.core.get("get_parameter_sets")(
             "path_pattern")[path_pattern["name"]]["func"]
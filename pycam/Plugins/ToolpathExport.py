@@ -20,9 +20,11 @@ along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 
 import pycam.Exporters.GCode.LinuxCNC
 import pycam.Plugins
+from pycam.Toolpath.Kinematics import get_machine_limits
 
 
-FILTER_GCODE = (("GCode files", ("*.ngc", "*.nc", "*.gc", "*.gcode")),)
+FILTER_GCODE = (("GCode files", ("*.ngc", "*.nc", "*.gc", "*.gcode")),
+                ("Compressed GCode files", ("*.ngc.gz", "*.nc.gz", "*.gc.gz", "*.gcode.gz")))
 
 
 class ToolpathExport(pycam.Plugins.PluginBase):
@@ -101,13 +103,14 @@ class ToolpathExport(pycam.Plugins.PluginBase):
         if not filename:
             return
         try:
-            destination = open(filename, "w")
+            destination = pycam.Exporters.GCode.open_destination(filename)
             # TODO: implement "get_meta_data()"
 #           meta_data = self.get_meta_data()
             machine_time = 0
             # calculate the machine time and store it in the GCode header
             for toolpath in toolpaths:
-                machine_time += toolpath.get_machine_time()
+                machine_time += toolpath.get_machine_time(
+                    machine_limits=get_machine_limits(filter_params))
             # TODO: use this description for the export
 #           all_info = (meta_data + os.linesep
 #                       + "Estimated machine time: %.0f minutes" % machine_time)
@@ -160,7 +163,8 @@ class ToolpathExport(pycam.Plugins.PluginBase):
                 generator.add_moves(toolpath.path, toolpath.filters)
             generator.finish()
             destination.close()
-            self.log.info("GCode file successfully written: %s", str(filename))
+            self.log.info("GCode file successfully written: %s (estimated machine time: "
+                          "%.1f minutes)", str(filename), machine_time)
         except IOError as err_msg:
             self.log.error("Failed to save toolpath file: %s", err_msg)
         else:
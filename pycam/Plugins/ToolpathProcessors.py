@@ -21,7 +21,8 @@ along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 
 import pycam.Gui.ControlsGTK
 import pycam.Plugins
-from pycam.Toolpath import CORNER_STYLE_EXACT_PATH
+from pycam.Toolpath import CORNER_STYLE_EXACT_PATH, SEGMENT_ORDER_KEEP
+from pycam.Toolpath.Kinematics import DEFAULT_MAX_ACCELERATION, DEFAULT_MAX_VELOCITY
 import pycam.Utils.log
 
 
@@ -202,10 +203,19 @@ def _get_processor_filters(core, parameters):
     return filters
 
 
+def _get_machine_limit_defaults():
+    result = {}
+    for index, key in enumerate("xyz"):
+        result["max_velocity_%s" % key] = DEFAULT_MAX_VELOCITY[index]
+        result["max_acceleration_%s" % key] = DEFAULT_MAX_ACCELERATION[index]
+    return result
+
+
 class ToolpathProcessorMilling(pycam.Plugins.PluginBase):
 
     DEPENDS = ["Toolpaths", "GCodeSafetyHeight", "GCodePlungeFeedrate", "GCodeFilenameExtension",
-               "GCodeStepWidth", "GCodeSpindle", "GCodeCornerStyle"]
+               "GCodeStepWidth", "GCodeSpindle", "GCodeCornerStyle", "GCodeSimplifyPath",
+               "GCodeArcFit", "GCodeSegmentOrder", "GCodeMachineLimits"]
     CATEGORIES = ["Toolpath"]
 
     def setup(self):
@@ -218,9 +228,13 @@ class ToolpathProcessorMilling(pycam.Plugins.PluginBase):
                       "path_mode": CORNER_STYLE_EXACT_PATH,
                       "motion_tolerance": 0.0,
                       "naive_tolerance": 0.0,
+                      "simplify_tolerance": 0.0,
+                      "arc_tolerance": 0.0,
+                      "segment_order": SEGMENT_ORDER_KEEP,
                       "spindle_enable": True,
                       "spindle_delay": 3,
                       "touch_off": None}
+        parameters.update(_get_machine_limit_defaults())
         self.core.get("register_parameter_set")(
             "toolpath_processor", "milling", "Milling",
             lambda params: _get_processor_filters(self.core, params), parameters=parameters,
@@ -235,7 +249,8 @@ class ToolpathProcessorMilling(pycam.Plugins.PluginBase):
 
 class ToolpathProcessorLaser(pycam.Plugins.PluginBase):
 
-    DEPENDS = ["Toolpaths", "GCodeFilenameExtension", "GCodeStepWidth", "GCodeCornerStyle"]
+    DEPENDS = ["Toolpaths", "GCodeFilenameExtension", "GCodeStepWidth", "GCodeCornerStyle",
+               "GCodeSimplifyPath", "GCodeArcFit", "GCodeSegmentOrder", "GCodeMachineLimits"]
     CATEGORIES = ["Toolpath"]
 
     def setup(self):
@@ -245,7 +260,11 @@ class ToolpathProcessorLaser(pycam.Plugins.PluginBase):
                       "step_width_z": 0.0001,
                       "path_mode": CORNER_STYLE_EXACT_PATH,
                       "motion_tolerance": 0.0,
-                      "naive_tolerance": 0.0}
+                      "naive_tolerance": 0.0,
+                      "simplify_tolerance": 0.0,
+                      "arc_tolerance": 0.0,
+                      "segment_order": SEGMENT_ORDER_KEEP}
+        parameters.update(_get_machine_limit_defaults())
         self.core.get("register_parameter_set")(
             "toolpath_processor", "laser", "Laser",
             lambda params: _get_processor_filters(self.core, params), parameters=parameters,
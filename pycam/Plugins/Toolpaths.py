@@ -21,6 +21,7 @@ along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 
 import pycam.Plugins
 import pycam.Toolpath
+from pycam.Toolpath.Kinematics import get_machine_limits
 from pycam.Utils import get_non_conflicting_name
 
 
@@ -141,7 +142,10 @@ class Toolpaths(pycam.Plugins.ListPluginBase):
                 return "%d seconds" % int(round(minutes * 60))
 
         toolpath = self.get_by_path(model.get_path(m_iter))
-        text = get_time_string(toolpath.get_machine_time())
+        # the machine limits are configured in the settings of the toolpath processor
+        machine_limits = get_machine_limits(
+            self.core.get("get_parameter_values")("toolpath_processor"))
+        text = get_time_string(toolpath.get_machine_time(machine_limits=machine_limits))
         cell.set_property("text", text)
 
     def add_new(self, new_tp, name=None):
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import re
+
+from pycam.Toolpath.Steps import MachineSetting, MoveStraight, MoveStraightRapid
+import pycam.Utils.log
+
+
+_log = pycam.Utils.log.get_logger()
+
+# maximum distance between an arc and its linear approximation
+DEFAULT_ARC_TOLERANCE = 0.001
+# length of an inch in mm
+INCH = 25.4
+
+_COMMENT_REGEX = re.compile(r"\([^)]*\)|;.*$")
+_WORD_REGEX = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+# G-codes without an effect on the position of the tool
+_IGNORED_G_CODES = (4, 40, 43, 49, 54, 55, 56, 57, 58, 59, 61, 64, 80, 94)
+
+
+def _get_arc_points(start, end, center, clockwise, tolerance):
+    """ return the points of a helical arc in the x/y plane (excluding the start) """
+    radius = math.hypot(start[0] - center[0], start[1] - center[1])
+    start_angle = math.atan2(start[1] - center[1], start[0] - center[0])
+    end_angle = math.atan2(end[1] - center[1], end[0] - center[0])
+    sweep = end_angle - start_angle
+    if clockwise:
+        if sweep >= 0:
+            sweep -= 2 * math.pi
+    elif sweep <= 0:
+        sweep += 2 * math.pi
+    if radius > tolerance:
+        max_step = 2 * math.acos(1 - tolerance / radius)
+        count = max(1, int(math.ceil(abs(sweep) / max_step)))
+    else:
+        count = 1
+    points = []
+    for index in range(1, count):
+        fraction = float(index) / count
+        angle = start_angle + sweep * fraction
+        points.append((center[0] + radius * math.cos(angle),
+                       center[1] + radius * math.sin(angle),
+                       start[2] + (end[2] - start[2]) * fraction))
+    points.append(tuple(end))
+    return points
+
+
+def _get_arc_center(start, end, radius, clockwise):
+    """ calculate the center of an arc given in radius format ("R") """
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    chord = math.hypot(dx, dy)
+    if chord == 0:
+        return None
+    height = math.sqrt(max(radius ** 2 - (chord / 2) ** 2, 0))
+    # a negative radius selects the larger arc
+    if clockwise == (radius > 0):
+        height = -height
+    return (start[0] + dx / 2 - height * dy / chord, start[1] + dy / 2 + height * dx / chord)
+
+
+def parse_gcode(lines, unit="mm", arc_tolerance=DEFAULT_ARC_TOLERANCE):
+    """ turn G-code into a list of toolpath steps (e.g. for a simulation)
+
+    Only the moves (G0, G1, G2, G3), units (G20, G21), distance modes (G90, G91) and feedrates
+    are interpreted. Arcs (in the x/y plane) are split into straight moves. Moves are emitted
+    after all three axes are known.
+
+    @value lines: an iterable of G-code lines (e.g. an open file)
+    @value unit: "mm" or "inch" - the unit of the resulting positions
+    """
+    steps = []
+    position = [None, None, None]
+    motion = None
+    absolute = True
+    scale = 1.0
+    warned_codes = set()
+    for line_number, line in enumerate(lines, 1):
+        text = _COMMENT_REGEX.sub("", line).upper()
+        words = _WORD_REGEX.findall(text)
+        if not words:
+            continue
+        values = {}
+        for letter, number in words:
+            if letter == "G":
+                code = float(number)
+                if code in (0, 1, 2, 3):
+                    motion = int(code)
+                elif code in (20, 21):
+                    file_unit = "inch" if code == 20 else "mm"
+                    if file_unit == unit:
+                        scale = 1.0
+                    else:
+                        scale = INCH if file_unit == "inch" else 1 / INCH
+                elif code in (90, 91):
+                    absolute = (code == 90)
+                elif code == 17:
+                    pass
+                elif (code not in _IGNORED_G_CODES) and (code not in warned_codes):
+                    _log.warning("Ignoring unsupported G-code in line %d: G%s", line_number,
+                                 number)
+                    warned_codes.add(code)
+            else:
+                values[letter] = float(number) * scale
+        if "F" in values:
+            steps.append(MachineSetting("feedrate", values["F"]))
+        if not any(axis in values for axis in "XYZ") or (motion is None):
+            continue
+        start = tuple(position)
+        for index, axis in enumerate("XYZ"):
+            if axis in values:
+                if absolute:
+                    position[index] = values[axis]
+                elif position[index] is not None:
+                    position[index] += values[axis]
+        if None in position:
+            continue
+        end = tuple(position)
+        if motion == 0:
+            steps.append(MoveStraightRapid(end))
+        elif (motion == 1) or (None in start):
+            steps.append(MoveStraight(end))
+        else:
+            clockwise = (motion == 2)
+            if "R" in values:
+                center = _get_arc_center(start, end, values["R"], clockwise)
+            else:
+                center = (start[0] + values.get("I", 0), start[1] + values.get("J", 0))
+            if center is None:
+                _log.warning("Ignoring invalid arc in line %d: %s", line_number, line.strip())
+                steps.append(MoveStraight(end))
+            else:
+                for point in _get_arc_points(start, end, center, clockwise, arc_tolerance):
+                    steps.append(MoveStraight(point))
+    return steps
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import json
+import struct
+import zlib
+
+from pycam.Simulation.ZBuffer import ZBuffer
+from pycam.Toolpath import MOVES_LIST, MOVE_STRAIGHT_RAPID
+import pycam.Utils.log
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+_log = pycam.Utils.log.get_logger()
+
+# number of cells along the longer side of the stock
+DEFAULT_CELLS = 1000
+# deviations below this limit are neither gouges nor leftover stock
+DEFAULT_TOLERANCE = 0.01
+
+# colors of the deviation image
+_COLOR_GOUGE = (255, 0, 0)
+_COLOR_LEFTOVER = (0, 64, 255)
+_COLOR_MATCH = (0, 192, 0)
+_COLOR_BACKGROUND = (255, 255, 255)
+
+
+class MaterialRemovalSimulation(object):
+    """ remove the material of a block of stock along the moves of a toolpath
+
+    The stock is represented by a height field (see "pycam.Simulation.ZBuffer").
+    """
+
+    def __init__(self, stock_box, cells=DEFAULT_CELLS, cell_size=None):
+        """ the resolution is given either as a cell size or as the number of cells along the
+        longer side of the stock
+        """
+        lower, upper = stock_box
+        self.stock_box = stock_box
+        width = upper[0] - lower[0]
+        height = upper[1] - lower[1]
+        if cell_size is None:
+            cell_size = max(width, height) / float(cells)
+        xres = max(1, int(round(width / cell_size)))
+        yres = max(1, int(round(height / cell_size)))
+        self.zbuffer = ZBuffer(lower[0], upper[0], xres, lower[1], upper[1], yres, lower[2],
+                               upper[2], initial_z=upper[2])
+        self.rapid_collisions = 0
+
+    def get_cell_area(self):
+        zbuffer = self.zbuffer
+        return ((zbuffer.maxx - zbuffer.minx) / zbuffer.xres
+                * (zbuffer.maxy - zbuffer.miny) / zbuffer.yres)
+
+    def add_moves(self, cutter, moves):
+        """ apply the moves (toolpath steps) of a cutter
+
+        Rapid moves removing material are counted as collisions.
+        """
+        zbuffer = self.zbuffer
+        position = None
+        # consecutive moves are applied together
+        feed_positions = []
+        for step in moves:
+            if step.action not in MOVES_LIST:
+                continue
+            if step.action == MOVE_STRAIGHT_RAPID:
+                if len(feed_positions) > 1:
+                    zbuffer.add_moves(cutter, feed_positions)
+                feed_positions = []
+                if position is not None:
+                    previous_changed = zbuffer.changed
+                    zbuffer.changed = False
+                    zbuffer.add_move(cutter, position, step.position)
+                    if zbuffer.changed:
+                        self.rapid_collisions += 1
+                        _log.debug("Rapid move through material: %s -> %s", position,
+                                   step.position)
+                    zbuffer.changed |= previous_changed
+            else:
+                if not feed_positions and (position is not None):
+                    feed_positions.append(position)
+                feed_positions.append(step.position)
+            position = step.position
+        if len(feed_positions) > 1:
+            zbuffer.add_moves(cutter, feed_positions)
+        elif len(feed_positions) == 1:
+            # the only known position
+            zbuffer.add_moves(cutter, feed_positions * 2)
+
+    def get_heights(self):
+        return self.zbuffer.buf
+
+    def compare(self, model, tolerance=DEFAULT_TOLERANCE):
+        """ compare the simulated stock with the surface of a model
+
+        Cells outside of the model are compared with the bottom of the stock.
+        """
+        zbuffer = self.zbuffer
+        target = ZBuffer(zbuffer.minx, zbuffer.maxx, zbuffer.xres, zbuffer.miny, zbuffer.maxy,
+                         zbuffer.yres, zbuffer.minz, zbuffer.maxz, initial_z=zbuffer.minz)
+        target.add_model(model)
+        target_heights = numpy.minimum(target.buf, zbuffer.maxz)
+        removed = zbuffer.maxz - zbuffer.buf
+        return SimulationReport(zbuffer.buf - target_heights, self.get_cell_area(), tolerance,
+                                removed.sum() * self.get_cell_area(), self.rapid_collisions)
+
+
+class SimulationReport(object):
+    """ the deviation between a simulated stock and its model
+
+    Negative deviations are gouges (too much material was removed). Positive deviations are
+    leftover stock.
+    """
+
+    def __init__(self, deviation, cell_area, tolerance, removed_volume=0, rapid_collisions=0):
+        self.deviation = deviation
+        self.tolerance = tolerance
+        gouges = deviation < -tolerance
+        leftovers = deviation > tolerance
+        self.max_gouge = max(0.0, -float(deviation.min()))
+        self.gouge_area = float(gouges.sum() * cell_area)
+        self.gouge_volume = float(-deviation[gouges].sum() * cell_area)
+        self.max_leftover = max(0.0, float(deviation.max()))
+        self.leftover_area = float(leftovers.sum() * cell_area)
+        self.leftover_volume = float(deviation[leftovers].sum() * cell_area)
+        self.max_deviation = float(numpy.abs(deviation).max())
+        self.mean_deviation = float(numpy.abs(deviation).mean())
+        self.removed_volume = float(removed_volume)
+        self.rapid_collisions = rapid_collisions
+
+    def is_acceptable(self, max_leftover=None):
+        """ the result is acceptable without gouges and collisions (and optionally without
+        excessive leftover stock)
+        """
+        if (self.max_gouge > self.tolerance) or (self.rapid_collisions > 0):
+            return False
+        if (max_leftover is not None) and (self.max_leftover > max_leftover):
+            return False
+        return True
+
+    def get_dict(self):
+        keys = ("tolerance", "max_gouge", "gouge_area", "gouge_volume", "max_leftover",
+                "leftover_area", "leftover_volume", "max_deviation", "mean_deviation",
+                "removed_volume", "rapid_collisions")
+        result = {key: getattr(self, key) for key in keys}
+        result["cells"] = list(self.deviation.shape[::-1])
+        return result
+
+    def write_summary(self, stream):
+        json.dump(self.get_dict(), stream, indent=2, sort_keys=True)
+        stream.write("\n")
+
+    def write_deviation(self, filename):
+        """ store the deviation as an image (".png") or as an array (".npy")
+
+        The image shows gouges (red), leftover stock (blue) and matching areas (green). The
+        intensity indicates the amount of the deviation. The y axis points upwards.
+        """
+        if filename.lower().endswith(".npy"):
+            numpy.save(filename, self.deviation)
+            return
+        with open(filename, "wb") as image_file:
+            image_file.write(_get_png_data(self.get_deviation_image()))
+
+    def get_deviation_image(self):
+        deviation = self.deviation
+        image = numpy.empty(deviation.shape + (3, ), dtype=numpy.uint8)
+        image[:] = _COLOR_MATCH
+        for mask, color, limit in ((deviation < -self.tolerance, _COLOR_GOUGE, self.max_gouge),
+                                   (deviation > self.tolerance, _COLOR_LEFTOVER,
+                                    self.max_leftover)):
+            if not mask.any():
+                continue
+            # weak deviations are faded (at least 25% of the full color)
+            weight = 0.25 + 0.75 * numpy.abs(deviation[mask]) / limit
+            image[mask] = (numpy.outer(weight, color)
+                           + numpy.outer(1 - weight, _COLOR_BACKGROUND)).astype(numpy.uint8)
+        # the first row of the image is the top
+        return image[::-1]
+
+
+def _get_png_data(image):
+    """ encode an RGB image (array of rows x columns x 3 bytes) as PNG """
+    def get_chunk(chunk_type, data):
+        return (struct.pack(">I", len(data)) + chunk_type + data
+                + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff))
+
+    height, width = image.shape[:2]
+    # every row starts with a filter type (zero: no filter)
+    rows = numpy.zeros((height, width * 3 + 1), dtype=numpy.uint8)
+    rows[:, 1:] = image.reshape(height, width * 3)
+    return b"".join((b"\x89PNG\r\n\x1a\n",
+                     get_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+                     get_chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)),
+                     get_chunk(b"IEND", b"")))
@@ -18,40 +18,97 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import ctypes
+import pycam.Geometry.intersection_batch as intersection_batch
 
 try:
     import OpenGL.GL as GL
-    from OpenGL.GL.pointers import glIndexPointers, glNormalPointerf, glVertexPointerf
     GL_enabled = True
 except ImportError:
     GL_enabled = False
 
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
 
-EPSILON = 1e-8
-
-NUM_PER_CELL_X = 10
-NUM_PER_CELL_Y = 10
-NUM_CELL_X = 0
-NUM_CELL_Y = 0
 
+EPSILON = 1e-8
 
-class ZBufferItem(object):
-    def __init__(self, z=0.0):
-        self.z = float(z)
-        self.changed = True
-        self.list = -1
+# maximum number of (triangle, cell) combinations processed at once
+MAX_RASTER_BATCH_SIZE = 2 ** 18
+# maximum number of cells processed at once for the moves of a cutter (small arrays fit into
+# the CPU cache)
+MAX_SWEEP_BATCH_SIZE = 2 ** 16
+# relative position of padding cells (beyond the reach of any cutter - even if squared as a
+# single precision number)
+_OUT_OF_REACH = 1e15
+
+
+def _get_cell_batches(counts):
+    """ combine items (e.g. triangles) with the cells within their range
+
+    "counts" is the number of cells for every item. The result is a sequence of pairs of arrays:
+    the item indices and the index of the cell within the range of the item. Every batch contains
+    complete items and (if possible) not more than MAX_RASTER_BATCH_SIZE cells.
+    """
+    ends = numpy.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        stop = max(start + 1, int(numpy.searchsorted(
+            ends, ends[start] - counts[start] + MAX_RASTER_BATCH_SIZE, side="right")))
+        batch_counts = counts[start:stop]
+        total = int(batch_counts.sum())
+        if total > 0:
+            items = start + numpy.repeat(numpy.arange(len(batch_counts)), batch_counts)
+            offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(batch_counts) - batch_counts,
+                                                         batch_counts)
+            yield items, offsets
+        start = stop
+
+
+def _get_window_size(counts):
+    """ round up to the next number of the form 2^n or 3*2^n (the waste is below 50%) """
+    counts = numpy.maximum(counts, 1)
+    power = 2 ** numpy.ceil(numpy.log2(counts)).astype(numpy.int64)
+    return numpy.where(3 * power // 4 >= counts, 3 * power // 4, power)
+
+
+def _get_lowest_ramp_positions(ramp_radius, is_spherical, rel_x, rel_y, t_line, delta_x,
+                               delta_y, delta_z):
+    """ return the position along inclined moves removing most material at the given cells
+
+    The cells are given relative to the start of the move. "t_line" is the position of the
+    closest point on the (infinite) line. The result contains the position (0..1) and the
+    squared horizontal distance between the cell and the cutter at that position.
+    """
+    length = numpy.hypot(delta_x, delta_y).astype(numpy.float64)
+    length = numpy.where(length > 0, length, 1)
+    # the horizontal distance to the line and the half length of the reachable part of the line
+    line_distance_sq = ((rel_x - t_line * delta_x) ** 2
+                        + (rel_y - t_line * delta_y) ** 2).astype(numpy.float64)
+    reach = numpy.sqrt(numpy.maximum(ramp_radius ** 2 - line_distance_sq, 0)) / length
+    if is_spherical:
+        # the tangent of the sphere is parallel to the move
+        shift = reach * delta_z / numpy.hypot(length, delta_z)
+    else:
+        # the lowest position of a flat cutter is the rim
+        shift = reach * numpy.sign(delta_z)
+    t = numpy.clip(t_line - shift, 0, 1)
+    distance_sq = (rel_x - t * delta_x) ** 2 + (rel_y - t * delta_y) ** 2
+    return t, distance_sq
 
 
-class ZCellItem(object):
-    def __init__(self):
-        self.list = -1
-        self.array = None
+class ZBuffer(object):
+    """ height field of a regular x/y grid - e.g. for material removal simulations
 
+    The heights are stored in the 2D array "buf" (rows: y, columns: x). Triangles raise the
+    heights ("add_triangles"), while cutters lower them ("add_cutter", "add_moves").
+    All operations are vectorized. This class is only available if numpy is installed.
+    """
 
-class ZBuffer(object):
-    def __init__(self, minx, maxx, xres, miny, maxy, yres, minz, maxz):
-        global NUM_CELL_X, NUM_CELL_Y
+    def __init__(self, minx, maxx, xres, miny, maxy, yres, minz, maxz, initial_z=None):
+        """ the buffer is filled with "initial_z" (default: minz) """
         self.minx = float(minx)
         self.maxx = float(maxx)
         self.miny = float(miny)
@@ -60,228 +117,235 @@ class ZBuffer(object):
         self.maxz = float(maxz)
         self.xres = int(xres)
         self.yres = int(yres)
+        self.x = self.minx + numpy.arange(self.xres) * (self.maxx - self.minx) / self.xres
+        self.y = self.miny + numpy.arange(self.yres) * (self.maxy - self.miny) / self.yres
+        self.buf = numpy.full((self.yres, self.xres),
+                              self.minz if initial_z is None else float(initial_z))
         self.changed = True
+        self._opengl_arrays = None
 
-        NUM_CELL_X = self.xres / NUM_PER_CELL_X
-        NUM_CELL_Y = self.yres / NUM_PER_CELL_Y
-
-        self.x = [0.0] * self.xres
-        for i in range(0, self.xres):
-            self.x[i] = self.minx+(i * (self.maxx-self.minx)/self.xres)
-        self.y = [0.0] * self.yres
-        for i in range(0, self.yres):
-            self.y[i] = self.miny+(i * (self.maxy-self.miny)/self.yres)
-        self.buf = [[]] * self.yres
-        for y in range(0, self.yres):
-            self.buf[y] = [None] * self.xres
-            for x in range(0, self.xres):
-                self.buf[y][x] = ZBufferItem(self.minz)
-
-        self.list = [[]] * self.yres
-        for y in range(0, self.yres):
-            self.list[y] = [None] * self.xres
-            for x in range(0, self.xres):
-                self.list[y][x] = -1
-
-        self.cell = [None] * NUM_CELL_Y
-        for y in range(0, NUM_CELL_Y):
-            self.cell[y] = [None] * NUM_CELL_X
-            for x in range(0, NUM_CELL_X):
-                self.cell[y][x] = ZCellItem()
+    def _get_column_range(self, low, high):
+        """ return the first and last columns with x coordinates between low and high (arrays) """
+        scale = self.xres / (self.maxx - self.minx)
+        first = numpy.maximum(0, numpy.ceil((low - self.minx) * scale - EPSILON))
+        last = numpy.minimum(self.xres - 1, numpy.floor((high - self.minx) * scale + EPSILON))
+        return first.astype(numpy.int64), last.astype(numpy.int64)
+
+    def _get_row_range(self, low, high):
+        scale = self.yres / (self.maxy - self.miny)
+        first = numpy.maximum(0, numpy.ceil((low - self.miny) * scale - EPSILON))
+        last = numpy.minimum(self.yres - 1, numpy.floor((high - self.miny) * scale + EPSILON))
+        return first.astype(numpy.int64), last.astype(numpy.int64)
 
     def add_triangles(self, triangles):
-        for t in triangles:
-            self.add_triangle(t)
+        self.add_triangle_arrays(*intersection_batch.get_triangle_arrays(triangles))
 
     def add_triangle(self, t):
-        minx = int((t.minx - self.minx) / (self.maxx - self.minx) * self.xres) - 1
-        maxx = int((t.maxx - self.minx) / (self.maxx - self.minx) * self.xres) + 1
-        miny = int((t.miny - self.miny) / (self.maxy - self.miny) * self.yres) - 1
-        maxy = int((t.maxy - self.miny) / (self.maxy - self.miny) * self.yres) + 2
-        if minx < 0:
-            minx = 0
-        if maxx > self.xres - 1:
-            maxx = self.xres - 1
-        if miny < 0:
-            miny = 0
-        if maxy > self.yres - 1:
-            maxy = self.yres - 1
-
-        for y in range(miny, maxy):
-            py = self.y[y]
-            for x in range(minx, maxx):
-                px = self.x[x]
-                v0x = t.p3[0] - t.p1[0]
-                v0y = t.p3[1] - t.p1[1]
-                v1x = t.p2[0] - t.p1[0]
-                v1y = t.p2[1] - t.p1[1]
-                v2x = px - t.p1[0]
-                v2y = py - t.p1[1]
-                dot00 = v0x*v0x + v0y*v0y
-                dot01 = v0x*v1x + v0y*v1y
-                dot02 = v0x*v2x + v0y*v2y
-                dot11 = v1x*v1x + v1y*v1y
-                dot12 = v1x*v2x + v1y*v2y
-                invDenom = 1 / (dot00 * dot11 - dot01 * dot01)
-                u = (dot11 * dot02 - dot01 * dot12) * invDenom
-                v = (dot00 * dot12 - dot01 * dot02) * invDenom
-                if (u >= -EPSILON) and (v >= -EPSILON) and (u + v <= 1-EPSILON):
-                    v0z = t.p3[2] - t.p1[2]
-                    v1z = t.p2[2] - t.p1[2]
-                    pz = t.p1[2] + v0z * u + v1z * v
-                    if pz > self.buf[y][x].z:
-                        self.buf[y][x].z = pz
-                        self.buf[y+0][x+0].changed = True
-                        self.buf[y+0][x+1].changed = True
-                        self.buf[y+1][x+0].changed = True
-                        self.buf[y+1][x+1].changed = True
-                        self.changed = True
+        self.add_triangles([t])
+
+    def add_model(self, model):
+        self.add_triangle_arrays(*model.get_triangle_arrays())
+
+    def add_triangle_arrays(self, p1, p2, p3):
+        """ raise the heights to the surface of the given triangles (see "get_triangle_arrays")
+
+        All triangles are rasterized at once: every triangle is combined with the cells within
+        its bounding box. The heights of the cells inside of the triangles are calculated via
+        barycentric coordinates.
+        """
+        if len(p1) == 0:
+            return
+        low = numpy.minimum(numpy.minimum(p1, p2), p3)
+        high = numpy.maximum(numpy.maximum(p1, p2), p3)
+        first_x, last_x = self._get_column_range(low[:, 0], high[:, 0])
+        first_y, last_y = self._get_row_range(low[:, 1], high[:, 1])
+        count_x = numpy.maximum(0, last_x - first_x + 1)
+        # barycentric coordinates (see "Triangle.is_point_inside")
+        v0 = p3[:, :2] - p1[:, :2]
+        v1 = p2[:, :2] - p1[:, :2]
+        dot00 = (v0 * v0).sum(axis=1)
+        dot01 = (v0 * v1).sum(axis=1)
+        dot11 = (v1 * v1).sum(axis=1)
+        denominator = dot00 * dot11 - dot01 * dot01
+        # vertical triangles are not visible from above
+        counts = numpy.where(numpy.abs(denominator) > EPSILON,
+                             count_x * numpy.maximum(0, last_y - first_y + 1), 0)
+        for triangles, cell_offsets in _get_cell_batches(counts):
+            columns = first_x[triangles] + cell_offsets % count_x[triangles]
+            rows = first_y[triangles] + cell_offsets // count_x[triangles]
+            v2x = self.x[columns] - p1[triangles, 0]
+            v2y = self.y[rows] - p1[triangles, 1]
+            dot02 = v0[triangles, 0] * v2x + v0[triangles, 1] * v2y
+            dot12 = v1[triangles, 0] * v2x + v1[triangles, 1] * v2y
+            u = (dot11[triangles] * dot02 - dot01[triangles] * dot12) / denominator[triangles]
+            v = (dot00[triangles] * dot12 - dot01[triangles] * dot02) / denominator[triangles]
+            inside = (u >= -EPSILON) & (v >= -EPSILON) & (u + v <= 1 + EPSILON)
+            triangles = triangles[inside]
+            heights = (p1[triangles, 2] + (p3[triangles, 2] - p1[triangles, 2]) * u[inside]
+                       + (p2[triangles, 2] - p1[triangles, 2]) * v[inside])
+            numpy.maximum.at(self.buf, (rows[inside], columns[inside]), heights)
+            self.changed = True
 
     def add_cutter(self, c):
-        cx = c.location[0]
-        cy = c.location[1]
-        rsq = c.radiussq
-        minx = int((c.minx - self.minx) / (self.maxx - self.minx) * self.xres) - 1
-        maxx = int((c.maxx - self.minx) / (self.maxx - self.minx) * self.xres) + 1
-        miny = int((c.miny - self.miny) / (self.maxy - self.miny) * self.yres) - 1
-        maxy = int((c.maxy - self.miny) / (self.maxy - self.miny) * self.yres) + 1
-        if minx < 0:
-            minx = 0
-        if maxx < 0:
-            maxx = 0
-        if minx > self.xres - 1:
-            minx = self.xres - 1
-        if maxx > self.xres - 1:
-            maxx = self.xres - 1
-        if miny < 0:
-            miny = 0
-        if maxy < 0:
-            maxy = 0
-        if maxy > self.yres - 1:
-            maxy = self.yres - 1
-        if miny > self.yres - 1:
-            miny = self.yres - 1
-        p = (0, 0, 0)
-        zaxis = (0, 0, -1)
-
-        for y in range(miny, maxy):
-            py = self.y[y]
-            p = (p[0], py, p[2])
-            for x in range(minx, maxx):
-                px = self.x[x]
-                p = (px, p[1], p[2])
-                if (px - cx) * (px - cx) + (py - cy) * (py - cy) <= rsq + EPSILON:
-                    (cl, ccp, cp, l) = c.intersect_point(zaxis, p)
-                    if ccp:
-                        pz = l
-                        if pz < self.buf[y][x].z:
-                            self.buf[y][x].z = pz
-                            self.buf[y+0][x+0].changed = True
-                            self.buf[y+0][x+1].changed = True
-                            self.buf[y+1][x+0].changed = True
-                            self.buf[y+1][x+1].changed = True
-                            self.changed = True
+        """ remove the material occupied by the cutter at its current location """
+        self.add_moves(c, [c.location, c.location])
+
+    def add_move(self, cutter, start, end):
+        self.add_moves(cutter, [start, end])
+
+    def add_moves(self, cutter, positions):
+        """ remove the material along a sequence of straight moves (a list of points)
+
+        The swept volume of a horizontal move is described by the cutter profile at the distance
+        to the move. The lowest point of an inclined move (along the move) is calculated directly
+        for spherical and cylindrical cutters. Inclined moves of toroidal cutters are split into
+        parts with a height difference below the resolution of the grid. The moves are processed
+        in groups: every move is combined with the cells within reach of the cutter.
+        """
+        profile = intersection_batch.get_cutter_profile(cutter)
+        if profile is None:
+            raise ValueError("Unsupported cutter shape: %s" % str(cutter))
+        positions = numpy.asarray([position[:3] for position in positions], dtype=numpy.float64)
+        if len(positions) < 2:
+            return
+        radius = profile.radius
+        # the height along an inclined move is convex for spherical and cylindrical cutters
+        if profile.major_radius == 0:
+            ramp_radius = profile.minor_radius
+        elif profile.minor_radius == 0:
+            ramp_radius = profile.major_radius
+        else:
+            ramp_radius = None
+        starts, ends = self._split_moves(positions[:-1], positions[1:],
+                                         split=(ramp_radius is None))
+        delta_z = ends[:, 2] - starts[:, 2]
+        first_x, last_x = self._get_column_range(
+            numpy.minimum(starts[:, 0], ends[:, 0]) - radius,
+            numpy.maximum(starts[:, 0], ends[:, 0]) + radius)
+        first_y, last_y = self._get_row_range(numpy.minimum(starts[:, 1], ends[:, 1]) - radius,
+                                              numpy.maximum(starts[:, 1], ends[:, 1]) + radius)
+        count_x = last_x - first_x + 1
+        count_y = last_y - first_y + 1
+        visible = (count_x > 0) & (count_y > 0)
+        # Moves with similar window sizes are processed together (padded to the same size).
+        size_x = _get_window_size(count_x[visible])
+        size_y = _get_window_size(count_y[visible])
+        # padded windows may be wider than the grid
+        key_base = int(size_x.max()) + 1 if len(size_x) > 0 else 1
+        group_keys, groups = numpy.unique(size_y * key_base + size_x, return_inverse=True)
+        moves = numpy.nonzero(visible)[0]
+        flat_buf = self.buf.reshape(-1)
+        for group_index, key in enumerate(group_keys.tolist()):
+            width_y, width_x = divmod(key, key_base)
+            members = moves[groups.ravel() == group_index]
+            chunk_size = max(1, MAX_SWEEP_BATCH_SIZE // (width_x * width_y))
+            for chunk_start in range(0, len(members), chunk_size):
+                chunk = members[chunk_start:chunk_start + chunk_size, numpy.newaxis, numpy.newaxis]
+                start = starts[chunk]
+                delta = ends[chunk] - start
+                # the window of every move: shape (moves, rows, columns)
+                columns = first_x[chunk] + numpy.arange(width_x)[numpy.newaxis, numpy.newaxis, :]
+                rows = first_y[chunk] + numpy.arange(width_y)[numpy.newaxis, :, numpy.newaxis]
+                # Distances are calculated with single precision relative to the start of the
+                # move. Padding cells are moved out of reach.
+                rel_x = numpy.where(columns <= last_x[chunk],
+                                    self.x[numpy.minimum(columns, self.xres - 1)] - start[..., 0],
+                                    _OUT_OF_REACH).astype(numpy.float32)
+                rel_y = numpy.where(rows <= last_y[chunk],
+                                    self.y[numpy.minimum(rows, self.yres - 1)] - start[..., 1],
+                                    _OUT_OF_REACH).astype(numpy.float32)
+                length_sq = delta[..., 0] ** 2 + delta[..., 1] ** 2
+                factor = numpy.where(length_sq > 0,
+                                     1 / numpy.where(length_sq > 0, length_sq, 1), 0)
+                delta_x = delta[..., 0].astype(numpy.float32)
+                delta_y = delta[..., 1].astype(numpy.float32)
+                # position of the closest point on the move
+                t_line = (rel_x * (delta[..., 0] * factor).astype(numpy.float32)
+                          + rel_y * (delta[..., 1] * factor).astype(numpy.float32))
+                t = numpy.clip(t_line, 0, 1)
+                distance_sq = rel_x - t * delta_x
+                distance_sq *= distance_sq
+                offset_y = rel_y - t * delta_y
+                offset_y *= offset_y
+                distance_sq += offset_y
+                inside = numpy.flatnonzero(distance_sq <= (radius + EPSILON) ** 2)
+                if len(inside) == 0:
+                    continue
+                # the cells are sorted by move
+                window_size = width_x * width_y
+                move = numpy.repeat(chunk.ravel(), numpy.diff(numpy.searchsorted(
+                    inside, numpy.arange(len(chunk) + 1) * window_size)))
+                indices = (rows * self.xres + columns).take(inside)
+                t = t.take(inside)
+                distance_sq = distance_sq.take(inside)
+                if (ramp_radius is not None) and delta_z[chunk].any():
+                    # the index of the move within the chunk
+                    local = inside // window_size
+                    t, distance_sq = _get_lowest_ramp_positions(
+                        ramp_radius, profile.major_radius == 0,
+                        numpy.broadcast_to(rel_x, t_line.shape).take(inside),
+                        numpy.broadcast_to(rel_y, t_line.shape).take(inside),
+                        t_line.take(inside), delta_x.take(local), delta_y.take(local),
+                        delta_z[move])
+                distance = numpy.minimum(numpy.sqrt(distance_sq), radius)
+                heights = starts[move, 2] + t * delta_z[move] + profile.get_lowest_offset(distance)
+                lower = heights < flat_buf[indices]
+                if lower.any():
+                    numpy.minimum.at(flat_buf, indices[lower], heights[lower])
+                    self.changed = True
+
+    def _split_moves(self, starts, ends, split=True):
+        """ split moves into parts with a small height difference """
+        delta = ends - starts
+        # vertical moves: the lowest position removes everything
+        vertical = numpy.hypot(delta[:, 0], delta[:, 1]) < EPSILON
+        lowest = numpy.where((starts[:, 2] < ends[:, 2])[:, numpy.newaxis], starts, ends)
+        starts = numpy.where(vertical[:, numpy.newaxis], lowest, starts)
+        delta[vertical] = 0
+        if not split:
+            return starts, starts + delta
+        step = min((self.maxx - self.minx) / self.xres, (self.maxy - self.miny) / self.yres)
+        parts = numpy.maximum(1, numpy.ceil(numpy.abs(delta[:, 2]) / step)).astype(numpy.int64)
+        moves = numpy.repeat(numpy.arange(len(starts)), parts)
+        index = numpy.arange(len(moves)) - numpy.repeat(numpy.cumsum(parts) - parts, parts)
+        first = (index / parts[moves].astype(numpy.float64))[:, numpy.newaxis]
+        last = ((index + 1) / parts[moves].astype(numpy.float64))[:, numpy.newaxis]
+        return (starts[moves] + delta[moves] * first, starts[moves] + delta[moves] * last)
+
+    def get_normals(self):
+        """ return the normals of the surface for every grid point (array: yres x xres x 3) """
+        step_x = (self.maxx - self.minx) / self.xres
+        step_y = (self.maxy - self.miny) / self.yres
+        if min(self.xres, self.yres) > 1:
+            gradient_y, gradient_x = numpy.gradient(self.buf, step_y, step_x)
+        else:
+            gradient_y = gradient_x = numpy.zeros_like(self.buf)
+        normals = numpy.dstack((-gradient_x, -gradient_y, numpy.ones_like(self.buf)))
+        return normals / numpy.linalg.norm(normals, axis=2)[:, :, numpy.newaxis]
+
+    def _get_opengl_arrays(self):
+        xs, ys = numpy.meshgrid(self.x, self.y)
+        vertices = numpy.dstack((xs, ys, self.buf)).reshape(-1, 3).astype(numpy.float32)
+        normals = self.get_normals().reshape(-1, 3).astype(numpy.float32)
+        if self._opengl_arrays is None:
+            # every quad connects four neighbouring grid points
+            corners = numpy.arange(self.xres * self.yres).reshape(self.yres, self.xres)
+            indices = numpy.dstack((corners[:-1, :-1], corners[1:, :-1], corners[1:, 1:],
+                                    corners[:-1, 1:])).ravel().astype(numpy.uint32)
+        else:
+            indices = self._opengl_arrays[2]
+        return vertices, normals, indices
 
     def to_OpenGL(self):
         if GL_enabled:
-            self.to_OpenGL_6()
+            if self.changed or (self._opengl_arrays is None):
+                self._opengl_arrays = self._get_opengl_arrays()
+            vertices, normals, indices = self._opengl_arrays
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glEnableClientState(GL.GL_NORMAL_ARRAY)
+            GL.glVertexPointer(3, GL.GL_FLOAT, 0, vertices)
+            GL.glNormalPointer(GL.GL_FLOAT, 0, normals)
+            GL.glDrawElements(GL.GL_QUADS, len(indices), GL.GL_UNSIGNED_INT, indices)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glDisableClientState(GL.GL_NORMAL_ARRAY)
         self.changed = False
-
-    def normal(self, z0, z1, z2):
-        nx = 1.0 / self.xres
-        ny = 1.0 / self.yres
-        nz = 1.0 / (self.maxz - self.minz)
-        return (-ny * (z1 - z0) * nz / nx, -nx * (z2 - z1) * nz / ny, nx * ny / nz * 100)
-
-    # use display list with vertex and normal and index buffers per cell
-    # (cell = group of quads)
-    def to_OpenGL_6(self):
-        num_cell_x = NUM_CELL_X
-        num_cell_y = NUM_CELL_Y
-
-        dy = self.yres/num_cell_y
-        if dy < 2:
-            num_cell_y = 1
-            dy = self.yres
-        dx = self.xres/num_cell_x
-        if dx < 2:
-            num_cell_x = 1
-            dx = self.xres
-
-        GL.glEnableClientState(GL.GL_INDEX_ARRAY)
-        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
-        GL.glEnableClientState(GL.GL_NORMAL_ARRAY)
-
-        for y in range(num_cell_y):
-            y0 = y * dy
-            y1 = y0 + dy + 1
-            if y1 > self.yres:
-                y1 = self.yres
-            for x in range(num_cell_x):
-                x0 = x * dx
-                x1 = x0 + dx + 1
-                if x1 > self.xres:
-                    x1 = self.xres
-
-                changed = False
-
-                if self.changed:
-                    for yi in range(y0, y1 - 1):
-                        for xi in range(x0, x1 - 1):
-                            if self.buf[yi][xi].changed:
-                                changed = True
-                                break
-
-                if changed:
-                    if self.cell[y][x].list == -1:
-                        self.cell[y][x].list = GL.glGenLists(1)
-                        self.cell[y][x].vertex = (ctypes.c_float * 3 * ((y1-y0) * (x1 - x0)))()
-                        self.cell[y][x].normal = (ctypes.c_float * 3 * ((y1-y0) * (x1 - x0)))()
-                        self.cell[y][x].index = (ctypes.c_ushort
-                                                 * (4 * (y1 - y0 - 1) * (x1 - x0 - 1)))()
-                    glIndexPointers(self.cell[y][x].index)
-                    glVertexPointerf(self.cell[y][x].vertex)
-                    glNormalPointerf(self.cell[y][x].normal)
-
-                    GL.glNewList(self.cell[y][x].list, GL.GL_COMPILE)
-                    idx = 0
-                    for yi in range(y0, y1):
-                        for xi in range(x0, x1):
-                            self.buf[yi][xi].changed = False
-                            self.cell[y][x].vertex[idx][0] = self.x[xi]
-                            self.cell[y][x].vertex[idx][1] = self.y[yi]
-                            self.cell[y][x].vertex[idx][2] = self.buf[yi][xi].z
-
-                            if (xi == self.xres - 1) or (yi == self.yres - 1):
-                                n = self.normal(self.buf[yi-1][xi-1].z, self.buf[yi-1][xi].z,
-                                                self.buf[yi][xi-1].z)
-                            else:
-                                n = self.normal(self.buf[yi][xi].z, self.buf[yi][xi+1].z,
-                                                self.buf[yi+1][xi].z)
-                            self.cell[y][x].normal[idx][0] = n[0]
-                            self.cell[y][x].normal[idx][1] = n[1]
-                            self.cell[y][x].normal[idx][2] = n[2]
-
-                            idx += 1
-
-                    idx = 0
-                    for yi in range(y0, y1 - 1):
-                        for xi in range(x0, x1 - 1):
-                            self.cell[y][x].index[idx + 0] = ((yi - y0 + 0)
-                                                              * (x1 - x0) + (xi - x0 + 0))
-                            self.cell[y][x].index[idx + 1] = ((yi - y0 + 1)
-                                                              * (x1 - x0) + (xi - x0 + 0))
-                            self.cell[y][x].index[idx + 2] = ((yi - y0 + 1)
-                                                              * (x1 - x0) + (xi - x0 + 1))
-                            self.cell[y][x].index[idx + 3] = ((yi - y0 + 0)
-                                                              * (x1 - x0) + (xi - x0 + 1))
-                            idx += 4
-
-                    GL.glDrawElements(GL.GL_QUADS, idx, GL.GL_UNSIGNED_SHORT,
-                                      self.cell[y][x].index)
-                    GL.glEndList()
-                GL.glCallList(self.cell[y][x].list)
-
-        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
-        GL.glDisableClientState(GL.GL_NORMAL_ARRAY)
-        GL.glDisableClientState(GL.GL_INDEX_ARRAY)
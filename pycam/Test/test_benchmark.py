@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import collections
+import io
+import os
+import tempfile
+
+import pycam
+import pycam.Importers.STLImporter
+import pycam.Test
+import pycam.Utils.benchmark as benchmark
+
+
+def _get_results(durations):
+    return {"format": benchmark.RESULT_FORMAT, "environment": {},
+            "benchmarks": {name: {"minimum": duration, "median": duration, "runs": 1}
+                           for name, duration in durations.items()}}
+
+
+class BenchmarkTests(pycam.Test.PycamTestCase):
+    """Benchmark suite and the comparison of its results"""
+
+    def test_wave_mesh_is_closed(self):
+        mesh = benchmark.get_wave_mesh(6)
+        edges = collections.Counter()
+        for face in mesh.faces.tolist():
+            for index in range(3):
+                edges[(face[index], face[(index + 1) % 3])] += 1
+        # every directed edge is used once and its reverse belongs to the adjacent face
+        self.assertEqual(max(edges.values()), 1)
+        for start, end in edges:
+            self.assertIn((end, start), edges)
+        low, high = mesh.get_bounds()
+        self.assertEqual(low[2], 0)
+        self.assertTrue(0 < high[2] <= 10)
+
+    def test_synthetic_model_file(self):
+        workloads = benchmark.Workloads()
+        try:
+            filename = workloads.get_model_file("waves-small")
+            model = pycam.Importers.STLImporter.ImportModel(filename)
+            self.assertEqual(len(model), len(workloads.get_model("waves-small").mesh))
+        finally:
+            workloads.cleanup()
+        self.assertIsNone(workloads.temp_dir)
+
+    def test_sample_location(self):
+        """Sample files do not depend on the current directory"""
+        original_directory = os.getcwd()
+        os.chdir(tempfile.gettempdir())
+        try:
+            self.assertTrue(os.path.isfile(benchmark.get_sample_location("pycam-textbox.stl")))
+            self.assertRaises(pycam.GenericError, benchmark.get_sample_location, "missing.stl")
+        finally:
+            os.chdir(original_directory)
+
+    def test_select_benchmarks(self):
+        workloads = benchmark.Workloads()
+        benchmarks = benchmark.get_benchmarks(workloads, sizes=("small", ))
+        names = [item.name for item in benchmarks]
+        self.assertIn("dropcutter/textbox", names)
+        self.assertIn("waterline/waves-small", names)
+        self.assertIn("pocketing/text", names)
+        self.assertNotIn("dropcutter/waves-medium", names)
+        selected = benchmark.select_benchmarks(benchmarks, ["^dropcutter/", "simulation/scene"])
+        self.assertEqual([item.name for item in selected],
+                         ["dropcutter/textbox", "dropcutter/scene", "dropcutter/waves-small",
+                          "simulation/scene"])
+        self.assertEqual(len(benchmark.select_benchmarks(benchmarks, [])), len(benchmarks))
+
+    def test_run_and_store(self):
+        calls = []
+        item = benchmark.Benchmark("dummy", lambda: lambda: calls.append(None))
+        reported = []
+        results = benchmark.run_benchmarks(
+            [item], repeat=3, callback=lambda name, result: reported.append(name))
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(reported, ["dummy"])
+        self.assertEqual(results["benchmarks"]["dummy"]["runs"], 3)
+        stream = io.StringIO()
+        benchmark.write_results(results, stream)
+        stream.seek(0)
+        self.assertEqual(benchmark.read_results(stream)["benchmarks"], results["benchmarks"])
+        self.assertRaises(ValueError, benchmark.read_results, io.StringIO(u'{"format": 0}'))
+
+    def test_compare_results(self):
+        baseline = _get_results({"same": 1.0, "slower": 1.0, "noise": 0.001, "removed": 1.0})
+        current = _get_results({"same": 1.1, "slower": 1.5, "noise": 0.005, "added": 1.0})
+        comparisons = {item.name: item
+                       for item in benchmark.compare_results(baseline, current, threshold=0.2)}
+        self.assertEqual(set(comparisons), {"same", "slower", "noise"})
+        self.assertFalse(comparisons["same"].is_regression)
+        self.assertTrue(comparisons["slower"].is_regression)
+        self.assertAlmostEqual(comparisons["slower"].ratio, 1.5)
+        # tiny absolute differences are ignored
+        self.assertFalse(comparisons["noise"].is_regression)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import pycam.Exporters.GCode.LinuxCNC
+from pycam.Exporters.GCode.LinuxCNC import LinuxCNC
+from pycam.Toolpath.Filters import StepWidth
+from pycam.Toolpath.Steps import MachineSetting, MoveArc, MoveStraight, MoveStraightRapid
+import pycam.Test
+
+
+def _get_stream():
+    return io.StringIO() if sys.version_info[0] >= 3 else io.BytesIO()
+
+
+class LinuxCNCExportTests(pycam.Test.PycamTestCase):
+    """Export of toolpaths as GCode"""
+
+    def setUp(self):
+        self.path = [MoveStraightRapid((0, 0, 5)), MoveStraight((0, 0, -0.0001)),
+                     MoveStraight((1.004, 0, -0.0001)), MoveStraight((1.004, 0.5, 0)),
+                     # invisible with a step width of 0.01
+                     MoveStraight((1.0041, 0.5, 0)),
+                     MachineSetting("feedrate", 200), MoveStraight((2, 0.5, 0)),
+                     MoveStraightRapid((2, 0.5, 5))]
+
+    def tearDown(self):
+        pycam.Exporters.GCode.LinuxCNC.numpy_enabled = True
+
+    def _get_moves(self, filters=None):
+        destination = _get_stream()
+        generator = LinuxCNC(destination)
+        generator.add_moves(self.path, filters)
+        generator.finish()
+        lines = destination.getvalue().splitlines()
+        return [line for line in lines
+                if line.strip().startswith(("G0", "G1", "G2 ", "G3 ", "X", "Y", "Z"))]
+
+    def test_moves(self):
+        """Skip unchanged axes"""
+        self.assertEqual(self._get_moves(), [
+            "G0 X0.000000 Y0.000000 Z5.000000", "G1 Z-0.000100", "  X1.004000",
+            "  Y0.500000 Z0.000000", "  X1.004100", "G1 X2.000000", "G0 Z5.000000"])
+
+    def test_step_width(self):
+        """Round the coordinates according to the step width"""
+        # the step width filter removes the move to x=2.001
+        self.path.insert(-1, MoveStraight((2.001, 0.5, 0)))
+        filters = [StepWidth(step_width_x=0.01, step_width_y=0.01, step_width_z=0.001)]
+        # z=-0.0001 is rounded to zero
+        expected = ["G0 X0.00 Y0.00 Z5.000", "G1 Z0.000", "  X1.00", "  Y0.50", "G1 X2.00",
+                    "G0 Z5.000"]
+        self.assertEqual(self._get_moves(filters), expected)
+        # the same result without numpy
+        pycam.Exporters.GCode.LinuxCNC.numpy_enabled = False
+        self.assertEqual(self._get_moves(filters), expected)
+
+    def test_arcs(self):
+        """Write arcs with a center relative to their start"""
+        self.path = [MoveStraightRapid((0, 0, 5)), MoveStraight((0, 0, 0)),
+                     MoveArc((2, 0, 0), (1, 0, 0), True), MoveArc((1, -1, 0), (1, 0, 0), True),
+                     MoveStraight((1, -3, 0))]
+        filters = [StepWidth(step_width_x=0.01, step_width_y=0.01, step_width_z=0.01)]
+        self.assertEqual(self._get_moves(filters), [
+            "G0 X0.00 Y0.00 Z5.00", "G1 Z0.00", "G17\t; select the XY plane for arcs",
+            "G2 X2.00 Y0.00 I1.00 J0.00",
+            "G2 X1.00 Y-1.00 I-1.00 J0.00", "G1 Y-3.00"])
+
+    def test_compressed(self):
+        """Write compressed files"""
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "test.ngc.gz")
+            generator = LinuxCNC(filename)
+            generator.add_moves(self.path)
+            generator.finish()
+            with gzip.open(filename, "rb") as gcode_file:
+                content = gcode_file.read().decode("utf-8")
+            self.assertIn("G1 X2.000000", content.splitlines())
+            self.assertTrue(content.splitlines()[-1].startswith("M2"))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
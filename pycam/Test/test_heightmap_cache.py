@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import os
+import random
+import unittest
+
+from pycam.Cutters.CylindricalCutter import CylindricalCutter
+from pycam.Cutters.SphericalCutter import SphericalCutter
+from pycam.Cutters.ToroidalCutter import ToroidalCutter
+from pycam.Geometry import Box3D, Point3D
+from pycam.Geometry.Model import Model
+from pycam.Geometry.Triangle import Triangle
+import pycam.Importers
+from pycam.Importers.TestModel import get_test_model
+from pycam.PathGenerators import get_max_height_batch
+from pycam.PathGenerators.DropCutter import DropCutter
+import pycam.PathGenerators.HeightmapCache
+from pycam.PathGenerators.HeightmapCache import HeightmapCache
+from pycam.Toolpath.MotionGrid import get_fixed_grid
+import pycam.Test
+
+try:
+    import pycam.Plugins.ProcessStrategies as process_strategies
+except ImportError:
+    # the plugins require GTK
+    process_strategies = None
+
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "samples",
+                           "pycam-textbox.stl")
+
+
+def _get_model(step_height):
+    """ a tilted plane - the right half is raised by "step_height" """
+    model = Model()
+
+    def get_point(x, y):
+        return (x, y, 0.1 * x + 0.05 * y + (step_height if x > 5 else 0))
+
+    for x1, x2 in ((0, 5), (5, 10)):
+        if x2 > 5:
+            # the inner end of the raised half (the wall is not needed)
+            x1 += 1e-6
+        model.append(Triangle(get_point(x1, 0), get_point(x1, 10), get_point(x2, 0)))
+        model.append(Triangle(get_point(x2, 0), get_point(x1, 10), get_point(x2, 10)))
+    return model
+
+
+@unittest.skipUnless(pycam.PathGenerators.HeightmapCache.numpy_enabled, "numpy is not available")
+class HeightmapCacheTests(pycam.Test.PycamTestCase):
+    """Shared lattice of drop heights"""
+
+    def setUp(self):
+        self.cutter = SphericalCutter(1)
+        self.positions = [(x / 10.0, y / 10.0) for x in range(20, 81, 3) for y in range(20, 81, 7)]
+
+    def tearDown(self):
+        pycam.PathGenerators.HeightmapCache.clear_heightmap_cache()
+
+    def _get_heights(self, model, cutter=None, positions=None, minz=-1, maxz=5):
+        cutter = cutter or self.cutter
+        positions = positions or self.positions
+        heightmap = HeightmapCache(0.5 * cutter.radius)
+        heightmap.fill(model, cutter, minz, maxz, [positions])
+        window = heightmap.get_window(positions)
+        expected = [point[2] for point in
+                    get_max_height_batch(model, cutter, positions, minz, maxz)]
+        return window.get_heights(positions), expected
+
+    def test_plane(self):
+        """Interpolate the heights above a plane"""
+        heights, expected = self._get_heights(_get_model(0))
+        for height, expected_height in zip(heights, expected):
+            self.assertAlmostEqual(height, expected_height)
+
+    def test_step(self):
+        """Calculate the heights near a step exactly"""
+        heights, expected = self._get_heights(_get_model(1))
+        for (x, y), height, expected_height in zip(self.positions, heights, expected):
+            if 4 < x < 5:
+                # the cutter touches the edge of the step
+                self.assertTrue(math.isnan(height))
+            elif abs(x - 5) > 2.5:
+                # the surrounding lattice nodes are not influenced by the step
+                self.assertAlmostEqual(height, expected_height)
+
+    def test_no_gouging(self):
+        """Interpolated heights are never below the exact heights"""
+        random.seed(1)
+        detected = pycam.Importers.detect_file_type(SAMPLE_FILE, use_cache=False)
+        for model in (get_test_model(), detected.importer(detected.uri)):
+            positions = [(random.uniform(model.minx, model.maxx),
+                          random.uniform(model.miny, model.maxy)) for _ in range(200)]
+            if model.maxx > 42.986:
+                # a symmetric step around this position was interpolated too low before
+                positions.append((42.986, 20.070))
+            for cutter in (CylindricalCutter(1), SphericalCutter(1), ToroidalCutter(1, 0.25)):
+                heights, expected = self._get_heights(model, cutter, positions, model.minz - 1,
+                                                      model.maxz + 1)
+                for height, expected_height in zip(heights, expected):
+                    if not math.isnan(height):
+                        self.assertGreaterEqual(height, expected_height - 1e-9)
+
+    def test_node_limit(self):
+        """The least recently used heightmaps are discarded"""
+        original_limit = pycam.PathGenerators.HeightmapCache.MAX_NODES
+        pycam.PathGenerators.HeightmapCache.MAX_NODES = 300
+        try:
+            model = _get_model(0)
+            first = pycam.PathGenerators.HeightmapCache.get_heightmap_cache(
+                model, self.cutter, -1, 5)
+            first.fill(model, self.cutter, -1, 5, [self.positions])
+            second = pycam.PathGenerators.HeightmapCache.get_heightmap_cache(
+                model, self.cutter, -1, 6)
+            second.fill(model, self.cutter, -1, 6, [self.positions])
+        finally:
+            pycam.PathGenerators.HeightmapCache.MAX_NODES = original_limit
+        self.assertTrue(len(first) + len(second) > 300)
+        self.assertEqual(list(pycam.PathGenerators.HeightmapCache._heightmaps.values()),
+                         [second])
+
+    def test_drop_cutter(self):
+        """Reuse the heightmap for another toolpath"""
+        model = _get_model(1)
+        box = Box3D(Point3D(0, 0, -1), Point3D(10, 10, 5))
+        # the heightmap is not used by default
+        grid = get_fixed_grid(box, None, 1, 0.25)
+        DropCutter().GenerateToolPath(self.cutter, [model], grid, -1, 5)
+        self.assertEqual(len(pycam.PathGenerators.HeightmapCache._heightmaps), 0)
+        paths = []
+        for line_distance in (1, 1, 0.7):
+            grid = get_fixed_grid(box, None, line_distance, 0.25)
+            generator = DropCutter(use_heightmap=True)
+            paths.append([move.position for move in
+                          generator.GenerateToolPath(self.cutter, [model], grid, -1, 5)])
+        self.assertEqual(len(pycam.PathGenerators.HeightmapCache._heightmaps), 1)
+        self.assertEqual(paths[0], paths[1])
+        # compare with the exact calculation
+        positions = [position for position in paths[2] if position]
+        exact = get_max_height_batch(model, self.cutter, positions, -1, 5)
+        for position, exact_position in zip(positions, exact):
+            self.assertAlmostEqual(position[2], exact_position[2], places=3)
+
+
+@unittest.skipUnless(pycam.PathGenerators.HeightmapCache.numpy_enabled, "numpy is not available")
+@unittest.skipIf(process_strategies is None, "the plugins are not available")
+class SurfacingStrategy(pycam.Test.PycamTestCase):
+    """Enable the heightmap for surfacing processes"""
+
+    def setUp(self):
+        self.parameter_sets = {}
+        grid_pattern = {"func": lambda pattern: (get_fixed_grid, {})}
+
+        def register_parameter_set(group, name, label, func, parameters=None, weight=None):
+            self.parameter_sets[name] = parameters
+
+        core = {"register_parameter_set": register_parameter_set,
+                "get_parameter_sets": lambda group: {"grid": grid_pattern}}
+        self.strategy = process_strategies.ProcessStrategySurfacing(core, "Surfacing")
+        self.strategy.setup()
+
+    def tearDown(self):
+        pycam.PathGenerators.HeightmapCache.clear_heightmap_cache()
+
+    def _run_process(self, **parameters):
+        process = {"parameters": dict(self.parameter_sets["surfacing"],
+                                      path_pattern={"name": "grid", "parameters": {}},
+                                      **parameters)}
+        box = Box3D(Point3D(0, 0, -1), Point3D(10, 10, 5))
+        generator, grid = self.strategy.run_process(process, 1, box)
+        return generator.GenerateToolPath(SphericalCutter(1), [_get_model(1)], grid, -1, 5)
+
+    def test_use_heightmap(self):
+        """The heightmap is shared only on request"""
+        self.assertFalse(self.parameter_sets["surfacing"]["use_heightmap"])
+        self._run_process()
+        self.assertEqual(len(pycam.PathGenerators.HeightmapCache._heightmaps), 0)
+        self._run_process(use_heightmap=True)
+        self._run_process(use_heightmap=True, overlap=0.3)
+        self.assertEqual(len(pycam.PathGenerators.HeightmapCache._heightmaps), 1)
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
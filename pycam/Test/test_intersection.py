@@ -66,6 +66,24 @@ class CircleIntersections(pycam.Test.PycamTestCase):
         coll = func(*(func_args + [(0, 0, -1)] + [edge]))
         self.assertCollisionEqual((None, None, INFINITE), coll)
 
+    def test_sloped_line(self):
+        """Circle->Line collisions with sloped lines"""
+        func = pycam.Geometry.intersection.intersect_circle_line
+        func_args = [self._circle["center"], self._circle["axis"], self._circle["radius"],
+                     self._circle["radius"] ** 2]
+        # line dips into circle: the higher side of the circle touches the line first
+        edge = Line((4, 1, 3), (10, 1, 5))
+        coll = func(*(func_args + [(0, 0, -1)] + [edge]))
+        self.assertCollisionEqual(((5, 1, 10), (5, 1, 3.3333333333), 6.666666666), coll)
+        # horizontally skewed line
+        edge = Line((2, 1, 3), (8, 1, 5))
+        coll = func(*(func_args + [(0, 0, -1)] + [edge]))
+        self.assertCollisionEqual(((5, 1, 10), (5, 1, 4), 6), coll)
+        # horizontal push: the leading side of the circle touches the line first
+        edge = Line((4, 1, 3), (10, 1, 5))
+        coll = func(*(func_args + [(1, 0, 0)] + [edge]))
+        self.assertCollisionEqual(((5, 1, 10), (25, 1, 10), 20), coll)
+
     def test_plane(self):
         """Circle->Plane collisions"""
         func = pycam.Geometry.intersection.intersect_circle_plane
@@ -78,6 +96,10 @@ class CircleIntersections(pycam.Test.PycamTestCase):
         triangle = Triangle((2, 5, 3), (2, 0, 3), (-4, 1, 6))
         coll = func(*(func_args + [(0, 0, -1)] + [triangle]))
         self.assertCollisionEqual(((-1, 1, 10), (-1, 1, 4.5), 5.5), coll)
+        # the same with a downward normal (reversed order of vertices)
+        triangle = Triangle((-4, 1, 6), (2, 0, 3), (2, 5, 3))
+        coll = func(*(func_args + [(0, 0, -1)] + [triangle]))
+        self.assertCollisionEqual(((-1, 1, 10), (-1, 1, 4.5), 5.5), coll)
         # skewed and shifted
         triangle = Triangle((14, 5, -3), (14, 0, -3), (8, 1, 0))
         coll = func(*(func_args + [(0, 0, -1)] + [triangle]))
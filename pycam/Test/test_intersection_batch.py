@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from pycam.Cutters.CylindricalCutter import CylindricalCutter
+from pycam.Cutters.SphericalCutter import SphericalCutter
+from pycam.Cutters.ToroidalCutter import ToroidalCutter
+import pycam.Geometry.intersection_batch as intersection_batch
+from pycam.Geometry.Model import Model
+from pycam.Geometry.Triangle import Triangle
+from pycam.PathGenerators import (get_free_paths_batch, get_free_paths_triangles,
+                                  get_max_height_batch, get_max_height_triangles)
+import pycam.Test
+
+
+@unittest.skipUnless(intersection_batch.numpy_enabled, "numpy is not available")
+class BatchDrop(pycam.Test.PycamTestCase):
+    """Vectorized drop of cutters"""
+
+    def _drop(self, cutter, triangle, positions=None):
+        if positions is None:
+            positions = [(0, 0)]
+        profile = intersection_batch.get_cutter_profile(cutter)
+        arrays = intersection_batch.get_triangle_arrays([triangle])
+        return list(intersection_batch.drop_cutter_on_triangles(profile, positions, *arrays))
+
+    def test_flat(self):
+        """Drop on a flat triangle"""
+        flat_triangle = Triangle((-2, 2, 3), (2, 0, 3), (-2, -2, 3))
+        for cutter in (CylindricalCutter(3), SphericalCutter(3), ToroidalCutter(3, 1)):
+            self.assertAlmostEqual(self._drop(cutter, flat_triangle)[0], 3)
+        # no collision outside of the cutter's reach
+        self.assertEqual(self._drop(CylindricalCutter(1), flat_triangle, [(10, 0)]),
+                         [float("-inf")])
+
+    def test_cylinder_skewed(self):
+        """Drop a cylinder on a skewed triangle"""
+        skewed_triangle = Triangle((-2, 2, 1), (2, 0, 3), (-2, -2, 1))
+        for radius, height in ((1, 2.5), (1.5, 2.75), (1.9, 2.95), (2.0, 3), (3, 3)):
+            self.assertAlmostEqual(self._drop(CylindricalCutter(radius), skewed_triangle)[0],
+                                   height)
+
+    def test_sphere_skewed(self):
+        """Drop a sphere on a skewed triangle"""
+        skewed_triangle = Triangle((-2, 2, 1), (2, 0, 5), (-2, -2, 1))
+        factor = 1.0 / math.cos(math.pi / 4) - 1
+        for radius in (0.1, 1, 1.9, 2.0, 2.1):
+            self.assertAlmostEqual(self._drop(SphericalCutter(radius), skewed_triangle)[0],
+                                   3 + factor * radius)
+
+    def test_torus_edge(self):
+        """Drop a torus on a horizontal edge"""
+        # the edge is located below the center of the minor circle
+        ridge = Triangle((-5, 0, 2), (5, 0, 2), (0, 3, -2))
+        cutter = ToroidalCutter(2, 0.5)
+        self.assertAlmostEqual(self._drop(cutter, ridge, [(0, -1.5)])[0], 2)
+        # the edge touches the minor circle at 45 degrees
+        shift = 0.5 * math.sqrt(0.5)
+        self.assertAlmostEqual(self._drop(cutter, ridge, [(0, -1.5 - shift)])[0],
+                               2 - 0.5 + shift, places=6)
+
+    def test_edge_contacts(self):
+        """Compare the edge and vertex contacts with the single drop"""
+        model = Model()
+        model.append(Triangle((-3, 0, 0), (3, 0, 3), (0, -5, -3)))
+        cutter = CylindricalCutter(1)
+        # the cutter touches the edge (z = (x + 3) / 2) at its intersection with the circle
+        exact = (3 + math.sqrt(0.75)) / 2
+        self.assertAlmostEqual(get_max_height_batch(model, cutter, [(0, 0.5)], -10, 10)[0][2],
+                               exact)
+        self.assertAlmostEqual(get_max_height_triangles(model, cutter, 0, 0.5, -10, 10)[2],
+                               exact)
+        # the peak vertex is higher than the contact with the horizontal edge
+        peak = Model()
+        peak.append(Triangle((0, 0, 2), (0, -1, 1.8), (-1, 0, 1.8)))
+        self.assertAlmostEqual(get_max_height_batch(peak, cutter, [(-0.2, 0.1)], -5, 5)[0][2], 2)
+        self.assertAlmostEqual(get_max_height_triangles(peak, cutter, -0.2, 0.1, -5, 5)[2], 2)
+
+    def test_torus_edge_approximation(self):
+        """The single drop approximates the edge contacts of a torus"""
+        model = Model()
+        model.append(Triangle((-3, 0, 0), (3, 0, 3), (0, -5, -3)))
+        cutter = ToroidalCutter(1, 0.25)
+        batch = get_max_height_batch(model, cutter, [(0, 0.5)], -10, 10)[0][2]
+        self.assertAlmostEqual(batch, 1.8256190, places=6)
+        single = get_max_height_triangles(model, cutter, 0, 0.5, -10, 10)[2]
+        self.assertAlmostEqual(single, 1.8253632, places=6)
+        self.assertLess(single, batch)
+
+    def test_model_equivalence(self):
+        """Compare the batch calculation with the single drop"""
+        model = Model()
+        model.append(Triangle((-3, -4, 1), (-3, 4, 1), (3, 0, 2)))
+        model.append(Triangle((3, 0, 2), (-3, 4, 1), (4, 4, 0)))
+        positions = [(x / 2.0, y / 2.0) for x in range(-12, 12, 3) for y in range(-12, 12, 3)]
+        cutter = SphericalCutter(1)
+        batch = get_max_height_batch(model, cutter, positions, 0, 5)
+        for (x, y), result in zip(positions, batch):
+            self.assertVectorEqual(result, get_max_height_triangles(model, cutter, x, y, 0, 5))
+
+
+@unittest.skipUnless(intersection_batch.numpy_enabled, "numpy is not available")
+class BatchPush(pycam.Test.PycamTestCase):
+    """Vectorized push of cutters along horizontal lines"""
+
+    def _get_pyramid(self):
+        model = Model()
+        top = (0, 0, 4)
+        corners = ((-4, -4, 0), (4, -4, 0), (4, 4, 0), (-4, 4, 0))
+        for index in range(4):
+            model.append(Triangle(corners[index], corners[(index + 1) % 4], top))
+        return model
+
+    def test_free_ranges(self):
+        """Merge overlapping collisions"""
+        result = intersection_batch.get_free_ranges(
+            [10, 10, 10], [0, 0, 1, 2], [2, 3, -1, 4], [4, 5, 11, 6])
+        # the second scanline is blocked completely
+        self.assertEqual([values.tolist() for values in result],
+                         [[0, 0, 2, 2], [0, 5, 0, 6], [2, 10, 4, 10]])
+
+    def _assert_points(self, points, expected):
+        self.assertEqual(len(points), len(expected))
+        for point, expected_point in zip(points, expected):
+            for value, expected_value in zip(point, expected_point):
+                # collisions are detected slightly (epsilon) above the line
+                self.assertAlmostEqual(value, expected_value, places=4)
+
+    def test_pyramid(self):
+        """Push a cylinder along both sides of a pyramid"""
+        cutter = CylindricalCutter(1)
+        lines = [((-10, 0, 2), (10, 0, 2)), ((10, 0, 2), (-10, 0, 2)),
+                 ((-10, 5.5, 2), (10, 5.5, 2)), ((-10, 4.5, 2), (10, 4.5, 2))]
+        result = get_free_paths_batch([self._get_pyramid()], cutter, lines)
+        self._assert_points(result[0], ((-10, 0, 2), (-3, 0, 2), (3, 0, 2), (10, 0, 2)))
+        # the direction of the line is kept
+        self._assert_points(result[1], ((10, 0, 2), (3, 0, 2), (-3, 0, 2), (-10, 0, 2)))
+        # out of reach
+        self.assertEqual(result[2], [lines[2][0], lines[2][1]])
+        # the pyramid is lower than the line at this distance
+        self.assertEqual(result[3], [lines[3][0], lines[3][1]])
+
+    def test_triangle_equivalence(self):
+        """Compare the free paths with the single push along a sloped edge"""
+        model = Model()
+        model.append(Triangle((-3, 0, 0), (3, 0, 3), (0, -5, -3)))
+        lines = [((-10, y, z), (10, y, z)) for y in (0.2, 0.5, 0.8) for z in (0.5, 1.5, 2.5)]
+        lines.extend(((10, 0.5, z), (-10, 0.5, z)) for z in (1, 2))
+        for cutter, places in ((CylindricalCutter(1), 4), (SphericalCutter(1), 4),
+                               (ToroidalCutter(1, 0.25), 3)):
+            batch = get_free_paths_batch([model], cutter, lines)
+            # the single push does not depend on the location of the cutter
+            for location in ((0, 0, 0), (3, -2, 7)):
+                cutter.moveto(location)
+                for (p1, p2), points in zip(lines, batch):
+                    single = get_free_paths_triangles([model], cutter, p1, p2)
+                    self.assertEqual(len(single), len(points), (cutter, p1))
+                    for point, single_point in zip(points, single):
+                        self.assertAlmostEqual(point[0], single_point[0], places=places)
+
+    def test_drop_equivalence(self):
+        """Compare the free paths with the drop heights along the lines"""
+        model = self._get_pyramid()
+        lines = []
+        for index in range(-12, 13, 3):
+            z = 0.3 * (index + 12)
+            lines.append(((-10, index / 2.0, z), (10, index / 2.0, z)))
+            lines.append(((index / 2.0, 10, z), (index / 2.0, -10, z)))
+        for cutter in (CylindricalCutter(1), SphericalCutter(1), ToroidalCutter(1, 0.25)):
+            batch = get_free_paths_batch([model], cutter, lines)
+            for (p1, p2), points in zip(lines, batch):
+                z = p1[2]
+                free_ranges = [(points[index], points[index + 1])
+                               for index in range(0, len(points), 2)]
+                positions = [tuple(p1[axis] + step / 100.0 * (p2[axis] - p1[axis])
+                                   for axis in range(2)) for step in range(1, 100)]
+                heights = get_max_height_batch(model, cutter, positions, -1, z)
+                for position, height in zip(positions, heights):
+                    distances = [min(math.hypot(position[0] - point[0], position[1] - point[1])
+                                     for point in free_range) for free_range in free_ranges]
+                    if distances and (min(distances) < 0.01):
+                        # skip positions close to the border of a free range
+                        continue
+                    is_free = any((min(start[axis], end[axis]) <= position[axis]
+                                   <= max(start[axis], end[axis])) for start, end in free_ranges
+                                  for axis in range(2) if start[axis] != end[axis])
+                    self.assertEqual(is_free, height is not None, (cutter, position, z))
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+
+from pycam.Geometry.IntervalSweep import IntervalSweep
+from pycam.Geometry.Model import ContourModel, Model
+from pycam.Geometry.Plane import Plane
+from pycam.Geometry.Triangle import Triangle
+import pycam.Test
+
+
+class IntervalSweepTests(pycam.Test.PycamTestCase):
+    """Intervals containing a moving level"""
+
+    def setUp(self):
+        rand = random.Random(42)
+        self.lows = [rand.choice((rand.uniform(0, 10), float(rand.randint(0, 10))))
+                     for _ in range(200)]
+        self.highs = [low + rand.choice((0, 1, rand.uniform(0, 5))) for low in self.lows]
+        # neighbouring levels in both directions, jumps and exact interval ends
+        self.levels = [rand.uniform(-1, 16) for _ in range(20)] + [8, 7.5, 7, 6, 6, 5.5, 5, 11]
+        self.levels += [self.lows[0], self.highs[1], -1, 20]
+
+    def test_both_ends(self):
+        """Compare the sweep with a linear search"""
+        sweep = IntervalSweep(self.lows, self.highs)
+        self.assertEqual(len(sweep), len(self.lows))
+        for level in self.levels:
+            expected = [index for index, (low, high) in enumerate(zip(self.lows, self.highs))
+                        if low <= level <= high]
+            self.assertEqual(sweep.get_indices(level), expected)
+
+    def test_upper_ends(self):
+        """Intervals without a lower end"""
+        sweep = IntervalSweep(None, self.highs)
+        for level in self.levels:
+            expected = [index for index, high in enumerate(self.highs) if level <= high]
+            self.assertEqual(sweep.get_indices(level), expected)
+
+    def test_invalid(self):
+        """Reject a different number of lower and upper ends"""
+        self.assertRaises(ValueError, IntervalSweep, [1, 2], [3])
+
+
+class WaterlineContourTests(pycam.Test.PycamTestCase):
+    """Slice models with horizontal planes"""
+
+    def test_layers(self):
+        """Slice a stack of pyramids at many levels"""
+        model = Model()
+        for index in range(3):
+            offset = 2 * index
+            top = (offset, 0, 4 + offset)
+            corners = [(offset + x, y, offset) for x, y in ((-4, -4), (4, -4), (4, 4), (-4, 4))]
+            for corner_index in range(4):
+                model.append(Triangle(corners[corner_index], corners[(corner_index + 1) % 4],
+                                      top))
+        for z in (9, 7, 5.5, 4, 2, 0.5, 0, 3, 8, 1e-7):
+            plane = Plane((0, 0, z), (0, 0, 1, 'v'))
+            # all triangles are sliced without the sweep
+            expected = ContourModel(plane=plane)
+            for triangle in model.triangles():
+                line = plane.intersect_triangle(triangle, counter_clockwise=True)
+                if line is not None:
+                    expected.append(line)
+            contour = model.get_waterline_contour(plane)
+            self.assertEqual([polygon.get_points() for polygon in contour.get_polygons()],
+                             [polygon.get_points() for polygon in expected.get_polygons()])
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from pycam.Toolpath import CORNER_STYLE_EXACT_PATH, CORNER_STYLE_EXACT_STOP, \
+        CORNER_STYLE_OPTIMIZE_SPEED, CORNER_STYLE_OPTIMIZE_TOLERANCE, Toolpath
+import pycam.Toolpath.Kinematics
+from pycam.Toolpath.Kinematics import MachineKinematics
+from pycam.Toolpath.Steps import MachineSetting, MoveArc, MoveStraight, MoveStraightRapid
+import pycam.Test
+
+
+@unittest.skipUnless(pycam.Toolpath.Kinematics.numpy_enabled, "numpy is not available")
+class MachineKinematicsTests(pycam.Test.PycamTestCase):
+    """Cycle time estimation based on acceleration limits"""
+
+    def setUp(self):
+        # 100 units per second (feedrate and maximum velocity) reached within one second
+        self.kinematics = MachineKinematics(max_velocity=(6000, 6000, 3000),
+                                            max_acceleration=(100, 100, 100))
+
+    def _get_seconds(self, steps):
+        return 60 * self.kinematics.get_cycle_time(steps).duration
+
+    def test_straight(self):
+        """Accelerate and decelerate along straight moves"""
+        feedrate = MachineSetting("feedrate", 6000)
+        # one second for acceleration, one second for deceleration
+        self.assertAlmostEqual(self._get_seconds(
+            [feedrate, MoveStraight((0, 0, 0)), MoveStraight((100, 0, 0))]), 2)
+        # collinear moves are joined without slowing down
+        self.assertAlmostEqual(self._get_seconds(
+            [feedrate] + [MoveStraight((10 * index, 0, 0)) for index in range(11)]), 2)
+        # the maximum velocity is not reached
+        self.assertAlmostEqual(self._get_seconds(
+            [feedrate, MoveStraight((0, 0, 0)), MoveStraight((10, 0, 0))]), 2 * math.sqrt(0.1))
+        # the z axis is slower
+        self.assertAlmostEqual(self._get_seconds(
+            [feedrate, MoveStraight((0, 0, 0)), MoveStraight((0, 0, 100))]), 2.5)
+
+    def test_corner_styles(self):
+        """Pass corners depending on the path mode"""
+        def get_seconds(corner_style):
+            return self._get_seconds([MachineSetting("corner_style", corner_style),
+                                      MachineSetting("feedrate", 6000), MoveStraight((0, 0, 0)),
+                                      MoveStraight((100, 0, 0)), MoveStraight((100, 100, 0))])
+
+        exact_stop = get_seconds((CORNER_STYLE_EXACT_STOP, 0, 0))
+        exact_path = get_seconds((CORNER_STYLE_EXACT_PATH, 0, 0))
+        tolerance = get_seconds((CORNER_STYLE_OPTIMIZE_TOLERANCE, 1, 0))
+        optimize_speed = get_seconds((CORNER_STYLE_OPTIMIZE_SPEED, 0, 0))
+        self.assertAlmostEqual(exact_stop, 4)
+        self.assertAlmostEqual(optimize_speed, 3)
+        self.assertTrue(exact_stop > exact_path > tolerance > optimize_speed)
+
+    def test_arcs(self):
+        """Follow arcs along their circumference"""
+        feedrate = MachineSetting("feedrate", 600)
+        # a half circle (radius 5): 10 units per second without acceleration
+        cycle_time = self.kinematics.get_cycle_time(
+            [feedrate, MoveStraight((-5, 0, 0)), MoveArc((5, 0, 0), (0, 0, 0), True)])
+        self.assertAlmostEqual(cycle_time.distance, 5 * math.pi, delta=0.01)
+        # 0.1 seconds (0.5 units) for acceleration and for deceleration
+        self.assertAlmostEqual(60 * cycle_time.duration, (5 * math.pi - 1) / 10 + 0.2, places=3)
+
+    def test_report(self):
+        """Summarize multiple toolpaths"""
+        rapid = Toolpath(toolpath_path=[MoveStraightRapid((0, 0, 0)),
+                                        MoveStraightRapid((100, 0, 0)),
+                                        MachineSetting("delay", 3)])
+        feed = Toolpath(toolpath_path=[MachineSetting("feedrate", 3000), MoveStraight((0, 0, 0)),
+                                       MoveStraight((100, 0, 0))])
+        report = self.kinematics.get_report([("rapid", rapid), ("feed", feed)])
+        result = report.get_dict()
+        self.assertEqual([item["name"] for item in result["toolpaths"]], ["rapid", "feed"])
+        self.assertAlmostEqual(60 * result["toolpaths"][0]["rapid_duration"], 2)
+        self.assertAlmostEqual(60 * result["toolpaths"][0]["duration"], 5)
+        # half a second of acceleration and deceleration, 1.5 seconds at full speed
+        self.assertAlmostEqual(60 * result["toolpaths"][1]["feed_duration"], 2.5)
+        self.assertAlmostEqual(60 * result["total"]["duration"], 7.5)
+        self.assertAlmostEqual(result["total"]["distance"], 200)
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
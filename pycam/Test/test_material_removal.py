@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from pycam.Cutters.CylindricalCutter import CylindricalCutter
+from pycam.Geometry import Box3D, Point3D
+from pycam.Geometry.Model import Model
+from pycam.Geometry.Triangle import Triangle
+from pycam.Simulation.GCodeParser import parse_gcode
+import pycam.Simulation.MaterialRemoval
+from pycam.Simulation.MaterialRemoval import MaterialRemovalSimulation
+from pycam.Toolpath import MACHINE_SETTING, MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID
+import pycam.Test
+
+
+class GCodeParserTests(pycam.Test.PycamTestCase):
+    """Interpretation of G-code files"""
+
+    def test_moves(self):
+        """Parse straight moves with modal axes, units and relative positions"""
+        steps = parse_gcode(["G21 G90 (metric)", "G0 X1 Y2", "Z3 ; the first complete position",
+                             "G1 Z-1 F200", "G91", "X2", "G20 G90", "G0 X1"])
+        moves = [(step.action, step.position) for step in steps if step.action != MACHINE_SETTING]
+        self.assertEqual(moves, [(MOVE_STRAIGHT_RAPID, (1, 2, 3)), (MOVE_STRAIGHT, (1, 2, -1)),
+                                 (MOVE_STRAIGHT, (3, 2, -1)),
+                                 (MOVE_STRAIGHT_RAPID, (25.4, 2, -1))])
+        settings = [step for step in steps if step.action == MACHINE_SETTING]
+        self.assertEqual([(step.key, step.value) for step in settings], [("feedrate", 200)])
+
+    def test_arcs(self):
+        """Split arcs into straight moves"""
+        for arc in ("G2 X10 Y0 I5 J0", "G2 X10 Y0 R5"):
+            steps = parse_gcode(["G1 X0 Y0 Z0", arc], arc_tolerance=0.01)
+            points = [step.position for step in steps[1:]]
+            self.assertGreater(len(points), 10)
+            self.assertEqual(points[-1], (10, 0, 0))
+            for x, y, z in points:
+                self.assertAlmostEqual(math.hypot(x - 5, y), 5)
+                # clockwise from the left to the right: the upper half of the circle
+                self.assertGreaterEqual(y, 0)
+
+
+@unittest.skipUnless(pycam.Simulation.MaterialRemoval.numpy_enabled, "numpy is not available")
+class MaterialRemovalTests(pycam.Test.PycamTestCase):
+    """Comparison of a simulated stock with a model"""
+
+    def setUp(self):
+        # a horizontal plane at z=1
+        self.model = Model()
+        self.model.append(Triangle((0, 0, 1), (0, 10, 1), (10, 0, 1)))
+        self.model.append(Triangle((10, 0, 1), (0, 10, 1), (10, 10, 1)))
+        self.cutter = CylindricalCutter(1)
+
+    def _simulate(self, gcode):
+        simulation = MaterialRemovalSimulation(Box3D(Point3D(0, 0, 0), Point3D(10, 10, 2)),
+                                               cells=100)
+        simulation.add_moves(self.cutter, parse_gcode(gcode))
+        return simulation.compare(self.model)
+
+    def _get_zigzag(self, height):
+        gcode = ["G0 X0 Y0 Z3", "G1 Z%f" % height]
+        for x in range(11):
+            gcode.append("G1 X%d Y%d" % (x, 0 if x % 2 else 10))
+            gcode.append("G1 X%d Y%d" % (x, 10 if x % 2 else 0))
+        return gcode
+
+    def test_exact(self):
+        """Remove the material above the model"""
+        report = self._simulate(self._get_zigzag(1))
+        self.assertEqual(report.max_gouge, 0)
+        self.assertEqual(report.max_leftover, 0)
+        self.assertAlmostEqual(report.removed_volume, 100)
+        self.assertTrue(report.is_acceptable())
+        self.assertEqual(report.get_dict()["cells"], [100, 100])
+
+    def test_gouge(self):
+        """Detect gouges and leftover stock"""
+        report = self._simulate(self._get_zigzag(0.8))
+        self.assertAlmostEqual(report.max_gouge, 0.2)
+        self.assertAlmostEqual(report.gouge_area, 100)
+        self.assertAlmostEqual(report.gouge_volume, 20)
+        self.assertFalse(report.is_acceptable())
+        report = self._simulate(self._get_zigzag(1.5))
+        self.assertEqual(report.max_gouge, 0)
+        self.assertAlmostEqual(report.max_leftover, 0.5)
+        self.assertTrue(report.is_acceptable())
+        self.assertFalse(report.is_acceptable(max_leftover=0.1))
+
+    def test_rapid_collision(self):
+        """Count rapid moves through material"""
+        report = self._simulate(["G0 X0 Y0 Z3", "G1 Z1.5", "G1 X10", "G0 X10 Y10"])
+        self.assertEqual(report.rapid_collisions, 1)
+        self.assertFalse(report.is_acceptable())
+        report = self._simulate(["G0 X0 Y0 Z3", "G1 Z1.5", "G1 X10", "G0 Z3", "G0 X10 Y10"])
+        self.assertEqual(report.rapid_collisions, 0)
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pycam.Importers
+import pycam.Importers.ModelCache
+import pycam.Test
+
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "samples",
+                           "pycam-textbox.stl")
+
+
+@unittest.skipUnless(pycam.Importers.ModelCache.numpy_enabled, "numpy is not available")
+class ModelCacheTests(pycam.Test.PycamTestCase):
+    """Cache imported models on disk"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        pycam.Importers.ModelCache.set_cache_directory(self.cache_dir)
+
+    def tearDown(self):
+        pycam.Importers.ModelCache.set_cache_directory(None)
+        shutil.rmtree(self.cache_dir)
+
+    def _import(self, **kwargs):
+        detected = pycam.Importers.detect_file_type(SAMPLE_FILE, **kwargs)
+        return detected.importer(detected.uri)
+
+    def test_cached_import(self):
+        """The second import of a file is loaded from the cache"""
+        original = self._import(use_cache=False)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self._import()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        cached = self._import()
+        self.assertEqual(len(cached), len(original))
+        for axis in ("minx", "maxx", "miny", "maxy", "minz", "maxz"):
+            self.assertAlmostEqual(getattr(cached, axis), getattr(original, axis))
+        box = (original.minx, original.miny, original.minz,
+               (original.minx + original.maxx) / 2, original.maxy, original.maxz)
+        self.assertEqual(len(cached.triangles(*box)), len(original.triangles(*box)))
+
+    def test_model_type(self):
+        """Cached models have the type of the imported model"""
+        original = self._import(use_cache=False)
+        self._import()
+        cached = self._import()
+        self.assertIs(type(cached), type(original))
+
+    def test_importer_version(self):
+        """Changes of the importer invalidate the cached items"""
+        get_key = pycam.Importers.ModelCache.get_cache_key
+        importer_digest = pycam.Importers.ModelCache.get_importer_digest(
+            pycam.Importers.STLImporter.ImportModel)
+        self.assertEqual(get_key(SAMPLE_FILE, "stl", {}, importer_digest),
+                         get_key(SAMPLE_FILE, "stl", {}, importer_digest))
+        self.assertNotEqual(get_key(SAMPLE_FILE, "stl", {}, importer_digest),
+                            get_key(SAMPLE_FILE, "stl", {}, "other"))
+
+    def test_invalid_item(self):
+        """Broken cache items are ignored"""
+        self._import()
+        for name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, name), "wb") as cache_file:
+                cache_file.write(b"broken")
+        self.assertEqual(len(self._import()), len(self._import(use_cache=False)))
+
+    def test_size_limit(self):
+        """The least recently used items are removed"""
+        original_limit = pycam.Importers.ModelCache.MAX_CACHE_SIZE
+        pycam.Importers.ModelCache.MAX_CACHE_SIZE = 1
+        try:
+            self._import()
+        finally:
+            pycam.Importers.ModelCache.MAX_CACHE_SIZE = original_limit
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
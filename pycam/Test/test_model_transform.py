@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import random
+import unittest
+
+from pycam.Geometry.Matrix import get_xy_box_mapping, TRANSFORMATIONS
+from pycam.Geometry.Model import Model
+from pycam.Geometry.Triangle import Triangle
+import pycam.Geometry.TriangleBVH
+from pycam.Geometry.TriangleBVH import TriangleBVH
+from pycam.Geometry.TriangleKdtree import TriangleKdtree
+import pycam.Test
+
+
+def _get_depth(tree):
+    if tree.bucket:
+        return 0
+    return 1 + max(_get_depth(tree.lo), _get_depth(tree.hi))
+
+
+class ModelIndexTransformation(pycam.Test.PycamTestCase):
+    """Move and extend the spatial index of a model instead of rebuilding it"""
+
+    def setUp(self):
+        self.rand = random.Random(17)
+        self.boxes = []
+        for _ in range(40):
+            x, y = self.rand.uniform(-80, 80), self.rand.uniform(-80, 80)
+            self.boxes.append((x, x + self.rand.uniform(0, 30), y, y + self.rand.uniform(0, 30)))
+
+    def _get_triangles(self, count):
+        triangles = []
+        for _ in range(count):
+            x, y, z = (self.rand.uniform(-50, 50), self.rand.uniform(-50, 50),
+                       self.rand.uniform(0, 10))
+            triangles.append(Triangle((x, y, z), (x + self.rand.uniform(0.1, 8), y, z),
+                                      (x, y + self.rand.uniform(0.1, 8), z + 1)))
+        return triangles
+
+    def _assert_search(self, search, triangles):
+        for minx, maxx, miny, maxy in self.boxes:
+            expected = [t.id for t in triangles if (t.minx <= maxx) and (t.maxx >= minx)
+                        and (t.miny <= maxy) and (t.maxy >= miny)]
+            self.assertEqual(sorted(t.id for t in search(minx, maxx, miny, maxy)),
+                             sorted(expected))
+
+    def test_box_mapping(self):
+        """Detect transformations keeping boxes axis-aligned"""
+        self.assertEqual(get_xy_box_mapping(((1, 0, 0, 2), (0, 1, 0, -3), (0, 0, 1, 4))),
+                         ((0, 1, 2), (1, 1, -3)))
+        self.assertEqual(get_xy_box_mapping(((2, 0, 0), (0, 3, 0), (0, 0, 1))),
+                         ((0, 2, 0), (1, 3, 0)))
+        self.assertEqual(get_xy_box_mapping(TRANSFORMATIONS["x_swap_y"]),
+                         ((1, 1, 0), (0, 1, 0)))
+        self.assertEqual(get_xy_box_mapping(TRANSFORMATIONS["yz_mirror"]),
+                         ((0, -1, 0), (1, 1, 0)))
+        # z is turned into x or y
+        self.assertIsNone(get_xy_box_mapping(TRANSFORMATIONS["x"]))
+        self.assertIsNone(get_xy_box_mapping(TRANSFORMATIONS["y_swap_z"]))
+        # a rotation around the z axis (45 degrees)
+        value = math.sqrt(0.5)
+        self.assertIsNone(get_xy_box_mapping(((value, -value, 0), (value, value, 0),
+                                              (0, 0, 1))))
+
+    def test_kdtree_insert(self):
+        """Insert sorted triangles into a kdtree"""
+        triangles = sorted(self._get_triangles(1000), key=lambda t: t.minx)
+        tree = TriangleKdtree([])
+        for triangle in triangles:
+            tree.insert_triangle(triangle)
+        self.assertEqual(tree.size, len(triangles))
+        # the tree is rebalanced while inserting
+        self.assertTrue(_get_depth(tree) < 4 * math.log(len(triangles), 2))
+        self._assert_search(tree.Search, triangles)
+
+    def _get_transformations(self):
+        for name in sorted(TRANSFORMATIONS):
+            yield TRANSFORMATIONS[name]
+        yield ((1, 0, 0, 3.5), (0, 1, 0, -7), (0, 0, 1, 2))
+        yield ((-1.5, 0, 0, 0), (0, 0.5, 0, 0), (0, 0, 2, 0))
+
+    def test_kdtree_transformation(self):
+        """Transform the bounds of a kdtree"""
+        triangles = self._get_triangles(500)
+        tree = TriangleKdtree(triangles)
+        for matrix in self._get_transformations():
+            mapping = get_xy_box_mapping(matrix)
+            if mapping is None:
+                continue
+            for triangle in triangles:
+                triangle.transform_by_matrix(matrix)
+            tree.transform_xy(mapping)
+            self._assert_search(tree.Search, triangles)
+
+    @unittest.skipUnless(pycam.Geometry.TriangleBVH.numpy_enabled, "numpy is not available")
+    def test_bvh_transformation(self):
+        """Transform the bounds of a TriangleBVH"""
+        triangles = self._get_triangles(500)
+        tree = TriangleBVH.from_triangles(triangles, leaf_size=3)
+        for matrix in self._get_transformations():
+            mapping = get_xy_box_mapping(matrix)
+            if mapping is None:
+                continue
+            for triangle in triangles:
+                triangle.transform_by_matrix(matrix)
+            tree.transform_xy(mapping)
+            self._assert_search(tree.Search, triangles)
+            # the result equals a new tree
+            for box in self.boxes:
+                self.assertEqual(list(tree.get_indices(*box)),
+                                 list(TriangleBVH.from_triangles(triangles).get_indices(*box)))
+
+    def test_model(self):
+        """Transform and extend a model"""
+        model = Model()
+        for triangle in self._get_triangles(300):
+            model.append(triangle)
+
+        def search(minx, maxx, miny, maxy):
+            return model.triangles(minx=minx, maxx=maxx, miny=miny, maxy=maxy)
+
+        self._assert_search(search, model.triangles())
+        for matrix in self._get_transformations():
+            model.transform_by_matrix(matrix)
+            self._assert_search(search, model.triangles())
+            # triangles are added to the existing index
+            uuid = model.uuid
+            for triangle in self._get_triangles(self.rand.randint(1, 20)):
+                model.append(triangle)
+            self.assertNotEqual(model.uuid, uuid)
+            self._assert_search(search, model.triangles())
+        self.assertEqual((model.minx, model.maxx),
+                         (min(t.minx for t in model.triangles()),
+                          max(t.maxx for t in model.triangles())))
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
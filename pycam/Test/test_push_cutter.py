@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from pycam.Cutters.CylindricalCutter import CylindricalCutter
+from pycam.Geometry import Box3D, Point3D
+from pycam.Geometry.Model import Model
+from pycam.Geometry.PointUtils import pdist
+from pycam.Geometry.Triangle import Triangle
+from pycam.PathGenerators import get_max_height_triangles
+from pycam.PathGenerators.PushCutter import PushCutter
+import pycam.Test
+from pycam.Toolpath.MotionGrid import get_fixed_grid, GridDirection, MillingStyle
+
+
+class PushCutterLayers(pycam.Test.PycamTestCase):
+    """Process the lines of all layers at once"""
+
+    def setUp(self):
+        self.model = Model()
+        top = (0, 0, 4)
+        corners = ((-4, -4, 0), (4, -4, 0), (4, 4, 0), (-4, 4, 0))
+        for index in range(4):
+            self.model.append(Triangle(corners[index], corners[(index + 1) % 4], top))
+        self.cutter = CylindricalCutter(1)
+
+    def _get_grid(self):
+        box = Box3D(Point3D(-6, -6, 0.5), Point3D(6, 6, 3.5))
+        return [[list(line) for line in layer]
+                for layer in get_fixed_grid(box, 1, line_distance=0.5,
+                                            grid_direction=GridDirection.X,
+                                            milling_style=MillingStyle.IGNORE)]
+
+    def test_layer_order(self):
+        """The layers are merged in the order of the grid"""
+        grid = self._get_grid()
+        self.assertEqual(len(grid), 4)
+        generator = PushCutter()
+        expected = []
+        for layer in grid:
+            expected.extend(generator.GenerateToolPathSlice(self.cutter, [self.model], layer))
+        path = generator.GenerateToolPath(self.cutter, [self.model], grid)
+        self.assertEqual([move.position for move in path],
+                         [move.position for move in expected])
+
+    def test_waterlines(self):
+        """Extract the waterlines of every layer"""
+        grid = self._get_grid()
+        path = PushCutter(waterlines=True).GenerateToolPath(self.cutter, [self.model], grid)
+        heights = [move.position[2] for move in path if move.position is not None]
+        self.assertEqual(sorted(set(heights)), sorted(set(layer[0][0][2] for layer in grid)))
+        # the upper layers come first
+        self.assertEqual(heights, sorted(heights, reverse=True))
+        for x, y, z in (move.position for move in path if move.position is not None):
+            # the cutter moves around the slice of the pyramid (size: 8 - 2 * z)
+            self.assertTrue(max(abs(x), abs(y)) >= 4 - z + 1 - 0.5)
+
+    def _get_segments(self, path):
+        positions = [move.position for move in path]
+        return [tuple(positions[index:index + 2]) for index in range(0, len(positions), 3)]
+
+    def _get_length(self, segments):
+        return sum(pdist(start, end) for start, end in segments)
+
+    def test_waterline_obstacles(self):
+        """Skip the parts of the waterlines colliding with an obstacle"""
+        obstacle = Model()
+        top = (5, 0, 10)
+        corners = ((4.5, -1, 0), (6, -1, 0), (6, 1, 0), (4.5, 1, 0))
+        for index in range(4):
+            obstacle.append(Triangle(corners[index], corners[(index + 1) % 4], top))
+        grid = self._get_grid()
+        generator = PushCutter(waterlines=True)
+        free_segments = self._get_segments(
+            generator.GenerateToolPath(self.cutter, [self.model], grid))
+        segments = self._get_segments(
+            generator.GenerateToolPath(self.cutter, [self.model, obstacle], grid))
+        self.assertLess(self._get_length(segments), self._get_length(free_segments) - 10)
+        for start, end in segments:
+            for step in range(11):
+                x, y, z = (s + step / 10.0 * (e - s) for s, e in zip(start, end))
+                # the cutter does not dig into the obstacle
+                self.assertIsNotNone(get_max_height_triangles(obstacle, self.cutter, x, y, 0,
+                                                              z + 0.001), (x, y, z))
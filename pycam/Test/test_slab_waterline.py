@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from pycam.Cutters.CylindricalCutter import CylindricalCutter
+from pycam.Cutters.SphericalCutter import SphericalCutter
+from pycam.Cutters.ToroidalCutter import ToroidalCutter
+import pycam.Geometry.intersection_batch as intersection_batch
+from pycam.Geometry.Model import Model
+import pycam.Geometry.offset_batch as offset_batch
+from pycam.Geometry.Triangle import Triangle
+from pycam.PathGenerators.SlabWaterline import SlabWaterline, get_slabs
+import pycam.Test
+from pycam.Toolpath.MotionGrid import MillingStyle
+
+
+def _get_area(points):
+    """ return the signed area of a closed polyline (positive: counter-clockwise) """
+    return sum(p1[0] * p2[1] - p2[0] * p1[1] for p1, p2 in zip(points, points[1:])) / 2
+
+
+def _get_distance(point, start, end):
+    delta = (end[0] - start[0], end[1] - start[1])
+    fraction = ((point[0] - start[0]) * delta[0] + (point[1] - start[1]) * delta[1]) \
+        / (delta[0] ** 2 + delta[1] ** 2)
+    fraction = min(1, max(0, fraction))
+    return math.hypot(point[0] - start[0] - fraction * delta[0],
+                      point[1] - start[1] - fraction * delta[1])
+
+
+def _is_free(position):
+    return [False] * len(position)
+
+
+@unittest.skipUnless(offset_batch.numpy_enabled, "numpy is not available")
+class OffsetOutlines(pycam.Test.PycamTestCase):
+    """Outlines of widened segments"""
+
+    def test_stadium(self):
+        """Widen a single segment"""
+        result = offset_batch.get_offset_outlines([([(0, 0)], [(4, 0)], 1)], _is_free, 0.01)
+        self.assertEqual(len(result), 1)
+        points, is_closed = result[0]
+        self.assertTrue(is_closed)
+        self.assertEqual(points[0], points[-1])
+        for point in points:
+            distance = _get_distance(point, (0, 0), (4, 0))
+            # arcs are approximated from outside
+            self.assertTrue(1 - 1e-6 < distance < 1.01 + 1e-6)
+        # the covered area is on the left side
+        self.assertAlmostEqual(_get_area(points), 8 + math.pi, places=1)
+        self.assertTrue(_get_area(points) > 8 + math.pi)
+
+    def test_union(self):
+        """Widen crossing segments with different radii"""
+        segments = [((-4, 0), (4, 0), 1), ((0, -4), (0, 4), 2)]
+        result = offset_batch.get_offset_outlines(
+            [([start], [end], radius) for start, end, radius in segments], _is_free, 0.01)
+        self.assertEqual(len(result), 1)
+        points, is_closed = result[0]
+        self.assertTrue(is_closed)
+        for point in points:
+            distances = [_get_distance(point, start, end) - radius
+                         for start, end, radius in segments]
+            self.assertTrue(-1e-6 < min(distances) < 0.01 + 1e-6)
+
+    def test_nested(self):
+        """Ignore stadiums within other stadiums"""
+        groups = [([(0, 0)], [(4, 0)], 1), ([(1, 0.5)], [(3, 0.5)], 0.5)]
+        self.assertEqual(offset_batch.get_offset_outlines(groups, _is_free, 0.01),
+                         offset_batch.get_offset_outlines(groups[:1], _is_free, 0.01))
+
+    def test_overlapping(self):
+        """Combine overlapping segments of different groups with equal radii"""
+        groups = [([(0, 0)], [(4, 0)], 1), ([(2, 0)], [(6, 0)], 1), ([(3, 0)], [(4, 1)], 1)]
+        result = offset_batch.get_offset_outlines(groups, _is_free, 0.01)
+        self.assertEqual(len(result), 1)
+        self.assertTrue(result[0][1])
+
+    def test_blocked(self):
+        """Remove the outline around an enclosed area"""
+        # a square of segments
+        corners = [(0, 0), (10, 0), (10, 10), (0, 10)]
+        group = (corners, corners[1:] + corners[:1], 1)
+        result = offset_batch.get_offset_outlines([group], _is_free, 0.01)
+        self.assertEqual(len(result), 2)
+
+        def is_blocked(positions):
+            return [(0 < x < 10) and (0 < y < 10) for x, y in positions]
+
+        result = offset_batch.get_offset_outlines([group], is_blocked, 0.01)
+        self.assertEqual(len(result), 1)
+        self.assertTrue(_get_area(result[0][0]) > 100)
+
+
+@unittest.skipUnless(offset_batch.numpy_enabled, "numpy is not available")
+class SlabWaterlines(pycam.Test.PycamTestCase):
+    """Waterlines based on slices of the model"""
+
+    def _get_pyramid(self):
+        model = Model()
+        top = (0, 0, 4)
+        corners = ((-4, -4, 0), (4, -4, 0), (4, 4, 0), (-4, 4, 0))
+        for index in range(4):
+            model.append(Triangle(corners[index], corners[(index + 1) % 4], top))
+        return model
+
+    def test_outline_edges(self):
+        """Find the borders and folds of a mesh"""
+        starts, ends = offset_batch.get_outline_edges(*self._get_pyramid().get_triangle_arrays())
+        # the ridges of the pyramid are hidden
+        edges = sorted(tuple(sorted((tuple(start), tuple(end))))
+                       for start, end in zip(starts.tolist(), ends.tolist()))
+        self.assertEqual(edges, [((-4, -4, 0), (-4, 4, 0)), ((-4, -4, 0), (4, -4, 0)),
+                                 ((-4, 4, 0), (4, 4, 0)), ((4, -4, 0), (4, 4, 0))])
+
+    def test_slabs(self):
+        """Split rounded cutters into slabs"""
+        profile = intersection_batch.get_cutter_profile(CylindricalCutter(2))
+        self.assertEqual(get_slabs(profile, 0.1), [(0, 2)])
+        profile = intersection_batch.get_cutter_profile(SphericalCutter(1))
+        slabs = get_slabs(profile, 0.25)
+        self.assertEqual(len(slabs), 5)
+        self.assertEqual(slabs[0], (0, 0.25))
+        self.assertEqual(slabs[-1], (1, 1))
+        for (bottom1, reach1), (bottom2, reach2) in zip(slabs, slabs[1:]):
+            self.assertTrue(bottom1 < bottom2)
+        # the reach grows evenly (the topmost slab reaches the full radius, as well)
+        for (_, reach1), (_, reach2) in zip(slabs[:-2], slabs[1:-1]):
+            self.assertAlmostEqual(reach2 - reach1, 0.25)
+
+    def _get_waterlines(self, cutter, z, **kwargs):
+        grid = [[((-10, -10, z), (10, -10, z)), ((-10, 10, z), (10, 10, z))]]
+        path = SlabWaterline(**kwargs).GenerateToolPath(cutter, [self._get_pyramid()], grid)
+        result = []
+        current = []
+        for move in path:
+            if move.position is None:
+                result.append(current)
+                current = []
+            else:
+                current.append(move.position)
+        return result
+
+    def test_pyramid(self):
+        """Calculate the waterline around a pyramid"""
+        waterlines = self._get_waterlines(CylindricalCutter(1), 2, accuracy=0.01)
+        self.assertEqual(len(waterlines), 1)
+        points = waterlines[0]
+        self.assertEqual(points[0], points[-1])
+        for x, y, z in points:
+            self.assertEqual(z, 2)
+            # the slice of the pyramid is a square (size: 4)
+            distance = math.hypot(max(abs(x) - 2, 0), max(abs(y) - 2, 0))
+            self.assertTrue(1 - 1e-4 < distance < 1.01 + 1e-4)
+        # conventional milling (clockwise spindle): the model is on the left side
+        conventional = self._get_waterlines(CylindricalCutter(1), 2, accuracy=0.01,
+                                            milling_style=MillingStyle.CONVENTIONAL)[0]
+        self.assertTrue(_get_area(conventional) > 0)
+        # climb milling: the model is on the right side
+        climb = self._get_waterlines(CylindricalCutter(1), 2, accuracy=0.01,
+                                     milling_style=MillingStyle.CLIMB)[0]
+        self.assertTrue(_get_area(climb) < 0)
+        self.assertEqual(climb, list(reversed(conventional)))
+
+    def test_rounded_cutters(self):
+        """The waterlines of rounded cutters keep a safe distance"""
+        model = self._get_pyramid()
+        for cutter in (SphericalCutter(1), ToroidalCutter(1, 0.25)):
+            profile = intersection_batch.get_cutter_profile(cutter)
+            for z in (0.5, 2):
+                waterlines = self._get_waterlines(cutter, z, accuracy=0.02)
+                self.assertEqual(len(waterlines), 1)
+                points = waterlines[0]
+                self.assertEqual(points[0], points[-1])
+                heights = intersection_batch.drop_cutter_on_triangles(
+                    profile, [point[:2] for point in points], *model.get_triangle_arrays())
+                self.assertTrue(max(heights) < z + 1e-4)
+                # the waterline is close to the model
+                inwards = [(x * 0.99, y * 0.99) for x, y, _ in points]
+                heights = intersection_batch.drop_cutter_on_triangles(
+                    profile, inwards, *model.get_triangle_arrays())
+                self.assertTrue(min(heights) > z)
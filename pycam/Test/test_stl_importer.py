@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import io
+import os
+import struct
+import tempfile
+
+import pycam.Importers.STLImporter
+import pycam.Test
+
+
+# counter-clockwise facets (as seen from above) and a degenerated facet
+FACETS = (
+    ((0, 0, 1), (0, 0, 0), (1, 0, 0), (0, 1, 0)),
+    ((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)),
+    ((0, 0, 1), (0, 0, 0), (1, 0, 0), (2, 0, 0)),
+)
+
+
+def _get_binary_stl():
+    data = [b"\0" * 80, struct.pack("<I", len(FACETS))]
+    for normal, p1, p2, p3 in FACETS:
+        data.append(struct.pack("<12fH", *(normal + p1 + p2 + p3 + (0, ))))
+    return b"".join(data)
+
+
+class BinarySTLImport(pycam.Test.PycamTestCase):
+    """Import binary STL files"""
+
+    def _check_model(self, model):
+        triangles = list(model.triangles())
+        # the degenerated facet is skipped
+        self.assertEqual(len(triangles), 2)
+        # Triangle objects use clockwise order
+        self.assertVectorEqual(triangles[0].p2, (0, 1, 0))
+        self.assertVectorEqual(triangles[0].p3, (1, 0, 0))
+        self.assertVectorEqual(triangles[0].normal[:3], (0, 0, 1))
+        # missing normals are calculated
+        self.assertVectorEqual(triangles[1].normal[:3], (0, 0, 1))
+        self.assertEqual((model.minx, model.maxx, model.maxz), (0, 1, 0))
+
+    def test_file(self):
+        """Import a local file"""
+        handle, filename = tempfile.mkstemp(suffix=".stl")
+        try:
+            os.write(handle, _get_binary_stl())
+            os.close(handle)
+            model = pycam.Importers.STLImporter.ImportModel(filename)
+            self._check_model(model)
+            if pycam.Importers.STLImporter.numpy_enabled:
+                # shared vertices are merged (the vertices of skipped facets are kept)
+                self.assertEqual(len(model.mesh.vertices), 5)
+        finally:
+            os.remove(filename)
+
+    def test_stream(self):
+        """Import a stream"""
+        self._check_model(pycam.Importers.STLImporter.ImportModel(io.BytesIO(_get_binary_stl())))
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
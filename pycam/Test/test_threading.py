@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import pycam.Test
+import pycam.Utils.threading as threading_utils
+
+
+class SharedItem(object):
+
+    def __init__(self, name):
+        self.uuid = name
+
+
+class CountedItem(SharedItem):
+    """ count the transfers of the item to the worker processes """
+
+    pickle_count = 0
+
+    def __getstate__(self):
+        CountedItem.pickle_count += 1
+        return self.__dict__
+
+
+def _get_name(args):
+    item, number = args
+    return "%s-%d" % (item.uuid, number)
+
+
+def _get_square(args):
+    value, delay = args
+    if delay:
+        time.sleep(delay)
+    return value * value
+
+
+def _get_local_pool():
+    return getattr(threading_utils, "__local_pool")
+
+
+def _get_local_cache_dir():
+    return getattr(threading_utils, "__local_cache_dir")
+
+
+class LocalTaskCache(pycam.Test.PycamTestCase):
+    """Shared task arguments of local worker processes"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _get_files(self):
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.cache_dir))
+
+    def test_nested_jobs(self):
+        """Keep the files of running jobs"""
+        first, second = SharedItem("first"), SharedItem("second")
+        args, outer_files = threading_utils._prepare_local_task_args([(first, 1), (first, 2)],
+                                                                     self.cache_dir)
+        self.assertEqual([arg[0].value for arg in args], ["first", "first"])
+        self.assertEqual([arg[1] for arg in args], [1, 2])
+        # a nested job must not remove the files of the outer job
+        args, inner_files = threading_utils._prepare_local_task_args([(second, )],
+                                                                     self.cache_dir)
+        self.assertEqual(self._get_files(), ["first", "second"])
+        threading_utils._release_local_cache_files(inner_files)
+        args, inner_files = threading_utils._prepare_local_task_args([(first, )],
+                                                                     self.cache_dir)
+        self.assertEqual(self._get_files(), ["first"])
+        threading_utils._release_local_cache_files(inner_files)
+        threading_utils._release_local_cache_files(outer_files)
+        # unused files are removed as soon as the next job starts
+        args, files = threading_utils._prepare_local_task_args([(second, )], self.cache_dir)
+        self.assertEqual(self._get_files(), ["second"])
+        threading_utils._release_local_cache_files(files)
+
+
+class LocalWorkerPool(pycam.Test.PycamTestCase):
+    """Keep the local worker processes between jobs"""
+
+    def setUp(self):
+        if not threading_utils.is_multiprocessing_available():
+            self.skipTest("multiprocessing is not available")
+        threading_utils.init_threading(number_of_processes=2)
+        CountedItem.pickle_count = 0
+
+    def tearDown(self):
+        threading_utils.cleanup()
+
+    def _run(self, args_list, **kwargs):
+        return list(threading_utils.run_in_parallel_local(_get_name, args_list, **kwargs))
+
+    def test_consecutive_jobs(self):
+        """Reuse the pool and the shared items"""
+        model = CountedItem("model")
+        self.assertEqual(self._run([(model, index) for index in range(10)]),
+                         ["model-%d" % index for index in range(10)])
+        pool = _get_local_pool()
+        self.assertIsNotNone(pool)
+        self.assertEqual(self._run([(model, index) for index in range(5)]),
+                         ["model-%d" % index for index in range(5)])
+        self.assertIs(_get_local_pool(), pool)
+        # the model was stored only once for both jobs
+        self.assertEqual(CountedItem.pickle_count, 1)
+        # a different item replaces the previous one
+        self.assertEqual(self._run([(CountedItem("other"), 1)]), ["other-1"])
+        self.assertIs(_get_local_pool(), pool)
+        self.assertEqual(CountedItem.pickle_count, 2)
+        self.assertEqual(os.listdir(_get_local_cache_dir()), ["other.pickle"])
+
+    def test_shutdown(self):
+        """Stop the pool after a cancelled job and during the cleanup"""
+        args_list = [(SharedItem("model"), index) for index in range(200)]
+        calls = []
+
+        def cancel():
+            calls.append(None)
+            return len(calls) > 3
+
+        self.assertEqual(len(self._run(args_list, callback=cancel)), 3)
+        self.assertIsNone(_get_local_pool())
+        self.assertIsNone(_get_local_cache_dir())
+        # the next job starts a new pool
+        self.assertEqual(len(self._run(args_list)), len(args_list))
+        self.assertIsNotNone(_get_local_pool())
+        cache_dir = _get_local_cache_dir()
+        self.assertTrue(os.path.isdir(cache_dir))
+        threading_utils.cleanup()
+        self.assertIsNone(_get_local_pool())
+        self.assertFalse(os.path.exists(cache_dir))
+
+
+class ChunkRecorder(object):
+    """ wrap a worker pool and record the size of the submitted chunks """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.chunk_sizes = []
+
+    def apply_async(self, func, args):
+        self.chunk_sizes.append(len(args[0]))
+        return self.pool.apply_async(func, args)
+
+
+class LocalTaskChunks(pycam.Test.PycamTestCase):
+    """Submit local tasks in chunks of adaptive size"""
+
+    def setUp(self):
+        if not threading_utils.is_multiprocessing_available():
+            self.skipTest("multiprocessing is not available")
+        threading_utils.init_threading(number_of_processes=3)
+        self.recorder = None
+        self.original_get_local_pool = threading_utils._get_local_pool
+
+        def get_local_pool():
+            self.recorder = ChunkRecorder(self.original_get_local_pool())
+            return self.recorder
+
+        threading_utils._get_local_pool = get_local_pool
+
+    def tearDown(self):
+        threading_utils._get_local_pool = self.original_get_local_pool
+        threading_utils.cleanup()
+
+    def _run(self, delays, **kwargs):
+        return threading_utils.run_in_parallel_local(
+            _get_square, [(index, delay) for index, delay in enumerate(delays)], **kwargs)
+
+    def test_order(self):
+        """Deliver all results in order (or unordered on request)"""
+        for count in (0, 1, 5, 200, 3000):
+            expected = [index * index for index in range(count)]
+            self.assertEqual(list(self._run([0] * count)), expected)
+            self.assertEqual(sorted(self._run([0] * count, unordered=True)), expected)
+            if count > 0:
+                self.assertEqual(sum(self.recorder.chunk_sizes), count)
+
+    def test_chunk_sizes(self):
+        """Adapt the size of the chunks to the duration of the tasks"""
+        slow_count = 20
+        delays = [0.05] * slow_count + [0] * 3000
+        self.assertEqual(list(self._run(delays)), [index * index for index in range(len(delays))])
+        sizes = self.recorder.chunk_sizes
+        self.assertEqual(sum(sizes), len(delays))
+        # the chunks of slow tasks take roughly "CHUNK_TARGET_DURATION"
+        slow_chunks = 0
+        while sum(sizes[:slow_chunks]) < slow_count:
+            slow_chunks += 1
+        self.assertLessEqual(max(sizes[:slow_chunks]), 2)
+        # fast tasks are combined into large chunks
+        self.assertGreater(max(sizes), 50)
+        self.assertLessEqual(max(sizes), threading_utils.MAX_CHUNK_SIZE)
+        # the chunks get smaller at the end of the job
+        self.assertEqual(sizes[-1], 1)
+
+    def test_break(self):
+        """Stop consuming the results early"""
+        results = self._run([0] * 3000)
+        for index, result in enumerate(results):
+            self.assertEqual(result, index * index)
+            if index == 10:
+                break
+        results.close()
+        # the remaining tasks are dropped together with the pool
+        self.assertIsNone(_get_local_pool())
+        self.assertEqual(list(self._run([0] * 5)), [0, 1, 4, 9, 16])
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import itertools
+import math
+
+import pycam.Toolpath
+from pycam.Toolpath import MOVE_ARC, MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID
+import pycam.Toolpath.Filters as Filters
+from pycam.Toolpath.Steps import MachineSetting, MoveSafety, MoveStraight, MoveStraightRapid, \
+        get_arc_points
+import pycam.Test
+
+
+class ToolpathFilterTests(pycam.Test.PycamTestCase):
+    """Toolpath filters"""
+
+    def setUp(self):
+        self.path = [MachineSetting("feedrate", 100), MoveStraight((0, 0, 0)),
+                     MoveStraight((1, 0, 0)), MoveSafety(), MoveStraight((1, 1, -1))]
+        self.filters = [Filters.SafetyHeight(5), Filters.SelectTool(2),
+                        Filters.TriggerSpindle(0), Filters.PlungeFeedrate(10)]
+
+    def test_pipeline(self):
+        """Apply a sequence of filters"""
+        result = Filters.get_filtered_moves(self.path, self.filters)
+        self.assertEqual(result, [
+            MachineSetting("feedrate", 100), MachineSetting("select_tool", 2),
+            MachineSetting("spindle_enabled", True), (MOVE_STRAIGHT_RAPID, (0, 0, 5)),
+            # the feedrate of plunge moves is limited
+            MachineSetting("feedrate", 10), MoveStraight((0, 0, 0)),
+            MachineSetting("feedrate", 100), MoveStraight((1, 0, 0)),
+            (MOVE_STRAIGHT_RAPID, (1, 0, 5)), (MOVE_STRAIGHT_RAPID, (1, 1, 5)),
+            MachineSetting("feedrate", 10), MoveStraight((1, 1, -1)),
+            MachineSetting("spindle_enabled", False)])
+        # the result does not depend on the order of the filters
+        self.assertEqual(Filters.get_filtered_moves(self.path, reversed(self.filters)), result)
+        # filters can be applied one by one
+        path = self.path
+        for one_filter in sorted(self.filters):
+            path |= one_filter
+        self.assertEqual(path, result)
+
+    def test_streaming(self):
+        """Process the steps one at a time"""
+        moves = (MoveStraight((index, 0, 0)) for index in itertools.count())
+        # the steps are generated on demand (the source is infinite)
+        steps = Filters.iter_filtered_moves(moves, self.filters[:3])
+        self.assertEqual(list(itertools.islice(steps, 5))[-1], MoveStraight((1, 0, 0)))
+        # the time limit ends the toolpath
+        moves = (MoveStraight((index, 0, 0)) for index in itertools.count())
+        steps = list(Filters.iter_filtered_moves(moves, [Filters.TimeLimit(3)]))
+        self.assertEqual(steps[-1], MoveStraight((3, 0, 0)))
+
+    def test_simplify(self):
+        """Remove moves along nearly straight lines"""
+        # a noisy line, a corner and a reversal
+        path = [MoveStraight((0.1 * index, 0.001 * (index % 2), 0)) for index in range(101)]
+        path += [MoveStraight((10, 5, 0)), MoveStraight((10, 2, 0)), MachineSetting("x", 1),
+                 MoveStraight((10, 1, 0)), MoveStraight((10, 0, 0))]
+        expected = [MoveStraight((0, 0, 0)), MoveStraight((10, 0, 0)), MoveStraight((10, 5, 0)),
+                    MoveStraight((10, 2, 0)), MachineSetting("x", 1), MoveStraight((10, 0, 0))]
+        original_numpy_enabled = Filters.numpy_enabled
+        for numpy_enabled in {original_numpy_enabled, False}:
+            Filters.numpy_enabled = numpy_enabled
+            try:
+                self.assertEqual(path | Filters.SimplifyPath(0.01), expected)
+                # only the exact line (10, 2, 0) -> (10, 1, 0) -> (10, 0, 0) is simplified
+                self.assertEqual(len(path | Filters.SimplifyPath(0.0001)), len(path) - 1)
+            finally:
+                Filters.numpy_enabled = original_numpy_enabled
+        # exact lines are simplified without a tolerance
+        points = [(index, 2 * index, 0) for index in range(10)]
+        pycam.Toolpath.simplify_toolpath(points)
+        self.assertEqual(points, [(0, 0, 0), (9, 18, 0)])
+
+    def test_arc_fit(self):
+        """Replace moves along a circle with arcs"""
+        # a clockwise circle (radius 5 around (1, 2)) followed by a straight line
+        angles = [-index * math.pi / 36 for index in range(73)]
+        circle = [(1 + 5 * math.cos(angle), 2 + 5 * math.sin(angle), -1) for angle in angles]
+        line = [(6 + index, 2, -1) for index in range(1, 6)]
+        path = [MoveStraightRapid(circle[0])] + [MoveStraight(point)
+                                                 for point in circle[1:] + line]
+        # the sagitta of every segment is 0.0048
+        result = path | Filters.ArcFit(0.01)
+        self.assertEqual(result[0], path[0])
+        arcs = [step for step in result if step.action == MOVE_ARC]
+        # a full circle is split into (at least) two arcs
+        self.assertIn(len(arcs), (2, 3))
+        for arc in arcs:
+            self.assertVectorEqual(arc.center, (1, 2, -1))
+            self.assertTrue(arc.clockwise)
+        self.assertEqual(result[-5:], path[-5:])
+        self.assertEqual(result[-6].position, circle[-1])
+        # the same result without numpy
+        original_numpy_enabled = Filters.numpy_enabled
+        Filters.numpy_enabled = False
+        try:
+            self.assertEqual(path | Filters.ArcFit(0.01), result)
+        finally:
+            Filters.numpy_enabled = original_numpy_enabled
+        # the linearized arcs stay close to the circle
+        start = circle[0]
+        for arc in arcs:
+            for point in get_arc_points(start, arc, 0.01):
+                self.assertAlmostEqual(math.hypot(point[0] - 1, point[1] - 2), 5)
+            start = arc.position
+        # moves changing the height and short sequences are kept
+        helix = [MoveStraight((point[0], point[1], 0.1 * index))
+                 for index, point in enumerate(circle)]
+        self.assertEqual(helix | Filters.ArcFit(0.01), helix)
+        self.assertEqual(path[:3] | Filters.ArcFit(0.01), path[:3])
+        # a coarse polygon deviates too much from the circle
+        self.assertEqual(path[:73:12] | Filters.ArcFit(0.01), path[:73:12])
+        self.assertTrue(all(step.action in (MOVE_STRAIGHT, MOVE_ARC)
+                            for step in path[1:73:12] | Filters.ArcFit(1)))
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import random
+
+from pycam.Toolpath import MOVE_SAFETY, MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID
+import pycam.Toolpath.Filters as Filters
+from pycam.Toolpath.Ordering import get_optimized_steps, get_transfer_distance
+from pycam.Toolpath.Steps import Comment, MachineSetting, MoveSafety, MoveStraight, \
+        MoveStraightRapid
+import pycam.Test
+
+
+def _get_path(segments):
+    """ separate the given sequences of positions with safety moves """
+    steps = []
+    for positions in segments:
+        steps.append(MoveSafety())
+        steps.extend(MoveStraight(position) for position in positions)
+    steps.append(MoveSafety())
+    return steps
+
+
+def _get_segments(steps):
+    """ return the sequences of positions between other steps """
+    segments = []
+    current = []
+    for step in steps:
+        if step.action in (MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID):
+            current.append(step.position)
+        elif current:
+            segments.append(current)
+            current = []
+    return segments
+
+
+def _get_square(x, y, size, z=0):
+    return [(x, y, z), (x + size, y, z), (x + size, y + size, z), (x, y + size, z), (x, y, z)]
+
+
+class ToolpathOrderingTests(pycam.Test.PycamTestCase):
+    """Reordering of toolpath segments"""
+
+    def test_nearest_segments(self):
+        """Visit nearby segments one after the other"""
+        lines = [[(x, 0, 0), (x, 1, 0)] for x in (0, 30, 10, 40, 20)]
+        result, report = get_optimized_steps(_get_path(lines))
+        self.assertEqual([segment[0][0] for segment in _get_segments(result)], [0, 10, 20, 30, 40])
+        self.assertEqual(report.segments, 5)
+        self.assertAlmostEqual(report.original_distance,
+                               2 * math.hypot(30, 1) + 2 * math.hypot(20, 1))
+        self.assertAlmostEqual(report.optimized_distance, 4 * math.hypot(10, 1))
+        self.assertAlmostEqual(report.saved_distance,
+                               report.original_distance - report.optimized_distance)
+        # the safety moves between the segments are kept
+        self.assertEqual([step.action for step in result].count(MOVE_SAFETY), 6)
+
+    def test_keep_shorter_original(self):
+        """Keep the original order if it is already optimal"""
+        lines = [[(x, 0, 0), (x, 1, 0)] for x in range(5)]
+        steps = _get_path(lines)
+        result, report = get_optimized_steps(steps)
+        self.assertEqual(result, steps)
+        self.assertAlmostEqual(report.saved_distance, 0)
+
+    def test_reverse(self):
+        """Process segments in reverse direction (if allowed)"""
+        lines = [[(0, 0, 0), (10, 0, 0)], [(0, 1, 0), (10, 1, 0)], [(0, 2, 0), (10, 2, 0)]]
+        result, report = get_optimized_steps(_get_path(lines))
+        self.assertEqual(_get_segments(result), lines)
+        result, report = get_optimized_steps(_get_path(lines), allow_reverse=True)
+        self.assertEqual(_get_segments(result),
+                         [lines[0], lines[1][::-1], lines[2]])
+        self.assertAlmostEqual(report.optimized_distance, 2)
+        # segments with rapid moves are never reversed
+        steps = _get_path(lines)
+        steps[4] = MoveStraightRapid(steps[4].position)
+        result, report = get_optimized_steps(steps, allow_reverse=True)
+        self.assertIn(lines[1], _get_segments(result))
+
+    def test_inner_before_outer(self):
+        """Process segments within a closed segment before the closed segment"""
+        outer = _get_square(0, 0, 10)
+        inner = _get_square(4, 4, 2)
+        far = [(30, 0, 0), (31, 0, 0)]
+        for allow_reverse in (False, True):
+            result, report = get_optimized_steps(_get_path([outer, inner, far]), allow_reverse)
+            found = _get_segments(result)
+            self.assertLess(found.index(inner), found.index(outer))
+        # the shortest order (starting far away) is kept
+        result, report = get_optimized_steps(_get_path([far, outer, inner]))
+        self.assertEqual(_get_segments(result), [far, inner, outer])
+
+    def test_barriers(self):
+        """Keep layers, machine settings and comments in their original order"""
+        high = [[(x, 0, 0), (x, 1, 0)] for x in (0, 20, 10)]
+        low = [[(x, 0, -1), (x, 1, -1)] for x in (20, 0, 10)]
+        steps = ([MachineSetting("feedrate", 100)] + _get_path(high) + [Comment("low")]
+                 + _get_path(low[:2]) + [MachineSetting("feedrate", 200)] + _get_path(low[2:]))
+        result, report = get_optimized_steps(steps)
+        self.assertEqual(result[0], MachineSetting("feedrate", 100))
+        self.assertEqual([step for step in result if step.action not in (MOVE_STRAIGHT,
+                                                                         MOVE_SAFETY)],
+                         [MachineSetting("feedrate", 100), Comment("low"),
+                          MachineSetting("feedrate", 200)])
+        self.assertEqual([segment[0] for segment in _get_segments(result)],
+                         [(0, 0, 0), (10, 0, 0), (20, 0, 0), (20, 0, -1), (0, 0, -1),
+                          (10, 0, -1)])
+        # layers (by height) without other steps in between
+        steps = _get_path(high + low)
+        result, report = get_optimized_steps(steps)
+        self.assertEqual([segment[0] for segment in _get_segments(result)],
+                         [(0, 0, 0), (10, 0, 0), (20, 0, 0), (20, 0, -1), (10, 0, -1),
+                          (0, 0, -1)])
+        # no additional safety moves
+        steps = [MachineSetting("feedrate", 100), MoveStraight((0, 0, 0)),
+                 MoveStraight((1, 0, 0)), Comment("end")]
+        self.assertEqual(get_optimized_steps(steps)[0], steps)
+
+    def test_random_segments(self):
+        """Keep all segments of a large toolpath and shorten the moves between them"""
+        rand = random.Random(17)
+        segments = []
+        for index in range(500):
+            x, y = rand.uniform(0, 100), rand.uniform(0, 100)
+            segments.append([(x, y, 0), (x + rand.uniform(-2, 2), y + rand.uniform(-2, 2), 0)])
+        for allow_reverse in (False, True):
+            result, report = get_optimized_steps(_get_path(segments), allow_reverse)
+            found = _get_segments(result)
+            if allow_reverse:
+                found = [min(segment, segment[::-1]) for segment in found]
+                expected = [min(segment, segment[::-1]) for segment in segments]
+            else:
+                expected = segments
+            self.assertEqual(sorted(found), sorted(expected))
+            self.assertLess(report.optimized_distance, report.original_distance / 5)
+            self.assertAlmostEqual(report.optimized_distance, get_transfer_distance(result))
+
+    def test_filter(self):
+        """Reorder segments via the toolpath filter"""
+        lines = [[(x, 0, 0), (x, 1, 0)] for x in (0, 20, 10)]
+        steps = _get_path(lines) | Filters.OptimizeOrder(False)
+        self.assertEqual([segment[0][0] for segment in _get_segments(steps)], [0, 10, 20])
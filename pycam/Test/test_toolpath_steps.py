@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from pycam.Toolpath import MOVE_STRAIGHT, Toolpath
+import pycam.Toolpath.Filters
+from pycam.Toolpath.Kinematics import get_machine_limits, MachineKinematics
+import pycam.Toolpath.Steps
+from pycam.Toolpath.Steps import Comment, MachineSetting, MoveArc, MoveSafety, MoveStraight, \
+        MoveStraightRapid, StepArray
+import pycam.Test
+
+
+@unittest.skipUnless(pycam.Toolpath.Steps.numpy_enabled, "numpy is not available")
+class StepArrayTests(pycam.Test.PycamTestCase):
+    """Compact storage of toolpath steps"""
+
+    def setUp(self):
+        self.steps = [MachineSetting("feedrate", 100), MoveStraightRapid((0, 0, 5)),
+                      MoveStraight((0, 0, 0)), Comment("cut"), MoveStraight((3, 4, 0)),
+                      MoveSafety(), MachineSetting("feedrate", 50), MoveStraight((3, 4, -2))]
+
+    def test_sequence(self):
+        """Access the steps"""
+        steps = StepArray(self.steps)
+        self.assertEqual(len(steps), len(self.steps))
+        self.assertEqual(list(steps), self.steps)
+        self.assertEqual(steps[4], self.steps[4])
+        self.assertEqual(steps[-2], self.steps[-2])
+        self.assertRaises(IndexError, lambda: steps[len(self.steps)])
+        self.assertEqual(list(steps[2:7]), self.steps[2:7])
+        self.assertEqual(list(steps[::-2]), self.steps[::-2])
+        self.assertEqual(list(StepArray(steps)), self.steps)
+        self.assertEqual(list(StepArray([])), [])
+        # arcs keep their center
+        steps = StepArray(self.steps + [MoveArc((5, 6, -2), (5, 4, -2), False)])
+        self.assertEqual(steps[-1], MoveArc((5, 6, -2), (5, 4, -2), False))
+        self.assertEqual(list(steps[-3:])[-1], steps[-1])
+        self.assertEqual(list(steps.get_timeline().get_steps(1))[-1],
+                         MoveArc((5, 6, -2), (5, 4, -2), False))
+
+    def test_estimations(self):
+        """Calculate the bounds, the length and the duration"""
+        steps = StepArray(self.steps)
+        self.assertEqual(steps.get_bounds(), ((0, 0, -2), (3, 4, 5)))
+        self.assertEqual(StepArray(self.steps[:1]).get_bounds(), None)
+        length, duration = steps.get_distance_and_time()
+        self.assertAlmostEqual(length, 12)
+        self.assertAlmostEqual(duration, 10 / 100.0 + 2 / 50.0)
+        toolpath = Toolpath(toolpath_path=self.steps)
+        self.assertEqual((toolpath.minx, toolpath.maxy, toolpath.minz), (0, 4, -2))
+        # without machine limits only the feedrate is taken into account (like the timeline)
+        self.assertAlmostEqual(toolpath.get_machine_time(), duration)
+        self.assertAlmostEqual(toolpath.get_machine_time(), toolpath.get_timeline().duration)
+        # the machine limits are taken from the settings of the toolpath processor
+        settings = {"max_velocity_x": 3000, "max_velocity_y": 3000, "max_velocity_z": 1000,
+                    "max_acceleration_x": 500, "max_acceleration_y": 500,
+                    "max_acceleration_z": 200}
+        machine_limits = get_machine_limits(settings)
+        self.assertEqual(machine_limits, ((3000, 3000, 1000), (500, 500, 200)))
+        self.assertIsNone(get_machine_limits({"max_velocity_x": 3000}))
+        cycle_time = MachineKinematics(*machine_limits).get_cycle_time(toolpath.get_basic_moves())
+        self.assertEqual(toolpath.get_cycle_time(*machine_limits), cycle_time)
+        self.assertAlmostEqual(toolpath.get_machine_time(machine_limits=machine_limits),
+                               cycle_time.duration)
+        self.assertGreater(cycle_time.duration, duration)
+        # the estimation follows changes of the limits
+        slow_limits = ((3000, 3000, 1000), (5, 5, 2))
+        self.assertGreater(toolpath.get_machine_time(machine_limits=slow_limits),
+                           cycle_time.duration + 0.01)
+
+    def test_timeline(self):
+        """Locate the tool at a given time"""
+        timeline = StepArray(self.steps).get_timeline()
+        self.assertEqual(timeline.times.tolist(), [0, 0.05, 0.1, 0.14])
+        self.assertEqual(timeline.get_position(-1), (0, 0, 5))
+        self.assertVectorEqual(timeline.get_position(0.075), (1.5, 2, 0))
+        self.assertEqual(timeline.get_position(1), (3, 4, -2))
+        moves = timeline.get_steps(0.12)
+        self.assertEqual(list(moves)[:3], [MoveStraightRapid((0, 0, 5)), MoveStraight((0, 0, 0)),
+                                           MoveStraight((3, 4, 0))])
+        self.assertEqual(moves[-1].action, MOVE_STRAIGHT)
+        self.assertVectorEqual(moves[-1].position, (3, 4, -1))
+        self.assertEqual(len(timeline.get_steps(1)), 4)
+        # rapid moves at their own speed
+        steps = StepArray(self.steps + [MoveStraightRapid((3, 4, 8))])
+        self.assertAlmostEqual(steps.get_timeline().duration, 0.14 + 10 / 50.0)
+        self.assertAlmostEqual(steps.get_timeline(rapid_feedrate=1000).duration, 0.15)
+        # the toolpath simulation
+        toolpath = Toolpath(toolpath_path=self.steps)
+        self.assertEqual(list(toolpath.get_moves(max_time=0.12)), list(moves))
+
+    def test_arcs(self):
+        """Measure arcs along their circumference"""
+        # a half circle (radius 5) through (0, 5)
+        steps = [MachineSetting("feedrate", 100), MoveStraight((-5, 0, 0)),
+                 MoveArc((5, 0, 0), (0, 0, 0), True), MoveStraight((5, -5, 0))]
+        timeline = StepArray(steps).get_timeline()
+        self.assertAlmostEqual(timeline.distance, 5 * math.pi + 5)
+        self.assertAlmostEqual(timeline.duration, (5 * math.pi + 5) / 100)
+        half_time = 2.5 * math.pi / 100
+        self.assertVectorEqual(timeline.get_position(half_time), (0, 5, 0))
+        # the unfinished arc is shortened along its circumference
+        moves = timeline.get_steps(half_time)
+        self.assertEqual(len(moves), 2)
+        self.assertVectorEqual(moves[-1].position, (0, 5, 0))
+        self.assertEqual((moves[-1].center, moves[-1].clockwise), ((0, 0, 0), True))
+        self.assertEqual(list(timeline.get_steps(1))[1], steps[2])
+        # the same applies to the filter
+        moves = list(steps | pycam.Toolpath.Filters.TimeLimit(half_time))
+        self.assertVectorEqual(moves[-1].position, (0, 5, 0))
+        self.assertEqual((moves[-1].center, moves[-1].clockwise), ((0, 0, 0), True))
+        toolpath = Toolpath(toolpath_path=steps)
+        self.assertAlmostEqual(toolpath.get_machine_move_distance_and_time()[0],
+                               5 * math.pi + 5)
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+import unittest
+
+import pycam.Geometry.TriangleBVH
+from pycam.Geometry.TriangleBVH import TriangleBVH
+from pycam.Geometry.Triangle import Triangle
+from pycam.Geometry.TriangleKdtree import TriangleKdtree
+import pycam.Test
+
+
+@unittest.skipUnless(pycam.Geometry.TriangleBVH.numpy_enabled, "numpy is not available")
+class TriangleBVHTests(pycam.Test.PycamTestCase):
+    """Flat bounding volume hierarchy"""
+
+    def setUp(self):
+        rand = random.Random(42)
+        self.triangles = []
+        for _ in range(500):
+            x, y, z = rand.uniform(-50, 50), rand.uniform(-50, 50), rand.uniform(0, 10)
+            self.triangles.append(Triangle((x, y, z), (x + rand.uniform(0.1, 8), y, z),
+                                           (x, y + rand.uniform(0.1, 8), z + 1)))
+        self.boxes = []
+        for _ in range(50):
+            x, y = rand.uniform(-60, 60), rand.uniform(-60, 60)
+            self.boxes.append((x, x + rand.uniform(0, 20), y, y + rand.uniform(0, 20)))
+
+    def _get_expected(self, minx, maxx, miny, maxy):
+        return [index for index, t in enumerate(self.triangles)
+                if (t.minx <= maxx) and (t.maxx >= minx) and (t.miny <= maxy)
+                and (t.maxy >= miny)]
+
+    def test_box_query(self):
+        """Compare box queries with a linear search and with the kdtree"""
+        tree = TriangleBVH.from_triangles(self.triangles)
+        kdtree = TriangleKdtree(self.triangles)
+        for box in self.boxes:
+            expected = self._get_expected(*box)
+            self.assertEqual(list(tree.get_indices(*box)), expected)
+            self.assertEqual(sorted(t.id for t in tree.Search(*box)),
+                             sorted(t.id for t in kdtree.Search(*box)))
+
+    def test_batch_query(self):
+        """Query many boxes at once"""
+        tree = TriangleBVH.from_triangles(self.triangles, leaf_size=3)
+        results = tree.get_indices_batch(self.boxes)
+        self.assertEqual(len(results), len(self.boxes))
+        for box, result in zip(self.boxes, results):
+            self.assertEqual(list(result), self._get_expected(*box))
+
+    def test_small_trees(self):
+        """Query empty and tiny trees"""
+        self.assertEqual(list(TriangleBVH.from_triangles([]).get_indices(-1, 1, -1, 1)), [])
+        tree = TriangleBVH.from_triangles(self.triangles[:1])
+        box = (self.triangles[0].minx, self.triangles[0].minx, self.triangles[0].miny,
+               self.triangles[0].miny)
+        self.assertEqual(list(tree.get_indices(*box)), [0])
+        self.assertEqual([list(result) for result in tree.get_indices_batch([box, box])],
+                         [[0], [0]])
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+from pycam.Cutters.SphericalCutter import SphericalCutter
+from pycam.Geometry.Model import MeshModel, Model
+from pycam.Geometry.PointUtils import ptransform_by_matrix
+from pycam.Geometry.Triangle import Triangle
+import pycam.Geometry.TriangleMesh
+from pycam.PathGenerators import get_max_height_batch
+import pycam.Test
+
+
+def _get_model(model_class=Model):
+    model = model_class()
+    model.append(Triangle((-3, -4, 1), (-3, 4, 1), (3, 0, 2)))
+    model.append(Triangle((3, 0, 2), (-3, 4, 1), (4, 4, 0)))
+    model.append(Triangle((10, 10, 0), (11, 10, 0), (10, 11, 1)))
+    return model
+
+
+@unittest.skipUnless(pycam.Geometry.TriangleMesh.numpy_enabled, "numpy is not available")
+class MeshModelTests(pycam.Test.PycamTestCase):
+    """Array based triangle model"""
+
+    def _assert_same_triangles(self, triangles1, triangles2):
+        self.assertEqual(len(triangles1), len(triangles2))
+        for t1, t2 in zip(triangles1, triangles2):
+            for p1, p2 in zip(t1.get_points(), t2.get_points()):
+                self.assertVectorEqual(p1, p2)
+            self.assertVectorEqual(t1.normal[:3], t2.normal[:3])
+
+    def test_from_model(self):
+        """Convert a model into a mesh model"""
+        model = _get_model()
+        mesh_model = MeshModel.from_model(model)
+        # shared vertices are merged
+        self.assertEqual(len(mesh_model.mesh.vertices), 7)
+        self._assert_same_triangles(model.triangles(), mesh_model.triangles())
+        self.assertEqual((mesh_model.minx, mesh_model.maxz), (model.minx, model.maxz))
+        # views are kept while they are in use
+        self.assertIs(mesh_model.triangles()[0], mesh_model.triangles()[0])
+
+    def test_append(self):
+        """Append triangles to a mesh model"""
+        self._assert_same_triangles(_get_model().triangles(), _get_model(MeshModel).triangles())
+        self.assertEqual(_get_model(MeshModel).maxx, 11)
+
+    def test_box_query(self):
+        """Select triangles within a rectangle"""
+        mesh_model = _get_model(MeshModel)
+        self.assertEqual(len(mesh_model.triangles(-1, -1, 0, 1, 1, 5)), 2)
+        self.assertEqual(len(mesh_model.triangles(9, 9, 0, 12, 12, 5)), 1)
+        self.assertEqual(len(mesh_model.get_triangle_arrays(9, 9, 0, 12, 12, 5)[0]), 1)
+
+    def test_transform(self):
+        """Transform a mesh model"""
+        matrix = ((0, 1, 0, 2), (-1, 0, 0, 3), (0, 0, 2, 1))
+        model = _get_model()
+        mesh_model = MeshModel.from_model(model)
+        uuid = mesh_model.uuid
+        mesh_model.transform_by_matrix(matrix)
+        self.assertNotEqual(uuid, mesh_model.uuid)
+        expected = [Triangle(*[ptransform_by_matrix(p, matrix) for p in t.get_points()],
+                             n=ptransform_by_matrix(t.normal, matrix))
+                    for t in model.triangles()]
+        self._assert_same_triangles(expected, mesh_model.triangles())
+        self.assertEqual(mesh_model.minz, 1)
+        self.assertEqual(mesh_model.maxz, 5)
+
+    def test_drop(self):
+        """Drop a cutter on a mesh model"""
+        positions = [(x / 2.0, y / 2.0) for x in range(-12, 24, 3) for y in range(-12, 24, 3)]
+        cutter = SphericalCutter(1)
+        expected = get_max_height_batch(_get_model(), cutter, positions, 0, 5)
+        result = get_max_height_batch(_get_model(MeshModel), cutter, positions, 0, 5)
+        for result_point, expected_point in zip(result, expected):
+            self.assertVectorEqual(result_point, expected_point)
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from pycam.Toolpath.Steps import MoveStraight, MoveStraightRapid
+import pycam.Toolpath.VertexBuffers
+from pycam.Toolpath.VertexBuffers import CONE_PRECISION, get_vertex_buffers
+import pycam.Test
+
+
+@unittest.skipUnless(pycam.Toolpath.VertexBuffers.numpy_enabled, "numpy is not available")
+class VertexBuffersTests(pycam.Test.PycamTestCase):
+    """Vertex and index arrays for the visualization of toolpaths"""
+
+    def setUp(self):
+        self.moves = [MoveStraightRapid((0, 0, 5)), MoveStraight((0, 0, 0)),
+                      MoveStraight((10, 0, 0)), MoveStraight((10, 0, 0)),
+                      MoveStraight((0, 0, 0)), MoveStraightRapid((0, 0, 5))]
+
+    def _get_lines(self, buffers):
+        return [([tuple(buffers.vertices[index]) for index in indices.tolist()], rapid)
+                for indices, triangles, rapid in buffers.runs]
+
+    def test_lines(self):
+        """Split the moves into line strips of rapid and cutting moves"""
+        buffers = get_vertex_buffers(self.moves, show_directions=False)
+        # every position is stored once
+        self.assertEqual(len(buffers.vertices), 3)
+        self.assertEqual(self._get_lines(buffers),
+                         [([(0, 0, 5), (0, 0, 0), (10, 0, 0), (0, 0, 0)], False),
+                          ([(0, 0, 0), (0, 0, 5)], True)])
+        self.assertEqual([len(triangles) for indices, triangles, rapid in buffers.runs], [0, 0])
+
+    def test_direction_cones(self):
+        """Add a cone to every long segment"""
+        buffers = get_vertex_buffers(self.moves)
+        triangle_counts = [len(triangles) // 3 for indices, triangles, rapid in buffers.runs]
+        self.assertEqual(triangle_counts, [3 * CONE_PRECISION, CONE_PRECISION])
+        # the cone of the segment from (0, 0, 0) to (10, 0, 0)
+        triangles = buffers.runs[0][1].reshape(-1, 3)[CONE_PRECISION:2 * CONE_PRECISION]
+        tops = set(triangles[:, 0].tolist())
+        self.assertEqual(len(tops), 1)
+        self.assertVectorEqual(tuple(buffers.vertices[tops.pop()].tolist()), (5.5, 0, 0))
+        for index in set(triangles[:, 1:].reshape(-1).tolist()):
+            x, y, z = buffers.vertices[index]
+            self.assertAlmostEqual(x, 4.5, places=5)
+            self.assertAlmostEqual(math.hypot(y, z), 1 / 3.0, places=5)
+
+    def test_level_of_detail(self):
+        """Merge nearby vertices"""
+        moves = [MoveStraight((0.1 * index, 0, 0)) for index in range(101)]
+        buffers = get_vertex_buffers(moves, tolerance=1, show_directions=False)
+        # the first point within every cell of the grid
+        self.assertEqual([round(point[0], 3) for point in self._get_lines(buffers)[0][0]],
+                         list(range(11)))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import unittest
+
+from pycam.Cutters.CylindricalCutter import CylindricalCutter
+from pycam.Cutters.SphericalCutter import SphericalCutter
+from pycam.Cutters.ToroidalCutter import ToroidalCutter
+from pycam.Geometry.Triangle import Triangle
+import pycam.Simulation.ZBuffer
+from pycam.Simulation.ZBuffer import ZBuffer
+import pycam.Test
+
+
+@unittest.skipUnless(pycam.Simulation.ZBuffer.numpy_enabled, "numpy is not available")
+class ZBufferTests(pycam.Test.PycamTestCase):
+    """Height field simulation"""
+
+    def setUp(self):
+        # cells have a size of 0.1
+        self.zbuffer = ZBuffer(0, 10, 100, 0, 10, 100, 0, 10, initial_z=5)
+
+    def _get_height(self, x, y):
+        return self.zbuffer.buf[int(round(y * 10)), int(round(x * 10))]
+
+    def test_triangles(self):
+        """Rasterize triangles"""
+        self.zbuffer.add_triangles([Triangle((1, 1, 6), (1, 9, 6), (9, 1, 8)),
+                                    # vertical triangles are ignored
+                                    Triangle((2, 2, 0), (2, 2, 9), (3, 3, 0))])
+        self.assertAlmostEqual(self._get_height(1, 1), 6)
+        self.assertAlmostEqual(self._get_height(5, 2), 7)
+        self.assertAlmostEqual(self._get_height(2, 5), 6.25)
+        # outside of the triangle
+        self.assertEqual(self._get_height(6, 6), 5)
+        self.assertEqual(self._get_height(0.5, 1), 5)
+        # lower triangles do not change the buffer
+        self.zbuffer.add_triangle(Triangle((0, 0, 1), (0, 10, 1), (10, 0, 1)))
+        self.assertAlmostEqual(self._get_height(5, 2), 7)
+
+    def test_cutter(self):
+        """Remove material at a single location"""
+        self.zbuffer.add_cutter(CylindricalCutter(1, location=(5, 5, 3)))
+        self.assertEqual(self._get_height(5, 5), 3)
+        self.assertEqual(self._get_height(5.9, 5.3), 3)
+        self.assertEqual(self._get_height(6.1, 5), 5)
+
+    def test_moves(self):
+        """Sweep a ball cutter along horizontal and inclined moves"""
+        cutter = SphericalCutter(1)
+        self.zbuffer.add_moves(cutter, [(2, 2, 4), (8, 2, 4), (8, 8, 2)])
+        # the ball profile across a horizontal move
+        for distance in (0, 0.3, 0.6, 0.9):
+            # distances are calculated with single precision
+            self.assertAlmostEqual(self._get_height(5, 2 + distance),
+                                   5 - math.sqrt(1 - distance ** 2), places=5)
+        self.assertEqual(self._get_height(5, 3.2), 5)
+        # the end of the inclined move
+        self.assertAlmostEqual(self._get_height(8, 8), 2)
+        # halfway along the inclined move (within the precision of the grid)
+        self.assertAlmostEqual(self._get_height(8, 5), 3, delta=0.1)
+        # the material removal is not repeated
+        self.assertTrue(self.zbuffer.changed)
+        self.zbuffer.changed = False
+        self.zbuffer.add_move(cutter, (2, 2, 4), (8, 2, 4))
+        self.assertFalse(self.zbuffer.changed)
+
+    def test_toroidal_ramp(self):
+        """Inclined moves of toroidal cutters leave at most one cell height of extra material"""
+        major_radius, minor_radius = 1, 0.25
+        start, end = (2, 5, 8), (8, 6, 2)
+        self.zbuffer = ZBuffer(0, 10, 100, 0, 10, 100, 0, 10, initial_z=10)
+        self.zbuffer.add_moves(ToroidalCutter(major_radius, minor_radius), [start, end])
+        steps = 2000
+        for y in (5.0, 5.5, 6.2, 6.6):
+            for column in range(100):
+                x = column / 10.0
+                # the lowest point of the swept volume (sampled densely along the move)
+                expected = 10
+                for index in range(steps + 1):
+                    t = index / float(steps)
+                    distance = math.hypot(x - start[0] - t * (end[0] - start[0]),
+                                          y - start[1] - t * (end[1] - start[1]))
+                    if distance <= major_radius + 1e-9:
+                        ring_distance = max(0, distance - (major_radius - minor_radius))
+                        height = (start[2] + t * (end[2] - start[2]) + minor_radius
+                                  - math.sqrt(max(0, minor_radius ** 2 - ring_distance ** 2)))
+                        expected = min(expected, height)
+                height = self._get_height(x, y)
+                # distances are calculated with single precision (imprecise near the rim)
+                self.assertGreaterEqual(height, expected - 1e-3)
+                # one cell height: the height difference of the parts of the move
+                self.assertLessEqual(height, expected + 0.1 + 1e-3)
+
+
+if __name__ == "__main__":
+    pycam.Test.main()
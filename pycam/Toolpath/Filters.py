@@ -20,16 +20,35 @@ along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 
 
 import decimal
+import math
 
 from pycam.Geometry import epsilon
 from pycam.Geometry.Line import Line
-from pycam.Geometry.PointUtils import padd, psub, pmul, pdist, pnear, ptransform_by_matrix
-from pycam.Toolpath import MOVE_SAFETY, MOVES_LIST, MACHINE_SETTING
+from pycam.Geometry.PointUtils import padd, pdot, psub, pmul, pdist, pnear, ptransform_by_matrix
+from pycam.Toolpath import MOVE_ARC, MOVE_SAFETY, MOVE_STRAIGHT, MOVES_LIST, MACHINE_SETTING
+from pycam.Toolpath.Ordering import get_optimized_steps
 import pycam.Toolpath.Steps as ToolpathSteps
 import pycam.Utils.log
 
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
 
 MAX_DIGITS = 12
+# maximum number of positions processed at once by "SimplifyPath" and "ArcFit"
+SEQUENCE_CHUNK_SIZE = 2 ** 14
+# avoid divisions by zero for segments without a length
+_MIN_LENGTH_SQ = 1e-300
+# minimum number of straight moves replaced by an arc
+MIN_ARC_SEGMENTS = 3
+# maximum angle of an arc: the end of an arc is never close to its start (this would look like
+# a full circle)
+MAX_ARC_SWEEP = math.pi
+# longer sequences of positions are checked with numpy (if available) by "ArcFit"
+ARC_ARRAY_SIZE = 32
 
 _log = pycam.Utils.log.get_logger()
 
@@ -64,12 +83,22 @@ def toolpath_filter(our_category, key):
 
 
 def get_filtered_moves(moves, filters):
+    return list(iter_filtered_moves(moves, filters))
+
+
+def iter_filtered_moves(moves, filters):
+    """ apply the filters to the toolpath steps one at a time (a generator)
+
+    The filters are chained: a step passes all filters before the next step is read. Thus the
+    complete toolpath is never stored (e.g. during an export).
+    """
     filters = list(filters)
-    moves = list(moves)
     filters.sort()
+    steps = iter(moves)
     for one_filter in filters:
-        moves |= one_filter
-    return moves
+        _log.debug("Applying toolpath filter: %s", one_filter.__class__)
+        steps = one_filter.filter_steps(steps)
+    return steps
 
 
 class BaseFilter(object):
@@ -120,7 +149,11 @@ class BaseFilter(object):
         return ", ".join(["%s=%s" % (key, self.settings[key]) for key in self.settings])
 
     def filter_toolpath(self, toolpath):
-        raise NotImplementedError(("The filter class %s failed to implement the 'filter_toolpath' "
+        return list(self.filter_steps(toolpath))
+
+    def filter_steps(self, steps):
+        """ process the steps of a toolpath (an iterable) one at a time (a generator) """
+        raise NotImplementedError(("The filter class %s failed to implement the 'filter_steps' "
                                    "method") % str(type(self)))
 
 
@@ -129,22 +162,22 @@ class SafetyHeight(BaseFilter):
     PARAMS = ("safety_height", )
     WEIGHT = 80
 
-    def filter_toolpath(self, toolpath):
+    def filter_steps(self, steps):
         last_pos = None
         max_height = None
-        new_path = []
         safety_pending = False
         get_safe = lambda pos: tuple((pos[0], pos[1], self.settings["safety_height"]))
-        for step in toolpath:
+        for step in steps:
             if step.action == MOVE_SAFETY:
                 safety_pending = True
             elif step.action in MOVES_LIST:
                 new_pos = tuple(step.position)
-                max_height = max(max_height, new_pos[2])
+                if (max_height is None) or (new_pos[2] > max_height):
+                    max_height = new_pos[2]
                 if not last_pos:
                     # there was a safety move (or no move at all) before
                     # -> move sideways
-                    new_path.append(ToolpathSteps.MoveStraightRapid(get_safe(new_pos)))
+                    yield ToolpathSteps.MoveStraightRapid(get_safe(new_pos))
                 elif safety_pending:
                     safety_pending = False
                     if pnear(last_pos, new_pos, axes=(0, 1)):
@@ -152,23 +185,22 @@ class SafetyHeight(BaseFilter):
                         pass
                     else:
                         # go up, sideways and down
-                        new_path.append(ToolpathSteps.MoveStraightRapid(get_safe(last_pos)))
-                        new_path.append(ToolpathSteps.MoveStraightRapid(get_safe(new_pos)))
+                        yield ToolpathSteps.MoveStraightRapid(get_safe(last_pos))
+                        yield ToolpathSteps.MoveStraightRapid(get_safe(new_pos))
                 else:
                     # we are in the middle of usual moves -> keep going
                     pass
-                new_path.append(step)
+                yield step
                 last_pos = new_pos
             else:
                 # unknown move -> keep it
-                new_path.append(step)
+                yield step
         # process pending safety moves
         if safety_pending and last_pos:
-            new_path.append(ToolpathSteps.MoveStraightRapid(get_safe(last_pos)))
-        if max_height > self.settings["safety_height"]:
+            yield ToolpathSteps.MoveStraightRapid(get_safe(last_pos))
+        if (max_height is not None) and (max_height > self.settings["safety_height"]):
             _log.warn("Toolpath exceeds safety height: %f => %f",
                       max_height, self.settings["safety_height"])
-        return new_path
 
 
 class MachineSetting(BaseFilter):
@@ -176,15 +208,22 @@ class MachineSetting(BaseFilter):
     PARAMS = ("key", "value")
     WEIGHT = 20
 
-    def filter_toolpath(self, toolpath):
-        result = []
-        # move all previous machine settings
-        while toolpath and toolpath[0].action == MACHINE_SETTING:
-            result.append(toolpath.pop(0))
+    def filter_steps(self, steps):
+        steps = iter(steps)
+        # keep all previous machine settings
+        for step in steps:
+            if step.action != MACHINE_SETTING:
+                break
+            yield step
+        else:
+            step = None
         # add the new setting
         for key, value in self._get_settings():
-            result.append(ToolpathSteps.MachineSetting(key, value))
-        return result + toolpath
+            yield ToolpathSteps.MachineSetting(key, value)
+        if step is not None:
+            yield step
+        for step in steps:
+            yield step
 
     def _get_settings(self):
         return [(self.settings["key"], self.settings["value"])]
@@ -214,51 +253,64 @@ class SelectTool(BaseFilter):
     PARAMS = ("tool_id", )
     WEIGHT = 35
 
-    def filter_toolpath(self, toolpath):
-        index = 0
-        # skip all non-moves
-        while (index < len(toolpath)) and (toolpath[index][0] not in MOVES_LIST):
-            index += 1
-        toolpath.insert(index, ToolpathSteps.MachineSetting("select_tool",
-                                                            self.settings["tool_id"]))
-        return toolpath
+    def filter_steps(self, steps):
+        tool_selected = False
+        for step in steps:
+            # select the tool before the first move
+            if not tool_selected and (step.action in MOVES_LIST):
+                yield ToolpathSteps.MachineSetting("select_tool", self.settings["tool_id"])
+                tool_selected = True
+            yield step
+        if not tool_selected:
+            yield ToolpathSteps.MachineSetting("select_tool", self.settings["tool_id"])
 
 
 class TriggerSpindle(BaseFilter):
+    """ start the spindle after every tool change (or before the first move) and stop it after
+    the last move
+    """
 
     PARAMS = ("delay", )
     WEIGHT = 40
 
-    def filter_toolpath(self, toolpath):
-        def enable_spindle(path, index):
-            path.insert(index, ToolpathSteps.MachineSetting("spindle_enabled", True))
+    def filter_steps(self, steps):
+        def enable_spindle():
+            yield ToolpathSteps.MachineSetting("spindle_enabled", True)
             if self.settings["delay"]:
-                path.insert(index + 1, ToolpathSteps.MachineSetting("delay",
-                                                                    self.settings["delay"]))
-
-        def disable_spindle(path, index):
-            path.insert(index, ToolpathSteps.MachineSetting("spindle_enabled", False))
-
-        # find all positions of "select_tool"
-        tool_changes = [index for index, step in enumerate(toolpath)
-                        if (step.action == MACHINE_SETTING) and (step.key == "select_tool")]
-        if tool_changes:
-            tool_changes.reverse()
-            for index in tool_changes:
-                enable_spindle(toolpath, index + 1)
-        else:
-            # add a single tool selection before the first move
-            for index, step in enumerate(toolpath):
-                if step.action in MOVES_LIST:
-                    enable_spindle(toolpath, index)
-                    break
-        # add "stop spindle" just after the last move
-        index = len(toolpath) - 1
-        while (toolpath[index].action not in MOVES_LIST) and (index > 0):
-            index -= 1
-        if toolpath[index].action in MOVES_LIST:
-            disable_spindle(toolpath, index + 1)
-        return toolpath
+                yield ToolpathSteps.MachineSetting("delay", self.settings["delay"])
+
+        spindle_enabled = False
+        moved = False
+        # the steps after the latest move are delayed: the spindle is stopped after the last move
+        pending = []
+        for step in steps:
+            if step.action in MOVES_LIST:
+                moved = True
+                if not spindle_enabled:
+                    # no tool was selected before the first move
+                    for setting in enable_spindle():
+                        yield setting
+                    spindle_enabled = True
+                for pending_step in pending:
+                    yield pending_step
+                pending = []
+                yield step
+            elif spindle_enabled:
+                pending.append(step)
+            else:
+                yield step
+            if (step.action == MACHINE_SETTING) and (step.key == "select_tool"):
+                # start the spindle after every tool change
+                for setting in enable_spindle():
+                    if spindle_enabled:
+                        pending.append(setting)
+                    else:
+                        yield setting
+                spindle_enabled = True
+        if moved:
+            yield ToolpathSteps.MachineSetting("spindle_enabled", False)
+        for pending_step in pending:
+            yield pending_step
 
 
 class PlungeFeedrate(BaseFilter):
@@ -267,12 +319,11 @@ class PlungeFeedrate(BaseFilter):
     # must be greater than the weight of the SafetyHeight filter
     WEIGHT = 82
 
-    def filter_toolpath(self, toolpath):
-        new_path = []
+    def filter_steps(self, steps):
         last_pos = None
         original_feedrate = None
         current_feedrate = None
-        for step in toolpath:
+        for step in steps:
             if (step.action == MACHINE_SETTING) and (step.key == "feedrate"):
                 # store the current feedrate
                 original_feedrate = step.value
@@ -289,20 +340,18 @@ class PlungeFeedrate(BaseFilter):
                     max_feedrate = min(original_feedrate, max_feedrate)
                     if current_feedrate != max_feedrate:
                         # we are too slow or too fast
-                        new_path.append(ToolpathSteps.MachineSetting("feedrate", max_feedrate))
+                        yield ToolpathSteps.MachineSetting("feedrate", max_feedrate)
                         current_feedrate = max_feedrate
                 else:
                     # we do not move down
                     if current_feedrate != original_feedrate:
                         # switch back to the maximum feedrate
-                        new_path.append(ToolpathSteps.MachineSetting("feedrate",
-                                                                     original_feedrate))
+                        yield ToolpathSteps.MachineSetting("feedrate", original_feedrate)
                         current_feedrate = original_feedrate
                 last_pos = step.position
             else:
                 pass
-            new_path.append(step)
-        return new_path
+            yield step
 
 
 class Crop(BaseFilter):
@@ -310,11 +359,10 @@ class Crop(BaseFilter):
     PARAMS = ("polygons", )
     WEIGHT = 90
 
-    def filter_toolpath(self, toolpath):
-        new_path = []
+    def filter_steps(self, steps):
         last_pos = None
         optional_moves = []
-        for step in toolpath:
+        for step in steps:
             if step.action in MOVES_LIST:
                 if last_pos:
                     # find all remaining pieces of this line
@@ -325,16 +373,14 @@ class Crop(BaseFilter):
                     # turn these lines into moves
                     for line in inner_lines:
                         if pdist(line.p1, last_pos) > epsilon:
-                            new_path.append(ToolpathSteps.MoveSafety())
-                            new_path.append(
-                                ToolpathSteps.get_step_class_by_action(step.action)(line.p1))
+                            yield ToolpathSteps.MoveSafety()
+                            yield ToolpathSteps.get_step_class_by_action(step.action)(line.p1)
                         else:
                             # we continue where we left
-                            if optional_moves:
-                                new_path.extend(optional_moves)
-                                optional_moves = []
-                        new_path.append(
-                            ToolpathSteps.get_step_class_by_action(step.action)(line.p2))
+                            for optional_move in optional_moves:
+                                yield optional_move
+                            optional_moves = []
+                        yield ToolpathSteps.get_step_class_by_action(step.action)(line.p2)
                         last_pos = line.p2
                     optional_moves = []
                     # finish the line by moving to its end (if necessary)
@@ -345,8 +391,7 @@ class Crop(BaseFilter):
             elif step.action == MOVE_SAFETY:
                 optional_moves = []
             else:
-                new_path.append(step)
-        return new_path
+                yield step
 
 
 class TransformPosition(BaseFilter):
@@ -356,15 +401,13 @@ class TransformPosition(BaseFilter):
     PARAMS = ("matrix", )
     WEIGHT = 85
 
-    def filter_toolpath(self, toolpath):
-        new_path = []
-        for step in toolpath:
+    def filter_steps(self, steps):
+        for step in steps:
             if step.action in MOVES_LIST:
                 new_pos = ptransform_by_matrix(step.position, self.settings["matrix"])
-                new_path.append(ToolpathSteps.get_step_class_by_action(step.action)(new_pos))
+                yield ToolpathSteps.get_step_class_by_action(step.action)(new_pos)
             else:
-                new_path.append(step)
-        return new_path
+                yield step
 
 
 class TimeLimit(BaseFilter):
@@ -375,33 +418,394 @@ class TimeLimit(BaseFilter):
     PARAMS = ("timelimit", )
     WEIGHT = 100
 
-    def filter_toolpath(self, toolpath):
+    def filter_steps(self, steps):
+        limit = self.settings["timelimit"]
+        if hasattr(steps, "get_timeline"):
+            # a StepArray: locate the end via binary search
+            for step in steps.get_timeline().get_steps(limit):
+                yield step
+            return
         feedrate = min_feedrate = 1
-        new_path = []
         last_pos = None
-        limit = self.settings["timelimit"]
         duration = 0
-        for step in toolpath:
+        for step in steps:
             if step.action in MOVES_LIST:
                 if last_pos:
-                    new_distance = pdist(step.position, last_pos)
+                    if step.action == MOVE_ARC:
+                        new_distance = ToolpathSteps.get_arc_length(last_pos, step)
+                    else:
+                        new_distance = pdist(step.position, last_pos)
                     new_duration = new_distance / max(feedrate, min_feedrate)
                     if (new_duration > 0) and (duration + new_duration > limit):
                         partial = (limit - duration) / new_duration
-                        destination = padd(last_pos, pmul(psub(step.position, last_pos), partial))
                         duration = limit
+                        if step.action == MOVE_ARC:
+                            # a partial arc ends on its circumference
+                            destination = ToolpathSteps.get_arc_position(last_pos, step, partial)
+                            step = ToolpathSteps.MoveArc(destination, step.center, step.clockwise)
+                        else:
+                            destination = padd(last_pos,
+                                               pmul(psub(step.position, last_pos), partial))
+                            step = ToolpathSteps.get_step_class_by_action(step.action)(
+                                destination)
                     else:
-                        destination = step.position
                         duration += new_duration
-                else:
-                    destination = step.position
-                new_path.append(ToolpathSteps.get_step_class_by_action(step.action)(destination))
+                yield step
                 last_pos = step.position
             if (step.action == MACHINE_SETTING) and (step.key == "feedrate"):
                 feedrate = step.value
             if duration >= limit:
                 break
-        return new_path
+
+
+class SimplifyPath(BaseFilter):
+    """ Remove straight cutting moves deviating less than the tolerance from a simplified path
+    (Douglas-Peucker algorithm).
+
+    Only sequences of straight cutting moves are simplified. The first and the last position of
+    every sequence are kept. Long sequences are processed in chunks of SEQUENCE_CHUNK_SIZE
+    positions (the border between two chunks is kept).
+    """
+
+    PARAMS = ("tolerance", )
+    WEIGHT = 55
+
+    def filter_steps(self, steps):
+        tolerance = self.settings["tolerance"]
+        if tolerance <= 0:
+            return iter(steps)
+        get_moves = lambda positions, with_start: _get_simplified_moves(positions, with_start,
+                                                                        tolerance)
+        return _replace_straight_sequences(steps, get_moves)
+
+
+def _replace_straight_sequences(steps, get_moves):
+    """ process sequences of straight cutting moves (a generator)
+
+    Sequences longer than SEQUENCE_CHUNK_SIZE are split into chunks. The last position of a
+    chunk is the start of the next one.
+    @value get_moves: function returning the replacement moves for a list of positions and a
+        flag indicating whether the first position is the start of the sequence (not a move)
+    """
+    # the positions of the current sequence of straight moves (possibly preceded by the
+    # position before the sequence)
+    positions = []
+    with_start = False
+    last_position = None
+    for step in steps:
+        if step.action == MOVE_STRAIGHT:
+            if not positions and (last_position is not None):
+                positions.append(last_position)
+                with_start = True
+            positions.append(step.position)
+            last_position = step.position
+            if len(positions) >= SEQUENCE_CHUNK_SIZE:
+                for move in get_moves(positions, with_start):
+                    yield move
+                positions = [last_position]
+                with_start = True
+            continue
+        if positions:
+            for move in get_moves(positions, with_start):
+                yield move
+            positions = []
+            with_start = False
+        if step.action in MOVES_LIST:
+            last_position = step.position
+        elif step.action == MOVE_SAFETY:
+            last_position = None
+        yield step
+    if positions:
+        for move in get_moves(positions, with_start):
+            yield move
+
+
+def _get_simplified_moves(positions, with_start, tolerance):
+    """ return the straight moves of a simplified sequence of positions
+
+    @value with_start: the first position is the start of the sequence (not a move)
+    """
+    if numpy_enabled:
+        indices = _get_simplified_indices(numpy.array(positions, dtype=float), tolerance)
+    else:
+        indices = _get_simplified_indices_slow(positions, tolerance)
+    if with_start:
+        indices = indices[1:]
+    return [ToolpathSteps.MoveStraight(positions[index]) for index in indices]
+
+
+def _get_simplified_indices(points, tolerance):
+    """ return the indices of the points kept by the Douglas-Peucker algorithm
+
+    All pending intervals are split at once (one iteration per level of the recursion).
+    The distance is measured to the segment (not the line) - thus reversals are kept.
+    @value points: an array of points (shape: count x 3)
+    """
+    count = len(points)
+    keep = numpy.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    # the points within intervals which were not checked, yet
+    pending = numpy.arange(1, count - 1)
+    tolerance_sq = tolerance ** 2
+    while len(pending) > 0:
+        kept = numpy.flatnonzero(keep)
+        interval_indices = numpy.searchsorted(kept, pending) - 1
+        starts = points[kept[interval_indices]]
+        chords = points[kept[interval_indices + 1]] - starts
+        offsets = points[pending] - starts
+        lengths_sq = numpy.einsum("ij,ij->i", chords, chords)
+        # zero length chords: the offset is the distance
+        fractions = (numpy.einsum("ij,ij->i", offsets, chords)
+                     / numpy.maximum(lengths_sq, _MIN_LENGTH_SQ))
+        offsets -= numpy.clip(fractions, 0, 1)[:, None] * chords
+        distances_sq = numpy.einsum("ij,ij->i", offsets, offsets)
+        # the farthest point of every interval
+        is_group_start = numpy.ones(len(pending), dtype=bool)
+        is_group_start[1:] = interval_indices[1:] != interval_indices[:-1]
+        group_starts = numpy.flatnonzero(is_group_start)
+        maxima = numpy.maximum.reduceat(distances_sq, group_starts)
+        group_ids = numpy.cumsum(is_group_start) - 1
+        candidates = numpy.flatnonzero((distances_sq == maxima[group_ids])
+                                       & (distances_sq > tolerance_sq))
+        if len(candidates) == 0:
+            break
+        # only the first farthest point of an interval is used
+        candidate_groups = group_ids[candidates]
+        first_candidates = numpy.ones(len(candidates), dtype=bool)
+        first_candidates[1:] = candidate_groups[1:] != candidate_groups[:-1]
+        candidates = candidates[first_candidates]
+        keep[pending[candidates]] = True
+        # intervals within the tolerance are finished
+        is_split = numpy.zeros(len(group_starts), dtype=bool)
+        is_split[group_ids[candidates]] = True
+        remaining = is_split[group_ids]
+        remaining[candidates] = False
+        pending = pending[remaining]
+    return numpy.flatnonzero(keep).tolist()
+
+
+def _get_simplified_indices_slow(points, tolerance):
+    """ the Douglas-Peucker algorithm without numpy (see "_get_simplified_indices") """
+    keep = [0, len(points) - 1]
+    intervals = [(0, len(points) - 1)]
+    tolerance_sq = tolerance ** 2
+    while intervals:
+        first, last = intervals.pop()
+        start = points[first]
+        chord = psub(points[last], start)
+        length_sq = pdot(chord, chord)
+        farthest = None
+        max_distance_sq = tolerance_sq
+        for index in range(first + 1, last):
+            offset = psub(points[index], start)
+            if length_sq > 0:
+                fraction = min(max(pdot(offset, chord) / length_sq, 0), 1)
+                offset = psub(offset, pmul(chord, fraction))
+            distance_sq = pdot(offset, offset)
+            if distance_sq > max_distance_sq:
+                farthest, max_distance_sq = index, distance_sq
+        if farthest is not None:
+            keep.append(farthest)
+            intervals.append((first, farthest))
+            intervals.append((farthest, last))
+    return sorted(set(keep))
+
+
+class ArcFit(BaseFilter):
+    """ Replace sequences of straight cutting moves along a circle with arcs (G2/G3).
+
+    An arc replaces at least MIN_ARC_SEGMENTS moves. All positions of the replaced moves are
+    within the tolerance of the arc - and the arc deviates less than the tolerance from these
+    moves. Only arcs within the XY plane (with a constant height) are fitted.
+    Sequences within the tolerance of a straight line are left alone (see "SimplifyPath").
+    The filter must be applied after all filters changing positions (e.g. "TransformPosition").
+    """
+
+    PARAMS = ("tolerance", )
+    WEIGHT = 92
+
+    def filter_steps(self, steps):
+        tolerance = self.settings["tolerance"]
+        if tolerance <= 0:
+            return iter(steps)
+        get_moves = lambda positions, with_start: _get_fitted_moves(positions, with_start,
+                                                                    tolerance)
+        return _replace_straight_sequences(steps, get_moves)
+
+
+def _get_fitted_moves(positions, with_start, tolerance):
+    """ return the straight moves and arcs replacing a sequence of straight moves
+
+    The longest arc starting at a position is determined by an exponential search followed by
+    a binary search (the number of checked arcs grows logarithmically with their length).
+    @value with_start: the first position is the start of the sequence (not a move)
+    """
+    if numpy_enabled and (len(positions) > ARC_ARRAY_SIZE):
+        points = numpy.array(positions, dtype=float)
+    else:
+        points = None
+
+    def get_arc(first, last):
+        if (points is not None) and (last - first >= ARC_ARRAY_SIZE):
+            return _get_arc(points[first:last + 1], tolerance)
+        else:
+            return _get_arc(positions[first:last + 1], tolerance)
+
+    moves = []
+    if not with_start:
+        # the first move starts at an unknown position
+        moves.append(ToolpathSteps.MoveStraight(positions[0]))
+    start = 0
+    last = len(positions) - 1
+    while start < last:
+        end = start + MIN_ARC_SEGMENTS
+        arc = get_arc(start, end) if end <= last else None
+        if arc is None:
+            start += 1
+            moves.append(ToolpathSteps.MoveStraight(positions[start]))
+            continue
+        good = end
+        bad = None
+        width = MIN_ARC_SEGMENTS
+        while good < last:
+            end = min(good + width, last)
+            candidate = get_arc(start, end)
+            if candidate is None:
+                bad = end
+                break
+            good, arc = end, candidate
+            width *= 2
+        while (bad is not None) and (bad - good > 1):
+            end = (good + bad) // 2
+            candidate = get_arc(start, end)
+            if candidate is None:
+                bad = end
+            else:
+                good, arc = end, candidate
+        center, clockwise = arc
+        radius = math.hypot(positions[start][0] - center[0], positions[start][1] - center[1])
+        chord = pdist(positions[start], positions[good])
+        # straight lines are not turned into arcs with a huge radius: the sagitta of the arc
+        # (not more than a half circle) is its maximum distance from the line between its ends
+        if radius - math.sqrt(max(radius ** 2 - chord ** 2 / 4, 0)) <= tolerance:
+            for position in positions[start + 1:good + 1]:
+                moves.append(ToolpathSteps.MoveStraight(position))
+        else:
+            moves.append(ToolpathSteps.MoveArc(positions[good], center, clockwise))
+        start = good
+    return moves
+
+
+def _get_arc(points, tolerance):
+    """ return the center and the direction (clockwise) of an arc along the points
+
+    The circle is defined by the first, the middle and the last point.
+    @value points: a list of positions or an array (checked with numpy)
+    @returns: None if the points are not within the tolerance of an arc
+    """
+    is_array = numpy_enabled and isinstance(points, numpy.ndarray)
+    if is_array:
+        first, middle, last = points[[0, len(points) // 2, -1]].tolist()
+    else:
+        first, middle, last = points[0], points[len(points) // 2], points[-1]
+    # the circle relative to the first point
+    middle_x = middle[0] - first[0]
+    middle_y = middle[1] - first[1]
+    last_x = last[0] - first[0]
+    last_y = last[1] - first[1]
+    cross = middle_x * last_y - middle_y * last_x
+    if cross == 0:
+        return None
+    middle_sq = middle_x ** 2 + middle_y ** 2
+    last_sq = last_x ** 2 + last_y ** 2
+    center = (first[0] + (last_y * middle_sq - middle_y * last_sq) / (2 * cross),
+              first[1] + (middle_x * last_sq - last_x * middle_sq) / (2 * cross), first[2])
+    radius = math.hypot(first[0] - center[0], first[1] - center[1])
+    direction = 1 if cross > 0 else -1
+    if is_array:
+        is_valid = _check_arc(points, center, radius, direction, tolerance)
+    else:
+        is_valid = _check_arc_slow(points, center, radius, direction, tolerance)
+    if is_valid:
+        return center, direction < 0
+    else:
+        return None
+
+
+def _check_arc(points, center, radius, direction, tolerance):
+    """ check if the segments between the points are within the tolerance of an arc
+
+    The points must share the height of the center. Every segment must turn into the direction
+    of the arc (1: counter-clockwise, -1: clockwise) and the total angle of the arc is limited
+    by MAX_ARC_SWEEP.
+    @value points: an array of points (shape: count x 3)
+    """
+    if numpy.abs(points[:, 2] - center[2]).max() > epsilon:
+        return False
+    offsets_x = points[:, 0] - center[0]
+    offsets_y = points[:, 1] - center[1]
+    errors = numpy.abs(numpy.hypot(offsets_x, offsets_y) - radius)
+    if errors.max() > tolerance:
+        return False
+    # the sagitta of every chord (and the distance of its ends from the arc) must be within
+    # the tolerance
+    chords_sq = numpy.diff(offsets_x) ** 2 + numpy.diff(offsets_y) ** 2
+    sagittas = radius - numpy.sqrt(numpy.maximum(radius ** 2 - chords_sq / 4, 0))
+    if (sagittas + numpy.maximum(errors[:-1], errors[1:]) > tolerance).any():
+        return False
+    turns = direction * (offsets_x[:-1] * offsets_y[1:] - offsets_y[:-1] * offsets_x[1:])
+    if turns.min() <= 0:
+        return False
+    dots = offsets_x[:-1] * offsets_x[1:] + offsets_y[:-1] * offsets_y[1:]
+    # a half circle is not rejected due to rounding errors
+    return numpy.arctan2(turns, dots).sum() <= MAX_ARC_SWEEP + epsilon
+
+
+def _check_arc_slow(points, center, radius, direction, tolerance):
+    """ check an arc without numpy (see "_check_arc") """
+    sweep = 0
+    previous_x = points[0][0] - center[0]
+    previous_y = points[0][1] - center[1]
+    previous_error = abs(math.hypot(previous_x, previous_y) - radius)
+    for point in points[1:]:
+        if abs(point[2] - center[2]) > epsilon:
+            return False
+        current_x = point[0] - center[0]
+        current_y = point[1] - center[1]
+        error = abs(math.hypot(current_x, current_y) - radius)
+        if error > tolerance:
+            return False
+        chord_sq = (current_x - previous_x) ** 2 + (current_y - previous_y) ** 2
+        sagitta = radius - math.sqrt(max(radius ** 2 - chord_sq / 4, 0))
+        if sagitta + max(error, previous_error) > tolerance:
+            return False
+        turn = direction * (previous_x * current_y - previous_y * current_x)
+        if turn <= 0:
+            return False
+        sweep += math.atan2(turn, previous_x * current_x + previous_y * current_y)
+        if sweep > MAX_ARC_SWEEP + epsilon:
+            return False
+        previous_x, previous_y, previous_error = current_x, current_y, error
+    return True
+
+
+class OptimizeOrder(BaseFilter):
+    """ Reorder the segments of a toolpath (separated by safety moves) for shorter rapid moves.
+
+    The whole toolpath is collected before any step is emitted. See "get_optimized_steps" for
+    the rules of reordering.
+    """
+
+    PARAMS = ("allow_reverse", )
+    # the safety moves are still required for detecting segments
+    WEIGHT = 75
+
+    def filter_steps(self, steps):
+        result, report = get_optimized_steps(steps, self.settings["allow_reverse"])
+        _log.info("Reordered %d toolpath segments: moves between them shortened from %g to %g",
+                  report.segments, report.original_distance, report.optimized_distance)
+        for step in result:
+            yield step
 
 
 class MovesOnly(BaseFilter):
@@ -411,16 +815,16 @@ class MovesOnly(BaseFilter):
 
     WEIGHT = 95
 
-    def filter_toolpath(self, toolpath):
-        return [step for step in toolpath if step.action in MOVES_LIST]
+    def filter_steps(self, steps):
+        return (step for step in steps if step.action in MOVES_LIST)
 
 
 class Copy(BaseFilter):
 
     WEIGHT = 100
 
-    def filter_toolpath(self, toolpath):
-        return list(toolpath)
+    def filter_steps(self, steps):
+        return iter(steps)
 
 
 def _get_num_of_significant_digits(number):
@@ -458,7 +862,7 @@ class StepWidth(BaseFilter):
     NUM_OF_AXES = 3
     WEIGHT = 60
 
-    def filter_toolpath(self, toolpath):
+    def filter_steps(self, steps):
         minimum_steps = []
         conv = []
         for key in "xyz":
@@ -466,8 +870,7 @@ class StepWidth(BaseFilter):
         for step_width in minimum_steps:
             conv.append(_get_num_converter(step_width)[0])
         last_pos = None
-        path = []
-        for step in toolpath:
+        for step in steps:
             if step.action in MOVES_LIST:
                 if last_pos:
                     diff = [(abs(a_conv(a_last_pos) - a_conv(a_pos)))
@@ -480,11 +883,9 @@ class StepWidth(BaseFilter):
                 # floats instead of decimals at this point. The output
                 # conversion needs to move into the GCode output hook.
 #               destination = [a_conv(a_pos) for a_conv, a_pos in zip(conv, step.position)]
-                destination = step.position
-                path.append(ToolpathSteps.get_step_class_by_action(step.action)(destination))
+                yield step
                 last_pos = step.position
             else:
                 # forget "last_pos" - we don't know what happened in between
                 last_pos = None
-                path.append(step)
-        return path
+                yield step
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import collections
+import json
+
+from pycam.Geometry import epsilon
+from pycam.Toolpath import CORNER_STYLE_EXACT_PATH, CORNER_STYLE_EXACT_STOP, \
+        CORNER_STYLE_OPTIMIZE_SPEED, CORNER_STYLE_OPTIMIZE_TOLERANCE, MACHINE_SETTING, MOVE_ARC, \
+        MOVE_SAFETY, MOVE_STRAIGHT_RAPID
+from pycam.Toolpath.Steps import StepArray, iter_linearized_moves
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+# per axis (x, y, z): units per minute (like feedrates)
+DEFAULT_MAX_VELOCITY = (3000, 3000, 1000)
+# per axis (x, y, z): units per second squared (like the LinuxCNC "MAX_ACCELERATION" setting)
+DEFAULT_MAX_ACCELERATION = (500, 500, 200)
+# maximum distance between a corner and the path of the tool while passing it
+DEFAULT_JUNCTION_DEVIATION = 0.01
+# the machine comes to a halt for these settings
+STOP_SETTINGS = ("select_tool", "spindle_enabled", "delay")
+# arcs are replaced by straight moves within this distance
+ARC_TOLERANCE = 0.001
+
+
+def get_machine_limits(settings):
+    """ return the maximum velocity and the maximum acceleration of the machine axes
+
+    The limits are taken from the settings of a toolpath processor ("max_velocity_x", ...,
+    "max_acceleration_z"). They are given in the units of the project. The result is None if the
+    settings are incomplete (e.g. for a processor without machine limits).
+    """
+    try:
+        return (tuple(settings["max_velocity_%s" % axis] for axis in "xyz"),
+                tuple(settings["max_acceleration_%s" % axis] for axis in "xyz"))
+    except KeyError:
+        return None
+
+
+CycleTime = collections.namedtuple(
+    "CycleTime", ("duration", "feed_duration", "rapid_duration", "dwell_duration", "distance",
+                  "feed_distance", "rapid_distance"))
+
+
+class MachineKinematics(object):
+    """ estimate the cycle time of a toolpath based on the limits of a machine
+
+    Every move accelerates and decelerates with the maximum acceleration allowed for its
+    direction (trapezoidal velocity profile). Feed moves are limited by the current feedrate
+    and by the maximum velocity of the involved axes. Rapid moves are limited only by the axes.
+    The velocity at the junction of two moves depends on the corner style (see the machine
+    setting "corner_style" emitted by the "PathMode" filter):
+        - exact stop: the machine stops after every move
+        - exact path: the junction velocity is limited by the junction deviation of the
+          machine (similar to the trajectory planner of LinuxCNC or Grbl)
+        - optimize tolerance: the motion tolerance (if larger) is used as the junction deviation
+        - optimize speed: corners are passed without slowing down (except for reversals)
+
+    Subclasses may override "get_segment_limits" and "get_junction_limits" in order to model
+    other machines. All calculations are vectorized (numpy is required).
+    """
+
+    def __init__(self, max_velocity=DEFAULT_MAX_VELOCITY,
+                 max_acceleration=DEFAULT_MAX_ACCELERATION,
+                 junction_deviation=DEFAULT_JUNCTION_DEVIATION, corner_style=None):
+        """
+        @value max_velocity: maximum velocity of every axis (units per minute)
+        @value max_acceleration: maximum acceleration of every axis (units per second squared)
+        @value junction_deviation: the cornering tolerance of the machine
+        @value corner_style: the default corner style (path mode, motion tolerance, naive
+            tolerance) to be used until the toolpath sets one
+        """
+        if (len(max_velocity) != 3) or (min(max_velocity) <= 0):
+            raise ValueError("Invalid maximum velocity (three positive values are required): %s"
+                             % str(max_velocity))
+        if (len(max_acceleration) != 3) or (min(max_acceleration) <= 0):
+            raise ValueError("Invalid maximum acceleration (three positive values are required): "
+                             "%s" % str(max_acceleration))
+        if junction_deviation < 0:
+            raise ValueError("Invalid junction deviation: %s" % str(junction_deviation))
+        self.max_velocity = numpy.array(max_velocity, dtype=float)
+        # all calculations are based on minutes
+        self.max_acceleration = numpy.array(max_acceleration, dtype=float) * 3600
+        self.junction_deviation = junction_deviation
+        if corner_style is None:
+            corner_style = (CORNER_STYLE_EXACT_PATH, 0, 0)
+        self.corner_style = corner_style
+
+    def get_segment_limits(self, directions, feedrates, rapid):
+        """ return the maximum velocity and acceleration of every move
+
+        @value directions: unit vectors of the moves
+        @value feedrates: the feedrate (or infinity for rapid moves) of every move
+        @value rapid: boolean mask of rapid moves
+        """
+        with numpy.errstate(divide="ignore"):
+            inverse = 1 / numpy.abs(directions)
+        velocities = numpy.minimum(feedrates, (self.max_velocity * inverse).min(axis=1))
+        accelerations = (self.max_acceleration * inverse).min(axis=1)
+        return velocities, accelerations
+
+    def get_junction_limits(self, directions, accelerations, corner_styles):
+        """ return the maximum squared velocity at the junctions between consecutive moves
+
+        @value corner_styles: array of path modes and array of motion tolerances (one item for
+            every junction)
+        """
+        path_modes, tolerances = corner_styles
+        cosines = (directions[:-1] * directions[1:]).sum(axis=1)
+        # the sine of half of the angle between the incoming and the reversed outgoing direction
+        sines = numpy.sqrt(numpy.clip((1 + cosines) / 2, 0, 1))
+        deviations = numpy.where(path_modes == CORNER_STYLE_OPTIMIZE_TOLERANCE,
+                                 numpy.maximum(tolerances, self.junction_deviation),
+                                 self.junction_deviation)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            limits = (numpy.minimum(accelerations[:-1], accelerations[1:]) * deviations
+                      * sines / (1 - sines))
+        # straight junctions: no limit
+        limits[sines >= 1 - epsilon] = numpy.inf
+        limits[sines <= epsilon] = 0
+        optimize_speed = path_modes == CORNER_STYLE_OPTIMIZE_SPEED
+        limits[optimize_speed] = numpy.where(sines[optimize_speed] > epsilon, numpy.inf, 0)
+        limits[path_modes == CORNER_STYLE_EXACT_STOP] = 0
+        return limits
+
+    def get_cycle_time(self, moves, min_feedrate=1):
+        """ calculate the cycle time of a toolpath
+
+        Arcs are replaced by a sequence of short straight moves. Thus the velocity along an arc
+        is limited by the junctions between these moves (like the centripetal acceleration).
+        @value moves: the toolpath steps (a StepArray or any sequence of steps)
+        @returns: a CycleTime tuple (durations in minutes)
+        """
+        if not isinstance(moves, StepArray):
+            moves = StepArray(moves)
+        if (moves.actions == MOVE_ARC).any():
+            moves = StepArray(iter_linearized_moves(moves, ARC_TOLERANCE))
+        actions = moves.actions
+        setting_indices = numpy.flatnonzero(actions == MACHINE_SETTING).tolist()
+        settings = [moves[index] for index in setting_indices]
+        # delays are given in seconds
+        dwell = sum(step.value for step in settings if step.key == "delay") / 60.0
+        move_indices = moves.get_move_indices()
+        positions = moves.positions[move_indices]
+        deltas = numpy.diff(positions, axis=0)
+        lengths = numpy.sqrt((deltas ** 2).sum(axis=1))
+        # moves without a length are irrelevant
+        keep = lengths > epsilon
+        if not keep.any():
+            return CycleTime(dwell, 0, 0, dwell, 0, 0, 0)
+        lengths = lengths[keep]
+        directions = deltas[keep] / lengths[:, None]
+        ends = move_indices[1:][keep]
+        rapid = actions[ends] == MOVE_STRAIGHT_RAPID
+        values, selection = moves.get_setting_values("feedrate", ends, default=min_feedrate)
+        feedrates = numpy.maximum(numpy.array(values, dtype=float)[selection], min_feedrate)
+        feedrates[rapid] = numpy.inf
+        velocities, accelerations = self.get_segment_limits(directions, feedrates, rapid)
+        # limits of the squared velocity at all junctions (including the start and the end)
+        values, selection = moves.get_setting_values("corner_style", ends[1:],
+                                                     default=self.corner_style)
+        path_modes = numpy.array([value[0] for value in values])[selection]
+        tolerances = numpy.array([value[1] or 0 for value in values], dtype=float)[selection]
+        junctions = numpy.minimum(
+            self.get_junction_limits(directions, accelerations, (path_modes, tolerances)),
+            numpy.minimum(velocities[:-1], velocities[1:]) ** 2)
+        # the machine stops for safety moves and for some settings (e.g. a tool change)
+        stop_indices = numpy.array(sorted(
+            numpy.flatnonzero(actions == MOVE_SAFETY).tolist()
+            + [index for index, step in zip(setting_indices, settings)
+               if step.key in STOP_SETTINGS]), dtype=numpy.int64)
+        interrupted = (numpy.searchsorted(stop_indices, ends[1:])
+                       > numpy.searchsorted(stop_indices, ends[:-1]))
+        junctions[interrupted] = 0
+        limits = numpy.concatenate(([0], junctions, [0]))
+        squared_entry, squared_exit = _plan_velocities(limits, 2 * accelerations * lengths)
+        durations = _get_trapezoid_durations(lengths, velocities, accelerations, squared_entry,
+                                             squared_exit)
+        feed_duration = float(durations[~rapid].sum())
+        rapid_duration = float(durations[rapid].sum())
+        feed_distance = float(lengths[~rapid].sum())
+        rapid_distance = float(lengths[rapid].sum())
+        return CycleTime(feed_duration + rapid_duration + dwell, feed_duration, rapid_duration,
+                         dwell, feed_distance + rapid_distance, feed_distance, rapid_distance)
+
+    def get_report(self, toolpaths):
+        """ calculate the cycle times of multiple toolpaths (e.g. one for every task)
+
+        @value toolpaths: sequence of tuples (name, toolpath)
+        """
+        return CycleTimeReport([(name, self.get_cycle_time(toolpath.get_basic_moves()))
+                                for name, toolpath in toolpaths])
+
+
+def _plan_velocities(limits, reach):
+    """ calculate the highest possible squared velocities at the start and end of every move
+
+    The squared velocity changes by at most "reach" (2 * acceleration * length) along a move.
+    The forward pass ("w[k+1] = min(limits[k+1], w[k] + reach[k])") is a running minimum of
+    "limits - cumsum(reach)" (the same applies to the backward pass).
+    """
+    def get_forward(limits, reach):
+        offsets = numpy.concatenate(([0], numpy.cumsum(reach)))
+        return numpy.minimum.accumulate(limits - offsets) + offsets
+
+    squared = numpy.minimum(get_forward(limits, reach),
+                            get_forward(limits[::-1], reach[::-1])[::-1])
+    squared = numpy.maximum(squared, 0)
+    return squared[:-1], squared[1:]
+
+
+def _get_trapezoid_durations(lengths, velocities, accelerations, squared_entry, squared_exit):
+    """ calculate the duration of moves with a trapezoidal (or triangular) velocity profile """
+    # the highest velocity reachable within the move
+    peak = numpy.sqrt(accelerations * lengths + (squared_entry + squared_exit) / 2)
+    cruise = numpy.minimum(velocities, peak)
+    entry = numpy.sqrt(squared_entry)
+    exit_ = numpy.sqrt(squared_exit)
+    ramp_distance = (2 * cruise ** 2 - squared_entry - squared_exit) / (2 * accelerations)
+    cruise_distance = numpy.maximum(lengths - ramp_distance, 0)
+    return ((2 * cruise - entry - exit_) / accelerations) + cruise_distance / cruise
+
+
+class CycleTimeReport(object):
+    """ the cycle times of multiple toolpaths """
+
+    def __init__(self, entries):
+        self.entries = entries
+        if entries:
+            self.total = CycleTime(*[sum(values) for values in zip(*[cycle_time for name,
+                                                                     cycle_time in entries])])
+        else:
+            self.total = CycleTime(0, 0, 0, 0, 0, 0, 0)
+
+    def get_dict(self):
+        return {"toolpaths": [dict(cycle_time._asdict(), name=name)
+                              for name, cycle_time in self.entries],
+                "total": dict(self.total._asdict())}
+
+    def write_summary(self, stream):
+        json.dump(self.get_dict(), stream, indent=2, sort_keys=True)
+        stream.write("\n")
@@ -0,0 +1,517 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import collections
+import math
+
+from pycam.Geometry import epsilon
+from pycam.Toolpath import MOVE_SAFETY, MOVE_STRAIGHT, MOVES_LIST
+from pycam.Toolpath.Steps import MoveSafety, MoveStraight
+
+
+# number of nearby segments considered as new neighbours of a segment during improvements
+NEIGHBOUR_COUNT = 8
+# maximum number of consecutive segments moved at once ("Or-opt")
+MAX_CHAIN_LENGTH = 3
+
+
+class OrderReport(collections.namedtuple(
+        "OrderReport", ("segments", "original_distance", "optimized_distance"))):
+    """ the number of segments and the horizontal distance of the moves between them (before
+    and after the optimization)
+    """
+
+    __slots__ = ()
+
+    @property
+    def saved_distance(self):
+        return self.original_distance - self.optimized_distance
+
+
+class _Segment(object):
+    """ a sequence of moves between two safety moves """
+
+    __slots__ = ("steps", "start", "end", "height", "bounds", "is_reversible")
+
+    def __init__(self, steps):
+        self.steps = steps
+        positions = [step.position for step in steps]
+        self.start = positions[0][:2]
+        self.end = positions[-1][:2]
+        self.height = min(position[2] for position in positions)
+        self.bounds = (min(position[0] for position in positions),
+                       min(position[1] for position in positions),
+                       max(position[0] for position in positions),
+                       max(position[1] for position in positions))
+        # the direction of arcs is not changed and rapid moves (e.g. an approach above the
+        # material) would turn into moves at the cutting height
+        self.is_reversible = all(step.action == MOVE_STRAIGHT for step in steps)
+
+    def get_steps(self, reverse=False):
+        if reverse:
+            return [MoveStraight(step.position) for step in reversed(self.steps)]
+        else:
+            return self.steps
+
+
+def _get_distance(point1, point2):
+    return math.hypot(point1[0] - point2[0], point1[1] - point2[1])
+
+
+def _get_cost(point1, point2):
+    """ the distance between two points (zero if one of them is unknown) """
+    if (point1 is None) or (point2 is None):
+        return 0
+    return _get_distance(point1, point2)
+
+
+def get_transfer_distance(steps):
+    """ return the horizontal distance between moves separated by other steps (e.g. safety
+    moves)
+    """
+    distance = 0
+    last_position = None
+    interrupted = False
+    for step in steps:
+        if step.action in MOVES_LIST:
+            if interrupted and (last_position is not None):
+                distance += _get_distance(last_position, step.position)
+            last_position = step.position
+            interrupted = False
+        else:
+            interrupted = True
+    return distance
+
+
+def get_optimized_steps(steps, allow_reverse=False):
+    """ reorder the cutting segments of a toolpath for shorter moves between them
+
+    Segments are sequences of moves separated by safety moves. They are reordered only within
+    a sequence of segments at the same height (a layer) - thus layers are processed in their
+    original order. Machine settings and comments are never moved: they also limit the
+    reordering. Closed segments (e.g. contours) are processed after all segments within their
+    bounding box (inner before outer).
+    The distance between segments is measured horizontally: the vertical moves to and from the
+    safety height do not depend on the order.
+
+    @value allow_reverse: segments may be processed in reverse (e.g. for engraving)
+    @returns: the list of steps and an OrderReport
+    """
+    steps = list(steps)
+    items = []
+    moves = []
+    for step in steps:
+        if step.action in MOVES_LIST:
+            moves.append(step)
+            continue
+        if moves:
+            items.append(_Segment(moves))
+            moves = []
+        items.append(step)
+    if moves:
+        items.append(_Segment(moves))
+    result = []
+    position = None
+    group = []
+    for item in items + [None]:
+        if isinstance(item, _Segment) or ((item is not None) and (item.action == MOVE_SAFETY)):
+            group.append(item)
+            continue
+        if group:
+            position = _add_group(result, group, position, allow_reverse)
+            group = []
+        if item is not None:
+            result.append(item)
+    segment_count = len([item for item in items if isinstance(item, _Segment)])
+    return result, OrderReport(segment_count, get_transfer_distance(steps),
+                               get_transfer_distance(result))
+
+
+def _add_group(result, group, position, allow_reverse):
+    """ add a sequence of segments and safety moves to the result (in an optimized order)
+
+    @value position: the position before the group (or None)
+    @returns: the position after the group
+    """
+    segments = [item for item in group if isinstance(item, _Segment)]
+    if not isinstance(group[0], _Segment):
+        result.append(MoveSafety())
+    layer_start = 0
+    for index in range(1, len(segments) + 1):
+        if (index < len(segments)) \
+                and (abs(segments[index].height - segments[layer_start].height) <= epsilon):
+            continue
+        layer = segments[layer_start:index]
+        optimizer = _LayerOrder(layer, position, allow_reverse)
+        optimizer.optimize()
+        for order_index, (segment_index, reverse) in enumerate(optimizer.order):
+            # the segments are separated by safety moves
+            if (layer_start > 0) or (order_index > 0):
+                result.append(MoveSafety())
+            result.extend(layer[segment_index].get_steps(reverse))
+        position = optimizer.get_end(len(layer) - 1)
+        layer_start = index
+    if segments and not isinstance(group[-1], _Segment):
+        result.append(MoveSafety())
+    return position
+
+
+class _PointGrid(object):
+    """ a uniform grid of items located at points (for nearest neighbour queries) """
+
+    # below this number of items a query checks all of them
+    MIN_GRID_ITEMS = 32
+
+    def __init__(self, points):
+        """ the size of the cells is based on the given points (the expected distribution) """
+        self.low = (min(point[0] for point in points), min(point[1] for point in points))
+        width = max(point[0] for point in points) - self.low[0]
+        height = max(point[1] for point in points) - self.low[1]
+        # about one point per cell
+        self.cell_size = max(width, height, epsilon) / math.sqrt(len(points))
+        self.limits = self._get_cell((self.low[0] + width, self.low[1] + height))
+        self.cells = {}
+        self.points = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def _get_cell(self, point):
+        return (int(math.floor((point[0] - self.low[0]) / self.cell_size)),
+                int(math.floor((point[1] - self.low[1]) / self.cell_size)))
+
+    def add(self, item, point):
+        self.points[item] = point
+        self.cells.setdefault(self._get_cell(point), set()).add(item)
+
+    def remove(self, item):
+        self.cells[self._get_cell(self.points.pop(item))].remove(item)
+
+    def get_nearest(self, point, count=1):
+        """ return the items closest to the point (sorted by distance) """
+        cell_x, cell_y = self._get_cell(point)
+        limit_x, limit_y = self.limits
+        if (len(self.points) <= max(count, self.MIN_GRID_ITEMS)) \
+                or not ((0 <= cell_x <= limit_x) and (0 <= cell_y <= limit_y)):
+            found = [(_get_distance(point, other), item) for item, other in self.points.items()]
+        else:
+            found = []
+            for radius in range(max(cell_x, limit_x - cell_x, cell_y, limit_y - cell_y) + 1):
+                for cell in _get_ring_cells(cell_x, cell_y, radius):
+                    for item in self.cells.get(cell, ()):
+                        found.append((_get_distance(point, self.points[item]), item))
+                # all remaining items are farther away than "radius" cells
+                if len(found) >= count:
+                    found.sort()
+                    if found[count - 1][0] <= radius * self.cell_size:
+                        break
+        found.sort()
+        return [item for distance, item in found[:count]]
+
+    def get_items_within(self, bounds):
+        """ return the items within the given rectangle (minx, miny, maxx, maxy) """
+        low_x, low_y = self._get_cell(bounds[:2])
+        high_x, high_y = self._get_cell(bounds[2:])
+        result = []
+        for cell_x in range(max(low_x, 0), min(high_x, self.limits[0]) + 1):
+            for cell_y in range(max(low_y, 0), min(high_y, self.limits[1]) + 1):
+                for item in self.cells.get((cell_x, cell_y), ()):
+                    point = self.points[item]
+                    if (bounds[0] <= point[0] <= bounds[2]) \
+                            and (bounds[1] <= point[1] <= bounds[3]):
+                        result.append(item)
+        return result
+
+
+def _get_ring_cells(center_x, center_y, radius):
+    """ return the cells with the given distance (in cells) from the center """
+    if radius == 0:
+        return [(center_x, center_y)]
+    cells = []
+    for offset in range(-radius, radius + 1):
+        cells.append((center_x + offset, center_y - radius))
+        cells.append((center_x + offset, center_y + radius))
+    for offset in range(1 - radius, radius):
+        cells.append((center_x - radius, center_y + offset))
+        cells.append((center_x + radius, center_y + offset))
+    return cells
+
+
+def _get_nesting(segments):
+    """ determine the segments to be processed before every closed segment (inner segments)
+
+    A segment is inside of a closed segment if its bounding box is inside of the bounding box
+    of the closed segment.
+    @returns: the list of predecessors and the list of successors of every segment
+    """
+    predecessors = [[] for segment in segments]
+    successors = [[] for segment in segments]
+    centers = [((segment.bounds[0] + segment.bounds[2]) / 2.0,
+                (segment.bounds[1] + segment.bounds[3]) / 2.0) for segment in segments]
+    grid = _PointGrid(centers)
+    for index, center in enumerate(centers):
+        grid.add(index, center)
+    for outer_index, outer in enumerate(segments):
+        if _get_distance(outer.start, outer.end) > epsilon:
+            continue
+        for inner_index in grid.get_items_within(outer.bounds):
+            inner = segments[inner_index]
+            if (outer.bounds[0] + epsilon < inner.bounds[0]) \
+                    and (outer.bounds[1] + epsilon < inner.bounds[1]) \
+                    and (inner.bounds[2] < outer.bounds[2] - epsilon) \
+                    and (inner.bounds[3] < outer.bounds[3] - epsilon):
+                predecessors[outer_index].append(inner_index)
+                successors[inner_index].append(outer_index)
+    return predecessors, successors
+
+
+class _LayerOrder(object):
+    """ the order of the segments of a layer (a list of segment indices and reverse flags)
+
+    The initial order is the original one. "optimize" replaces it with a greedy nearest
+    neighbour tour (respecting the nesting of segments) and improves it by moving chains of
+    segments ("Or-opt") and by reversing sequences of reversible segments ("2-opt"). The
+    original order is kept if the result is not shorter (unless it violates the nesting).
+    """
+
+    def __init__(self, segments, position, allow_reverse):
+        """
+        @value position: the position before the first segment (or None)
+        """
+        self.segments = segments
+        self.position = position
+        self.reversible = [allow_reverse and segment.is_reversible for segment in segments]
+        self.order = [(index, False) for index in range(len(segments))]
+        self.positions = list(range(len(segments)))
+
+    def get_start(self, order_index):
+        """ return the start of the segment at the given position within the order (None
+        after the last segment)
+        """
+        if order_index >= len(self.order):
+            return None
+        index, reverse = self.order[order_index]
+        return self.segments[index].end if reverse else self.segments[index].start
+
+    def get_end(self, order_index):
+        """ return the end of the segment at the given position within the order (the position
+        before the layer for -1)
+        """
+        if order_index < 0:
+            return self.position
+        index, reverse = self.order[order_index]
+        return self.segments[index].start if reverse else self.segments[index].end
+
+    def _get_link(self, order_index):
+        """ the distance between a segment and its successor """
+        return _get_cost(self.get_end(order_index), self.get_start(order_index + 1))
+
+    def get_distance(self):
+        return sum(self._get_link(order_index) for order_index in range(-1, len(self.order)))
+
+    def optimize(self):
+        if len(self.segments) < 2:
+            return
+        original_order = list(self.order)
+        original_distance = self.get_distance()
+        self.predecessors, self.successors = _get_nesting(self.segments)
+        self._set_order(self._get_greedy_order(), 0, len(self.segments))
+        self._improve()
+        # the original order (if valid) is kept unless the new one is shorter
+        if (self.get_distance() >= original_distance - epsilon) \
+                and all(predecessor < index for index, predecessors in enumerate(self.predecessors)
+                        for predecessor in predecessors):
+            self._set_order(original_order, 0, len(self.segments))
+
+    def _set_order(self, order, start, stop):
+        """ replace a part of the order """
+        self.order[start:stop] = order
+        for order_index in range(start, stop):
+            self.positions[self.order[order_index][0]] = order_index
+
+    def _get_greedy_order(self):
+        segments = self.segments
+        grid = _PointGrid([segment.start for segment in segments]
+                          + [segment.end for segment in segments])
+        waiting = [len(predecessors) for predecessors in self.predecessors]
+
+        def add_segment(index):
+            grid.add((index, False), segments[index].start)
+            if self.reversible[index]:
+                grid.add((index, True), segments[index].end)
+
+        for index in range(len(segments)):
+            if waiting[index] == 0:
+                add_segment(index)
+        order = []
+        position = self.position
+        while len(order) < len(segments):
+            if position is None:
+                # keep the first available segment
+                index, reverse = min(grid.points)
+            else:
+                index, reverse = grid.get_nearest(position)[0]
+            grid.remove((index, False))
+            if self.reversible[index]:
+                grid.remove((index, True))
+            order.append((index, reverse))
+            position = segments[index].start if reverse else segments[index].end
+            for successor in self.successors[index]:
+                waiting[successor] -= 1
+                if waiting[successor] == 0:
+                    add_segment(successor)
+        return order
+
+    def _get_neighbours(self):
+        """ return the nearby segments of every segment (based on their ends) """
+        segments = self.segments
+        grid = _PointGrid([segment.start for segment in segments]
+                          + [segment.end for segment in segments])
+        for index, segment in enumerate(segments):
+            grid.add((index, False), segment.start)
+            grid.add((index, True), segment.end)
+        neighbours = []
+        for index, segment in enumerate(segments):
+            nearby = set()
+            for point in (segment.start, segment.end):
+                for other, reverse in grid.get_nearest(point, NEIGHBOUR_COUNT + 1):
+                    nearby.add(other)
+            nearby.discard(index)
+            neighbours.append(sorted(nearby))
+        return neighbours
+
+    def _improve(self):
+        """ apply improvements until none is left (each one shortens the tour) """
+        self.neighbours = self._get_neighbours()
+        pending = collections.deque(range(len(self.segments)))
+        queued = set(pending)
+        while pending:
+            index = pending.popleft()
+            queued.discard(index)
+            changed = self._move_chain(index) or self._reverse_sequence(index)
+            for other in changed or ():
+                if other not in queued:
+                    queued.add(other)
+                    pending.append(other)
+
+    def _get_neighbour_segments(self, order_indices):
+        """ return the segments at the given positions of the order (if they exist) """
+        return [self.order[order_index][0] for order_index in order_indices
+                if 0 <= order_index < len(self.order)]
+
+    def _move_chain(self, index):
+        """ move a chain of segments (starting at the given segment) to a better location near
+        one of its neighbours (optionally reversed)
+
+        @returns: the segments with changed links (or None)
+        """
+        start = self.positions[index]
+        for length in range(1, MAX_CHAIN_LENGTH + 1):
+            stop = start + length
+            if stop > len(self.order):
+                break
+            chain = self.order[start:stop]
+            removal_gain = (self._get_link(start - 1) + self._get_link(stop - 1)
+                            - _get_cost(self.get_end(start - 1), self.get_start(stop)))
+            if removal_gain <= epsilon:
+                continue
+            variants = [chain]
+            if all(self.reversible[chain_index] for chain_index, reverse in chain) \
+                    and not self._has_internal_precedence(chain):
+                variants.append([(chain_index, not reverse)
+                                 for chain_index, reverse in reversed(chain)])
+            gaps = set()
+            for neighbour in self.neighbours[index]:
+                gaps.add(self.positions[neighbour])
+                gaps.add(self.positions[neighbour] + 1)
+            for gap in sorted(gaps):
+                if start <= gap <= stop:
+                    continue
+                before = self.get_end(gap - 1)
+                after = self.get_start(gap)
+                for variant in variants:
+                    first, last = variant[0], variant[-1]
+                    first_point = self.segments[first[0]].end if first[1] \
+                        else self.segments[first[0]].start
+                    last_point = self.segments[last[0]].start if last[1] \
+                        else self.segments[last[0]].end
+                    insertion_cost = (_get_cost(before, first_point)
+                                      + _get_cost(last_point, after) - _get_cost(before, after))
+                    if (insertion_cost < removal_gain - epsilon) \
+                            and self._can_move_chain(chain, start, stop, gap):
+                        changed = self._get_neighbour_segments(
+                            (start - 1, stop, gap - 1, gap)) + [item[0] for item in chain]
+                        if gap < start:
+                            self._set_order(variant + self.order[gap:start], gap, stop)
+                        else:
+                            self._set_order(self.order[stop:gap] + variant, start, gap)
+                        return changed
+        return None
+
+    def _has_internal_precedence(self, chain):
+        indices = set(index for index, reverse in chain)
+        return any(indices.intersection(self.predecessors[index]) for index in indices)
+
+    def _can_move_chain(self, chain, start, stop, gap):
+        """ check if the nesting allows to move the chain order[start:stop] to the gap """
+        for index, reverse in chain:
+            if gap < start:
+                # the chain is moved before the segments at gap..start-1
+                if any(gap <= self.positions[other] < start
+                       for other in self.predecessors[index]):
+                    return False
+            elif any(stop <= self.positions[other] < gap for other in self.successors[index]):
+                return False
+        return True
+
+    def _reverse_sequence(self, index):
+        """ reverse the sequence of segments between the given segment and one of its neighbours
+        (if all of them are reversible)
+
+        @returns: the segments with changed links (or None)
+        """
+        position = self.positions[index]
+        for neighbour in self.neighbours[index]:
+            other_position = self.positions[neighbour]
+            for first in (position - 1, position):
+                for second in (other_position - 1, other_position):
+                    # reverse the segments after "low" up to "high"
+                    low, high = min(first, second), max(first, second)
+                    if low == high:
+                        continue
+                    old_cost = self._get_link(low) + self._get_link(high)
+                    # the reversed segments start at their current ends (and vice versa)
+                    new_cost = (_get_cost(self.get_end(low), self.get_end(high))
+                                + _get_cost(self.get_start(low + 1), self.get_start(high + 1)))
+                    if (new_cost < old_cost - epsilon) and self._can_reverse(low + 1, high + 1):
+                        changed = self._get_neighbour_segments((low, low + 1, high, high + 1))
+                        window = self.order[low + 1:high + 1]
+                        window = [(item_index, not reverse)
+                                  for item_index, reverse in reversed(window)]
+                        self._set_order(window, low + 1, high + 1)
+                        return changed
+        return None
+
+    def _can_reverse(self, start, stop):
+        """ check if the segments order[start:stop] can be processed in reverse order """
+        window = self.order[start:stop]
+        if not all(self.reversible[index] for index, reverse in window):
+            return False
+        return not self._has_internal_precedence(window)
@@ -19,9 +19,21 @@ along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import collections
+import itertools
+import math
 
 from pycam.Toolpath import MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID, MOVE_ARC, MOVE_SAFETY, \
-        MACHINE_SETTING, COMMENT
+        MACHINE_SETTING, COMMENT, MOVES_LIST
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+# number of steps converted at once
+CHUNK_SIZE = 2 ** 16
 
 
 def get_step_class_by_action(action):
@@ -36,13 +48,322 @@ def get_step_class_by_action(action):
 
 
 MoveClass = collections.namedtuple("Move", ("action", "position"))
+# "center" is the center of an arc within the XY plane (starting at the previous position)
+ArcClass = collections.namedtuple("Arc", ("action", "position", "center", "clockwise"))
 MachineSettingClass = collections.namedtuple("MachineSetting", ("action", "key", "value"))
 CommentClass = collections.namedtuple("Comment", ("action", "text"))
 
 
 MoveStraight = lambda position: MoveClass(MOVE_STRAIGHT, position)
 MoveStraightRapid = lambda position: MoveClass(MOVE_STRAIGHT_RAPID, position)
-MoveArc = lambda position: MoveClass(MOVE_ARC, position)
+MoveArc = lambda position, center, clockwise: ArcClass(MOVE_ARC, position, center, clockwise)
 MoveSafety = lambda: MoveClass(MOVE_SAFETY, None)
 MachineSetting = lambda key, value: MachineSettingClass(MACHINE_SETTING, key, value)
 Comment = lambda text: CommentClass(COMMENT, text)
+
+
+_NO_POSITION = (float("nan"), ) * 3
+_STRAIGHT_MOVES = (MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID)
+
+
+def _get_arc_sweep(start, arc):
+    """ return the radius, the start angle and the (signed) sweep angle of an arc """
+    end = arc.position
+    center_x, center_y = arc.center[0], arc.center[1]
+    radius = math.hypot(start[0] - center_x, start[1] - center_y)
+    start_angle = math.atan2(start[1] - center_y, start[0] - center_x)
+    sweep = math.atan2(end[1] - center_y, end[0] - center_x) - start_angle
+    if arc.clockwise:
+        sweep = -((-sweep) % (2 * math.pi))
+    else:
+        sweep %= 2 * math.pi
+    if sweep == 0:
+        # the same start and end: a full circle
+        sweep = -2 * math.pi if arc.clockwise else 2 * math.pi
+    return radius, start_angle, sweep
+
+
+def get_arc_length(start, arc):
+    """ return the length of an arc (including a change of its height) """
+    radius, start_angle, sweep = _get_arc_sweep(start, arc)
+    return math.hypot(radius * sweep, arc.position[2] - start[2])
+
+
+def get_arc_position(start, arc, fraction):
+    """ return the position after the given fraction (0..1) of the length of an arc """
+    if fraction >= 1:
+        return tuple(arc.position)
+    radius, start_angle, sweep = _get_arc_sweep(start, arc)
+    angle = start_angle + sweep * fraction
+    return (arc.center[0] + radius * math.cos(angle), arc.center[1] + radius * math.sin(angle),
+            start[2] + (arc.position[2] - start[2]) * fraction)
+
+
+def get_arc_points(start, arc, tolerance):
+    """ approximate an arc with straight lines
+
+    A change of the height along the arc (helix) is distributed evenly.
+    @value start: the position before the arc
+    @value arc: an arc step (see "MoveArc")
+    @value tolerance: maximum distance between the lines and the arc
+    @returns: the list of points along the arc (excluding the start)
+    """
+    radius, start_angle, sweep = _get_arc_sweep(start, arc)
+    if radius > tolerance > 0:
+        max_angle = 2 * math.acos(1 - tolerance / radius)
+        count = max(1, int(math.ceil(abs(sweep) / max_angle)))
+    else:
+        count = 1
+    points = [get_arc_position(start, arc, index / float(count)) for index in range(1, count)]
+    points.append(tuple(arc.position))
+    return points
+
+
+def iter_linearized_moves(moves, tolerance):
+    """ replace arcs with straight moves (see "get_arc_points") """
+    last_position = None
+    for step in moves:
+        if (step.action == MOVE_ARC) and (last_position is not None):
+            for point in get_arc_points(last_position, step, tolerance):
+                yield MoveStraight(point)
+        else:
+            yield step
+        if step.action in MOVES_LIST:
+            last_position = step.position
+        elif step.action == MOVE_SAFETY:
+            last_position = None
+
+
+class StepArray(object):
+    """ a compact read-only sequence of toolpath steps (requires numpy)
+
+    Every step is stored as an action code and a position (NaN for steps without a position).
+    Machine settings, comments and arcs (with their center) are kept in a separate table (by
+    index). Items are returned as the usual step tuples (see above).
+    """
+
+    def __init__(self, steps=()):
+        if isinstance(steps, StepArray):
+            # the arrays are read-only - they can be shared
+            self._set_arrays(steps._actions, steps._positions, steps._extras)
+            return
+        action_chunks = []
+        position_chunks = []
+        extras = {}
+        actions = []
+        positions = []
+        for index, step in enumerate(steps):
+            action = step.action
+            actions.append(action)
+            if action in MOVES_LIST:
+                positions.append(step.position)
+                if action == MOVE_ARC:
+                    extras[index] = step
+            else:
+                positions.append(_NO_POSITION)
+                if action != MOVE_SAFETY:
+                    extras[index] = step
+            if len(actions) >= CHUNK_SIZE:
+                action_chunks.append(numpy.array(actions, dtype=numpy.uint8))
+                position_chunks.append(numpy.array(positions, dtype=numpy.float64))
+                actions = []
+                positions = []
+        action_chunks.append(numpy.array(actions, dtype=numpy.uint8))
+        position_chunks.append(numpy.array(positions, dtype=numpy.float64).reshape(-1, 3))
+        self._set_arrays(numpy.concatenate(action_chunks), numpy.concatenate(position_chunks),
+                         extras)
+
+    @classmethod
+    def from_arrays(cls, actions, positions, extras=None):
+        """ create a sequence of steps from an array of action codes and an array of positions
+
+        @value extras: dictionary of steps (machine settings, comments and arcs) by index
+        """
+        result = cls.__new__(cls)
+        result._set_arrays(numpy.array(actions, dtype=numpy.uint8),
+                           numpy.array(positions, dtype=numpy.float64).reshape(-1, 3),
+                           dict(extras or {}))
+        return result
+
+    def _set_arrays(self, actions, positions, extras):
+        if len(actions) != len(positions):
+            raise ValueError("The number of actions (%d) and positions (%d) differs"
+                             % (len(actions), len(positions)))
+        actions.flags.writeable = False
+        positions.flags.writeable = False
+        self._actions = actions
+        self._positions = positions
+        self._extras = extras
+
+    @property
+    def actions(self):
+        return self._actions
+
+    @property
+    def positions(self):
+        return self._positions
+
+    def __len__(self):
+        return len(self._actions)
+
+    def __repr__(self):
+        return "StepArray(%d steps)" % len(self)
+
+    def _get_step(self, index, action, position):
+        if action in _STRAIGHT_MOVES:
+            return MoveClass(action, tuple(position))
+        elif action == MOVE_SAFETY:
+            return MoveSafety()
+        else:
+            return self._extras[index]
+
+    def __iter__(self):
+        safety = MoveSafety()
+        for start in range(0, len(self), CHUNK_SIZE):
+            actions = self._actions[start:start + CHUNK_SIZE].tolist()
+            positions = self._positions[start:start + CHUNK_SIZE].tolist()
+            for index, action, position in zip(itertools.count(start), actions, positions):
+                if action in _STRAIGHT_MOVES:
+                    yield MoveClass(action, tuple(position))
+                elif action == MOVE_SAFETY:
+                    yield safety
+                else:
+                    yield self._extras[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            selection = numpy.arange(len(self))[index]
+            actions = self._actions[selection]
+            extras = {}
+            if self._extras:
+                for new_index in numpy.flatnonzero((actions == MACHINE_SETTING)
+                                                   | (actions == COMMENT)
+                                                   | (actions == MOVE_ARC)).tolist():
+                    extras[new_index] = self._extras[int(selection[new_index])]
+            return self.from_arrays(actions, self._positions[selection], extras)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("step index out of range: %d" % index)
+        return self._get_step(index, int(self._actions[index]),
+                              self._positions[index].tolist())
+
+    def get_move_indices(self):
+        return numpy.flatnonzero((self._actions == MOVE_STRAIGHT)
+                                 | (self._actions == MOVE_STRAIGHT_RAPID)
+                                 | (self._actions == MOVE_ARC))
+
+    def get_bounds(self):
+        """ return the lower and upper corner of all move positions (or None without moves) """
+        if len(self) == 0:
+            return None
+        # steps without a position (NaN) are ignored (columns are faster than rows)
+        columns = [self._positions[:, axis] for axis in range(3)]
+        low = tuple(float(numpy.fmin.reduce(column)) for column in columns)
+        if math.isnan(low[0]):
+            return None
+        return low, tuple(float(numpy.fmax.reduce(column)) for column in columns)
+
+    def get_setting_values(self, key, indices, default=None):
+        """ determine the value of a machine setting at the given step indices
+
+        The most recent setting before each index is used.
+        @returns: the list of values (starting with the default) and an array of positions
+            within this list (one for each index)
+        """
+        setting_indices = sorted(index for index, step in self._extras.items()
+                                 if (step.action == MACHINE_SETTING) and (step.key == key))
+        values = [default] + [self._extras[index].value for index in setting_indices]
+        selection = numpy.searchsorted(numpy.array(setting_indices, dtype=numpy.int64), indices)
+        return values, selection
+
+    def get_distance_and_time(self, min_feedrate=1):
+        """ return the length of all moves and the time required (based on the feedrate) """
+        timeline = self.get_timeline(min_feedrate=min_feedrate)
+        return timeline.distance, timeline.duration
+
+    def get_timeline(self, min_feedrate=1, rapid_feedrate=None):
+        return StepTimeline(self, min_feedrate=min_feedrate, rapid_feedrate=rapid_feedrate)
+
+
+class StepTimeline(object):
+    """ the cumulative distance and machine time at every move of a StepArray
+
+    The time of every move is based on the most recent feedrate setting. Rapid moves use the
+    same feedrate unless a separate "rapid_feedrate" is given. Arcs are measured along their
+    circumference (starting at the previous move).
+    The time is measured in minutes (distance divided by feedrate).
+    """
+
+    def __init__(self, steps, min_feedrate=1, rapid_feedrate=None):
+        self.steps = steps
+        self.move_indices = steps.get_move_indices()
+        self.positions = steps.positions[self.move_indices]
+        count = len(self.move_indices)
+        self.distances = numpy.zeros(count)
+        self.times = numpy.zeros(count)
+        # arc steps by their index within the moves
+        self._arcs = {index: steps[int(self.move_indices[index])] for index in
+                      numpy.flatnonzero(steps.actions[self.move_indices] == MOVE_ARC).tolist()}
+        if count < 2:
+            self.distance = self.duration = 0
+            return
+        distances = numpy.sqrt((numpy.diff(self.positions, axis=0) ** 2).sum(axis=1))
+        for index, arc in self._arcs.items():
+            # the first move has no start
+            if index > 0:
+                distances[index - 1] = get_arc_length(self.positions[index - 1].tolist(), arc)
+        values, selection = steps.get_setting_values("feedrate", self.move_indices[1:],
+                                                     default=min_feedrate)
+        feedrates = numpy.array(values, dtype=float)[selection]
+        if rapid_feedrate is not None:
+            rapid_mask = steps.actions[self.move_indices[1:]] == MOVE_STRAIGHT_RAPID
+            feedrates[rapid_mask] = rapid_feedrate
+        numpy.cumsum(distances, out=self.distances[1:])
+        numpy.cumsum(distances / numpy.maximum(feedrates, min_feedrate), out=self.times[1:])
+        self.distance = float(self.distances[-1])
+        self.duration = float(self.times[-1])
+
+    def _locate(self, time):
+        """ return the index of the first move finished at the given time (or later) and the
+        position at this time
+        """
+        count = len(self.times)
+        index = int(numpy.searchsorted(self.times, time))
+        if index == 0:
+            return 0, self.positions[0]
+        if index >= count:
+            return count, self.positions[-1]
+        start_time = self.times[index - 1]
+        fraction = (time - start_time) / (self.times[index] - start_time)
+        start = self.positions[index - 1]
+        if index in self._arcs:
+            return index, numpy.array(get_arc_position(start.tolist(), self._arcs[index],
+                                                       fraction))
+        return index, start + (self.positions[index] - start) * fraction
+
+    def get_position(self, time):
+        """ return the position of the tool at the given time (or None without moves) """
+        if len(self.times) == 0:
+            return None
+        return tuple(self._locate(time)[1].tolist())
+
+    def get_steps(self, time):
+        """ return the moves processed until the given time (as a StepArray)
+
+        The last move is shortened if it is not finished at the given time (along the arc for
+        arcs). Steps other than moves are omitted (similar to the "TimeLimit" filter).
+        """
+        if len(self.times) == 0:
+            return StepArray()
+        index, position = self._locate(time)
+        actions = self.steps.actions[self.move_indices]
+        if index >= len(self.times):
+            return StepArray.from_arrays(actions, self.positions, self._arcs)
+        arcs = {arc_index: arc for arc_index, arc in self._arcs.items() if arc_index < index}
+        if index in self._arcs:
+            arc = self._arcs[index]
+            arcs[index] = MoveArc(tuple(position.tolist()), arc.center, arc.clockwise)
+        return StepArray.from_arrays(
+            numpy.append(actions[:index], actions[index]),
+            numpy.concatenate((self.positions[:index], position.reshape(1, 3))), arcs)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import collections
+import math
+
+from pycam.Toolpath import MOVE_ARC, MOVE_STRAIGHT_RAPID
+from pycam.Toolpath.Steps import StepArray, iter_linearized_moves
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+# segments shorter than this length are drawn without a direction cone
+MIN_CONE_SEGMENT_LENGTH = 0.5
+# number of points along the base of a direction cone
+CONE_PRECISION = 12
+# length of a direction cone relative to its segment
+CONE_SIZE = 0.1
+# location of a direction cone along its segment (0: start, 1: end)
+CONE_POSITION = 0.5
+# maximum distance between an arc and its lines (unless a larger tolerance is given)
+ARC_TOLERANCE = 0.01
+
+
+# vertex and index arrays for drawing toolpath moves
+# "vertices" is an array of float32 triples. Every item of "runs" describes a sequence of moves
+# with the same type: indices of a line strip, indices of the direction cone triangles and a
+# flag for rapid moves.
+VertexBuffers = collections.namedtuple("VertexBuffers", ("vertices", "runs"))
+
+
+def get_vertex_buffers(moves, tolerance=None, show_directions=True):
+    """ convert toolpath steps into vertex and index arrays (see "VertexBuffers")
+
+    @value moves: the toolpath steps (a StepArray or any sequence of steps)
+    @value tolerance: merge consecutive vertices within the same cell of a grid with this size
+        (level of detail for views from far away)
+    @value show_directions: add a cone to every segment (if it is long enough)
+    """
+    if not isinstance(moves, StepArray):
+        moves = StepArray(moves)
+    if (moves.actions == MOVE_ARC).any():
+        moves = StepArray(iter_linearized_moves(moves, max(tolerance or 0, ARC_TOLERANCE)))
+    move_indices = moves.get_move_indices()
+    points = moves.positions[move_indices]
+    rapid = moves.actions[move_indices] == MOVE_STRAIGHT_RAPID
+    if tolerance:
+        points, rapid = _decimate(points, rapid, tolerance)
+    empty = numpy.zeros(0, dtype=numpy.int32)
+    if len(points) < 2:
+        return VertexBuffers(numpy.zeros((0, 3), dtype=numpy.float32), [])
+    # every segment is drawn with the type of its target
+    segment_rapid = rapid[1:]
+    run_starts = numpy.concatenate(
+        ([0], numpy.flatnonzero(segment_rapid[1:] != segment_rapid[:-1]) + 1))
+    run_ends = numpy.append(run_starts[1:], len(segment_rapid))
+    # vertices are stored with single precision
+    points = points.astype(numpy.float32)
+    vertices, point_indices = _get_unique_rows(points)
+    if show_directions:
+        min_length = MIN_CONE_SEGMENT_LENGTH
+        if tolerance:
+            min_length = max(min_length, 20 * tolerance)
+        cone_segments, cone_vertices = _get_direction_cones(points, min_length)
+        # every cone consists of a top and the points of its base
+        cone_indices = _get_cone_triangle_indices(len(cone_segments)) + len(vertices)
+        vertices = numpy.concatenate((vertices, cone_vertices))
+        cone_runs = numpy.searchsorted(cone_segments, run_starts)
+        cone_runs = numpy.append(cone_runs, len(cone_segments))
+    runs = []
+    for index, (start, end) in enumerate(zip(run_starts.tolist(), run_ends.tolist())):
+        indices = point_indices[start:end + 1]
+        # skip consecutive duplicates
+        indices = indices[numpy.append(True, indices[1:] != indices[:-1])]
+        if show_directions:
+            triangles = cone_indices[cone_runs[index]:cone_runs[index + 1]].reshape(-1)
+        else:
+            triangles = empty
+        runs.append((indices, triangles, bool(segment_rapid[start])))
+    return VertexBuffers(vertices, runs)
+
+
+def _get_unique_rows(points):
+    """ return the unique rows of a float32 array and the index of each row within them
+
+    Sorting the bit patterns of the coordinates is much faster than "numpy.unique(axis=0)".
+    """
+    # adding zero turns "-0.0" into "0.0"
+    bits = (points + numpy.float32(0)).view(numpy.uint32).astype(numpy.uint64)
+    high = (bits[:, 0] << numpy.uint64(32)) | bits[:, 1]
+    low = bits[:, 2]
+    order = numpy.lexsort((low, high))
+    high = high[order]
+    low = low[order]
+    is_new = numpy.ones(len(order), dtype=bool)
+    is_new[1:] = (high[1:] != high[:-1]) | (low[1:] != low[:-1])
+    inverse = numpy.empty(len(order), dtype=numpy.int32)
+    inverse[order] = numpy.cumsum(is_new) - 1
+    return points[order[is_new]], inverse
+
+
+def _decimate(points, rapid, tolerance):
+    """ remove consecutive points within the same grid cell
+
+    The first point of every cell, the last point and points changing the type of move are kept.
+    """
+    cells = numpy.floor(points / tolerance)
+    changed = (cells[1:] != cells[:-1]).any(axis=1) | (rapid[1:] != rapid[:-1])
+    keep = numpy.append(True, changed)
+    keep[-1] = True
+    return points[keep], rapid[keep]
+
+
+def _get_direction_cones(points, min_length):
+    """ calculate the vertices of cones indicating the direction of segments
+
+    @returns: the indices of the segments with a cone and an array of vertices (for every cone:
+        the top and the points of the base)
+    """
+    deltas = points[1:] - points[:-1]
+    lengths = numpy.sqrt((deltas ** 2).sum(axis=1))
+    segments = numpy.flatnonzero(lengths >= min_length)
+    starts = points[segments]
+    deltas = deltas[segments]
+    directions = deltas / lengths[segments, None]
+    radii = lengths[segments] * CONE_SIZE / 3.0
+    bottoms = starts + deltas * (CONE_POSITION - CONE_SIZE / 2)
+    tops = starts + deltas * (CONE_POSITION + CONE_SIZE / 2)
+    # two axes perpendicular to every direction (the first one is horizontal)
+    first = numpy.zeros_like(directions)
+    first[:, 0] = -directions[:, 1]
+    first[:, 1] = directions[:, 0]
+    horizontal_lengths = numpy.sqrt((first ** 2).sum(axis=1))
+    vertical = horizontal_lengths == 0
+    first[vertical] = (1, 0, 0)
+    horizontal_lengths[vertical] = 1
+    first /= horizontal_lengths[:, None]
+    second = numpy.cross(directions, first)
+    angles = numpy.arange(CONE_PRECISION) * (2 * math.pi / CONE_PRECISION)
+    bases = (bottoms[:, None, :]
+             + radii[:, None, None] * (numpy.cos(angles)[None, :, None] * first[:, None, :]
+                                       + numpy.sin(angles)[None, :, None] * second[:, None, :]))
+    vertices = numpy.concatenate((tops[:, None, :], bases), axis=1)
+    return segments, vertices.reshape(-1, 3)
+
+
+def _get_cone_triangle_indices(count):
+    """ return the vertex indices of the triangles of cones (shape: count x triangles x 3) """
+    base = numpy.arange(CONE_PRECISION)
+    pattern = numpy.column_stack((numpy.zeros(CONE_PRECISION, dtype=int), 1 + base,
+                                  1 + (base + 1) % CONE_PRECISION))
+    offsets = numpy.arange(count) * (CONE_PRECISION + 1)
+    return (offsets[:, None, None] + pattern[None, :, :]).astype(numpy.int32)
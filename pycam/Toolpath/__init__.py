@@ -18,19 +18,16 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from itertools import groupby
-import math
 import os
 
 try:
-    import numpy
     from OpenGL.arrays import vbo
 except ImportError:
-    # both modules are required for visualization, only
+    # this module is required for visualization, only
     pass
 
 from pycam.Geometry import epsilon, number, Box3D, Point3D
-from pycam.Geometry.PointUtils import padd, pcross, pdist, pmul, pnorm, pnormalized, psub
+from pycam.Geometry.PointUtils import pdist, pdot, pmul, pnormsq, psub
 import pycam.Utils.log
 
 
@@ -41,35 +38,54 @@ MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID, MOVE_ARC, MOVE_SAFETY, MACHINE_SETTING, COMM
 MOVES_LIST = (MOVE_STRAIGHT, MOVE_STRAIGHT_RAPID, MOVE_ARC)
 CORNER_STYLE_EXACT_PATH, CORNER_STYLE_EXACT_STOP, CORNER_STYLE_OPTIMIZE_SPEED, \
     CORNER_STYLE_OPTIMIZE_TOLERANCE = range(4)
+SEGMENT_ORDER_KEEP, SEGMENT_ORDER_OPTIMIZE, SEGMENT_ORDER_OPTIMIZE_REVERSE = range(3)
 
 
-def _check_colinearity(p1, p2, p3):
-    v1 = pnormalized(psub(p2, p1))
-    v2 = pnormalized(psub(p3, p2))
-    # compare if the normalized distances between p1-p2 and p2-p3 are equal
-    return v1 == v2
+def _check_colinearity(p1, p2, p3, tolerance=epsilon):
+    """ check if p2 is within the given distance of the line segment between p1 and p3 """
+    chord = psub(p3, p1)
+    offset = psub(p2, p1)
+    length_sq = pnormsq(chord)
+    if length_sq > 0:
+        fraction = min(max(pdot(offset, chord) / length_sq, 0), 1)
+        offset = psub(offset, pmul(chord, fraction))
+    return pnormsq(offset) <= tolerance ** 2
 
 
-def simplify_toolpath(path):
+def simplify_toolpath(path, tolerance=epsilon):
     """ remove multiple points in a line from a toolpath
 
     If A, B, C and D are on a straight line, then B and C will be removed.
     This reduces memory consumption and avoids a severe slow-down of the machine
     when moving along very small steps.
+    Every point is compared with the line between the previously kept point and its
+    successor (linear time). Use the "SimplifyPath" filter for a toolpath with a larger
+    tolerance.
     The toolpath is simplified _in_place_.
     @value path: a single separate segment of a toolpath
     @type path: list of points
     """
-    index = 1
     # stay compatible with pycam.Geometry.Path objects
     if hasattr(path, "points"):
         path = path.points
-    while index < len(path) - 1:
-        if _check_colinearity(path[index-1], path[index], path[index+1]):
-            path.pop(index)
-            # don't increase the counter - otherwise we skip one point
-        else:
-            index += 1
+    if len(path) < 3:
+        return
+    result = [path[0]]
+    for index in range(1, len(path) - 1):
+        if not _check_colinearity(result[-1], path[index], path[index + 1], tolerance):
+            result.append(path[index])
+    result.append(path[-1])
+    path[:] = result
+
+
+def _get_step_sequence(steps):
+    """ store toolpath steps in a compact array (if numpy is available) or in a tuple """
+    # late import due to dependency cycle
+    import pycam.Toolpath.Steps
+    if pycam.Toolpath.Steps.numpy_enabled:
+        return pycam.Toolpath.Steps.StepArray(steps)
+    else:
+        return tuple(steps)
 
 
 class Toolpath(object):
@@ -89,9 +105,9 @@ class Toolpath(object):
         return self.__path
 
     def __set_path(self, new_path):
-        # use a read-only tuple instead of a list
+        # use a read-only sequence instead of a list
         # (otherwise we can't detect changes)
-        self.__path = tuple(new_path)
+        self.__path = _get_step_sequence(new_path)
         self.clear_cache()
 
     def __get_filters(self):
@@ -111,19 +127,28 @@ class Toolpath(object):
         return type(self)(toolpath_path=self.path, toolpath_filters=self.filters, tool=self.tool)
 
     def clear_cache(self):
-        self.opengl_safety_height = None
+        self._cache_opengl = None
         self._cache_basic_moves = None
         self._cache_visual_filters_string = None
         self._cache_visual_filters = None
         self._cache_machine_distance_and_time = None
+        self._cache_timeline = None
+        self._cache_cycle_time = None
         self._minx = None
         self._maxx = None
         self._miny = None
         self._maxy = None
         self._minz = None
         self._maxz = None
+        self._bounds = None
 
     def _get_limit_generic(self, idx, func):
+        if hasattr(self.path, "get_bounds"):
+            # all limits are calculated at once
+            if self._bounds is None:
+                self._bounds = self.path.get_bounds()
+            if self._bounds is not None:
+                return self._bounds[0 if func is min else 1][idx]
         values = [step.position[idx] for step in self.path if step.action in MOVES_LIST]
         return func(values)
 
@@ -173,151 +198,30 @@ class Toolpath(object):
         moves = self.get_basic_moves()
         if max_time is None:
             return moves
+        timeline = self.get_timeline()
+        if timeline is not None:
+            return timeline.get_steps(max_time)
         else:
             # late import due to dependency cycle
             import pycam.Toolpath.Filters
             return moves | pycam.Toolpath.Filters.TimeLimit(max_time)
 
-    def _rotate_point(self, rp, sp, v, angle):
-        vx = v[0]
-        vy = v[1]
-        vz = v[2]
-        x = ((sp[0] * (vy ** 2 + vz ** 2)
-              - vx * (sp[1] * vy
-                      + sp[2] * vz
-                      - vx * rp[0]
-                      - vy * rp[1]
-                      - vz * rp[2])) * (1 - math.cos(angle))
-             + rp[0] * math.cos(angle)
-             + (-sp[2] * vy + sp[1] * vz - vz * rp[1] + vy * rp[2]) * math.sin(angle))
-        y = ((sp[1] * (vx ** 2 + vz ** 2)
-              - vy * (sp[0] * vx
-                      + sp[2] * vz
-                      - vx * rp[0]
-                      - vy * rp[1]
-                      - vz * rp[2])) * (1 - math.cos(angle))
-             + rp[1] * math.cos(angle)
-             + (sp[2] * vx - sp[0] * vz + vz * rp[0] - vx * rp[2]) * math.sin(angle))
-        z = ((sp[2] * (vx ** 2 + vy ** 2)
-              - vz * (sp[0] * vx
-                      + sp[1] * vy
-                      - vx * rp[0]
-                      - vy * rp[1]
-                      - vz * rp[2])) * (1 - math.cos(angle))
-             + rp[2] * math.cos(angle)
-             + (-sp[1] * vx + sp[0] * vy - vy * rp[0] + vx * rp[1]) * math.sin(angle))
-        return (x, y, z)
-
-    def draw_direction_cone_mesh(self, p1, p2, position=0.5, precision=12, size=0.1):
-        distance = psub(p2, p1)
-        length = pnorm(distance)
-        direction = pnormalized(distance)
-        if direction is None or length < 0.5:
-            # zero-length line
-            return []
-        cone_length = length * size
-        cone_radius = cone_length / 3.0
-        bottom = padd(p1, pmul(psub(p2, p1), position - size / 2))
-        top = padd(p1, pmul(psub(p2, p1), position + size / 2))
-        # generate a a line perpendicular to this line, cross product is good at this
-        cross = pcross(direction, (0, 0, -1))
-        conepoints = []
-        if pnorm(cross) != 0:
-            # The line direction is not in line with the z axis.
-            conep1 = padd(bottom, pmul(cross, cone_radius))
-            conepoints = [self._rotate_point(conep1, bottom, direction, x)
-                          for x in numpy.linspace(0, 2 * math.pi, precision)]
-        else:
-            # Z axis
-            # just add cone radius to the x axis and rotate the point
-            conep1 = (bottom[0] + cone_radius, bottom[1], bottom[2])
-            conepoints = [self._rotate_point(conep1, p1, direction, x)
-                          for x in numpy.linspace(0, 2*math.pi, precision)]
-        triangles = [(top, conepoints[idx], conepoints[idx + 1])
-                     for idx in range(len(conepoints) - 1)]
-        return triangles
-
-    def get_moves_for_opengl(self, safety_height):
-        if self.opengl_safety_height != safety_height:
-            self.make_moves_for_opengl(safety_height)
-            self.make_vbo_for_moves()
-        return (self.opengl_coords, self.opengl_indices)
-
-    # separate vertex coordinates from line definitions and convert to indices
-    def make_vbo_for_moves(self):
-        index = 0
-        output = []
-        store_vertices = {}
-        vertices = []
-        for path in self.opengl_lines:
-            indices = []
-            triangles = []
-            triangle_indices = []
-            # compress the lines into a centeral array containing all the vertices
-            # generate a matching index for each line
-            for idx in range(len(path[0]) - 1):
-                point = path[0][idx]
-                if point not in store_vertices:
-                    store_vertices[point] = index
-                    vertices.insert(index, point)
-                    index += 1
-                indices.append(store_vertices[point])
-                point2 = path[0][idx + 1]
-                if point2 not in store_vertices:
-                    store_vertices[point2] = index
-                    vertices.insert(index, point2)
-                    index += 1
-                triangles.extend(self.draw_direction_cone_mesh(path[0][idx], path[0][idx + 1]))
-                for t in triangles:
-                    for p in t:
-                        if p not in store_vertices:
-                            store_vertices[p] = index
-                            vertices.insert(index, p)
-                            index += 1
-                        triangle_indices.append(store_vertices[p])
-            triangle_indices = numpy.array(triangle_indices, dtype=numpy.int32)
-            indices.append(store_vertices[path[0][-1]])
-            # this list comprehension removes consecutive duplicate points.
-            indices = numpy.array([x[0] for x in groupby(indices)], dtype=numpy.int32)
-            output.append((indices, triangle_indices, path[1]))
-        vertices = numpy.array(vertices, dtype=numpy.float32)
-        self.opengl_coords = vbo.VBO(vertices)
-        self.opengl_indices = output
-
-    def make_moves_for_opengl(self, safety_height):
-        # convert moves into lines for display with opengl
-        working_path = []
-        outpaths = []
-        for path in self.path:
-            if not path:
-                continue
-
-            if len(outpaths) != 0:
-                lastp = outpaths[-1][0][-1]
-                working_path.append((path[0][0], path[0][1], safety_height))
-                if ((abs(lastp[0] - path[0][0]) > epsilon)
-                        or (abs(lastp[1] - path[0][1]) > epsilon)):
-                    if ((abs(lastp[2] - path[0][2]) > epsilon)
-                            or (pdist(lastp, path[0]) > self._max_safe_distance + epsilon)):
-                        outpaths.append((tuple([x[0] for x in groupby(working_path)]), True))
-            else:
-                working_path.append((0, 0, 0))
-                working_path.append((path[0][0], path[0][1], safety_height))
-                outpaths.append((working_path, True))
+    def get_moves_for_opengl(self, filters=None, tolerance=None, show_directions=True):
+        """ return a vertex buffer object and the line strips and cone triangles (see
+        "pycam.Toolpath.VertexBuffers") of the basic moves
 
-            # add this move to last move if last move was not rapid
-            if not outpaths[-1][1]:
-                outpaths[-1] = (outpaths[-1][0] + tuple(path), False)
-            else:
-                # last move was rapid, so add last point of rapid to beginning of path
-                outpaths.append((tuple([x[0] for x in groupby((outpaths[-1][0][-1],)
-                                                              + tuple(path))]), False))
-            working_path = []
-            working_path.append(path[-1])
-            working_path.append((path[-1][0], path[-1][1], safety_height))
-        outpaths.append((tuple([x[0] for x in groupby(working_path)]), True))
-        self.opengl_safety_height = safety_height
-        self.opengl_lines = outpaths
+        @value tolerance: level of detail - vertices closer than this distance may be merged
+        """
+        # late import due to dependency cycle
+        import pycam.Toolpath.VertexBuffers
+        moves = self.get_basic_moves(filters=filters)
+        key = (tolerance, show_directions)
+        if (self._cache_opengl is None) or (self._cache_opengl[0] is not moves) \
+                or (self._cache_opengl[1] != key):
+            buffers = pycam.Toolpath.VertexBuffers.get_vertex_buffers(
+                moves, tolerance=tolerance, show_directions=show_directions)
+            self._cache_opengl = (moves, key, (vbo.VBO(buffers.vertices), buffers.runs))
+        return self._cache_opengl[2]
 
     def get_machine_setting(self, key, default=None):
         """ look for the first appearance of a machine setting (e.g. feedrate,
@@ -329,29 +233,81 @@ class Toolpath(object):
                 return step.value
         return default
 
-    def get_machine_time(self, safety_height=0.0):
+    def get_machine_time(self, safety_height=0.0, machine_limits=None):
         """ calculate an estimation of the time required for processing the
         toolpath with the machine
 
+        Without "machine_limits" the time is based on the distance and the feedrate of the moves
+        (like the timeline used for the simulation). Otherwise the acceleration of the machine is
+        taken into account, if numpy is available (see "get_cycle_time").
+        @value machine_limits: maximum velocity and maximum acceleration of the machine axes (see
+            "pycam.Toolpath.Kinematics.get_machine_limits")
         @rtype: float
         @returns: the machine time used for processing the toolpath in minutes
         """
+        if machine_limits is not None:
+            cycle_time = self.get_cycle_time(*machine_limits)
+            if cycle_time is not None:
+                return cycle_time.duration
         return self.get_machine_move_distance_and_time()[1]
 
+    def get_cycle_time(self, max_velocity, max_acceleration):
+        """ estimate the cycle time of the basic moves based on the limits of the machine (see
+        "MachineKinematics")
+
+        @value max_velocity: maximum velocity of every axis (units of the project per minute)
+        @value max_acceleration: maximum acceleration of every axis (units of the project per
+            second squared)
+        The result is a CycleTime tuple or None if numpy is missing.
+        """
+        # late import due to dependency cycle
+        import pycam.Toolpath.Kinematics
+        if not pycam.Toolpath.Kinematics.numpy_enabled:
+            return None
+        moves = self.get_basic_moves()
+        limits = (tuple(max_velocity), tuple(max_acceleration))
+        if (self._cache_cycle_time is None) or (self._cache_cycle_time[0] is not moves) \
+                or (self._cache_cycle_time[1] != limits):
+            kinematics = pycam.Toolpath.Kinematics.MachineKinematics(*limits)
+            self._cache_cycle_time = (moves, limits, kinematics.get_cycle_time(moves))
+        return self._cache_cycle_time[2]
+
+    def get_timeline(self):
+        """ return the cumulative distance and time of the basic moves (see "StepTimeline")
+
+        The result is None if the moves are not stored in a StepArray (numpy is missing).
+        """
+        moves = self.get_basic_moves()
+        if not hasattr(moves, "get_timeline"):
+            return None
+        if (self._cache_timeline is None) or (self._cache_timeline.steps is not moves):
+            self._cache_timeline = moves.get_timeline()
+        return self._cache_timeline
+
     def get_machine_move_distance_and_time(self):
         if self._cache_machine_distance_and_time is None:
+            timeline = self.get_timeline()
+            if timeline is not None:
+                self._cache_machine_distance_and_time = timeline.distance, timeline.duration
+                return self._cache_machine_distance_and_time
+            moves = self.get_basic_moves()
             min_feedrate = 1
             length = 0
             duration = 0
             feedrate = min_feedrate
             current_position = None
             # go through all points of the path
-            for step in self.get_basic_moves():
+            for step in moves:
                 if (step.action == MACHINE_SETTING) and (step.key == "feedrate"):
                     feedrate = step.value
                 elif step.action in MOVES_LIST:
                     if current_position is not None:
-                        distance = pdist(step.position, current_position)
+                        if step.action == MOVE_ARC:
+                            # late import due to dependency cycle
+                            import pycam.Toolpath.Steps
+                            distance = pycam.Toolpath.Steps.get_arc_length(current_position, step)
+                        else:
+                            distance = pdist(step.position, current_position)
                         duration += distance / max(feedrate, min_feedrate)
                         length += distance
                     current_position = step.position
@@ -367,8 +323,11 @@ class Toolpath(object):
             # late import due to dependency cycle
             import pycam.Toolpath.Filters
             all_filters = tuple(self.filters) + tuple(filters)
-            self._cache_basic_moves = pycam.Toolpath.Filters.get_filtered_moves(self.path,
-                                                                                all_filters)
+            if all_filters:
+                self._cache_basic_moves = _get_step_sequence(
+                    pycam.Toolpath.Filters.iter_filtered_moves(self.path, all_filters))
+            else:
+                self._cache_basic_moves = self.path
             self._cache_visual_filters_string = str(filters)
             self._cache_visual_filters = filters
             _log.debug("Applying toolpath filters: %s",
@@ -0,0 +1,511 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Benchmarks of the time-consuming operations of PyCAM (see "scripts/profile_pycam.py").
+# Every benchmark prepares its input (not measured) and returns a function to be measured. The
+# results of a run can be stored as JSON and compared with the results of a previous run
+# (baseline) in order to detect performance regressions.
+
+import collections
+import functools
+import io
+import json
+import math
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+
+from pycam import GenericError, VERSION
+from pycam.Cutters.CylindricalCutter import CylindricalCutter
+from pycam.Cutters.SphericalCutter import SphericalCutter
+import pycam.Exporters.GCode.LinuxCNC
+from pycam.Geometry import Box3D, Point3D
+from pycam.Geometry.Model import MeshModel
+from pycam.Geometry.TriangleBVH import TriangleBVH
+from pycam.Geometry.TriangleMesh import TriangleMesh
+import pycam.Importers.DXFImporter
+import pycam.Importers.STLImporter
+import pycam.PathGenerators.DropCutter
+import pycam.PathGenerators.EngraveCutter
+import pycam.PathGenerators.PushCutter
+import pycam.PathGenerators.SlabWaterline
+from pycam.Simulation.MaterialRemoval import MaterialRemovalSimulation
+from pycam.Toolpath import MOVE_SAFETY
+import pycam.Toolpath.Filters as Filters
+import pycam.Toolpath.MotionGrid as MotionGrid
+from pycam.Toolpath.Steps import MachineSetting
+from pycam.Utils.locations import PROJECT_BASE_DIR, get_data_file_location
+import pycam.Utils.log
+import pycam.Utils.threading
+
+try:
+    import numpy
+    numpy_enabled = True
+except ImportError:
+    numpy_enabled = False
+
+
+_log = pycam.Utils.log.get_logger()
+
+# version of the format of result files
+RESULT_FORMAT = 1
+# models shipped with PyCAM (name and file within the "samples" directory)
+SAMPLE_MODELS = (("textbox", "pycam-textbox.stl"), ("scene", "SampleScene.stl"))
+SAMPLE_CONTOURS = (("text", "pycam-text.dxf"), )
+# resolution of the synthetic wave meshes (number of grid cells along every side)
+SYNTHETIC_SIZES = collections.OrderedDict((("small", 16), ("medium", 48), ("large", 128)))
+DEFAULT_SIZES = ("small", )
+# number of measurements of every benchmark (the fastest one is used for comparisons)
+DEFAULT_REPEAT = 3
+# relative slowdown regarded as a regression
+DEFAULT_THRESHOLD = 0.2
+# smaller differences (in seconds) are regarded as noise
+MIN_DURATION_DIFFERENCE = 0.01
+# number of grid lines along the longer side of a model (relative to its size)
+SURFACING_LINES = 40
+SLICING_LINES = 10
+# the toolpath processed by the filter, export and simulation benchmarks
+TOOLPATH_LINES = 100
+# number of layers of slicing and waterline benchmarks
+SLICING_LAYERS = 3
+# resolution of the simulated stock (number of cells along the longer side)
+SIMULATION_CELLS = 256
+
+
+class Benchmark(object):
+    """ a named operation: "prepare" returns the function to be measured """
+
+    def __init__(self, name, prepare):
+        self.name = name
+        self.prepare = prepare
+
+    def __repr__(self):
+        return "Benchmark(%s)" % self.name
+
+
+BenchmarkComparison = collections.namedtuple(
+    "BenchmarkComparison", ("name", "baseline", "current", "ratio", "is_regression"))
+
+
+def get_wave_mesh(resolution, size=100.0, height=10.0):
+    """ create a closed mesh: a block with a wavy top
+
+    @value resolution: number of grid cells along every side (the mesh consists of about
+        4 * resolution ** 2 triangles)
+    """
+    steps = numpy.linspace(0, size, resolution + 1)
+    grid_x, grid_y = numpy.meshgrid(steps, steps, indexing="ij")
+    grid_x, grid_y = grid_x.reshape(-1), grid_y.reshape(-1)
+    waves = (numpy.sin(grid_x * (2 * math.pi / (0.4 * size)))
+             * numpy.cos(grid_y * (2 * math.pi / (0.6 * size))))
+    top = numpy.column_stack((grid_x, grid_y, height * (0.7 + 0.2 * waves)))
+    bottom = numpy.column_stack((grid_x, grid_y, numpy.zeros(len(grid_x))))
+    vertices = numpy.concatenate((top, bottom))
+    offset = len(top)
+    index = numpy.arange(offset).reshape(resolution + 1, resolution + 1)
+    corners = (index[:-1, :-1].reshape(-1), index[1:, :-1].reshape(-1),
+               index[1:, 1:].reshape(-1), index[:-1, 1:].reshape(-1))
+    # all faces are defined counter-clockwise (viewed from outside)
+    faces = [numpy.column_stack((corners[0], corners[1], corners[2])),
+             numpy.column_stack((corners[0], corners[2], corners[3])),
+             numpy.column_stack((corners[0], corners[2], corners[1])) + offset,
+             numpy.column_stack((corners[0], corners[3], corners[2])) + offset]
+    # the border (counter-clockwise viewed from above) is connected with the bottom
+    border = numpy.concatenate((index[:, 0], index[-1, 1:], index[-2::-1, -1],
+                                index[0, -2::-1]))
+    starts, ends = border[:-1], border[1:]
+    faces.append(numpy.column_stack((starts + offset, ends + offset, ends)))
+    faces.append(numpy.column_stack((starts + offset, ends, starts)))
+    # Triangle objects expect clockwise order
+    faces = numpy.concatenate(faces)[:, [0, 2, 1]]
+    return TriangleMesh(vertices, faces)
+
+
+def _write_binary_stl(mesh, filename):
+    p1, p2, p3 = mesh.get_triangle_arrays()
+    facets = numpy.zeros(len(p1), dtype=pycam.Importers.STLImporter.BINARY_FACET_DTYPE)
+    facets["normal"] = mesh.normals
+    # STL expects counter-clockwise order
+    facets["vertices"] = numpy.stack((p1, p3, p2), axis=1)
+    with open(filename, "wb") as out_file:
+        out_file.write(b"\0" * 80)
+        out_file.write(numpy.array([len(facets)], dtype="<u4").tobytes())
+        out_file.write(facets.tobytes())
+
+
+def get_sample_location(filename):
+    """ return the location of a file within the "samples" directory
+
+    The samples of the source tree are used (independent of the current directory). Otherwise
+    the usual data directories are searched.
+    """
+    location = os.path.join(PROJECT_BASE_DIR, "samples", filename)
+    if not os.path.isfile(location):
+        location = get_data_file_location(os.path.join("samples", filename), silent=True)
+    if location is None:
+        raise GenericError("Failed to locate the sample file '%s' (expected: %s)"
+                           % (filename, os.path.join(PROJECT_BASE_DIR, "samples")))
+    return location
+
+
+def _check_import(model, location):
+    # the importers return None instead of raising errors
+    if model is None:
+        raise GenericError("Failed to import the model: %s" % location)
+    return model
+
+
+def _get_box(model, margin=0):
+    return Box3D(Point3D(model.minx - margin, model.miny - margin, model.minz),
+                 Point3D(model.maxx + margin, model.maxy + margin, model.maxz))
+
+
+def _get_line_distance(model, count):
+    return max(model.maxx - model.minx, model.maxy - model.miny) / count
+
+
+class Workloads(object):
+    """ lazily loaded models and toolpaths (shared by multiple benchmarks)
+
+    Synthetic models are written to temporary files: call "cleanup" after the benchmarks.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self.temp_dir = None
+
+    def _get(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def get_model_file(self, name):
+        """ return the location of an STL file (sample models or synthetic meshes) """
+        for sample_name, filename in SAMPLE_MODELS:
+            if name == sample_name:
+                return get_sample_location(filename)
+
+        def write_mesh():
+            if self.temp_dir is None:
+                self.temp_dir = tempfile.mkdtemp(prefix="pycam-benchmark-")
+            filename = os.path.join(self.temp_dir, "%s.stl" % name)
+            _write_binary_stl(self.get_model(name).mesh, filename)
+            return filename
+
+        return self._get(("file", name), write_mesh)
+
+    def get_model(self, name):
+        if name.startswith("waves-"):
+            resolution = SYNTHETIC_SIZES[name.split("-", 1)[1]]
+            return self._get(("model", name),
+                             lambda: MeshModel(get_wave_mesh(resolution)))
+        location = self.get_model_file(name)
+        return self._get(("model", name), lambda: _check_import(
+            pycam.Importers.STLImporter.ImportModel(location), location))
+
+    def get_contour_model(self, name):
+        for sample_name, filename in SAMPLE_CONTOURS:
+            if name == sample_name:
+                location = get_sample_location(filename)
+                return self._get(("contour", name), lambda: _check_import(
+                    pycam.Importers.DXFImporter.import_model(location), location))
+        raise KeyError(name)
+
+    def get_toolpath(self, name):
+        """ return the steps of a surfacing toolpath of the model (with safety moves)
+
+        Every grid line is a separate segment (followed by a safety move). Thus filters
+        reordering the segments have some work to do.
+        """
+        def get_steps():
+            steps = [MachineSetting("feedrate", 1000)]
+            steps.extend(_get_surfacing_function(
+                self.get_model(name), TOOLPATH_LINES,
+                milling_style=MotionGrid.MillingStyle.CONVENTIONAL)())
+            return steps
+        return self._get(("toolpath", name), get_steps)
+
+    def get_machine_toolpath(self, name):
+        """ return the steps of a surfacing toolpath of the model (with rapid moves) """
+        safety_height = self.get_model(name).maxz + 5
+        return self._get(("machine_toolpath", name), lambda: list(
+            self.get_toolpath(name) | Filters.SafetyHeight(safety_height)))
+
+    def cleanup(self):
+        if self.temp_dir is not None:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+        self._cache.clear()
+
+
+def _get_surfacing_function(model, lines=SURFACING_LINES,
+                            milling_style=MotionGrid.MillingStyle.IGNORE):
+    cutter = SphericalCutter(_get_line_distance(model, lines))
+    line_distance = _get_line_distance(model, lines)
+    box = _get_box(model, margin=cutter.radius)
+
+    def generate():
+        grid = MotionGrid.get_fixed_grid(box, None, line_distance=line_distance,
+                                         step_width=line_distance / 2,
+                                         grid_direction=MotionGrid.GridDirection.X,
+                                         milling_style=milling_style)
+        generator = pycam.PathGenerators.DropCutter.DropCutter()
+        return generator.GenerateToolPath(cutter, [model], grid, box.lower.z, box.upper.z)
+
+    return generate
+
+
+def _get_slicing_function(model, waterlines, slabs=False):
+    cutter = CylindricalCutter(_get_line_distance(model, SLICING_LINES))
+    box = _get_box(model, margin=cutter.radius)
+    layer_distance = (box.upper.z - box.lower.z) / SLICING_LAYERS
+    line_distance = _get_line_distance(model, SLICING_LINES)
+    if waterlines:
+        # waterlines require a finer grid
+        line_distance /= 2
+
+    def generate():
+        grid = MotionGrid.get_fixed_grid(box, layer_distance, line_distance=line_distance,
+                                         grid_direction=MotionGrid.GridDirection.X,
+                                         milling_style=MotionGrid.MillingStyle.IGNORE)
+        if slabs:
+            generator = pycam.PathGenerators.SlabWaterline.SlabWaterline()
+        else:
+            generator = pycam.PathGenerators.PushCutter.PushCutter(waterlines=waterlines)
+        return generator.GenerateToolPath(cutter, [model], grid, box.lower.z, box.upper.z)
+
+    return generate
+
+
+def _get_engraving_function(model, pocketing_type):
+    cutter = CylindricalCutter(_get_line_distance(model, SURFACING_LINES))
+    box = Box3D(Point3D(model.minx, model.miny, -3), Point3D(model.maxx, model.maxy, 0))
+
+    def generate():
+        grid = MotionGrid.get_lines_grid(
+            [model], box, 1, line_distance=1.8 * cutter.radius, step_width=cutter.radius / 4,
+            milling_style=MotionGrid.MillingStyle.IGNORE, pocketing_type=pocketing_type,
+            skip_first_layer=True)
+        generator = pycam.PathGenerators.EngraveCutter.EngraveCutter()
+        # the contour only defines the motion grid - there are no collision models
+        return generator.GenerateToolPath(cutter, [], grid, box.lower.z, box.upper.z)
+
+    return generate
+
+
+def _prepare_stl_import(workloads, name):
+    location = workloads.get_model_file(name)
+    # fail early for missing or broken files
+    workloads.get_model(name)
+    return lambda: pycam.Importers.STLImporter.ImportModel(location)
+
+
+def _prepare_triangle_tree(workloads, name):
+    model = workloads.get_model(name)
+    if hasattr(model, "mesh"):
+        low, high = model.mesh.get_face_bounds()
+        return lambda: TriangleBVH(low[:, :2], high[:, :2], items=model.mesh)
+    else:
+        # text files are imported as a model of Triangle objects
+        triangles = list(model.triangles())
+        return lambda: TriangleBVH.from_triangles(triangles)
+
+
+def _prepare_dropcutter(workloads, name):
+    return _get_surfacing_function(workloads.get_model(name))
+
+
+def _prepare_pushcutter(workloads, name):
+    return _get_slicing_function(workloads.get_model(name), False)
+
+
+def _prepare_waterline(workloads, name):
+    return _get_slicing_function(workloads.get_model(name), True)
+
+
+def _prepare_slab_waterline(workloads, name):
+    return _get_slicing_function(workloads.get_model(name), True, slabs=True)
+
+
+def _prepare_filters(workloads, name):
+    steps = workloads.get_toolpath(name)
+    # Every other line is moved to the end. Thus the reordering shortens the moves between the
+    # segments.
+    segments = [[]]
+    for step in steps:
+        segments[-1].append(step)
+        if step.action == MOVE_SAFETY:
+            segments.append([])
+    steps = [step for segment in segments[::2] + segments[1::2] for step in segment]
+    filters = [Filters.SimplifyPath(0.001), Filters.OptimizeOrder(False),
+               Filters.SafetyHeight(workloads.get_model(name).maxz + 5),
+               Filters.ArcFit(0.001), Filters.StepWidth(0.001, 0.001, 0.001)]
+    return lambda: list(Filters.get_filtered_moves(steps, filters))
+
+
+def _prepare_gcode_export(workloads, name):
+    steps = workloads.get_machine_toolpath(name)
+
+    def export():
+        destination = io.StringIO() if sys.version_info[0] >= 3 else io.BytesIO()
+        generator = pycam.Exporters.GCode.LinuxCNC.LinuxCNC(destination)
+        generator.add_moves(steps)
+        generator.finish()
+        return destination.getvalue()
+
+    return export
+
+
+def _prepare_simulation(workloads, name):
+    steps = workloads.get_machine_toolpath(name)
+    model = workloads.get_model(name)
+    cutter = SphericalCutter(_get_line_distance(model, TOOLPATH_LINES))
+    box = _get_box(model, margin=cutter.radius)
+
+    def simulate():
+        simulation = MaterialRemovalSimulation(box, cells=SIMULATION_CELLS)
+        simulation.add_moves(cutter, steps)
+        return simulation
+
+    return simulate
+
+
+def _prepare_engrave(workloads, name):
+    return _get_engraving_function(workloads.get_contour_model(name),
+                                   MotionGrid.PocketingType.NONE)
+
+
+def _prepare_pocketing(workloads, name):
+    return _get_engraving_function(workloads.get_contour_model(name),
+                                   MotionGrid.PocketingType.HOLES)
+
+
+# benchmarks based on triangle models and on contour models
+MODEL_BENCHMARKS = (("stl_import", _prepare_stl_import),
+                    ("triangle_tree", _prepare_triangle_tree),
+                    ("dropcutter", _prepare_dropcutter),
+                    ("pushcutter", _prepare_pushcutter),
+                    ("waterline", _prepare_waterline),
+                    ("slab_waterline", _prepare_slab_waterline),
+                    ("filters", _prepare_filters),
+                    ("gcode_export", _prepare_gcode_export),
+                    ("simulation", _prepare_simulation))
+CONTOUR_BENCHMARKS = (("engrave", _prepare_engrave),
+                      ("pocketing", _prepare_pocketing))
+
+
+def get_benchmarks(workloads, sizes=DEFAULT_SIZES):
+    """ return the list of benchmarks for the sample models and for the synthetic meshes of the
+    given sizes (see SYNTHETIC_SIZES)
+    """
+    model_names = [name for name, filename in SAMPLE_MODELS]
+    model_names.extend("waves-%s" % size for size in sizes)
+    benchmarks = []
+    for key, prepare in MODEL_BENCHMARKS:
+        for name in model_names:
+            benchmarks.append(Benchmark("%s/%s" % (key, name),
+                                        functools.partial(prepare, workloads, name)))
+    for key, prepare in CONTOUR_BENCHMARKS:
+        for name, filename in SAMPLE_CONTOURS:
+            benchmarks.append(Benchmark("%s/%s" % (key, name),
+                                        functools.partial(prepare, workloads, name)))
+    return benchmarks
+
+
+def select_benchmarks(benchmarks, patterns):
+    """ return the benchmarks with names matching any of the regular expressions """
+    if not patterns:
+        return list(benchmarks)
+    regexes = [re.compile(pattern) for pattern in patterns]
+    return [benchmark for benchmark in benchmarks
+            if any(regex.search(benchmark.name) for regex in regexes)]
+
+
+def get_environment():
+    """ describe the environment of a benchmark run (for the interpretation of results) """
+    return {"pycam": VERSION,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "numpy": numpy.__version__ if numpy_enabled else None,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "processes": (pycam.Utils.threading.get_number_of_processes()
+                          if pycam.Utils.threading.is_multiprocessing_enabled() else 0)}
+
+
+def run_benchmarks(benchmarks, repeat=DEFAULT_REPEAT, callback=None):
+    """ measure the duration of every benchmark
+
+    @value callback: called with the name and the result of every benchmark
+    @returns: a dictionary (see "write_results")
+    """
+    results = collections.OrderedDict()
+    for benchmark in benchmarks:
+        func = benchmark.prepare()
+        durations = []
+        for index in range(repeat):
+            start_time = timeit.default_timer()
+            func()
+            durations.append(timeit.default_timer() - start_time)
+        durations.sort()
+        result = {"minimum": durations[0], "median": durations[len(durations) // 2],
+                  "runs": len(durations)}
+        results[benchmark.name] = result
+        if callback:
+            callback(benchmark.name, result)
+    return {"format": RESULT_FORMAT, "environment": get_environment(), "benchmarks": results}
+
+
+def write_results(results, stream):
+    json.dump(results, stream, indent=2, sort_keys=True)
+    stream.write("\n")
+
+
+def read_results(stream):
+    results = json.load(stream)
+    if results.get("format") != RESULT_FORMAT:
+        raise ValueError("Unsupported format of benchmark results: %s"
+                         % str(results.get("format")))
+    return results
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD,
+                    min_difference=MIN_DURATION_DIFFERENCE):
+    """ compare the fastest measurement of every benchmark with the baseline
+
+    A benchmark is regarded as a regression if it is slower than the baseline by more than the
+    relative threshold and by more than the absolute minimum difference (in seconds).
+    Benchmarks missing in one of the results are ignored.
+    @returns: a list of BenchmarkComparison tuples
+    """
+    comparisons = []
+    for name, result in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        before = baseline["benchmarks"][name]["minimum"]
+        after = result["minimum"]
+        ratio = after / before if before > 0 else float("inf")
+        is_regression = (after > before * (1 + threshold)) and (after - before > min_difference)
+        comparisons.append(BenchmarkComparison(name, before, after, ratio, is_regression))
+    return comparisons
@@ -18,9 +18,11 @@ You should have received a copy of the GNU General Public License
 along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import atexit
 # multiprocessing is imported later
 # import multiprocessing
 import os
+import pickle
 import platform
 try:
     import queue
@@ -28,9 +30,11 @@ except ImportError:
     # fallback for python2
     import Queue as queue
 import random
+import shutil
 import signal
 import socket
 import sys
+import tempfile
 import time
 import uuid
 
@@ -77,6 +81,23 @@ __task_source_uuid = None
 __finished_jobs = []
 __issued_warnings = []
 
+# local tasks are combined into chunks requiring roughly this processing time (in seconds)
+CHUNK_TARGET_DURATION = 0.1
+MAX_CHUNK_SIZE = 1000
+
+# the local worker pool is kept alive between jobs (see "run_in_parallel_local")
+__local_pool = None
+# shared task arguments (e.g. models) are transferred to the local workers via this directory
+__local_cache_dir = None
+# the number of running jobs using every file of the cache directory (unused files are kept for
+# later jobs until they are replaced)
+__local_cache_users = {}
+# the number of running jobs (nested or concurrent)
+__local_running_jobs = 0
+# the worker processes keep the shared task arguments in this cache
+__local_worker_cache = {}
+__local_worker_job_id = None
+
 
 def run_in_parallel(*args, **kwargs):
     global __manager
@@ -194,6 +215,8 @@ class ManagerInfo(object):
 def init_threading(number_of_processes=None, enable_server=False, remote=None, run_server=False,
                    server_credentials="", local_port=DEFAULT_PORT):
     global __multiprocessing, __num_of_processes, __manager, __closing, __task_source_uuid
+    # the number of local processes may change
+    _shutdown_local_pool()
     if __multiprocessing:
         # kill the manager and clean everything up for a re-initialization
         cleanup()
@@ -245,7 +268,7 @@ def init_threading(number_of_processes=None, enable_server=False, remote=None, r
                 __num_of_processes = multiprocessing.cpu_count()
             else:
                 __multiprocessing = False
-        elif (number_of_processes < 1) and (remote is None) and (enable_server is None):
+        elif (number_of_processes < 1) and (remote is None) and not enable_server:
             # Zero processes are allowed if we use a remote server or offer a
             # server.
             __multiprocessing = False
@@ -346,6 +369,7 @@ def init_threading(number_of_processes=None, enable_server=False, remote=None, r
 
 def cleanup():
     global __multiprocessing, __manager, __closing
+    _shutdown_local_pool()
     if __multiprocessing and __closing:
         log.debug("Shutting down process handler")
         try:
@@ -630,32 +654,210 @@ def _cleanup_job(job_id, tasks_queue, pending_tasks, finished_jobs):
         finished_jobs.pop(0)
 
 
+def _get_local_pool():
+    global __local_pool, __local_cache_dir
+    if __local_pool is None:
+        __local_pool = __multiprocessing.Pool(__num_of_processes)
+        __local_cache_dir = tempfile.mkdtemp(prefix="pycam-workers-")
+        log.debug("Started local worker pool with %d processes", __num_of_processes)
+    return __local_pool
+
+
+def _shutdown_local_pool():
+    global __local_pool, __local_cache_dir
+    __local_cache_users.clear()
+    if __local_pool is not None:
+        __local_pool.terminate()
+        __local_pool = None
+        log.debug("Stopped local worker pool")
+    if __local_cache_dir is not None:
+        shutil.rmtree(__local_cache_dir, ignore_errors=True)
+        __local_cache_dir = None
+
+
+atexit.register(_shutdown_local_pool)
+
+
+def _get_local_cache_filename(cache_dir, item_id):
+    return os.path.join(cache_dir, "%s.pickle" % item_id.value)
+
+
+def _prepare_local_task_args(args_list, cache_dir):
+    """ replace all cacheable items (objects with a "uuid") with references
+
+    Every referenced item is stored only once in the cache directory. The worker processes load
+    it from there when they need it for the first time. Items of finished jobs are removed from
+    the directory, unless they are used again. Files used by other running jobs (nested or
+    concurrent) are kept.
+    The result contains the arguments and the set of used files. The files need to be released
+    via "_release_local_cache_files" at the end of the job.
+    Every item of "args_list" needs to be an iterable of task arguments (e.g. a tuple).
+    """
+    used_files = set()
+
+    def get_reference(item):
+        item_id = ProcessDataCacheItemID(str(item.uuid))
+        filename = _get_local_cache_filename(cache_dir, item_id)
+        if filename not in used_files:
+            used_files.add(filename)
+            __local_cache_users[filename] = __local_cache_users.get(filename, 0) + 1
+            if not os.path.exists(filename):
+                log.debug("Storing shared item for local workers: %s - %s",
+                          item.uuid, item.__class__)
+                temp_filename = filename + ".tmp"
+                with open(temp_filename, "wb") as cache_file:
+                    pickle.dump(item, cache_file, pickle.HIGHEST_PROTOCOL)
+                os.rename(temp_filename, filename)
+        return item_id
+
+    result = []
+    for args in args_list:
+        result_args = []
+        for arg in args:
+            if hasattr(arg, "uuid"):
+                result_args.append(get_reference(arg))
+            elif isinstance(arg, (list, set, tuple)) and [True for item in arg
+                                                          if hasattr(item, "uuid")]:
+                result_args.append([get_reference(item) if hasattr(item, "uuid") else item
+                                    for item in arg])
+            else:
+                result_args.append(arg)
+        result.append(result_args)
+    for filename, users in list(__local_cache_users.items()):
+        if users == 0:
+            # not used by any running job
+            del __local_cache_users[filename]
+            if os.path.exists(filename):
+                os.remove(filename)
+    return result, used_files
+
+
+def _release_local_cache_files(used_files):
+    for filename in used_files:
+        if filename in __local_cache_users:
+            __local_cache_users[filename] -= 1
+
+
+def _handle_local_task(task):
+    """ run a task within a local worker process
+
+    References to shared items are resolved via the cache of the worker process. Items that are
+    not used by the current job are dropped from the cache as soon as the next job starts.
+    """
+    global __local_worker_job_id
+    job_id, cache_dir, func, args = task
+
+    def get_value(item_id):
+        try:
+            return __local_worker_cache[item_id.value]
+        except KeyError:
+            with open(_get_local_cache_filename(cache_dir, item_id), "rb") as cache_file:
+                value = pickle.load(cache_file)
+            __local_worker_cache[item_id.value] = value
+            return value
+
+    if job_id != __local_worker_job_id:
+        __local_worker_job_id = job_id
+        used_ids = set()
+        for arg in args:
+            for item in (arg if isinstance(arg, list) else [arg]):
+                if isinstance(item, ProcessDataCacheItemID):
+                    used_ids.add(item.value)
+        for key in list(__local_worker_cache):
+            if key not in used_ids:
+                del __local_worker_cache[key]
+    real_args = []
+    for arg in args:
+        if isinstance(arg, ProcessDataCacheItemID):
+            real_args.append(get_value(arg))
+        elif isinstance(arg, list):
+            real_args.append([get_value(item) if isinstance(item, ProcessDataCacheItemID)
+                              else item for item in arg])
+        else:
+            real_args.append(arg)
+    return func(real_args)
+
+
+def _handle_local_chunk(chunk):
+    """ run a list of tasks within a local worker process and measure the processing time """
+    start_time = time.time()
+    results = [_handle_local_task(task) for task in chunk]
+    return results, time.time() - start_time
+
+
 def run_in_parallel_local(func, args, unordered=False, disable_multiprocessing=False,
                           callback=None):
-    global __multiprocessing, __num_of_processes
+    global __multiprocessing, __num_of_processes, __local_running_jobs
     if __multiprocessing is None:
         # threading was not configured before
         init_threading()
     if __multiprocessing and not disable_multiprocessing:
-        # use the number of CPUs as the default number of worker threads
-        pool = __multiprocessing.Pool(__num_of_processes)
-        if unordered:
-            imap_func = pool.imap_unordered
-        else:
-            imap_func = pool.imap
-        # We need to use try/finally here to ensure the garbage collection
-        # of "pool". Otherwise a memory overflow is caused for Python 2.7.
+        # The pool of worker processes is kept alive between jobs. Large shared arguments (e.g.
+        # the model and the cutter) are transferred only once - the tasks just carry references.
+        pool = _get_local_pool()
+        job_id = str(uuid.uuid1())
+        task_args_list, used_files = _prepare_local_task_args(args, __local_cache_dir)
+        tasks = [(job_id, __local_cache_dir, func, task_args) for task_args in task_args_list]
+        __local_running_jobs += 1
+        # Tasks are submitted in chunks. The size of the chunks is adjusted to the measured
+        # processing time of single tasks. Thus the overhead of inter-process communication stays
+        # small even for tiny tasks.
+        max_pending_chunks = 2 * __num_of_processes
+        chunk_size = 1
+        task_duration = None
+        next_task_index = 0
+        pending_chunks = {}
+        finished_chunks = {}
+        next_chunk_index = 0
+        next_result_chunk_index = 0
+        finished = False
         try:
-            # Beware: we may not return "pool.imap" or "pool.imap_unordered"
-            # directly. It would somehow loose the focus and just hang infinitely.
-            # Thus we wrap our own generator around it.
-            for result in imap_func(func, args):
-                if callback and callback():
-                    # cancel requested
-                    break
-                yield result
+            while pending_chunks or finished_chunks or (next_task_index < len(tasks)):
+                while (len(pending_chunks) < max_pending_chunks) \
+                        and (next_task_index < len(tasks)):
+                    # keep all workers busy until the end of the job
+                    remaining = len(tasks) - next_task_index
+                    this_chunk_size = max(1, min(chunk_size, remaining // __num_of_processes))
+                    chunk = tasks[next_task_index:next_task_index + this_chunk_size]
+                    pending_chunks[next_chunk_index] = pool.apply_async(_handle_local_chunk,
+                                                                        (chunk, ))
+                    next_task_index += this_chunk_size
+                    next_chunk_index += 1
+                if pending_chunks:
+                    # wait for the oldest chunk (or for any chunk in unordered mode)
+                    pending_chunks[min(pending_chunks)].wait(0.01 if unordered else None)
+                for chunk_index in sorted(pending_chunks):
+                    if pending_chunks[chunk_index].ready():
+                        results, duration = pending_chunks.pop(chunk_index).get()
+                        finished_chunks[chunk_index] = results
+                        current = duration / len(results)
+                        if task_duration is None:
+                            task_duration = current
+                        else:
+                            task_duration = 0.7 * task_duration + 0.3 * current
+                        chunk_size = int(CHUNK_TARGET_DURATION / max(task_duration, 1e-6))
+                        chunk_size = max(1, min(MAX_CHUNK_SIZE, chunk_size))
+                if unordered:
+                    ready_chunk_indexes = sorted(finished_chunks)
+                else:
+                    ready_chunk_indexes = []
+                    while next_result_chunk_index in finished_chunks:
+                        ready_chunk_indexes.append(next_result_chunk_index)
+                        next_result_chunk_index += 1
+                for chunk_index in ready_chunk_indexes:
+                    for result in finished_chunks.pop(chunk_index):
+                        if callback and callback():
+                            # cancel requested
+                            return
+                        yield result
+            finished = True
         finally:
-            pool.terminate()
+            __local_running_jobs -= 1
+            _release_local_cache_files(used_files)
+            if not finished and (__local_running_jobs == 0):
+                # Remaining tasks of a cancelled (or failed) job would keep the workers busy.
+                # The pool is kept as long as other jobs are running.
+                _shutdown_local_pool()
     else:
         for arg in args:
             if callback and callback():
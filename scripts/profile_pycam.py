@@ -1,56 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright 2026 The PyCAM developers
+
+This file is part of PyCAM.
+
+PyCAM is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+PyCAM is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCAM.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# for "print" to stderr
+from __future__ import print_function
+
+import argparse
 import cProfile
-from os.path import join
+import os
 import pstats
 import sys
-from time import time
-
-from pycam.Cutters.CylindricalCutter import CylindricalCutter
-from pycam.Geometry import Box3D, Point3D
-from pycam.Gui.Console import ConsoleProgressBar
-from pycam.Importers.STLImporter import ImportModel
-from pycam.PathGenerators.DropCutter import DropCutter
-from pycam.PathProcessors.PathAccumulator import PathAccumulator
-from pycam.Toolpath import Bounds
-from pycam.Toolpath.MotionGrid import get_fixed_grid
-from pycam.Utils.locations import get_data_file_location
-
-# Disable multi processing
-from pycam.Utils import threading
-threading.__multiprocessing = False
-
-""" Profile PyCAM doing several operations, print out the top 10
-(sorted by actual local runtime) methods.
+
+try:
+    import pycam.Utils.benchmark as benchmark
+except ImportError:
+    # running locally (without a proper PYTHONPATH) requires manual intervention
+    sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                                     os.pardir)))
+    import pycam.Utils.benchmark as benchmark
+
+import pycam.Utils.threading
+
+
+EXIT_CODES = {"ok": 0, "regression": 1, "usage": 2, "error": 3}
+USAGE_EXAMPLES = """examples:
+  %(prog)s --output baseline.json
+  %(prog)s --baseline baseline.json --filter dropcutter
+  %(prog)s --profile dropcutter/textbox
 """
 
-model = ImportModel(get_data_file_location(join('samples', 'pycam-textbox.stl')))
 
+def get_arguments():
+    parser = argparse.ArgumentParser(
+        description="Measure the duration of PyCAM operations and compare the results with a "
+                    "previous run.", epilog=USAGE_EXAMPLES,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--list", action="store_true", help="list the available benchmarks")
+    parser.add_argument("--filter", action="append", default=[], metavar="REGEX",
+                        help="run only benchmarks matching this regular expression (repeatable)")
+    parser.add_argument("--size", action="append", default=[],
+                        choices=list(benchmark.SYNTHETIC_SIZES),
+                        help="size of the synthetic meshes (repeatable, default: %s)"
+                        % ", ".join(benchmark.DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=benchmark.DEFAULT_REPEAT,
+                        help="number of measurements of every benchmark (default: %(default)s)")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="number of parallel processes (default: %(default)s - everything "
+                        "is calculated within the current process)")
+    parser.add_argument("--output", metavar="FILE", help="store the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare the results with a previous run (JSON)")
+    parser.add_argument("--threshold", type=float, default=benchmark.DEFAULT_THRESHOLD,
+                        help="relative slowdown regarded as a regression (default: %(default)s)")
+    parser.add_argument("--profile", metavar="NAME",
+                        help="show the most time-consuming functions of one benchmark")
+    return parser.parse_args()
+
+
+def show_profile(selected):
+    if len(selected) != 1:
+        print("Exactly one benchmark needs to be selected for profiling (found %d)"
+              % len(selected), file=sys.stderr)
+        return EXIT_CODES["usage"]
+    func = selected[0].prepare()
+    profiler = cProfile.Profile()
+    profiler.runcall(func)
+    stats = pstats.Stats(profiler, stream=sys.stdout)
+    stats.sort_stats("cumulative").print_stats(25)
+    stats.sort_stats("time").print_stats(15)
+    return EXIT_CODES["ok"]
+
+
+def show_result(name, result):
+    print("%-32s %10.4fs (median: %.4fs)" % (name, result["minimum"], result["median"]))
+    sys.stdout.flush()
 
-def run_dropcutter():
-    """ Run DropCutter on standard PyCAM sample plaque """
-    progress_bar = ConsoleProgressBar(sys.stdout)
 
-    overlap = .6
-    layer_distance = 1
-    tool = CylindricalCutter(10)
-    path_generator = DropCutter(PathAccumulator())
-    bounds = Bounds(Bounds.TYPE_CUSTOM, Box3D(Point3D(model.minx-5, model.miny-5, model.minz),
-                                              Point3D(model.maxx+5, model.maxy+5, model.maxz)))
+def show_comparison(comparisons):
+    regressions = 0
+    print()
+    print("%-32s %11s %11s %8s" % ("Benchmark", "Baseline", "Current", "Ratio"))
+    for comparison in comparisons:
+        if comparison.is_regression:
+            regressions += 1
+            marker = "  REGRESSION"
+        else:
+            marker = ""
+        print("%-32s %10.4fs %10.4fs %7.2fx%s"
+              % (comparison.name, comparison.baseline, comparison.current, comparison.ratio,
+                 marker))
+    if regressions:
+        print("%d of %d benchmarks are slower than the baseline"
+              % (regressions, len(comparisons)), file=sys.stderr)
+    return regressions
 
-    low, high = bounds.get_absolute_limits()
-    line_distance = 2 * tool.radius * (1.0 - overlap)
 
-    motion_grid = get_fixed_grid((low, high), layer_distance,
-                                 line_distance, tool.radius / 4.0)
-    path_generator.GenerateToolPath(tool, [model], motion_grid, minz=low[2], maxz=high[2],
-                                    draw_callback=progress_bar.update)
+def main():
+    arguments = get_arguments()
+    workloads = benchmark.Workloads()
+    try:
+        benchmarks = benchmark.get_benchmarks(workloads, sizes=arguments.size
+                                              or benchmark.DEFAULT_SIZES)
+        if arguments.profile:
+            selected = [item for item in benchmarks if item.name == arguments.profile]
+        else:
+            selected = benchmark.select_benchmarks(benchmarks, arguments.filter)
+        if arguments.list:
+            for item in selected:
+                print(item.name)
+            return EXIT_CODES["ok"]
+        if arguments.profile:
+            # the profiler sees only the current process
+            pycam.Utils.threading.init_threading(number_of_processes=0)
+            return show_profile(selected)
+        pycam.Utils.threading.init_threading(number_of_processes=arguments.processes)
+        baseline = None
+        if arguments.baseline:
+            # fail early (before running the benchmarks)
+            with open(arguments.baseline) as baseline_file:
+                baseline = benchmark.read_results(baseline_file)
+        results = benchmark.run_benchmarks(selected, repeat=arguments.repeat,
+                                           callback=show_result)
+        if arguments.output:
+            with open(arguments.output, "w") as output_file:
+                benchmark.write_results(results, output_file)
+        if baseline is not None:
+            if show_comparison(benchmark.compare_results(baseline, results,
+                                                         threshold=arguments.threshold)):
+                return EXIT_CODES["regression"]
+        return EXIT_CODES["ok"]
+    except pycam.GenericError as exc:
+        # e.g. missing sample files
+        print("Error: %s" % exc, file=sys.stderr)
+        return EXIT_CODES["error"]
+    finally:
+        workloads.cleanup()
 
 
-if __name__ == '__main__':
-    print(model.minx, model.miny, model.maxx, model.maxy)
-    start_time = time()
-    cProfile.run('run_dropcutter()', 'dropcutter.pyprof')
-    run_time = time() - start_time
-    print('\nDropcutter took %f seconds' % run_time)
-    p = pstats.Stats('dropcutter.pyprof')
-    print('Top ten time-consuming functions:')
-    p.sort_stats('time').print_stats(10)
+if __name__ == "__main__":
+    sys.exit(main())